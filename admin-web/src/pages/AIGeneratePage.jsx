@@ -36,6 +36,7 @@ import {
   listGenerateTemplates,
   listMaterials,
   resumeGenerateTask,
+  watchGenerateTaskList,
 } from '../services/api';
 import { getGlobalTenantId, subscribeGlobalTenant } from '../services/tenantScope';
 import MarkdownWithMermaid from '../components/MarkdownWithMermaid';
@@ -86,6 +87,9 @@ export default function AIGeneratePage() {
   const [taskStatusFilter, setTaskStatusFilter] = useState('');
   const [taskMaterialFilter, setTaskMaterialFilter] = useState('');
   const taskListRequestInFlightRef = useRef(false);
+  const taskListStreamingRef = useRef(false);
+  const taskItemsRef = useRef(taskItems);
+  taskItemsRef.current = taskItems;
   const taskDetailRequestInFlightRef = useRef(false);
   const [taskQueryKeyword, setTaskQueryKeyword] = useState('');
   const [taskQueryStatus, setTaskQueryStatus] = useState('');
@@ -677,7 +681,11 @@ export default function AIGeneratePage() {
 
   useEffect(() => {
     if (!tenantId) return undefined;
+    let tick = 0;
     const timer = setInterval(() => {
+      // Running rows arrive over the push channel; while it is open the list poll only runs every 30s.
+      tick += 1;
+      if (taskListStreamingRef.current && tick % 3 !== 0) return;
       // In create mode with no active task (new-task flow), only refresh list; do not set activeTaskId to avoid showing previous task's result
       const skipSetActive = pageMode === 'create' && !activeTaskId;
       loadTaskList(tenantId, true, skipSetActive).catch(() => {});
@@ -685,6 +693,40 @@ export default function AIGeneratePage() {
     return () => clearInterval(timer);
   }, [tenantId, pageMode, activeTaskId]);
 
+  const hasRunningTaskItem = useMemo(() => (taskItems || []).some((t) => isTaskRunning(t?.status)), [taskItems]);
+
+  useEffect(() => {
+    if (!tenantId || !hasRunningTaskItem) return undefined;
+    const upsertRows = (rows) => {
+      const known = new Set((taskItemsRef.current || []).map((t) => String(t?.task_id || '')));
+      if (rows.some((row) => !known.has(String(row?.task_id || '')))) {
+        // A task not on the page yet: the list endpoint decides its position.
+        loadTaskList(tenantId, true, pageMode === 'create' && !activeTaskIdRef.current).catch(() => {});
+        return;
+      }
+      const byId = new Map(rows.map((row) => [String(row?.task_id || ''), row]));
+      setTaskItems((prev) => (prev || []).map((t) => byId.get(String(t?.task_id || '')) || t));
+    };
+    const watcher = watchGenerateTaskList(tenantId, {
+      onEvent: (event, data) => {
+        if (event === 'snapshot') {
+          taskListStreamingRef.current = true;
+          upsertRows(Array.isArray(data?.items) ? data.items : []);
+        } else if (event === 'task' && data?.task) {
+          upsertRows([data.task]);
+        } else if (event === 'end') {
+          loadTaskList(tenantId, true, pageMode === 'create' && !activeTaskIdRef.current).catch(() => {});
+        }
+      },
+    });
+    watcher.done.catch(() => {}).finally(() => { taskListStreamingRef.current = false; });
+    return () => {
+      taskListStreamingRef.current = false;
+      watcher.close();
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [tenantId, hasRunningTaskItem]);
+
   const loadPathTree = async (tid, mid) => {
     if (!tid) return;
     try {
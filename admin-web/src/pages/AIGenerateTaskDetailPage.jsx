@@ -15,7 +15,7 @@ import {
   message,
 } from 'antd';
 import { useNavigate, useParams } from 'react-router-dom';
-import { cancelGenerateTask, getGenerateTask, getSlices, getSliceImageUrl, updateGenerateTaskBankPolicy } from '../services/api';
+import { cancelGenerateTask, getGenerateTask, getSlices, getSliceImageUrl, updateGenerateTaskBankPolicy, watchGenerateTask } from '../services/api';
 import { getGlobalTenantId, subscribeGlobalTenant } from '../services/tenantScope';
 import MarkdownWithMermaid from '../components/MarkdownWithMermaid';
 import QuestionDetailView from '../components/QuestionDetailView';
@@ -791,12 +791,45 @@ export default function AIGenerateTaskDetailPage() {
   const verifiedSavedCount = itemCount;
   const generatedCountMismatch = false;
 
+  /** Apply one pushed progress delta: top-level patch + full rows of the changed trace indexes. */
+  const applyTaskProgress = (prevTask, delta) => {
+    const next = { ...(prevTask || {}), ...(delta?.patch || {}) };
+    const rows = Array.isArray(delta?.trace) ? delta.trace : [];
+    if (rows.length) {
+      const byIndex = new Map();
+      (Array.isArray(next.process_trace) ? next.process_trace : []).forEach((row) => byIndex.set(Number(row?.index || 0), row));
+      rows.forEach((row) => byIndex.set(Number(row?.index || 0), row));
+      next.process_trace = Array.from(byIndex.keys()).sort((a, b) => a - b).map((k) => byIndex.get(k));
+    }
+    return next;
+  };
+
   useEffect(() => {
     if (!tenantId || !taskId || !isTaskActive) return undefined;
+    // Live fields arrive over the push channel; the slower poll still refreshes run-hydrated fields.
+    let streaming = false;
+    const watcher = watchGenerateTask(tenantId, taskId, {
+      onEvent: (event, data) => {
+        if (event === 'snapshot') {
+          streaming = true;
+          setTask((prev) => mergeTaskForRender(prev, data?.task || {}));
+        } else if (event === 'progress') {
+          setTask((prev) => mergeTaskForRender(prev, applyTaskProgress(prev, data)));
+        } else if (event === 'end') {
+          loadDetail({ silent: true });
+        }
+      },
+    });
+    watcher.done.catch(() => {}).finally(() => { streaming = false; });
+    let tick = 0;
     const timer = setInterval(() => {
-      loadDetail({ silent: true });
+      tick += 1;
+      if (!streaming || tick % 5 === 0) loadDetail({ silent: true });
     }, 3000);
-    return () => clearInterval(timer);
+    return () => {
+      clearInterval(timer);
+      watcher.close();
+    };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [tenantId, taskId, isTaskActive]);
 
@@ -281,6 +281,51 @@ export const listGenerateTasks = (tenantId, params) =>
 export const getGenerateTask = (tenantId, taskId) =>
   client.get(`/${tenantId}/generate/tasks/${encodeURIComponent(taskId)}`).then((r) => r.data);
 
+/** Read a GET SSE endpoint; returns { close, done }, `done` resolves when the server ends the stream. */
+const watchSse = (url, handlers = {}) => {
+  const controller = new AbortController();
+  const token = getAuthToken();
+  const systemUser = getSystemUser();
+  const emit = (raw) => {
+    const evt = parseSseChunk(raw);
+    if (evt && typeof handlers.onEvent === 'function') handlers.onEvent(evt.event, evt.data);
+  };
+  const done = (async () => {
+    const res = await fetch(url, {
+      headers: {
+        'X-System-User': systemUser || 'admin',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      signal: controller.signal,
+    });
+    if (!res.ok || !res.body) throw new Error(`订阅任务进度失败 (${res.status})`);
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder('utf-8');
+    let buffer = '';
+    while (true) {
+      const { value, done: finished } = await reader.read();
+      if (finished) break;
+      buffer += decoder.decode(value, { stream: true });
+      let idx = buffer.indexOf('\n\n');
+      while (idx >= 0) {
+        emit(buffer.slice(0, idx));
+        buffer = buffer.slice(idx + 2);
+        idx = buffer.indexOf('\n\n');
+      }
+    }
+    if (buffer.trim()) emit(buffer);
+  })();
+  return { close: () => controller.abort(), done };
+};
+
+/** Subscribe to live progress of a task (SSE: snapshot → progress* → end). */
+export const watchGenerateTask = (tenantId, taskId, handlers = {}) =>
+  watchSse(`/api/${encodeURIComponent(tenantId)}/generate/tasks/${encodeURIComponent(taskId)}/events`, handlers);
+
+/** Subscribe to list rows of running tasks (SSE: snapshot → task* → end once nothing runs in the server process). */
+export const watchGenerateTaskList = (tenantId, handlers = {}) =>
+  watchSse(`/api/${encodeURIComponent(tenantId)}/generate/tasks/events`, handlers);
+
 /** Request cancel of a running or pending task. */
 export const cancelGenerateTask = (tenantId, taskId) =>
   client.post(`/${tenantId}/generate/tasks/${encodeURIComponent(taskId)}/cancel`).then((r) => r.data);
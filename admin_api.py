@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextvars
 import json
 import math
 import os
@@ -14,22 +15,27 @@ from io import BytesIO
 from datetime import datetime, timedelta, timezone
 from hashlib import sha256
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 import threading
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed, wait
 from copy import deepcopy
 from urllib.parse import quote, urlsplit, urlunsplit
 
 import pandas as pd
-from flask import Flask, Response, g, jsonify, redirect, request, send_file, stream_with_context
+from flask import Flask, Response, after_this_request, g, jsonify, redirect, request, send_file, stream_with_context
 from werkzeug.exceptions import HTTPException
 
 from authn import AccessDenied, Principal, resolve_legacy_principal, resolve_principal
 from audit_log import write_audit_log
+from bank_store import get_bank_store, load_bank_items
 from governance import circuit_breaker, rate_limiter, select_release_channel
+from graph_exec_backend import get_graph_backend
+from llm_rate_limiter import get_llm_limiter, llm_limiter_snapshot
 from mapping_review_store import load_mapping_review
+from near_dup_index import NearDuplicateIndex
 from observability import init_observability, start_span
-from runtime_paths import ensure_parent, repo_tenant_data_dir, resolve_primary_key_file, runtime_key_file
+from qa_analytics_store import QAAnalyticsStore, get_qa_analytics_store
+from runtime_paths import cache_root, ensure_parent, repo_tenant_data_dir, resolve_primary_key_file, runtime_key_file
 from slice_registry import (
     archive_material_version,
     delete_material_version,
@@ -38,7 +44,9 @@ from slice_registry import (
     set_effective_material_version,
     upsert_material_runtime,
 )
+from slice_context_cache import slice_context_cache_stats
 from slice_review_store import load_slice_review
+from task_progress_broker import TaskProgressBroker
 from tenants_config import (
     TenantDataMissingError,
     delete_tenant,
@@ -58,13 +66,16 @@ from tenant_context import get_accessible_tenants, assert_tenant_access, enforce
 from exam_factory import KnowledgeRetriever, build_knowledge_retriever
 from exam_graph import (
     app as graph_app,
+    attach_glossary_tenant,
     attach_question_wall_clock_budget,
     call_llm,
+    detach_glossary_tenant,
     detach_question_wall_clock_budget,
     detect_router_high_risk_slice,
     mark_unstable,
     parse_json_from_response,
     summarize_llm_trace,
+    warm_slice_context,
 )
 from reference_loader import load_reference_questions
 from sso_auth import SSOError, SSOManager, _safe_return_to
@@ -3675,51 +3686,53 @@ def _normalize_text_key(raw_value: Any) -> str:
     return re.sub(r"\s+", "", text)
 
 
-def _build_bank_origin_lookup(tenant_id: str) -> dict[str, dict[str, Any]]:
-    def _fmt_offline_quality_conclusion(oj: dict[str, Any]) -> str:
-        basis = str(oj.get("quality_scoring_basis", "") or "").strip()
-        reasons = [str(x).strip() for x in (oj.get("quality_reasons") or []) if str(x).strip()]
-        dim = oj.get("quality_dimension_feedback") if isinstance(oj.get("quality_dimension_feedback"), dict) else {}
-        dim_lines = [f"{str(k).strip()}:{str(v).strip()}" for k, v in dim.items() if str(k).strip() and str(v).strip()]
-        parts: list[str] = []
-        if basis:
-            parts.append(f"核心依据：{basis}")
-        if reasons:
-            parts.append(f"质量原因：{'；'.join(reasons)}")
-        if dim_lines:
-            parts.append(f"分维反馈：{'；'.join(dim_lines)}")
-        return "\n".join(parts).strip()
-
-    def _fmt_offline_baseline_conclusion(oj: dict[str, Any]) -> str:
-        dim = oj.get("dimension_results") if isinstance(oj.get("dimension_results"), dict) else {}
-        dim_lines: list[str] = []
-        for name, raw in dim.items():
-            dr = raw if isinstance(raw, dict) else {}
-            status = str(dr.get("status", "") or "").strip().upper() or "-"
-            score_raw = dr.get("score_10")
-            score_txt = "-"
-            if score_raw is not None:
-                try:
-                    score_txt = f"{float(score_raw):.1f}"
-                except Exception:
-                    score_txt = str(score_raw)
-            issues = [str(x).strip() for x in (dr.get("issues") or []) if str(x).strip()]
-            reasons = [str(x).strip() for x in (dr.get("reasons") or []) if str(x).strip()]
-            detail = "；".join((issues + reasons)[:2]).strip()
-            dim_lines.append(f"{name}(status={status},score={score_txt}){f'：{detail}' if detail else ''}")
-        all_reasons = [str(x).strip() for x in (oj.get("reasons") or []) if str(x).strip()]
-        baseline_reasons = [x for x in all_reasons if not x.startswith("【质量评分】") and not x.startswith("【质量评分依据】")]
-        hard_gate = oj.get("hard_gate") if isinstance(oj.get("hard_gate"), dict) else {}
-        hard_fail = [str(k).strip() for k, v in hard_gate.items() if v is False and str(k).strip()]
-        parts: list[str] = []
-        if dim_lines:
-            parts.append(f"维度依据：{'；'.join(dim_lines[:8])}")
-        if baseline_reasons:
-            parts.append(f"基线原因：{'；'.join(baseline_reasons)}")
-        if hard_fail:
-            parts.append(f"硬闸门未通过：{'、'.join(hard_fail)}")
-        return "\n".join(parts).strip()
+def _fmt_offline_quality_conclusion(oj: dict[str, Any]) -> str:
+    basis = str(oj.get("quality_scoring_basis", "") or "").strip()
+    reasons = [str(x).strip() for x in (oj.get("quality_reasons") or []) if str(x).strip()]
+    dim = oj.get("quality_dimension_feedback") if isinstance(oj.get("quality_dimension_feedback"), dict) else {}
+    dim_lines = [f"{str(k).strip()}:{str(v).strip()}" for k, v in dim.items() if str(k).strip() and str(v).strip()]
+    parts: list[str] = []
+    if basis:
+        parts.append(f"核心依据：{basis}")
+    if reasons:
+        parts.append(f"质量原因：{'；'.join(reasons)}")
+    if dim_lines:
+        parts.append(f"分维反馈：{'；'.join(dim_lines)}")
+    return "\n".join(parts).strip()
+
+
+def _fmt_offline_baseline_conclusion(oj: dict[str, Any]) -> str:
+    dim = oj.get("dimension_results") if isinstance(oj.get("dimension_results"), dict) else {}
+    dim_lines: list[str] = []
+    for name, raw in dim.items():
+        dr = raw if isinstance(raw, dict) else {}
+        status = str(dr.get("status", "") or "").strip().upper() or "-"
+        score_raw = dr.get("score_10")
+        score_txt = "-"
+        if score_raw is not None:
+            try:
+                score_txt = f"{float(score_raw):.1f}"
+            except Exception:
+                score_txt = str(score_raw)
+        issues = [str(x).strip() for x in (dr.get("issues") or []) if str(x).strip()]
+        reasons = [str(x).strip() for x in (dr.get("reasons") or []) if str(x).strip()]
+        detail = "；".join((issues + reasons)[:2]).strip()
+        dim_lines.append(f"{name}(status={status},score={score_txt}){f'：{detail}' if detail else ''}")
+    all_reasons = [str(x).strip() for x in (oj.get("reasons") or []) if str(x).strip()]
+    baseline_reasons = [x for x in all_reasons if not x.startswith("【质量评分】") and not x.startswith("【质量评分依据】")]
+    hard_gate = oj.get("hard_gate") if isinstance(oj.get("hard_gate"), dict) else {}
+    hard_fail = [str(k).strip() for k, v in hard_gate.items() if v is False and str(k).strip()]
+    parts: list[str] = []
+    if dim_lines:
+        parts.append(f"维度依据：{'；'.join(dim_lines[:8])}")
+    if baseline_reasons:
+        parts.append(f"基线原因：{'；'.join(baseline_reasons)}")
+    if hard_fail:
+        parts.append(f"硬闸门未通过：{'、'.join(hard_fail)}")
+    return "\n".join(parts).strip()
 
+
+def _bank_origin_task_names(tenant_id: str) -> dict[str, str]:
     task_name_lookup: dict[str, str] = {}
     for row in _latest_gen_task_rows(tenant_id, allow_full_fallback=True).values():
         if not isinstance(row, dict):
@@ -3728,51 +3741,212 @@ def _build_bank_origin_lookup(tenant_id: str) -> dict[str, dict[str, Any]]:
         tname = str(row.get("task_name", "")).strip()
         if tid and tname:
             task_name_lookup[tid] = tname
-    runs = _read_jsonl(_qa_runs_path(tenant_id))
-    lookup: dict[str, dict[str, Any]] = {}
-    lookup_no_material: dict[str, dict[str, Any]] = {}
-    for run in runs:
-        if not isinstance(run, dict):
+    return task_name_lookup
+
+
+def _bank_origin_run_entries(
+    run: dict[str, Any],
+    task_names: Callable[[], dict[str, str]],
+) -> list[tuple[str, str, dict[str, Any]]]:
+    """(key_with_material, key_without_material, meta) for each question of a QA run."""
+    if not isinstance(run, dict):
+        return []
+    run_id = str(run.get("run_id", "")).strip()
+    config = run.get("config") if isinstance(run.get("config"), dict) else {}
+    task_id = str(config.get("task_id", "")).strip()
+    task_name = str(config.get("task_name", "")).strip() or (task_names().get(task_id, "") if task_id else "")
+    material_version_id = str(run.get("material_version_id", "")).strip()
+    questions = run.get("questions") if isinstance(run.get("questions"), list) else []
+    entries: list[tuple[str, str, dict[str, Any]]] = []
+    for q in questions:
+        if not isinstance(q, dict):
             continue
-        run_id = str(run.get("run_id", "")).strip()
-        config = run.get("config") if isinstance(run.get("config"), dict) else {}
-        task_id = str(config.get("task_id", "")).strip()
-        task_name = str(config.get("task_name", "")).strip() or task_name_lookup.get(task_id, "")
-        material_version_id = str(run.get("material_version_id", "")).strip()
-        questions = run.get("questions") if isinstance(run.get("questions"), list) else []
-        for q in questions:
-            if not isinstance(q, dict):
-                continue
-            judge_input = q.get("judge_input") if isinstance(q.get("judge_input"), dict) else {}
-            stem_key = _normalize_text_key(q.get("question_text") or judge_input.get("stem"))
-            path_key = _normalize_text_key(q.get("slice_path"))
-            answer_key = _normalize_answer_key(q.get("answer") or judge_input.get("correct_answer"))
-            if not stem_key:
-                continue
-            offline_judge = q.get("offline_judge") if isinstance(q.get("offline_judge"), dict) else {}
-            score = offline_judge.get("overall_score")
-            if score is None:
-                score = offline_judge.get("quality_score")
-            baseline_score = offline_judge.get("baseline_score", offline_judge.get("penalty_score"))
-            quality_score = offline_judge.get("quality_score")
-            decision = str(offline_judge.get("decision", "") or "").strip().lower()
-            meta = {
-                "source_run_id": run_id,
-                "source_task_id": task_id,
-                "source_task_name": task_name,
-                "offline_judge_score": score,
-                "offline_judge_decision": decision,
-                "offline_judge_quality_score": quality_score,
-                "offline_judge_baseline_score": baseline_score,
-                "offline_judge_quality_conclusion": _fmt_offline_quality_conclusion(offline_judge),
-                "offline_judge_baseline_conclusion": _fmt_offline_baseline_conclusion(offline_judge),
-            }
-            key_with_material = f"{material_version_id}|{path_key}|{answer_key}|{stem_key}"
-            key_without_material = f"{path_key}|{answer_key}|{stem_key}"
+        judge_input = q.get("judge_input") if isinstance(q.get("judge_input"), dict) else {}
+        stem_key = _normalize_text_key(q.get("question_text") or judge_input.get("stem"))
+        path_key = _normalize_text_key(q.get("slice_path"))
+        answer_key = _normalize_answer_key(q.get("answer") or judge_input.get("correct_answer"))
+        if not stem_key:
+            continue
+        offline_judge = q.get("offline_judge") if isinstance(q.get("offline_judge"), dict) else {}
+        score = offline_judge.get("overall_score")
+        if score is None:
+            score = offline_judge.get("quality_score")
+        baseline_score = offline_judge.get("baseline_score", offline_judge.get("penalty_score"))
+        quality_score = offline_judge.get("quality_score")
+        decision = str(offline_judge.get("decision", "") or "").strip().lower()
+        meta = {
+            "source_run_id": run_id,
+            "source_task_id": task_id,
+            "source_task_name": task_name,
+            "offline_judge_score": score,
+            "offline_judge_decision": decision,
+            "offline_judge_quality_score": quality_score,
+            "offline_judge_baseline_score": baseline_score,
+            "offline_judge_quality_conclusion": _fmt_offline_quality_conclusion(offline_judge),
+            "offline_judge_baseline_conclusion": _fmt_offline_baseline_conclusion(offline_judge),
+        }
+        entries.append(
+            (
+                f"{material_version_id}|{path_key}|{answer_key}|{stem_key}",
+                f"{path_key}|{answer_key}|{stem_key}",
+                meta,
+            )
+        )
+    return entries
+
+
+def _apply_bank_origin_entries(index: dict[str, Any], entries: Iterable[Any], position: int) -> None:
+    # Later runs in qa_runs.jsonl win; positions let an in-place run update keep that order.
+    lookup = index["lookup"]
+    no_material = lookup["__without_material__"]
+    positions = index["positions"]
+    for key_with_material, key_without_material, meta in entries:
+        if positions.get(f"m|{key_with_material}", -1) <= position:
             lookup[key_with_material] = meta
-            lookup_no_material[key_without_material] = meta
-    lookup["__without_material__"] = lookup_no_material  # internal key for fallback
-    return lookup
+            positions[f"m|{key_with_material}"] = position
+        if positions.get(f"n|{key_without_material}", -1) <= position:
+            no_material[key_without_material] = meta
+            positions[f"n|{key_without_material}"] = position
+
+
+def _apply_run_to_bank_origin_index(
+    index: dict[str, Any],
+    run: dict[str, Any],
+    position: int,
+    task_names: Callable[[], dict[str, str]],
+) -> list[tuple[str, str, dict[str, Any]]]:
+    entries = _bank_origin_run_entries(run, task_names)
+    _apply_bank_origin_entries(index, entries, position)
+    return entries
+
+
+def _bank_origin_index_path(tenant_id: str) -> Path:
+    return _qa_dir(tenant_id) / "bank_origin_index.json"
+
+
+def _bank_origin_index_log_path(tenant_id: str) -> Path:
+    # Per-run deltas appended since the snapshot was written; folded back into it every
+    # BANK_ORIGIN_INDEX_COMPACT_EVERY records.
+    return _qa_dir(tenant_id) / "bank_origin_index.log.jsonl"
+
+
+def _write_bank_origin_snapshot(tenant_id: str, index: dict[str, Any]) -> None:
+    index["log_records"] = 0
+    _write_json(_bank_origin_index_path(tenant_id), index)
+    _bank_origin_index_log_path(tenant_id).unlink(missing_ok=True)
+
+
+def _lazy_bank_origin_task_names(tenant_id: str) -> Callable[[], dict[str, str]]:
+    cache: dict[str, dict[str, str]] = {}
+
+    def _get() -> dict[str, str]:
+        if "names" not in cache:
+            cache["names"] = _bank_origin_task_names(tenant_id)
+        return cache["names"]
+
+    return _get
+
+
+def rebuild_bank_origin_index(tenant_id: str) -> dict[str, Any]:
+    """Full scan of qa_runs.jsonl into the materialised origin index; also used for backfill."""
+    runs_path = _qa_runs_path(tenant_id)
+    runs_token = _path_version_token(runs_path)
+    index: dict[str, Any] = {
+        "version": BANK_ORIGIN_INDEX_VERSION,
+        "runs_token": runs_token,
+        "run_count": 0,
+        "lookup": {"__without_material__": {}},  # internal key for fallback
+        "positions": {},
+    }
+    task_names = _lazy_bank_origin_task_names(tenant_id)
+    for position, run in enumerate(_read_jsonl(runs_path)):
+        _apply_run_to_bank_origin_index(index, run, position, task_names)
+        index["run_count"] = position + 1
+    _write_bank_origin_snapshot(tenant_id, index)
+    with BANK_ORIGIN_INDEX_LOCK:
+        BANK_ORIGIN_INDEXES[tenant_id] = index
+    return index
+
+
+def _get_bank_origin_index(tenant_id: str) -> dict[str, Any]:
+    runs_token = _path_version_token(_qa_runs_path(tenant_id))
+    with BANK_ORIGIN_INDEX_LOCK:
+        entry = BANK_ORIGIN_INDEXES.get(tenant_id)
+        if entry is not None and entry.get("runs_token") == runs_token:
+            return entry
+    snapshot = _read_json(_bank_origin_index_path(tenant_id), {})
+    if (
+        isinstance(snapshot, dict)
+        and snapshot.get("version") == BANK_ORIGIN_INDEX_VERSION
+        and isinstance(snapshot.get("lookup"), dict)
+        and isinstance(snapshot.get("positions"), dict)
+    ):
+        # Replay the deltas that chain on from the snapshot's runs_token (stale ones are skipped).
+        snapshot["log_records"] = 0
+        for record in _read_jsonl(_bank_origin_index_log_path(tenant_id)):
+            if record.get("before_token") != snapshot.get("runs_token"):
+                continue
+            _apply_bank_origin_entries(snapshot, record.get("entries") or [], int(record.get("position", 0) or 0))
+            snapshot["runs_token"] = record.get("runs_token")
+            snapshot["run_count"] = int(record.get("run_count", 0) or 0)
+            snapshot["log_records"] += 1
+        if snapshot.get("runs_token") == runs_token:
+            with BANK_ORIGIN_INDEX_LOCK:
+                BANK_ORIGIN_INDEXES[tenant_id] = snapshot
+            return snapshot
+    return rebuild_bank_origin_index(tenant_id)
+
+
+def _index_persisted_qa_run(
+    tenant_id: str,
+    run: dict[str, Any],
+    before_token: str,
+    *,
+    replaced_position: int | None = None,
+    replaced_run: dict[str, Any] | None = None,
+) -> None:
+    """
+    Fold a just-written run into the origin index (call under QA_PERSIST_LOCK) and append the delta
+    to the index log; the snapshot is rewritten only every BANK_ORIGIN_INDEX_COMPACT_EVERY deltas.
+    Falls back to a lazy rebuild when the index missed other writes or the update drops questions.
+    """
+    with BANK_ORIGIN_INDEX_LOCK:
+        entry = BANK_ORIGIN_INDEXES.get(tenant_id)
+        if entry is None or entry.get("runs_token") != before_token:
+            BANK_ORIGIN_INDEXES.pop(tenant_id, None)
+            return
+        task_names = _lazy_bank_origin_task_names(tenant_id)
+        if replaced_position is None:
+            position = int(entry.get("run_count", 0) or 0)
+            entry["run_count"] = position + 1
+        else:
+            old_keys = {k for k, _, _ in _bank_origin_run_entries(replaced_run or {}, task_names)}
+            new_keys = {k for k, _, _ in _bank_origin_run_entries(run, task_names)}
+            if not old_keys <= new_keys:
+                BANK_ORIGIN_INDEXES.pop(tenant_id, None)
+                return
+            position = replaced_position
+        entries = _apply_run_to_bank_origin_index(entry, run, position, task_names)
+        entry["runs_token"] = _path_version_token(_qa_runs_path(tenant_id))
+        if int(entry.get("log_records", 0) or 0) + 1 >= BANK_ORIGIN_INDEX_COMPACT_EVERY:
+            _write_bank_origin_snapshot(tenant_id, entry)
+            return
+        _append_jsonl(
+            _bank_origin_index_log_path(tenant_id),
+            {
+                "before_token": before_token,
+                "runs_token": entry["runs_token"],
+                "run_count": entry["run_count"],
+                "position": position,
+                "entries": entries,
+            },
+        )
+        entry["log_records"] = int(entry.get("log_records", 0) or 0) + 1
+
+
+def _build_bank_origin_lookup(tenant_id: str) -> dict[str, dict[str, Any]]:
+    """Key -> origin meta (plus the `__without_material__` fallback map); served from the materialised index."""
+    return _get_bank_origin_index(tenant_id)["lookup"]
 
 
 def _fill_bank_item_origin_fields(item: dict[str, Any], origin_lookup: dict[str, dict[str, Any]]) -> None:
@@ -3933,32 +4107,20 @@ def _save_slice_order_for_material(tenant_id: str, material_version_id: str, buc
 
 
 def _load_bank(path: Path) -> list[dict[str, Any]]:
-    if not path.exists():
-        return []
-    rows = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        if not line.strip():
-            continue
-        try:
-            rows.append(json.loads(line))
-        except json.JSONDecodeError:
-            continue
-    return rows
+    # 题库文件是追加日志（put / delete / skip 记录），这里折叠成当前的题目列表
+    return load_bank_items(path)
 
 
 def _save_bank(path: Path, items: list[dict[str, Any]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text("\n".join(json.dumps(i, ensure_ascii=False) for i in items), encoding="utf-8")
+    # 整库改写：内容没变的题保留原 question_id
+    with BANK_WRITE_LOCK:
+        get_bank_store(path).rewrite(items)
 
 
 def _append_bank_item(path: Path, item: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    line = json.dumps(item, ensure_ascii=False)
     with BANK_WRITE_LOCK:
-        with path.open("a", encoding="utf-8") as f:
-            if path.exists() and path.stat().st_size > 0:
-                f.write("\n")
-            f.write(line)
+        get_bank_store(path).append(item)
+    _index_appended_bank_item(path, item)
 
 
 def _build_needs_fix_bank_item(
@@ -4826,6 +4988,10 @@ def _qa_gen_task_snapshot_path(tenant_id: str, task_id: str) -> Path:
     return _qa_gen_task_snapshot_dir(tenant_id) / f"{safe_task_id}.json"
 
 
+def _qa_gen_task_events_path(tenant_id: str, task_id: str) -> Path:
+    return _qa_gen_task_snapshot_path(tenant_id, task_id).with_suffix(".events.jsonl")
+
+
 def _qa_judge_tasks_path(tenant_id: str) -> Path:
     return _qa_dir(tenant_id) / "judge_tasks.jsonl"
 
@@ -4844,6 +5010,22 @@ RETRIEVER_CACHE: dict[tuple[str, str, str, str, str], KnowledgeRetriever] = {}
 RETRIEVER_CACHE_LOCK = threading.Lock()
 RETRIEVER_CACHE_INFLIGHT: dict[tuple[str, str, str, str, str], threading.Event] = {}
 RETRIEVER_CACHE_ERRORS: dict[tuple[str, str, str, str, str], Exception] = {}
+# tenant_id -> {"index", "bank_path", "bank_token", "history_tokens"}; see _get_tenant_near_dup_index.
+NEAR_DUP_INDEXES: dict[str, dict[str, Any]] = {}
+NEAR_DUP_INDEX_LOCK = threading.Lock()
+# task_id -> fingerprint of the last persisted live state; see _persist_live_task_snapshot.
+GEN_TASK_EVENT_STATE: dict[str, dict[str, Any]] = {}
+GEN_TASK_EVENT_LOCK = threading.Lock()
+# Push channel for task detail viewers; events are published under GEN_TASK_LOCK by _update_task_live.
+TASK_PROGRESS_BROKER = TaskProgressBroker(max_pending=max(8, int(os.getenv("TASK_PROGRESS_MAX_PENDING", "256") or 256)))
+# Same channel for task list viewers, keyed by tenant_id; events carry list-row summaries.
+TASK_LIST_BROKER = TaskProgressBroker(max_pending=max(8, int(os.getenv("TASK_PROGRESS_MAX_PENDING", "256") or 256)))
+_TASK_PROGRESS_HEARTBEAT_SECONDS = max(1.0, float(os.getenv("TASK_PROGRESS_HEARTBEAT_SECONDS", "15") or 15))
+# tenant_id -> materialised bank origin index; see _get_bank_origin_index.
+BANK_ORIGIN_INDEX_VERSION = 1
+BANK_ORIGIN_INDEX_COMPACT_EVERY = max(1, int(os.getenv("BANK_ORIGIN_INDEX_COMPACT_EVERY", "64") or 64))
+BANK_ORIGIN_INDEXES: dict[str, dict[str, Any]] = {}
+BANK_ORIGIN_INDEX_LOCK = threading.Lock()
 GEN_TASK_NAME_INFLIGHT: set[tuple[str, str]] = set()
 
 
@@ -4878,6 +5060,7 @@ _ORPHAN_GEN_UNOWNED_RUNNING_SECONDS = max(
 _ORPHAN_JUDGE_GRACE_SECONDS = max(120, int(os.getenv("ORPHAN_JUDGE_GRACE_SECONDS", "1800") or 1800))
 _TASK_MAINTENANCE_INTERVAL_SECONDS = max(30, int(os.getenv("TASK_MAINTENANCE_INTERVAL_SECONDS", "120") or 120))
 _RETRIEVER_CACHE_WAIT_SECONDS = max(5, int(os.getenv("RETRIEVER_CACHE_WAIT_SECONDS", "180") or 180))
+_NEAR_DUP_THRESHOLD = min(1.0, max(0.5, float(os.getenv("NEAR_DUP_THRESHOLD", "0.85") or 0.85)))
 _PARALLEL_CHILD_WAIT_SECONDS = max(10, int(os.getenv("PARALLEL_CHILD_WAIT_SECONDS", "1800") or 1800))
 _PARALLEL_CHILD_TIMEOUT_MIN_SECONDS = max(10, int(os.getenv("PARALLEL_CHILD_TIMEOUT_MIN_SECONDS", "180") or 180))
 _PARALLEL_CHILD_TIMEOUT_MAX_SECONDS = max(
@@ -5045,6 +5228,10 @@ _GEN_TASK_SUMMARY_TAIL_SYNC_BYTES = max(
 _GEN_TASK_SUMMARY_READ_MAX_BYTES = max(
     0, int(os.getenv("GEN_TASK_SUMMARY_READ_MAX_BYTES", str(4 * 1024 * 1024)) or 0)
 )
+# Slices warmed into the slice-context cache before a generate run starts (0 disables).
+_SLICE_CONTEXT_WARM_MAX = max(0, int(os.getenv("SLICE_CONTEXT_WARM_MAX", "64") or 64))
+# Live task deltas appended before the snapshot file is rewritten and the event log truncated.
+_GEN_TASK_EVENT_COMPACT_EVERY = max(1, int(os.getenv("GEN_TASK_EVENT_COMPACT_EVERY", "50") or 50))
 _RECENT_JSONL_FULL_READ_MAX_BYTES = max(
     0, int(os.getenv("RECENT_JSONL_FULL_READ_MAX_BYTES", str(4 * 1024 * 1024)) or 0)
 )
@@ -6885,6 +7072,50 @@ def _update_task_live(tenant_id: str, task_id: str, patch: dict[str, Any], trace
         task["error_count"] = len(task.get("errors") or [])
         task["updated_at"] = now
         _sync_parent_subtask_stats_from_child(tenant_id, str(task_id or ""), task, now_iso=now)
+        _publish_task_progress(task, patch or {}, trace_updates)
+
+
+def _format_sse(event_name: str, payload: dict[str, Any]) -> str:
+    return f"event: {event_name}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+
+def _publish_task_progress(task: dict[str, Any], patch: dict[str, Any], trace_updates: list[dict[str, Any]] | None) -> None:
+    """
+    Fan out one live update to the task's viewers (and its parent's, for subtask stats).
+    调用方须已持有 GEN_TASK_LOCK：事件在锁内序列化，订阅方拿到快照后不会漏掉或错序任何增量。
+    """
+    tid = str(task.get("task_id", "") or "")
+    if TASK_PROGRESS_BROKER.has_subscribers(tid):
+        changed = {int(x.get("index", 0) or 0) for x in (trace_updates or []) if isinstance(x, dict)}
+        delta = dict(patch)
+        if "errors" in delta:
+            delta["errors"] = _sanitize_task_errors(delta.get("errors"))
+        delta["error_count"] = task.get("error_count", 0)
+        delta["updated_at"] = task.get("updated_at", "")
+        trace = [x for x in (task.get("process_trace") or []) if int(x.get("index", 0) or 0) in changed] if changed else []
+        TASK_PROGRESS_BROKER.publish(tid, _format_sse("progress", {"task_id": tid, "patch": delta, "trace": trace}))
+        if str(task.get("status", "") or "").strip().lower() in {"completed", "failed", "cancelled"}:
+            TASK_PROGRESS_BROKER.publish(tid, _format_sse("end", {"task_id": tid, "status": task.get("status")}))
+    parent_id = str(task.get("parent_task_id", "") or "").strip()
+    parent = GEN_TASKS.get(parent_id) if parent_id else None
+    if isinstance(parent, dict) and TASK_PROGRESS_BROKER.has_subscribers(parent_id):
+        TASK_PROGRESS_BROKER.publish(
+            parent_id,
+            _format_sse(
+                "progress",
+                {
+                    "task_id": parent_id,
+                    "patch": {"subtasks": parent.get("subtasks") or [], "updated_at": parent.get("updated_at", "")},
+                    "trace": [],
+                },
+            ),
+        )
+    tenant_id = str(task.get("tenant_id", "") or "")
+    if TASK_LIST_BROKER.has_subscribers(tenant_id):
+        # 列表只展示顶层任务：子任务的变化以父任务汇总行的形式推送
+        row = parent if isinstance(parent, dict) else task
+        if not _is_internal_child_gen_task(row):
+            TASK_LIST_BROKER.publish(tenant_id, _format_sse("task", {"task": _build_gen_task_summary(row)}))
 
 
 def _mark_live_final_json_stale(question_trace: dict[str, Any], append_step: Callable[..., None] | None = None) -> None:
@@ -6913,7 +7144,7 @@ def _persist_gen_task(tenant_id: str, task: dict[str, Any]) -> None:
     _append_jsonl(_qa_gen_tasks_summary_path(tenant_id), _build_gen_task_summary(task))
 
 
-def _persist_gen_task_snapshot_file(tenant_id: str, task: dict[str, Any]) -> None:
+def _write_gen_task_snapshot_file(tenant_id: str, task: dict[str, Any]) -> None:
     tid = str((task or {}).get("task_id", "") or "").strip()
     if not tid:
         return
@@ -6924,6 +7155,40 @@ def _persist_gen_task_snapshot_file(tenant_id: str, task: dict[str, Any]) -> Non
     tmp_path.replace(path)
 
 
+def _persist_gen_task_snapshot_file(tenant_id: str, task: dict[str, Any]) -> None:
+    tid = str((task or {}).get("task_id", "") or "").strip()
+    if not tid:
+        return
+    with GEN_TASK_EVENT_LOCK:
+        _write_gen_task_snapshot_file(tenant_id, task)
+        # The snapshot now supersedes any pending deltas; the next live persist starts a new base.
+        _qa_gen_task_events_path(tenant_id, tid).unlink(missing_ok=True)
+        GEN_TASK_EVENT_STATE.pop(tid, None)
+
+
+def _replay_gen_task_events(tenant_id: str, task: dict[str, Any]) -> dict[str, Any]:
+    """Apply the delta events recorded on top of a compacted snapshot."""
+    tid = str(task.get("task_id", "") or "").strip()
+    path = _qa_gen_task_events_path(tenant_id, tid)
+    if not tid or not path.exists():
+        return task
+    base = str(task.get("updated_at", "") or "")
+    for event in _read_jsonl(path):
+        if str(event.get("base", "")) != base:
+            continue
+        patch = event.get("patch") if isinstance(event.get("patch"), dict) else {}
+        for key in event.get("unset") or []:
+            task.pop(str(key), None)
+        task.update(patch)
+        trace_rows = [x for x in (event.get("trace") or []) if isinstance(x, dict)]
+        if trace_rows:
+            by_index = {int(x.get("index", 0) or 0): x for x in (task.get("process_trace") or []) if isinstance(x, dict)}
+            for row in trace_rows:
+                by_index[int(row.get("index", 0) or 0)] = row
+            task["process_trace"] = [by_index[k] for k in sorted(by_index)]
+    return task
+
+
 def _read_gen_task_snapshot_file(tenant_id: str, task_id: str) -> dict[str, Any] | None:
     tid = str(task_id or "").strip()
     if not tid:
@@ -6935,11 +7200,40 @@ def _read_gen_task_snapshot_file(tenant_id: str, task_id: str) -> dict[str, Any]
         payload = json.loads(path.read_text(encoding="utf-8"))
     except Exception:
         return None
-    return payload if isinstance(payload, dict) else None
+    return _replay_gen_task_events(tenant_id, payload) if isinstance(payload, dict) else None
+
+
+def _gen_task_fingerprint(task: dict[str, Any]) -> tuple[dict[str, int], dict[int, int] | None]:
+    """
+    Hash of each top-level field and of each process_trace row (by question index).
+    Trace hashes are None when the trace is not an index-ordered list, so it is diffed as one field.
+    """
+    fields = {
+        k: hash(json.dumps(v, ensure_ascii=False, sort_keys=True, default=str))
+        for k, v in task.items()
+        if k != "process_trace"
+    }
+    trace_rows = task.get("process_trace") if isinstance(task.get("process_trace"), list) else []
+    trace: dict[int, int] | None = {}
+    last_index = 0
+    for row in trace_rows:
+        idx = int(row.get("index", 0) or 0) if isinstance(row, dict) else 0
+        if idx <= last_index:
+            trace = None
+            break
+        trace[idx] = hash(json.dumps(row, ensure_ascii=False, sort_keys=True, default=str))
+        last_index = idx
+    if trace is None:
+        fields["process_trace"] = hash(json.dumps(trace_rows, ensure_ascii=False, sort_keys=True, default=str))
+    return fields, trace
 
 
 def _persist_live_task_snapshot(tenant_id: str, task_id: str) -> None:
-    """Best-effort persist current in-memory task snapshot for crash/restart recovery."""
+    """
+    Best-effort persist current in-memory task snapshot for crash/restart recovery.
+    Writes a small delta event (changed fields + changed per-question trace rows) per call and
+    compacts into the snapshot file every _GEN_TASK_EVENT_COMPACT_EVERY events or on terminal status.
+    """
     with GEN_TASK_LOCK:
         task = GEN_TASKS.get(str(task_id or ""))
         if not isinstance(task, dict):
@@ -6947,8 +7241,51 @@ def _persist_live_task_snapshot(tenant_id: str, task_id: str) -> None:
         if str(task.get("tenant_id", "")) != tenant_id:
             return
         snap = _task_snapshot(task)
-    _persist_gen_task(tenant_id, snap)
-    _persist_gen_task_snapshot_file(tenant_id, snap)
+    tid = str(snap.get("task_id", "") or task_id or "").strip()
+    if not tid:
+        return
+    fields, trace = _gen_task_fingerprint(snap)
+    terminal = str(snap.get("status", "") or "").strip().lower() in {"completed", "failed", "cancelled"}
+    summary = _build_gen_task_summary(snap)
+    summary_hash = hash(json.dumps(summary, ensure_ascii=False, sort_keys=True, default=str))
+    with GEN_TASK_EVENT_LOCK:
+        state = GEN_TASK_EVENT_STATE.get(tid)
+        if state is None or terminal or state.get("tenant_id") != tenant_id or int(state.get("events", 0)) >= _GEN_TASK_EVENT_COMPACT_EVERY:
+            _write_gen_task_snapshot_file(tenant_id, snap)
+            _qa_gen_task_events_path(tenant_id, tid).unlink(missing_ok=True)
+            state = {"tenant_id": tenant_id, "base": str(snap.get("updated_at", "") or ""), "events": 0}
+        else:
+            prev_fields = state["fields"]
+            prev_trace = state["trace"]
+            event: dict[str, Any] = {
+                "base": state["base"],
+                "patch": {k: snap.get(k) for k, h in fields.items() if prev_fields.get(k) != h and k != "process_trace"},
+                "unset": [k for k in prev_fields if k not in fields],
+            }
+            if trace is None or prev_trace is None or any(i not in trace for i in prev_trace):
+                if trace is not None or fields.get("process_trace") != prev_fields.get("process_trace"):
+                    event["patch"]["process_trace"] = snap.get("process_trace") or []
+            else:
+                event["trace"] = [
+                    row for row in (snap.get("process_trace") or []) if prev_trace.get(int(row.get("index", 0) or 0)) != trace[int(row.get("index", 0) or 0)]
+                ]
+            # An ordered trace has no "process_trace" field hash, but it must not be unset once patched back in.
+            event["unset"] = [k for k in event["unset"] if k not in event["patch"]]
+            if event["patch"] or event["unset"] or event.get("trace"):
+                _append_jsonl(_qa_gen_task_events_path(tenant_id, tid), event)
+                state["events"] = int(state.get("events", 0)) + 1
+        state["fields"] = fields
+        state["trace"] = trace
+        if terminal:
+            GEN_TASK_EVENT_STATE.pop(tid, None)
+        else:
+            GEN_TASK_EVENT_STATE[tid] = state
+        summary_changed = state.get("summary") != summary_hash
+        state["summary"] = summary_hash
+    if terminal:
+        _persist_gen_task(tenant_id, snap)
+    elif summary_changed:
+        _append_jsonl(_qa_gen_tasks_summary_path(tenant_id), summary)
 
 
 def _get_latest_gen_task_snapshot(tenant_id: str, task_id: str) -> dict[str, Any] | None:
@@ -8039,6 +8376,7 @@ def _get_cached_retriever(
             history_path=str(history_path),
             mapping_path=str(mapping_path),
             mapping_review_path=str(mapping_review_path),
+            snapshot_key=cache_key,
         )
     except Exception as e:
         with RETRIEVER_CACHE_LOCK:
@@ -8062,6 +8400,132 @@ def _get_cached_retriever(
         return RETRIEVER_CACHE[cache_key]
 
 
+def _bank_item_dup_key(item: dict[str, Any]) -> str:
+    stem = str(item.get("题干", "") or "").strip()
+    return f"bank:{sha256(stem.encode('utf-8')).hexdigest()[:24]}"
+
+
+def _get_tenant_near_dup_index(tenant_id: str, retriever: KnowledgeRetriever | None = None) -> NearDuplicateIndex:
+    """
+    Process-wide near-duplicate index per tenant: saved bank items plus mother questions.
+    Rebuilt when the bank file changes outside `_append_bank_item` (update/delete rewrites).
+    The rebuild runs outside NEAR_DUP_INDEX_LOCK and is swapped in under it, so other tenants
+    and `_index_appended_bank_item` are not blocked behind a large bank load.
+    """
+    bank_path = tenant_bank_path(tenant_id)
+    bank_token = _path_version_token(bank_path)
+    with NEAR_DUP_INDEX_LOCK:
+        entry = NEAR_DUP_INDEXES.get(tenant_id)
+    if entry is None or entry.get("bank_token") != bank_token:
+        index = NearDuplicateIndex()
+        index.add_batch(
+            (_bank_item_dup_key(item), str(item.get("题干", "") or ""))
+            for item in _load_bank(bank_path)
+            if isinstance(item, dict)
+        )
+        fresh = {"index": index, "bank_path": str(bank_path), "bank_token": bank_token, "history_tokens": set()}
+        with NEAR_DUP_INDEX_LOCK:
+            current = NEAR_DUP_INDEXES.get(tenant_id)
+            # 构建期间其他线程已换入（或追加后已跟上）最新索引时沿用它；否则换入本次构建结果
+            if current is not None and current is not entry and current.get("bank_token") == _path_version_token(bank_path):
+                entry = current
+            else:
+                NEAR_DUP_INDEXES[tenant_id] = fresh
+                entry = fresh
+    history_df = getattr(retriever, "history_df", None)
+    if history_df is not None and not history_df.empty:
+        history_token = _path_version_token(getattr(retriever, "history_path", ""))
+        with NEAR_DUP_INDEX_LOCK:
+            indexed = history_token in entry["history_tokens"]
+        if not indexed:
+            prefix = sha256(history_token.encode("utf-8")).hexdigest()[:12]
+            # 母题 key 确定，并发重复 add_batch 会被索引跳过
+            entry["index"].add_batch(
+                (f"mother:{prefix}:{i}", str(stem or ""))
+                for i, stem in enumerate(history_df["题干"].tolist())
+            )
+            with NEAR_DUP_INDEX_LOCK:
+                entry["history_tokens"].add(history_token)
+    return entry["index"]
+
+
+def _evict_tenant_dup_scope(tenant_id: str, scope: str) -> None:
+    """任务/单次出题结束后清掉其 scoped 题干，避免常驻进程的租户索引无限增长。"""
+    with NEAR_DUP_INDEX_LOCK:
+        entry = NEAR_DUP_INDEXES.get(tenant_id)
+    if entry is not None and scope:
+        entry["index"].remove_scope(scope)
+
+
+def _evict_dup_scope_on_close(stream, tenant_id: str, scope: str):
+    try:
+        yield from stream
+    finally:
+        _evict_tenant_dup_scope(tenant_id, scope)
+
+
+def _warm_generation_slice_context(tenant_id: str, retriever: KnowledgeRetriever, slice_ids: list[int]) -> None:
+    """Best-effort precompute of per-slice graph context before the first attempt (in-process backend only)."""
+    if get_graph_backend() is not None or _SLICE_CONTEXT_WARM_MAX <= 0:
+        return
+    kb_data = getattr(retriever, "kb_data", None) or []
+    ids = [sid for sid in dict.fromkeys(int(x) for x in slice_ids) if 0 <= sid < len(kb_data)][:_SLICE_CONTEXT_WARM_MAX]
+    if not ids:
+        return
+    try:
+        warm_slice_context([kb_data[sid] for sid in ids], retriever, tenant_id=tenant_id)
+    except Exception as e:
+        print(f"⚠️ 切片上下文预热失败，出题时按需计算: {e}")
+
+
+def _stream_exam_graph(
+    inputs: dict[str, Any],
+    config: dict[str, Any],
+    *,
+    tenant_id: str,
+    started_at: datetime,
+    max_elapsed_ms: int,
+):
+    """
+    Stream one exam_graph run through the configured execution backend (GRAPH_EXEC_BACKEND).
+    process 后端在独立 worker 进程内重建 retriever / 近重复索引，事件原样回传，调用方的进度处理不变。
+    """
+    backend = get_graph_backend()
+    if backend is None:
+        return graph_app.stream(inputs, config=config)
+    configurable = dict(config.get("configurable") or {})
+    retriever = configurable.pop("retriever", None)
+    dup_index = configurable.pop("dup_index", None)
+    payload = {
+        "tenant_id": tenant_id,
+        "inputs": inputs,
+        "configurable": configurable,
+        "retriever": {
+            "tenant_id": str(getattr(retriever, "tenant_id", "") or tenant_id),
+            "kb_path": str(getattr(retriever, "kb_path", "") or ""),
+            "history_path": str(getattr(retriever, "history_path", "") or ""),
+            "mapping_path": str(getattr(retriever, "mapping_path", "") or ""),
+            "mapping_review_path": str(getattr(retriever, "mapping_review_path", "") or ""),
+        } if retriever is not None else None,
+        "with_dup_index": dup_index is not None,
+        "bank_path": str(tenant_bank_path(tenant_id)),
+        # Stems already accepted earlier in this task live only in this process' index.
+        "dup_entries": dup_index.scoped_entries(str(configurable.get("dup_scope") or "")) if dup_index is not None else [],
+        "started_at": started_at,
+        "max_elapsed_ms": int(max_elapsed_ms or 0),
+    }
+    return backend.stream(payload)
+
+
+def _index_appended_bank_item(path: Path, item: dict[str, Any]) -> None:
+    with NEAR_DUP_INDEX_LOCK:
+        for entry in NEAR_DUP_INDEXES.values():
+            if entry.get("bank_path") != str(path):
+                continue
+            entry["index"].add(_bank_item_dup_key(item), str(item.get("题干", "") or ""))
+            entry["bank_token"] = _path_version_token(path)
+
+
 def _judge_request_body_from_task(task: dict[str, Any]) -> dict[str, Any]:
     req = task.get("request") if isinstance(task.get("request"), dict) else {}
     qids = req.get("question_ids")
@@ -9317,6 +9781,21 @@ def _trace_to_question_input(
     }
 
 
+class _ThrottledJudgeLLM:
+    """Routes Judge `.invoke` calls through the process-wide LLM limiter shared with generation."""
+
+    def __init__(self, llm: Any, provider: str, model: str) -> None:
+        self._llm = llm
+        self._limiter = get_llm_limiter(provider, model)
+
+    def invoke(self, *args: Any, **kwargs: Any) -> Any:
+        with self._limiter.slot(timeout=300):
+            return self._llm.invoke(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+
+
 def _get_offline_judge_llm() -> tuple[Any | None, str | None]:
     """
     Build LLM for offline Judge from env or key file. Uses AIT provider and gpt-5.2 by default.
@@ -9336,6 +9815,8 @@ def _get_offline_judge_llm() -> tuple[Any | None, str | None]:
             v = str(cfg.get(k, "")).strip()
             if _is_usable_secret(v):
                 os.environ[k] = v  # always override so online key updates take effect
+    # 重评同一题时复用未变化的各层结果（见 离线Judge/src/pipeline/layer_cache.py）
+    os.environ.setdefault("JUDGE_LAYER_CACHE_DIR", str(cache_root() / "judge_layers"))
     try:
         judge_model = os.getenv("AIT_JUDGE_MODEL") or os.getenv("JUDGE_MODEL", "gpt-5.2")
         llm = build_llm(
@@ -9343,7 +9824,7 @@ def _get_offline_judge_llm() -> tuple[Any | None, str | None]:
             model=judge_model,
             temperature=0,
         )
-        return llm, None
+        return _ThrottledJudgeLLM(llm, "ait", judge_model), None
     except Exception as e:
         return None, f"构建 Judge LLM 失败: {e!s}"
 
@@ -10195,9 +10676,45 @@ def _build_alerts_for_run(qa_run: dict[str, Any], thresholds: dict[str, Any]) ->
     return alerts
 
 
+def _qa_runs_source_token(tenant_id: str) -> str:
+    return ";".join(_path_version_token(p) for p in _qa_read_paths(tenant_id, "qa_runs.jsonl"))
+
+
+def _qa_analytics_store(tenant_id: str) -> QAAnalyticsStore:
+    """Per-run / per-question metric tables, rebuilt from qa_runs.jsonl when they missed a write."""
+    store = get_qa_analytics_store(_qa_dir(tenant_id) / "qa_analytics.sqlite3")
+    token = _qa_runs_source_token(tenant_id)
+    if not store.is_current(token):
+        primary = _qa_runs_path(tenant_id)
+        runs: list[dict[str, Any]] = []
+        legacy_runs: list[dict[str, Any]] = []
+        for path in _qa_read_paths(tenant_id, "qa_runs.jsonl"):
+            (runs if path == primary else legacy_runs).extend(_read_jsonl(path))
+        store.rebuild(runs, token, legacy_runs=legacy_runs)
+    return store
+
+
+def _record_qa_run_analytics(tenant_id: str, qa_run: dict[str, Any], before_token: str, *, replace: bool = False) -> None:
+    try:
+        get_qa_analytics_store(_qa_dir(tenant_id) / "qa_analytics.sqlite3").record_run(
+            qa_run,
+            before_token=before_token,
+            after_token=_qa_runs_source_token(tenant_id),
+            replace=replace,
+        )
+    except Exception as e:
+        # The tables are derived data; a failed write only means the next dashboard read rebuilds them.
+        print(f"⚠️ QA 分析表写入失败，将在下次查询时重建: {e}")
+
+
 def _persist_qa_run(tenant_id: str, qa_run: dict[str, Any]) -> None:
     with QA_PERSIST_LOCK:
-        _append_jsonl(_qa_runs_path(tenant_id), qa_run)
+        runs_path = _qa_runs_path(tenant_id)
+        before_token = _path_version_token(runs_path)
+        before_analytics_token = _qa_runs_source_token(tenant_id)
+        _append_jsonl(runs_path, qa_run)
+        _index_persisted_qa_run(tenant_id, qa_run, before_token)
+        _record_qa_run_analytics(tenant_id, qa_run, before_analytics_token)
         thresholds = _load_qa_thresholds(tenant_id)
         alerts = _build_alerts_for_run(qa_run, thresholds)
         for alert in alerts:
@@ -10501,6 +11018,26 @@ def api_admin_key_config_put():
     return _json_response({"ok": True, "item": result})
 
 
+@app.get('/api/admin/llm-limits')
+@app.get('/api/platform/llm-limits')
+def api_admin_llm_limits():
+    try:
+        _require_platform_admin()
+    except PermissionError as e:
+        return _error(str(e), "仅平台管理员可查看 LLM 并发限流状态", 403)
+    return _json_response({"items": llm_limiter_snapshot()})
+
+
+@app.get('/api/admin/slice-context-cache')
+@app.get('/api/platform/slice-context-cache')
+def api_admin_slice_context_cache():
+    try:
+        _require_platform_admin()
+    except PermissionError as e:
+        return _error(str(e), "仅平台管理员可查看切片上下文缓存状态", 403)
+    return _json_response({"items": slice_context_cache_stats()})
+
+
 @app.get('/api/admin/cities')
 @app.get('/api/platform/cities')
 def api_admin_cities():
@@ -13086,6 +13623,17 @@ def api_generate_questions(tenant_id: str):
     process_trace: list[dict[str, Any]] = []
     saved = 0
     bank_path = tenant_bank_path(tenant_id)
+    # Parallel shards of one task share the parent id, so in-task duplicates are caught across shards.
+    dup_scope = parent_task_id or task_id or run_id
+    dup_index = _get_tenant_near_dup_index(tenant_id, retriever)
+    if dup_scope == run_id:
+        # 无任务上下文的单次出题：请求结束即清理；任务级 scope 由 _run_generate_task_worker 结束时清理。
+        @after_this_request
+        def _evict_run_dup_scope(response):
+            _evict_tenant_dup_scope(tenant_id, run_id)
+            return response
+
+    _warm_generation_slice_context(tenant_id, retriever, planned_slice_ids or candidate_ids)
     if task_id and _is_task_cancelled(task_id):
         run_ended_at = datetime.now(timezone.utc).isoformat()
         qa_run = _build_qa_run_payload(
@@ -13279,6 +13827,9 @@ def api_generate_questions(tenant_id: str):
                 "api_key": api_key,
                 "base_url": base_url,
                 "retriever": retriever,
+                "dup_index": dup_index,
+                "dup_scope": dup_scope,
+                "dup_threshold": _NEAR_DUP_THRESHOLD,
                 "question_type": question_type,
                 "generation_mode": generation_mode,
                 "difficulty_range": effective_difficulty_range,
@@ -13300,8 +13851,15 @@ def api_generate_questions(tenant_id: str):
             started_at_utc=started_at,
             max_elapsed_ms=max_question_elapsed_ms,
         )
+        _glossary_token = attach_glossary_tenant(tenant_id)
         try:
-            for event in graph_app.stream(inputs, config=config):
+            for event in _stream_exam_graph(
+                inputs,
+                config,
+                tenant_id=tenant_id,
+                started_at=started_at,
+                max_elapsed_ms=max_question_elapsed_ms,
+            ):
                 for node_name, state_update in event.items():
                     if not isinstance(state_update, dict):
                         continue
@@ -13564,6 +14122,7 @@ def api_generate_questions(tenant_id: str):
                     )
                     question_trace["final_json"] = deepcopy(q_json)
                 generated.append(q_json)
+                dup_index.add(f"{dup_scope}:{run_id}:{len(generated)}", str(q_json.get("题干", "") or ""), scope=dup_scope)
                 if planned_slots:
                     _template_slot_cursor = success_index + 1
                 if persist_to_bank and _is_task_auto_bank_enabled(tenant_id, task_id, persist_to_bank):
@@ -13671,6 +14230,7 @@ def api_generate_questions(tenant_id: str):
             }
         finally:
             detach_question_wall_clock_budget(_wall_token)
+            detach_glossary_tenant(_glossary_token)
 
         if attempt_error_info and not saved_current:
             err_key = str(attempt_error_info.get("error_key", "attempt_failed")).strip() or "attempt_failed"
@@ -14178,8 +14738,7 @@ def api_generate_questions_stream(tenant_id: str):
     run_started_at = datetime.now(timezone.utc).isoformat()
     run_id = f"run_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
 
-    def _sse(event_name: str, payload: dict[str, Any]) -> str:
-        return f"event: {event_name}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    _sse = _format_sse
 
     @stream_with_context
     def _event_stream():
@@ -14188,6 +14747,9 @@ def api_generate_questions_stream(tenant_id: str):
         process_trace: list[dict[str, Any]] = []
         saved = 0
         bank_path = tenant_bank_path(tenant_id)
+        dup_scope = parent_task_id or task_id or run_id
+        dup_index = _get_tenant_near_dup_index(tenant_id, retriever)
+        _warm_generation_slice_context(tenant_id, retriever, planned_slice_ids or candidate_ids)
         yield _sse(
             "started",
             {
@@ -14355,6 +14917,9 @@ def api_generate_questions_stream(tenant_id: str):
                     "api_key": api_key,
                     "base_url": base_url,
                     "retriever": retriever,
+                    "dup_index": dup_index,
+                    "dup_scope": dup_scope,
+                    "dup_threshold": _NEAR_DUP_THRESHOLD,
                     "question_type": question_type,
                     "generation_mode": generation_mode,
                     "difficulty_range": effective_difficulty_range,
@@ -14376,8 +14941,15 @@ def api_generate_questions_stream(tenant_id: str):
                 started_at_utc=started_at,
                 max_elapsed_ms=max_question_elapsed_ms,
             )
+            _glossary_token = attach_glossary_tenant(tenant_id)
             try:
-                for event in graph_app.stream(inputs, config=config):
+                for event in _stream_exam_graph(
+                    inputs,
+                    config,
+                    tenant_id=tenant_id,
+                    started_at=started_at,
+                    max_elapsed_ms=max_question_elapsed_ms,
+                ):
                     for node_name, state_update in event.items():
                         if not isinstance(state_update, dict):
                             continue
@@ -14612,6 +15184,7 @@ def api_generate_questions_stream(tenant_id: str):
                         )
                         question_trace["final_json"] = deepcopy(q_json)
                     generated.append(q_json)
+                    dup_index.add(f"{dup_scope}:{run_id}:{len(generated)}", str(q_json.get("题干", "") or ""), scope=dup_scope)
                     if planned_slots:
                         _template_slot_cursor2 = success_index + 1
                     if persist_to_bank and _is_task_auto_bank_enabled(tenant_id, task_id, persist_to_bank):
@@ -14719,6 +15292,7 @@ def api_generate_questions_stream(tenant_id: str):
                 }
             finally:
                 detach_question_wall_clock_budget(_wall_token)
+                detach_glossary_tenant(_glossary_token)
 
             if attempt_error_info and not saved_current:
                 err_key = str(attempt_error_info.get("error_key", "attempt_failed")).strip() or "attempt_failed"
@@ -14950,7 +15524,13 @@ def api_generate_questions_stream(tenant_id: str):
             },
         )
 
-    resp = Response(_event_stream(), mimetype="text/event-stream")
+    if parent_task_id or task_id:
+        return _sse_response(_event_stream())
+    return _sse_response(_evict_dup_scope_on_close(_event_stream(), tenant_id, run_id))
+
+
+def _sse_response(stream: Any) -> Response:
+    resp = Response(stream, mimetype="text/event-stream")
     req_origin = request.headers.get("Origin", "")
     if req_origin in ALLOWED_ORIGINS:
         resp.headers["Access-Control-Allow-Origin"] = req_origin
@@ -15149,8 +15729,13 @@ def _update_qa_run(tenant_id: str, run_id: str, updated_run: dict[str, Any]) ->
                 break
         if idx < 0:
             return False
+        before_token = _path_version_token(path)
+        before_analytics_token = _qa_runs_source_token(tenant_id)
+        replaced_run = rows[idx]
         rows[idx] = updated_run
         _write_jsonl(path, rows)
+        _index_persisted_qa_run(tenant_id, updated_run, before_token, replaced_position=idx, replaced_run=replaced_run)
+        _record_qa_run_analytics(tenant_id, updated_run, before_analytics_token, replace=True)
         return True
 
 
@@ -16910,6 +17495,9 @@ def _run_generate_task_worker(tenant_id: str, task_id: str, body: dict[str, Any]
         if isinstance(task_to_persist, dict):
             _persist_failed_task_qa_run(tenant_id, task_to_persist, reason=str(e), started_at=started_at, ended_at=ended_at)
             _persist_gen_task(tenant_id, task_to_persist)
+    finally:
+        # 分片子任务共用父任务 scope，父任务 worker 结束时（子任务均已返回）统一清理。
+        _evict_tenant_dup_scope(tenant_id, task_id)
 
 
 @app.post('/api/<tenant_id>/generate/tasks')
@@ -17336,6 +17924,59 @@ def api_generate_task_list(tenant_id: str):
     return _json_response({"items": [_build_gen_task_summary(x) for x in enriched_items], "total": len(items)})
 
 
+@app.get('/api/<tenant_id>/generate/tasks/events')
+def api_generate_task_list_events(tenant_id: str):
+    """
+    SSE 推送任务列表行：先发本进程内进行中任务的 snapshot，之后每次 _update_task_live 推送对应顶层任务的汇总行（task）。
+    本进程内没有进行中的任务时发 end，前端回退到列表接口轮询，出现新的进行中任务后再订阅。
+    """
+    try:
+        _check_tenant_permission(tenant_id, "gen.read")
+    except PermissionError as e:
+        return _error(str(e), "无权限查看出题任务", 403)
+
+    def _live_rows() -> list[dict[str, Any]]:
+        # Caller holds GEN_TASK_LOCK.
+        return [
+            deepcopy(_build_gen_task_summary(task))
+            for task in GEN_TASKS.values()
+            if str(task.get("tenant_id", "")) == tenant_id
+            and str(task.get("status", "") or "").strip().lower() in {"pending", "running"}
+            and not _is_internal_child_gen_task(task)
+        ]
+
+    with GEN_TASK_LOCK:
+        rows = _live_rows()
+        sub = TASK_LIST_BROKER.subscribe(tenant_id) if rows else None
+    if sub is None:
+        return _sse_response(iter([_format_sse("snapshot", {"items": []}), _format_sse("end", {"tenant_id": tenant_id})]))
+
+    @stream_with_context
+    def _event_stream():
+        try:
+            yield _format_sse("snapshot", {"items": rows})
+            while True:
+                if sub.lagged:
+                    with GEN_TASK_LOCK:
+                        sub.drain()
+                        fresh = _live_rows()
+                    yield _format_sse("snapshot", {"items": fresh})
+                event = sub.get(_TASK_PROGRESS_HEARTBEAT_SECONDS)
+                if event is None:
+                    with GEN_TASK_LOCK:
+                        active = bool(_live_rows())
+                    if not active:
+                        yield _format_sse("end", {"tenant_id": tenant_id})
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield event
+        finally:
+            TASK_LIST_BROKER.unsubscribe(sub)
+
+    return _sse_response(_event_stream())
+
+
 @app.post('/api/<tenant_id>/generate/tasks/<task_id>/cancel')
 def api_generate_task_cancel(tenant_id: str, task_id: str):
     """Request cancellation of a running or pending task. Running task will stop after current question."""
@@ -17489,6 +18130,75 @@ def api_generate_task_detail(tenant_id: str, task_id: str):
     return _error("TASK_NOT_FOUND", "任务不存在", 404)
 
 
+@app.get('/api/<tenant_id>/generate/tasks/<task_id>/events')
+def api_generate_task_events(tenant_id: str, task_id: str):
+    """
+    SSE 推送任务进度：先发一次 snapshot，之后只推 _update_task_live 产生的增量（progress），任务结束发 end。
+    任务不在本进程内运行时只发 snapshot + end，前端回退到详情接口轮询。
+    """
+    try:
+        _check_tenant_permission(tenant_id, "gen.read")
+    except PermissionError as e:
+        return _error(str(e), "无权限查看出题任务详情", 403)
+    tid = str(task_id or "").strip()
+
+    def _live_snapshot() -> dict[str, Any] | None:
+        # Caller holds GEN_TASK_LOCK.
+        task = GEN_TASKS.get(tid)
+        if not isinstance(task, dict) or str(task.get("tenant_id", "")) != tenant_id:
+            return None
+        snap = _task_snapshot(task)
+        snap["errors"] = _sanitize_task_errors(snap.get("errors"))
+        return snap
+
+    sub = None
+    with GEN_TASK_LOCK:
+        snap = _live_snapshot()
+        if snap is not None and str(snap.get("status", "") or "").strip().lower() in {"pending", "running"}:
+            sub = TASK_PROGRESS_BROKER.subscribe(tid)
+    if sub is None:
+        if snap is None:
+            snap = _read_gen_task_snapshot_file(tenant_id, tid) or _read_persisted_task(tenant_id, tid)
+        if not isinstance(snap, dict):
+            return _error("TASK_NOT_FOUND", "任务不存在", 404)
+        snap = dict(snap)
+        snap["errors"] = _sanitize_task_errors(snap.get("errors"))
+        final_payload = [_format_sse("snapshot", {"task": snap}), _format_sse("end", {"task_id": tid, "status": snap.get("status")})]
+        return _sse_response(iter(final_payload))
+
+    @stream_with_context
+    def _event_stream():
+        try:
+            yield _format_sse("snapshot", {"task": snap})
+            while True:
+                if sub.lagged:
+                    with GEN_TASK_LOCK:
+                        sub.drain()
+                        fresh = _live_snapshot()
+                    if fresh is None:
+                        yield _format_sse("end", {"task_id": tid, "status": ""})
+                        return
+                    yield _format_sse("snapshot", {"task": fresh})
+                event = sub.get(_TASK_PROGRESS_HEARTBEAT_SECONDS)
+                if event is None:
+                    # Statuses changed outside _update_task_live (cancel, restart) surface here.
+                    with GEN_TASK_LOCK:
+                        task = GEN_TASKS.get(tid)
+                        status = str((task or {}).get("status", "") or "").strip().lower()
+                    if status not in {"pending", "running"}:
+                        yield _format_sse("end", {"task_id": tid, "status": status})
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield event
+                if event.startswith("event: end\n"):
+                    return
+        finally:
+            TASK_PROGRESS_BROKER.unsubscribe(sub)
+
+    return _sse_response(_event_stream())
+
+
 @app.post('/api/<tenant_id>/generate/tasks/<task_id>/bank-policy')
 def api_generate_task_bank_policy(tenant_id: str, task_id: str):
     """
@@ -17588,6 +18298,10 @@ def _get_task_id_and_name_by_run_id(tenant_id: str, run_id: str) -> tuple[str, s
     return "", ""
 
 
+# 总览 / 趋势只统计窗口内最近的这么多次运行
+_QA_DASHBOARD_RUN_LIMIT = 200
+
+
 def _filter_qa_runs(
     tenant_id: str,
     *,
@@ -17616,7 +18330,7 @@ def _filter_qa_runs(
 
     runs, _ = _collect_recent_jsonl_rows_from_paths(
         _qa_read_paths(tenant_id, "qa_runs.jsonl"),
-        target_count=max(1, int(target_count or 200)),
+        target_count=max(1, int(target_count or _QA_DASHBOARD_RUN_LIMIT)),
         sort_key=lambda row: str(row.get("ended_at", "") or ""),
         predicate=_predicate,
         unique_key=lambda row: str(row.get("run_id", "") or ""),
@@ -17644,6 +18358,12 @@ def _decorate_alert_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return out
 
 
+def _qa_runs_metrics_by_id(tenant_id: str, run_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """run_id -> {"run_id", "batch_metrics"} for drift / release comparisons; like before, only the primary qa_runs.jsonl."""
+    metrics = _qa_analytics_store(tenant_id).batch_metrics_by_run_id(run_ids)
+    return {rid: {"run_id": rid, "batch_metrics": bm} for rid, bm in metrics.items()}
+
+
 def _build_release_report(base: dict[str, Any], target: dict[str, Any]) -> dict[str, Any]:
     bm_base = base.get("batch_metrics") if isinstance(base.get("batch_metrics"), dict) else {}
     bm_target = target.get("batch_metrics") if isinstance(target.get("batch_metrics"), dict) else {}
@@ -17807,8 +18527,12 @@ def _build_slice_success_stats_from_runs(runs: list[dict[str, Any]]) -> list[dic
             row["attempt_count"] += 1
             if bool(q.get("saved", False)):
                 row["success_count"] += 1
+    return _finalize_slice_success_stats(list(agg.values()))
+
+
+def _finalize_slice_success_stats(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     out: list[dict[str, Any]] = []
-    for row in agg.values():
+    for row in rows:
         attempts = int(row.get("attempt_count", 0) or 0)
         success = int(row.get("success_count", 0) or 0)
         row["success_rate"] = round(_safe_div(success, attempts), 4) if attempts > 0 else 0.0
@@ -18123,6 +18847,11 @@ def _normalize_run_batch_metrics(run: dict[str, Any]) -> tuple[dict[str, Any], b
     return out, changed
 
 
+_JUDGE_RUN_WORKERS = max(1, int(os.getenv("JUDGE_RUN_WORKERS", "4") or 4))
+_JUDGE_RUN_FLUSH_EVERY = max(1, int(os.getenv("JUDGE_RUN_FLUSH_EVERY", "5") or 5))
+_JUDGE_RUN_FLUSH_SECONDS = max(0.5, float(os.getenv("JUDGE_RUN_FLUSH_SECONDS", "5") or 5))
+
+
 def _execute_judge_run(
     tenant_id: str,
     run_id: str,
@@ -18164,78 +18893,121 @@ def _execute_judge_run(
     if not _update_qa_run(tenant_id, run_id, run):
         raise RuntimeError("UPDATE_FAILED|500|初始化 Judge 运行状态失败")
 
+    targets = [
+        (i, q, str(q.get("question_id", "")).strip())
+        for i, q in enumerate(questions)
+        if isinstance(q, dict) and str(q.get("question_id", "")).strip() in ids_to_run
+    ]
     completed_count = 0
     success_count = 0
     error_count = 0
     cancelled = False
-    for i, q in enumerate(questions):
-        if not isinstance(q, dict):
-            continue
-        qid = str(q.get("question_id", "")).strip()
-        if qid not in ids_to_run:
-            continue
-        if task_id and _is_judge_task_cancelled(task_id):
-            cancelled = True
-            break
-        run["judge_job"]["current_question_id"] = qid
-        run["judge_job"]["updated_at"] = datetime.now(timezone.utc).isoformat()
-        _update_qa_run(tenant_id, run_id, run)
+    pending_flush = 0
+    last_flush_at = time.monotonic()
+
+    def _emit_progress(current_qid: str) -> None:
         if on_progress:
             on_progress(
                 {
                     "progress": {"current": int(completed_count), "total": int(n_to_run)},
-                    "current_question_id": qid,
+                    "current_question_id": current_qid,
                     "success_count": int(success_count),
                     "error_count": int(error_count),
                     "judge_count": int(completed_count),
                 }
             )
-        _append_judge_log(tenant_id, "JUDGE_QUESTION_START", {"run_id": run_id, "question_id": qid})
-        report = _run_offline_judge_for_question(q, config_payload, judge_llm, tenant_id=tenant_id)
-        if report is None:
-            _append_judge_log(tenant_id, "JUDGE_SKIP_NONE", {"run_id": run_id, "question_id": qid})
-            continue
-        questions[i] = dict(q)
-        questions[i]["offline_judge"] = report
+
+    def _flush(in_flight: list[str], *, force: bool = False) -> None:
+        # Batch run rewrites: every N results or T seconds (the run doubles as the resume checkpoint).
+        nonlocal pending_flush, last_flush_at
+        if not force and pending_flush < _JUDGE_RUN_FLUSH_EVERY and time.monotonic() - last_flush_at < _JUDGE_RUN_FLUSH_SECONDS:
+            return
         run["questions"] = questions
-        trace_row = {"run_id": run_id, "question_id": qid, "index": int(q.get("index", 0) or 0)}
-        trace_row.update(report.get("_qa_trace") or {})
-        _append_qa_trace(tenant_id, trace_row)
-        completed_count += 1
-        if report.get("error"):
-            error_count += 1
-        else:
-            success_count += 1
         run["judge_job"].update(
             {
                 "updated_at": datetime.now(timezone.utc).isoformat(),
                 "completed_count": int(completed_count),
                 "success_count": int(success_count),
                 "error_count": int(error_count),
-                "current_question_id": qid,
+                "current_question_id": in_flight[0] if in_flight else "",
+                "in_flight_question_ids": list(in_flight),
             }
         )
         if not _update_qa_run(tenant_id, run_id, run):
             raise RuntimeError("UPDATE_FAILED|500|更新 Judge 题目进度失败")
+        pending_flush = 0
+        last_flush_at = time.monotonic()
+
+    def _judge_one(q: dict[str, Any], qid: str) -> dict[str, Any] | None:
+        _append_judge_log(tenant_id, "JUDGE_QUESTION_START", {"run_id": run_id, "question_id": qid})
+        return _run_offline_judge_for_question(q, config_payload, judge_llm, tenant_id=tenant_id)
+
+    def _apply(i: int, q: dict[str, Any], qid: str, report: dict[str, Any] | None) -> None:
+        nonlocal completed_count, success_count, error_count, pending_flush
+        if report is None:
+            _append_judge_log(tenant_id, "JUDGE_SKIP_NONE", {"run_id": run_id, "question_id": qid})
+            return
+        questions[i] = dict(q)
+        questions[i]["offline_judge"] = report
+        trace_row = {"run_id": run_id, "question_id": qid, "index": int(q.get("index", 0) or 0)}
+        trace_row.update(report.get("_qa_trace") or {})
+        _append_qa_trace(tenant_id, trace_row)
+        completed_count += 1
+        pending_flush += 1
         if report.get("error"):
-            log_detail = {"run_id": run_id, "question_id": qid, "error": report["error"]}
-            _append_judge_log(tenant_id, "JUDGE_QUESTION_FAIL", log_detail)
+            error_count += 1
+            _append_judge_log(tenant_id, "JUDGE_QUESTION_FAIL", {"run_id": run_id, "question_id": qid, "error": report["error"]})
         else:
+            success_count += 1
             _append_judge_log(
                 tenant_id,
                 "JUDGE_QUESTION_DONE",
                 {"run_id": run_id, "question_id": qid, "decision": report.get("decision", "")},
             )
-        if on_progress:
-            on_progress(
-                {
-                    "progress": {"current": int(completed_count), "total": int(n_to_run)},
-                    "current_question_id": qid,
-                    "success_count": int(success_count),
-                    "error_count": int(error_count),
-                    "judge_count": int(completed_count),
-                }
-            )
+        _emit_progress(qid)
+
+    # Bounded window of questions in flight; results are applied in question order (a small reorder
+    # buffer holds early finishers), so progress, trace rows and the checkpoint stay sequential.
+    workers = max(1, min(_JUDGE_RUN_WORKERS, len(targets)))
+    next_submit = 0
+    next_apply = 0
+    futures: dict[int, Any] = {}
+    done_futures: dict[int, Any] = {}
+    ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="judge-run")
+    try:
+        while next_apply < len(targets):
+            while not cancelled and next_submit < len(targets) and len(futures) < workers and len(done_futures) < workers * 4:
+                if task_id and _is_judge_task_cancelled(task_id):
+                    cancelled = True
+                    break
+                _, q, qid = targets[next_submit]
+                if not futures and not done_futures:
+                    _emit_progress(qid)
+                # Each question gets its own copy of the caller's context (observability / tracing ContextVars).
+                futures[next_submit] = ex.submit(contextvars.copy_context().run, _judge_one, q, qid)
+                next_submit += 1
+            if not futures and next_apply not in done_futures:
+                break
+            if futures:
+                done, _ = wait(list(futures.values()), timeout=1.0, return_when=FIRST_COMPLETED)
+                for pos in [p for p, f in futures.items() if f in done]:
+                    done_futures[pos] = futures.pop(pos)
+                if not cancelled and task_id and not done and _is_judge_task_cancelled(task_id):
+                    # Stop submitting; questions already in flight still finish and are recorded.
+                    cancelled = True
+            while next_apply in done_futures:
+                i, q, qid = targets[next_apply]
+                _apply(i, q, qid, done_futures.pop(next_apply).result())
+                next_apply += 1
+            _flush([targets[p][2] for p in sorted(futures)])
+    except Exception:
+        # As in the sequential loop, a question that raises aborts the run; questions judged before it
+        # are checkpointed, later ones still in flight are dropped.
+        ex.shutdown(wait=False, cancel_futures=True)
+        _flush([], force=True)
+        raise
+    ex.shutdown()
+    _flush([], force=True)
 
     run = dict(run)
     run["questions"] = questions
@@ -18255,6 +19027,7 @@ def _execute_judge_run(
         "success_count": int(success_count),
         "error_count": int(error_count),
         "current_question_id": "",
+        "in_flight_question_ids": [],
         "last_error": "",
     }
     if not _update_qa_run(tenant_id, run_id, run):
@@ -18513,16 +19286,19 @@ def api_qa_overview(tenant_id: str):
     run_ids = [x.strip() for x in run_ids_raw.split(",") if x.strip()]
     run_ids_set = set(run_ids)
     success_only = request.args.get("success_only", "1").strip() in ("1", "true", "yes")
-    runs = _filter_qa_runs(
-        tenant_id,
-        material_version_id=material_version_id,
-        days=days,
-        success_only=success_only,
-    )
-    if run_ids_set:
-        runs = [x for x in runs if str(x.get("run_id", "")) in run_ids_set]
     if run_id:
-        runs = [x for x in runs if str(x.get("run_id", "")) == run_id]
+        selected_run_ids: list[str] | None = [run_id] if (not run_ids_set or run_id in run_ids_set) else []
+    else:
+        selected_run_ids = run_ids or None
+    window = {
+        "material_version_id": material_version_id,
+        "since_ts": datetime.now(timezone.utc).timestamp() - days * 24 * 3600 if days > 0 else None,
+        "success_only": success_only,
+        "run_ids": selected_run_ids or (),
+        "limit": _QA_DASHBOARD_RUN_LIMIT,
+    }
+    store = _qa_analytics_store(tenant_id)
+    runs = store.window_runs(**window) if selected_run_ids != [] else []
     if not runs:
         return _json_response(
             {
@@ -18566,22 +19342,16 @@ def api_qa_overview(tenant_id: str):
                 "slice_success_stats": [],
             }
         )
-    bm_list = [x.get("batch_metrics", {}) for x in runs if isinstance(x.get("batch_metrics"), dict)]
-    n = len(bm_list)
-    total_questions = sum(int(x.get("question_count", 0) or 0) for x in bm_list)
-    total_llm_calls_sum = sum(int(x.get("total_llm_calls", 0) or 0) for x in bm_list)
-    error_calls_sum = sum(int(x.get("error_calls", 0) or 0) for x in bm_list)
-    total_cost_sum = sum(float(x.get("total_cost", 0) or 0) for x in bm_list)
-    weighted = lambda key: _safe_div(
-        sum(float(x.get(key, 0) or 0) * int(x.get("question_count", 0) or 0) for x in bm_list),
-        total_questions,
-    )
+    agg = store.overview_aggregates(**window)
+    total_questions = int(agg["total_questions"] or 0)
+    total_cost_sum = float(agg["total_cost"] or 0)
+    weighted = lambda key: _safe_div(float(agg[f"w_{key}"] or 0), total_questions)
     overview = {
         "run_id": run_id or str(runs[0].get("run_id", "")),
         "run_ids": [str(x.get("run_id", "")) for x in runs if str(x.get("run_id", "")).strip()],
         "material_version_id": material_version_id,
         "days": days,
-        "run_count": n,
+        "run_count": int(agg["run_count"] or 0),
         "hard_pass_rate": round(weighted("hard_pass_rate"), 4),
         "quality_score_avg": round(weighted("quality_score_avg"), 2),
         "risk_high_rate": round(weighted("risk_high_rate"), 4),
@@ -18592,100 +19362,48 @@ def api_qa_overview(tenant_id: str):
         "avg_latency_ms_per_question": round(weighted("avg_latency_ms_per_question"), 2),
         "avg_cost_per_question": round(_safe_div(total_cost_sum, total_questions), 6),
         "total_cost": round(total_cost_sum, 6),
-        "currency": str((bm_list[0] or {}).get("currency", "CNY")),
+        "currency": agg["currency"],
         "avg_critic_loops": round(weighted("avg_critic_loops"), 3),
-        "error_call_rate": round(_safe_div(error_calls_sum, total_llm_calls_sum), 4),
-        "slice_success_stats": _build_slice_success_stats_from_runs(runs),
+        "error_call_rate": round(_safe_div(int(agg["error_calls"] or 0), int(agg["total_llm_calls"] or 0)), 4),
+        "slice_success_stats": _finalize_slice_success_stats(agg["slices"]),
     }
     # Judge metrics: aggregate directly from latest offline_judge payload on each question.
-    judge_pass_sum = 0
-    judge_review_sum = 0
-    judge_reject_sum = 0
-    judge_total_questions = 0
-    judge_scored_count = 0
-    judge_overall_scores: list[float] = []
-    judge_baseline_scores: list[float] = []
-    judge_quality_scores: list[float] = []
-    judge_calls_sum = 0
-    judge_failed_calls_sum = 0
-    judge_total_tokens_sum = 0
-    judge_total_latency_ms_sum = 0
-    judge_total_cost_usd_sum = 0.0
-    for run in runs:
-        for q in (run.get("questions") or []):
-            if not isinstance(q, dict):
-                continue
-            oj = q.get("offline_judge") if isinstance(q.get("offline_judge"), dict) else {}
-            if not oj:
-                continue
-            judge_total_questions += 1
-            decision = str(oj.get("decision", "") or "").strip().lower()
-            if decision == "pass":
-                judge_pass_sum += 1
-            elif decision == "review":
-                judge_review_sum += 1
-            elif decision == "reject":
-                judge_reject_sum += 1
-            if decision in {"pass", "review", "reject"}:
-                judge_scored_count += 1
-            overall_score = oj.get("overall_score")
-            if overall_score is not None:
-                try:
-                    judge_overall_scores.append(float(overall_score))
-                except Exception:
-                    pass
-            baseline_score = oj.get("baseline_score")
-            if baseline_score is None:
-                baseline_score = oj.get("penalty_score")
-            if baseline_score is not None:
-                try:
-                    judge_baseline_scores.append(float(baseline_score))
-                except Exception:
-                    pass
-            quality_score = oj.get("quality_score")
-            if quality_score is not None:
-                try:
-                    judge_quality_scores.append(float(quality_score))
-                except Exception:
-                    pass
-            obs = oj.get("observability") if isinstance(oj.get("observability"), dict) else {}
-            tok = obs.get("tokens") if isinstance(obs.get("tokens"), dict) else {}
-            costs = oj.get("costs") if isinstance(oj.get("costs"), dict) else {}
-            judge_calls_sum += int(obs.get("llm_calls", 0) or 0)
-            judge_failed_calls_sum += int(obs.get("failed_calls", 0) or 0)
-            judge_total_tokens_sum += int(tok.get("total_tokens", 0) or 0)
-            judge_total_latency_ms_sum += int(obs.get("latency_ms", 0) or 0)
-            judge_total_cost_usd_sum += float(costs.get("per_question_usd", 0.0) or 0.0)
-
-    judge_total = judge_pass_sum + judge_review_sum + judge_reject_sum
-    if judge_total > 0:
-        overview["judge_pass_rate"] = round(_safe_div(judge_pass_sum, judge_total), 4)
-        overview["judge_review_rate"] = round(_safe_div(judge_review_sum, judge_total), 4)
-        overview["judge_reject_rate"] = round(_safe_div(judge_reject_sum, judge_total), 4)
+    judge = agg["judge"]
+    judge_pass_sum = int(judge["pass_count"] or 0)
+    judge_review_sum = int(judge["review_count"] or 0)
+    judge_reject_sum = int(judge["reject_count"] or 0)
+    judge_scored_count = judge_pass_sum + judge_review_sum + judge_reject_sum
+    judge_total_tokens_sum = int(judge["tokens"] or 0)
+    judge_total_latency_ms_sum = int(judge["latency_ms"] or 0)
+    judge_total_cost_usd_sum = float(judge["cost_usd"] or 0.0)
+    if judge_scored_count > 0:
+        overview["judge_pass_rate"] = round(_safe_div(judge_pass_sum, judge_scored_count), 4)
+        overview["judge_review_rate"] = round(_safe_div(judge_review_sum, judge_scored_count), 4)
+        overview["judge_reject_rate"] = round(_safe_div(judge_reject_sum, judge_scored_count), 4)
     else:
         overview["judge_pass_rate"] = None
         overview["judge_review_rate"] = None
         overview["judge_reject_rate"] = None
-    overview["judge_overall_score_avg"] = round(_safe_div(sum(judge_overall_scores), len(judge_overall_scores)), 2) if judge_overall_scores else None
-    overview["judge_baseline_score_avg"] = round(_safe_div(sum(judge_baseline_scores), len(judge_baseline_scores)), 2) if judge_baseline_scores else None
+    overview["judge_overall_score_avg"] = round(judge["overall_avg"], 2) if judge["overall_avg"] is not None else None
+    overview["judge_baseline_score_avg"] = round(judge["baseline_avg"], 2) if judge["baseline_avg"] is not None else None
     # For overview card, prefer quality_score from offline_judge when available.
-    if judge_quality_scores:
-        overview["quality_score_avg"] = round(_safe_div(sum(judge_quality_scores), len(judge_quality_scores)), 2)
+    if judge["quality_avg"] is not None:
+        overview["quality_score_avg"] = round(judge["quality_avg"], 2)
 
-    overview["judge_question_count"] = int(judge_total_questions)
+    overview["judge_question_count"] = int(judge["question_count"] or 0)
     overview["judge_scored_count"] = int(judge_scored_count)
-    overview["judge_pass_count"] = int(judge_pass_sum)
-    overview["judge_review_count"] = int(judge_review_sum)
-    overview["judge_reject_count"] = int(judge_reject_sum)
-    overview["judge_total_llm_calls"] = int(judge_calls_sum)
-    overview["judge_failed_llm_calls"] = int(judge_failed_calls_sum)
-    overview["judge_total_tokens"] = int(judge_total_tokens_sum)
-    overview["judge_total_latency_ms"] = int(judge_total_latency_ms_sum)
+    overview["judge_pass_count"] = judge_pass_sum
+    overview["judge_review_count"] = judge_review_sum
+    overview["judge_reject_count"] = judge_reject_sum
+    overview["judge_total_llm_calls"] = int(judge["llm_calls"] or 0)
+    overview["judge_failed_llm_calls"] = int(judge["failed_calls"] or 0)
+    overview["judge_total_tokens"] = judge_total_tokens_sum
+    overview["judge_total_latency_ms"] = judge_total_latency_ms_sum
     overview["judge_total_cost_usd"] = round(judge_total_cost_usd_sum, 6)
     overview["judge_avg_tokens_per_question"] = round(_safe_div(judge_total_tokens_sum, judge_scored_count), 2) if judge_scored_count > 0 else 0.0
     overview["judge_avg_latency_ms_per_question"] = round(_safe_div(judge_total_latency_ms_sum, judge_scored_count), 2) if judge_scored_count > 0 else 0.0
     overview["judge_avg_cost_usd_per_question"] = round(_safe_div(judge_total_cost_usd_sum, judge_scored_count), 6) if judge_scored_count > 0 else 0.0
-    saved_sum = sum(int(x.get("saved_count", 0) or 0) for x in bm_list)
+    saved_sum = int(agg["saved_count"] or 0)
     overview["saved_count"] = saved_sum
     overview["cpvq"] = round(_safe_div(total_cost_sum, saved_sum), 6) if saved_sum > 0 else None
     return _json_response(overview)
@@ -18733,11 +19451,11 @@ def api_qa_trends(tenant_id: str):
     days = max(1, int(request.args.get("days", 30) or 30))
     material_version_id = str(request.args.get("material_version_id", "")).strip()
     success_only = request.args.get("success_only", "1").strip() in ("1", "true", "yes")
-    runs = _filter_qa_runs(
-        tenant_id,
+    runs = _qa_analytics_store(tenant_id).window_runs(
         material_version_id=material_version_id,
-        days=days,
+        since_ts=datetime.now(timezone.utc).timestamp() - days * 24 * 3600,
         success_only=success_only,
+        limit=_QA_DASHBOARD_RUN_LIMIT,
     )
     points: list[dict[str, Any]] = []
     for r in sorted(runs, key=lambda x: str(x.get("ended_at", ""))):
@@ -18773,8 +19491,6 @@ def api_qa_drift(tenant_id: str):
     target_run_id = str(request.args.get("target_run_id", "")).strip()
     if not target_run_id:
         return _error("BAD_REQUEST", "target_run_id 必填", 400)
-    runs = _read_jsonl(_qa_runs_path(tenant_id))
-    by_id = {str(x.get("run_id", "")): x for x in runs if isinstance(x, dict)}
     base_run_ids: list[str] = []
     if base_run_ids_arg:
         base_run_ids = [x.strip() for x in base_run_ids_arg.split(",") if x.strip()]
@@ -18782,10 +19498,11 @@ def api_qa_drift(tenant_id: str):
         base_run_ids = [base_run_id]
     if not base_run_ids:
         return _error("BAD_REQUEST", "base_run_id 或 base_run_ids 必填", 400)
+    by_id = _qa_runs_metrics_by_id(tenant_id, base_run_ids + [target_run_id])
     base_runs = [by_id.get(rid) for rid in base_run_ids]
     if any(not isinstance(x, dict) for x in base_runs):
         return _error("RUN_NOT_FOUND", "基线运行不存在", 404)
-    target = next((x for x in runs if str(x.get("run_id", "")) == target_run_id), None)
+    target = by_id.get(target_run_id)
     if not isinstance(target, dict):
         return _error("RUN_NOT_FOUND", "对比运行不存在", 404)
     base_rows = [x for x in base_runs if isinstance(x, dict)]
@@ -19088,8 +19805,6 @@ def api_qa_release_report(tenant_id: str):
     target_run_id = str(request.args.get("target_run_id", "")).strip()
     if not target_run_id:
         return _error("BAD_REQUEST", "target_run_id 必填", 400)
-    runs = _read_jsonl(_qa_runs_path(tenant_id))
-    by_id = {str(x.get("run_id", "")): x for x in runs if isinstance(x, dict)}
     base_run_ids: list[str] = []
     if base_run_ids_arg:
         base_run_ids = [x.strip() for x in base_run_ids_arg.split(",") if x.strip()]
@@ -19107,10 +19822,11 @@ def api_qa_release_report(tenant_id: str):
                     base_run_ids = [rid]
     if not base_run_ids:
         return _error("BAD_REQUEST", "base_run_id 或 base_run_ids 必填", 400)
+    by_id = _qa_runs_metrics_by_id(tenant_id, base_run_ids + [target_run_id])
     base_runs = [by_id.get(rid) for rid in base_run_ids]
     if any(not isinstance(x, dict) for x in base_runs):
         return _error("RUN_NOT_FOUND", "基线运行不存在", 404)
-    target = next((x for x in runs if str(x.get("run_id", "")) == target_run_id), None)
+    target = by_id.get(target_run_id)
     if not isinstance(target, dict):
         return _error("RUN_NOT_FOUND", "对比运行不存在", 404)
     base_rows = [x for x in base_runs if isinstance(x, dict)]
@@ -19478,30 +20194,34 @@ def api_bank_list(tenant_id: str):
     material_version_id = "" if all_materials else _resolve_material_version_id(tenant_id, requested_material_version_id)
     if requested_material_version_id and not all_materials and not material_version_id:
         return _error("MATERIAL_NOT_FOUND", "教材版本不存在", 404)
-    bank_path = tenant_bank_path(tenant_id)
-    bank = _load_bank(bank_path)
+    # legacy question without material marker only matches "全部教材" (empty material filter).
+    # 题库优先展示最新入库题，避免用户误以为“未展示”。
+    total, rows = get_bank_store(tenant_bank_path(tenant_id)).query(
+        material_version_id=material_version_id,
+        task_name=request.args.get("task_name", "").strip(),
+        slice_path=request.args.get("slice_path", "").strip(),
+        question_type=request.args.get("question_type", "").strip(),
+        keyword=keyword,
+        offset=(page - 1) * page_size,
+        limit=page_size,
+        newest_first=True,
+    )
     origin_lookup = _build_bank_origin_lookup(tenant_id)
     items: list[dict[str, Any]] = []
-    for idx, q in enumerate(bank):
-        stem = str(q.get("题干", "")).strip()
-        q_material = str(q.get("教材版本ID", "")).strip()
-        if material_version_id:
-            if q_material and q_material != material_version_id:
-                continue
-            if not q_material:
-                # legacy question without material marker: only show in "全部教材"
-                continue
-        if keyword and keyword not in stem:
-            continue
+    for idx, q in rows:
         item = dict(q)
         item["question_id"] = idx
         _fill_bank_item_origin_fields(item, origin_lookup)
         items.append(item)
-    # 题库优先展示最新入库题，避免用户误以为“未展示”。
-    items.reverse()
-    payload = _paginate(items, page, page_size)
-    payload["material_version_id"] = material_version_id
-    return _json_response(payload)
+    return _json_response(
+        {
+            "items": items,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "material_version_id": material_version_id,
+        }
+    )
 
 
 @app.get('/api/<tenant_id>/bank/<question_id>')
@@ -19516,11 +20236,7 @@ def api_bank_get_one(tenant_id: str, question_id: str):
     except (TypeError, ValueError):
         return _error("BAD_REQUEST", "question_id is invalid", 400)
 
-    bank = _load_bank(tenant_bank_path(tenant_id))
-    if qid < 0 or qid >= len(bank):
-        return _error("NOT_FOUND", "题目不存在", 404)
-
-    row = bank[qid]
+    row = get_bank_store(tenant_bank_path(tenant_id)).get(qid)
     if not isinstance(row, dict):
         return _error("NOT_FOUND", "题目不存在", 404)
 
@@ -19553,11 +20269,11 @@ def api_bank_optimize(tenant_id: str):
     except (TypeError, ValueError):
         return _error("BAD_REQUEST", "question_id is invalid", 400)
 
-    bank = _load_bank(tenant_bank_path(tenant_id))
-    if question_id < 0 or question_id >= len(bank):
+    stored_item = get_bank_store(tenant_bank_path(tenant_id)).get(question_id)
+    if stored_item is None:
         return _error("NOT_FOUND", "题目不存在", 404)
 
-    base_item = bank[question_id] if isinstance(bank[question_id], dict) else {}
+    base_item = stored_item if isinstance(stored_item, dict) else {}
     if isinstance(draft_item, dict) and str(draft_item.get("题干", "") or draft_item.get("question", "")).strip():
         base_item = _normalize_bank_question_item(draft_item, fallback_item=base_item, merge_with_fallback=True)
 
@@ -19628,19 +20344,18 @@ def api_bank_update(tenant_id: str):
     if requested_material_version_id and not material_version_id:
         return _error("MATERIAL_NOT_FOUND", "教材版本不存在", 404)
 
-    bank_path = tenant_bank_path(tenant_id)
+    store = get_bank_store(tenant_bank_path(tenant_id))
     with BANK_WRITE_LOCK:
-        bank = _load_bank(bank_path)
-        if question_id < 0 or question_id >= len(bank):
+        stored_item = store.get(question_id)
+        if stored_item is None:
             return _error("NOT_FOUND", "题目不存在", 404)
-        old_item = bank[question_id] if isinstance(bank[question_id], dict) else {}
+        old_item = stored_item if isinstance(stored_item, dict) else {}
         new_item = _normalize_bank_question_item(raw_item, merge_with_fallback=False)
         if material_version_id and not str(new_item.get("教材版本ID", "")).strip():
             new_item["教材版本ID"] = material_version_id
         if not str(new_item.get("题干", "") or "").strip():
             return _error("BAD_REQUEST", "题干不能为空", 400)
-        bank[question_id] = new_item
-        _save_bank(bank_path, bank)
+        store.replace(question_id, new_item)
 
     write_audit_log(
         tenant_id,
@@ -19672,11 +20387,8 @@ def api_bank_delete(tenant_id: str):
             delete_ids.add(int(x))
         except (TypeError, ValueError):
             continue
-    bank_path = tenant_bank_path(tenant_id)
-    bank = _load_bank(bank_path)
-    kept = [q for i, q in enumerate(bank) if i not in delete_ids]
-    _save_bank(bank_path, kept)
-    deleted = len(bank) - len(kept)
+    with BANK_WRITE_LOCK:
+        deleted, remaining = get_bank_store(tenant_bank_path(tenant_id)).delete(delete_ids)
     write_audit_log(
         tenant_id,
         system_user,
@@ -19685,7 +20397,7 @@ def api_bank_delete(tenant_id: str):
         ",".join(str(x) for x in sorted(delete_ids)),
         after={"deleted": deleted},
     )
-    return _json_response({"deleted": deleted, "remaining": len(kept)})
+    return _json_response({"deleted": deleted, "remaining": remaining})
 
 
 @app.post('/api/<tenant_id>/bank/export')
@@ -19710,11 +20422,10 @@ def api_bank_export(tenant_id: str):
     if not selected_ids:
         return _error("BAD_REQUEST", "无有效 question_ids", 400)
 
-    bank = _load_bank(tenant_bank_path(tenant_id))
     origin_lookup = _build_bank_origin_lookup(tenant_id)
     selected_rows = []
-    for idx, q in enumerate(bank):
-        if idx not in selected_ids or not isinstance(q, dict):
+    for idx, q in get_bank_store(tenant_bank_path(tenant_id)).get_many(selected_ids):
+        if not isinstance(q, dict):
             continue
         if only_template_official:
             has_template_marks = (
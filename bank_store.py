@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+BANK_INDEX_SCHEMA_VERSION = 2
+BANK_INDEX_SUFFIX = ".index.sqlite3"
+
+# Log records in the bank JSONL. Plain rows are appended questions (question_id = running sequence);
+# op records carry this key: put / delete address an existing question_id, skip advances the sequence
+# over ids that compaction dropped, so ids are never reused or shifted.
+BANK_OP_KEY = "__bank_op__"
+
+# Compact once superseded records exceed max(min, ratio * live rows).
+BANK_COMPACT_MIN_DEAD = max(1, int(os.getenv("BANK_COMPACT_MIN_DEAD", "256") or 256))
+BANK_COMPACT_DEAD_RATIO = max(0.0, float(os.getenv("BANK_COMPACT_DEAD_RATIO", "0.5") or 0.5))
+
+
+def bank_row_fields(item: Any) -> Dict[str, str]:
+    """Indexed columns of a bank row (empty strings for legacy rows without the field)."""
+    if not isinstance(item, dict):
+        return {"material_version_id": "", "task_name": "", "slice_path": "", "question_type": "", "stem": ""}
+    return {
+        "material_version_id": str(item.get("教材版本ID", "") or "").strip(),
+        "task_name": str(item.get("出题任务名称") or item.get("task_name") or "").strip(),
+        "slice_path": str(item.get("来源路径", "") or "").strip(),
+        "question_type": str(item.get("题目类型", "") or "").strip(),
+        "stem": str(item.get("题干", "") or "").strip(),
+    }
+
+
+def _bank_op(record: Any) -> str:
+    return str(record.get(BANK_OP_KEY, "") or "") if isinstance(record, dict) else ""
+
+
+def fold_bank_lines(lines: Iterable[str]) -> Tuple[List[Tuple[int, Any]], int, int]:
+    """
+    Apply the bank log. Returns ([(question_id, item)] ordered by id, next question_id, superseded record count).
+    Blank and unparsable lines are skipped, as `_load_bank` always did.
+    """
+    rows: Dict[int, Any] = {}
+    seq = 0
+    dead = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        op = _bank_op(record)
+        if not op:
+            rows[seq] = record
+            seq += 1
+            continue
+        try:
+            qid = int(record.get("question_id", -1))
+        except (TypeError, ValueError):
+            qid = -1
+        if op == "skip":
+            seq += max(0, int(record.get("count", 0) or 0))
+        elif op == "put" and qid in rows:
+            rows[qid] = record.get("item")
+            dead += 1
+        elif op == "delete" and qid in rows:
+            rows.pop(qid)
+            dead += 2
+        else:
+            dead += 1
+    return sorted(rows.items()), seq, dead
+
+
+def load_bank_items(path: Path) -> List[Any]:
+    """Live bank rows in question_id order (what `_load_bank` returns)."""
+    if not Path(path).exists():
+        return []
+    items, _, _ = fold_bank_lines(Path(path).read_text(encoding="utf-8").splitlines())
+    return [item for _, item in items]
+
+
+def compacted_bank_lines(rows: Iterable[Tuple[int, Any]], next_id: int) -> List[str]:
+    """Plain rows in id order, with skip records over dropped ids (including a dropped tail)."""
+    out: List[str] = []
+    seq = 0
+    for qid, item in rows:
+        if qid > seq:
+            out.append(json.dumps({BANK_OP_KEY: "skip", "count": qid - seq}, ensure_ascii=False))
+        out.append(json.dumps(item, ensure_ascii=False))
+        seq = qid + 1
+    if next_id > seq:
+        out.append(json.dumps({BANK_OP_KEY: "skip", "count": next_id - seq}, ensure_ascii=False))
+    return out
+
+
+class BankStore:
+    """
+    SQLite index over a question bank JSONL log.
+
+    The JSONL file stays the canonical storage; batch jobs read it through `_load_bank`, which folds
+    the log (`fold_bank_lines`). question_id is assigned once, when a row is appended, and never
+    changes: replace appends a put record, delete appends a tombstone, and the file is compacted
+    (rewritten with skip records over dropped ids) once superseded records pile up. The index holds
+    the live rows with their filter columns, so reads never parse the file. Any change made outside
+    the store (size/mtime/inode mismatch) triggers a full rebuild on next access.
+    """
+
+    def __init__(self, bank_path: Path) -> None:
+        self.path = Path(bank_path)
+        self.index_path = self.path.with_name(self.path.name + BANK_INDEX_SUFFIX)
+        self._lock = threading.Lock()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("pragma journal_mode=wal")
+            columns = {r["name"] for r in conn.execute("pragma table_info(bank_rows)").fetchall()}
+            if "byte_start" in columns:
+                # Schema v1 indexed byte ranges by line position; the table is derived data, rebuild it.
+                conn.execute("drop table bank_rows")
+            conn.execute(
+                """
+                create table if not exists bank_rows (
+                  ord integer primary key,
+                  is_dict integer not null,
+                  material_version_id text not null default '',
+                  task_name text not null default '',
+                  slice_path text not null default '',
+                  question_type text not null default '',
+                  stem text not null default '',
+                  payload text not null
+                )
+                """
+            )
+            for column in ("material_version_id", "task_name", "slice_path", "question_type"):
+                conn.execute(f"create index if not exists idx_bank_rows_{column} on bank_rows ({column}, ord)")
+            conn.execute("create table if not exists bank_index_meta (key text primary key, value text not null)")
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.index_path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _source_token(self) -> str:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return "missing"
+        return f"{BANK_INDEX_SCHEMA_VERSION}:{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}"
+
+    @staticmethod
+    def _get_meta(conn: sqlite3.Connection, key: str, default: str = "") -> str:
+        row = conn.execute("select value from bank_index_meta where key = ?", (key,)).fetchone()
+        return str(row["value"]) if row is not None else default
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, **values: Any) -> None:
+        conn.executemany(
+            "insert into bank_index_meta (key, value) values (?, ?) "
+            "on conflict(key) do update set value = excluded.value",
+            [(k, str(v)) for k, v in values.items()],
+        )
+
+    def _ensure_fresh(self, conn: sqlite3.Connection) -> None:
+        token = self._source_token()
+        if self._get_meta(conn, "source_token") != token:
+            self._rebuild(conn, token)
+
+    def _rebuild(self, conn: sqlite3.Connection, token: str) -> None:
+        conn.execute("delete from bank_rows")
+        text = self.path.read_text(encoding="utf-8") if self.path.exists() else ""
+        rows, next_id, dead = fold_bank_lines(text.splitlines())
+        self._insert_rows(conn, [self._row_values(qid, item) for qid, item in rows])
+        self._set_meta(conn, source_token=token, next_id=next_id, dead_records=dead)
+
+    @staticmethod
+    def _row_values(ord_: int, item: Any) -> Tuple[Any, ...]:
+        fields = bank_row_fields(item)
+        return (
+            ord_,
+            1 if isinstance(item, dict) else 0,
+            fields["material_version_id"],
+            fields["task_name"],
+            fields["slice_path"],
+            fields["question_type"],
+            fields["stem"],
+            json.dumps(item, ensure_ascii=False),
+        )
+
+    @staticmethod
+    def _insert_rows(conn: sqlite3.Connection, rows: Iterable[Tuple[Any, ...]]) -> None:
+        conn.executemany(
+            """
+            insert or replace into bank_rows (
+              ord, is_dict, material_version_id, task_name, slice_path, question_type, stem, payload
+            ) values (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+    def _append_record(self, conn: sqlite3.Connection, record: Any) -> bool:
+        """Append one log line; False (and a stale token) when the file changed under us."""
+        body = json.dumps(record, ensure_ascii=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        encoded = (b"\n" if size > 0 else b"") + body.encode("utf-8")
+        with self.path.open("ab") as f:
+            f.write(encoded)
+        if len(body.splitlines()) == 1 and self.path.stat().st_size == size + len(encoded):
+            self._set_meta(conn, source_token=self._source_token())
+            return True
+        # Another writer interleaved (or the row would split into several lines): rebuild lazily.
+        self._set_meta(conn, source_token="stale")
+        return False
+
+    def _write_compacted(self, conn: sqlite3.Connection, rows: List[Tuple[int, Any]], next_id: int) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text("\n".join(compacted_bank_lines(rows, next_id)), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._set_meta(conn, source_token=self._source_token(), next_id=next_id, dead_records=0)
+
+    def _note_dead(self, conn: sqlite3.Connection, added: int) -> None:
+        dead = int(self._get_meta(conn, "dead_records", "0") or 0) + added
+        self._set_meta(conn, dead_records=dead)
+        live = int(conn.execute("select count(*) as n from bank_rows").fetchone()["n"])
+        if dead >= max(BANK_COMPACT_MIN_DEAD, BANK_COMPACT_DEAD_RATIO * live):
+            self._compact(conn)
+
+    def _compact(self, conn: sqlite3.Connection) -> None:
+        rows = [(int(r["ord"]), json.loads(r["payload"])) for r in conn.execute("select ord, payload from bank_rows order by ord")]
+        self._write_compacted(conn, rows, int(self._get_meta(conn, "next_id", "0") or 0))
+
+    def compact(self) -> None:
+        """Rewrite the log with only live rows (ids unchanged)."""
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            self._compact(conn)
+
+    def append(self, item: Any) -> int:
+        """Append one row to the bank file and index it; returns its question_id."""
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            next_id = int(self._get_meta(conn, "next_id", "0") or 0)
+            if self._append_record(conn, item):
+                self._insert_rows(conn, [self._row_values(next_id, item)])
+                self._set_meta(conn, next_id=next_id + 1)
+            return next_id
+
+    def count(self) -> int:
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            return int(conn.execute("select count(*) as n from bank_rows").fetchone()["n"])
+
+    def get(self, question_id: int) -> Optional[Any]:
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            row = conn.execute("select payload from bank_rows where ord = ?", (int(question_id),)).fetchone()
+        return json.loads(row["payload"]) if row is not None else None
+
+    def get_many(self, question_ids: Iterable[int]) -> List[Tuple[int, Any]]:
+        ids = sorted({int(x) for x in question_ids})
+        out: List[Tuple[int, Any]] = []
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" for _ in chunk)
+                for row in conn.execute(f"select ord, payload from bank_rows where ord in ({marks}) order by ord", chunk):
+                    out.append((int(row["ord"]), json.loads(row["payload"])))
+        return out
+
+    def query(
+        self,
+        *,
+        material_version_id: str = "",
+        task_name: str = "",
+        slice_path: str = "",
+        question_type: str = "",
+        keyword: str = "",
+        offset: int = 0,
+        limit: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> Tuple[int, List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Filtered page of dict rows as (total, [(question_id, item)]).
+        `task_name` also matches template sub-tasks named `<task>#...`; `keyword` is a substring of the stem.
+        """
+        clauses = ["is_dict = 1"]
+        params: List[Any] = []
+        if material_version_id:
+            clauses.append("material_version_id = ?")
+            params.append(material_version_id)
+        if task_name:
+            # '$' sorts right after '#', so the range covers every `<task>#...` sub-task on the index.
+            clauses.append("(task_name = ? or (task_name >= ? and task_name < ?))")
+            params.extend([task_name, f"{task_name}#", f"{task_name}$"])
+        if slice_path:
+            clauses.append("slice_path = ?")
+            params.append(slice_path)
+        if question_type:
+            clauses.append("question_type = ?")
+            params.append(question_type)
+        if keyword:
+            clauses.append("instr(stem, ?) > 0")
+            params.append(keyword)
+        where = " and ".join(clauses)
+        order = "desc" if newest_first else "asc"
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            total = int(conn.execute(f"select count(*) as n from bank_rows where {where}", params).fetchone()["n"])
+            page_sql = f"select ord, payload from bank_rows where {where} order by ord {order}"
+            page_params = list(params)
+            if limit is not None:
+                page_sql += " limit ? offset ?"
+                page_params.extend([max(0, int(limit)), max(0, int(offset))])
+            rows = conn.execute(page_sql, page_params).fetchall()
+        return total, [(int(r["ord"]), json.loads(r["payload"])) for r in rows]
+
+    def replace(self, question_id: int, item: Any) -> Optional[Any]:
+        """Overwrite one row (appends a put record); returns the previous row, or None when the id does not exist."""
+        qid = int(question_id)
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            row = conn.execute("select payload from bank_rows where ord = ?", (qid,)).fetchone()
+            if row is None:
+                return None
+            if self._append_record(conn, {BANK_OP_KEY: "put", "question_id": qid, "item": item}):
+                self._insert_rows(conn, [self._row_values(qid, item)])
+                self._note_dead(conn, 1)
+            return json.loads(row["payload"])
+
+    def delete(self, question_ids: Iterable[int]) -> Tuple[int, int]:
+        """Remove rows by question_id (appends tombstones; other ids are unaffected). Returns (deleted, remaining)."""
+        ids = sorted({int(x) for x in question_ids})
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            marks = ",".join("?" for _ in ids)
+            doomed = [int(r["ord"]) for r in conn.execute(f"select ord from bank_rows where ord in ({marks})", ids)] if ids else []
+            deleted = 0
+            for qid in doomed:
+                if not self._append_record(conn, {BANK_OP_KEY: "delete", "question_id": qid}):
+                    break
+                conn.execute("delete from bank_rows where ord = ?", (qid,))
+                deleted += 1
+            if deleted:
+                self._note_dead(conn, 2 * deleted)
+            if deleted < len(doomed):
+                # The file changed under us; count from the rebuilt index.
+                self._ensure_fresh(conn)
+            remaining = int(conn.execute("select count(*) as n from bank_rows").fetchone()["n"])
+            return deleted, remaining
+
+    def rewrite(self, items: List[Any]) -> None:
+        """
+        Replace the whole bank with `items` (bulk edits that went through `_load_bank`).
+        Rows whose content is unchanged keep their question_id; an edited row keeps the id of the
+        old row at the same position if that row's content is gone, and everything else gets a
+        fresh id (removed ids are never handed to different questions).
+        """
+        with self._lock, self.connect() as conn:
+            self._ensure_fresh(conn)
+            old = [(int(r["ord"]), str(r["payload"])) for r in conn.execute("select ord, payload from bank_rows order by ord")]
+            next_id = int(self._get_meta(conn, "next_id", "0") or 0)
+            by_body: Dict[str, List[int]] = {}
+            for qid, body in old:
+                by_body.setdefault(body, []).append(qid)
+            assigned: List[Optional[int]] = []
+            used: set = set()
+            for item in items:
+                ids = by_body.get(json.dumps(item, ensure_ascii=False))
+                qid = ids.pop(0) if ids else None
+                if qid is not None:
+                    used.add(qid)
+                assigned.append(qid)
+            rows: List[Tuple[int, Any]] = []
+            for pos, (qid, item) in enumerate(zip(assigned, items)):
+                if qid is None and pos < len(old) and old[pos][0] not in used:
+                    qid = old[pos][0]
+                    used.add(qid)
+                if qid is None:
+                    qid = next_id
+                    next_id += 1
+                rows.append((qid, item))
+            rows.sort(key=lambda x: x[0])
+            conn.execute("delete from bank_rows")
+            self._insert_rows(conn, [self._row_values(qid, item) for qid, item in rows])
+            self._write_compacted(conn, rows, next_id)
+
+
+_STORES: Dict[str, BankStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_bank_store(bank_path: Path) -> BankStore:
+    key = str(Path(bank_path))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = BankStore(Path(bank_path))
+            _STORES[key] = store
+        return store
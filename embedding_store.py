@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts only get the in-process lock
+    fcntl = None
+
+from runtime_paths import cache_root
+
+_STORE_DTYPES = {"float16", "float32"}
+
+
+def embedding_store_enabled() -> bool:
+    return str(os.getenv("EMBEDDING_STORE_ENABLED", "1") or "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def embedding_store_root() -> Path:
+    raw = os.getenv("EMBEDDING_STORE_DIR")
+    return Path(raw).expanduser().resolve() if raw else cache_root() / "embeddings"
+
+
+def embedding_store_dtype() -> str:
+    dtype = str(os.getenv("EMBEDDING_STORE_DTYPE", "float32") or "float32").strip().lower()
+    return dtype if dtype in _STORE_DTYPES else "float32"
+
+
+def embedding_text_key(text: str) -> str:
+    """Embeddings depend only on the encoded text, so the text hash is the key."""
+    return sha256(str(text or "").encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only, content-addressed embedding cache for one model.
+
+    Vectors live in a flat `<dtype>.bin` file read through np.memmap; `<dtype>.keys` holds one
+    text hash per row. Rows are written before their keys, so a crash can only leave unreferenced
+    tail bytes, which are ignored (and overwritten) on the next open.
+    """
+
+    def __init__(self, root: Path, model_name: str, dtype: str = "float32") -> None:
+        if dtype not in _STORE_DTYPES:
+            raise ValueError(f"unsupported embedding dtype: {dtype}")
+        self.model_name = str(model_name or "")
+        self.dtype = dtype
+        self.dir = Path(root) / re.sub(r"[^0-9A-Za-z._-]+", "_", self.model_name or "default")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.dir / f"{dtype}.bin"
+        self._keys_path = self.dir / f"{dtype}.keys"
+        self._meta_path = self.dir / "meta.json"
+        self._lock_path = self.dir / f"{dtype}.lock"
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._row_count = 0
+        self._keys_offset = 0
+        self._dim = 0
+        self._mmap: Optional[np.memmap] = None
+        self._hits = 0
+        self._misses = 0
+        with self._lock:
+            self._refresh()
+
+    def _row_bytes(self) -> int:
+        return self._dim * np.dtype(self.dtype).itemsize
+
+    def _refresh(self) -> None:
+        """Pick up rows appended since the last read (possibly by another process)."""
+        if not self._dim and self._meta_path.exists():
+            try:
+                self._dim = int(json.loads(self._meta_path.read_text(encoding="utf-8")).get("dim") or 0)
+            except Exception:
+                self._dim = 0
+        if not self._dim or not self._keys_path.exists():
+            return
+        stored_rows = self._vectors_path.stat().st_size // self._row_bytes() if self._vectors_path.exists() else 0
+        with self._keys_path.open("rb") as fh:
+            fh.seek(self._keys_offset)
+            chunk = fh.read()
+        # Only consume complete lines; a partial last line is finished by its writer later.
+        complete = chunk[: chunk.rfind(b"\n") + 1] if b"\n" in chunk else b""
+        consumed = 0
+        for line in complete.splitlines(keepends=True):
+            if self._row_count >= stored_rows:
+                break
+            self._rows.setdefault(line.decode("utf-8").strip(), self._row_count)
+            self._row_count += 1
+            consumed += len(line)
+        self._keys_offset += consumed
+        self._mmap = None
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Serialise appends across processes sharing the store directory."""
+        if fcntl is None:
+            yield
+            return
+        with self._lock_path.open("a") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def _vectors(self) -> Optional[np.memmap]:
+        count = self._row_count
+        if not count:
+            return None
+        if self._mmap is None or self._mmap.shape[0] != count:
+            self._mmap = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(count, self._dim))
+        return self._mmap
+
+    def get_many(self, keys: Sequence[str]) -> Tuple[Optional[np.ndarray], List[bool]]:
+        """(float32 rows aligned with keys, found flags); rows for missing keys are zero."""
+        with self._lock:
+            if any(k not in self._rows for k in keys):
+                self._refresh()
+            found = [k in self._rows for k in keys]
+            self._hits += sum(found)
+            self._misses += len(found) - sum(found)
+            if not any(found):
+                return None, found
+            vectors = self._vectors()
+            out = np.zeros((len(keys), self._dim), dtype=np.float32)
+            for i, key in enumerate(keys):
+                if found[i]:
+                    out[i] = vectors[self._rows[key]]
+            return out, found
+
+    def put_many(self, keys: Sequence[str], vectors: Any) -> None:
+        arr = np.asarray(vectors, dtype=np.float32)
+        if arr.ndim != 2 or arr.shape[0] != len(keys):
+            raise ValueError("vectors must be a (len(keys), dim) array")
+        with self._lock, self._file_lock():
+            self._refresh()
+            if not self._dim:
+                self._dim = int(arr.shape[1])
+                self._meta_path.write_text(json.dumps({"model": self.model_name, "dim": self._dim}), encoding="utf-8")
+            elif arr.shape[1] != self._dim:
+                raise ValueError(f"embedding dim {arr.shape[1]} does not match store dim {self._dim}")
+            new_keys: Dict[str, np.ndarray] = {}
+            for key, vec in zip(keys, arr):
+                if key not in self._rows:
+                    new_keys.setdefault(key, vec)
+            if not new_keys:
+                return
+            start = self._row_count
+            if self._keys_path.exists() and self._keys_path.stat().st_size > self._keys_offset:
+                # Unreferenced tail left by an interrupted writer (we hold the file lock).
+                with self._keys_path.open("r+b") as fh:
+                    fh.truncate(self._keys_offset)
+            with self._vectors_path.open("r+b" if self._vectors_path.exists() else "wb") as fh:
+                fh.seek(start * self._row_bytes())
+                fh.write(np.asarray(list(new_keys.values()), dtype=self.dtype).tobytes())
+                fh.truncate()
+            with self._keys_path.open("ab") as fh:
+                fh.write("".join(f"{k}\n" for k in new_keys).encode("utf-8"))
+            self._refresh()
+
+    def encode(self, texts: Sequence[str], encoder: Callable[[List[str]], Any]) -> np.ndarray:
+        """Embeddings for texts; only texts missing from the store are passed to `encoder`."""
+        texts = [str(t or "") for t in texts]
+        keys = [embedding_text_key(t) for t in texts]
+        cached, found = self.get_many(keys)
+        missing = [i for i, ok in enumerate(found) if not ok]
+        if not missing:
+            return cached
+        unique: Dict[str, int] = {}
+        for i in missing:
+            unique.setdefault(keys[i], i)
+        fresh = np.asarray(encoder([texts[i] for i in unique.values()]), dtype=np.float32)
+        self.put_many(list(unique.keys()), fresh)
+        out = cached if cached is not None else np.zeros((len(texts), fresh.shape[1]), dtype=np.float32)
+        fresh_by_key = {key: fresh[j] for j, key in enumerate(unique.keys())}
+        for i in missing:
+            out[i] = fresh_by_key[keys[i]]
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "dtype": self.dtype,
+                "dim": self._dim,
+                "entries": len(self._rows),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+_STORES: Dict[Tuple[str, str, str], EmbeddingStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_embedding_store(model_name: str) -> EmbeddingStore:
+    key = (str(embedding_store_root()), str(model_name or ""), embedding_store_dtype())
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = EmbeddingStore(Path(key[0]), key[1], key[2])
+            _STORES[key] = store
+        return store
+
+
+def encode_with_store(model_name: str, texts: Sequence[str], encoder: Callable[[List[str]], Any]) -> np.ndarray:
+    """Shared entry point for the mapping and slicing pipelines; bypasses the store when disabled."""
+    if not embedding_store_enabled():
+        return np.asarray(encoder([str(t or "") for t in texts]), dtype=np.float32)
+    if not texts:
+        return np.asarray(encoder([]), dtype=np.float32)
+    try:
+        store = get_embedding_store(model_name)
+    except OSError as e:
+        print(f"⚠️ 向量缓存目录不可用，本次直接编码: {e}")
+        return np.asarray(encoder([str(t or "") for t in texts]), dtype=np.float32)
+    return store.encode(texts, encoder)
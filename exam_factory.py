@@ -1,12 +1,12 @@
 import os
 import json
+import numpy as np
 import pandas as pd
 import random
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
 from pydantic import BaseModel, Field, ValidationError
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from openai import OpenAI
 from volcenginesdkarkruntime import Ark
 from tenants_config import (
@@ -18,6 +18,7 @@ from tenants_config import (
     resolve_tenant_from_env,
 )
 from reference_loader import load_reference_questions
+from retriever_snapshot import load_retriever_snapshot, save_retriever_snapshot, snapshots_enabled
 from runtime_paths import load_primary_key_config
 
 # Load environment variables from the single primary key file.
@@ -70,14 +71,15 @@ def get_tenant_resource_paths(tenant_id: str) -> tuple[str, str, str]:
     )
 
 
-def build_knowledge_retriever(
+def resolve_knowledge_retriever_paths(
     *,
     tenant_id: Optional[str] = None,
     kb_path: Optional[str] = None,
     history_path: Optional[str] = None,
     mapping_path: Optional[str] = None,
     mapping_review_path: Optional[str] = None,
-) -> "KnowledgeRetriever":
+) -> Tuple[str, str, str, str, str]:
+    """(tenant_id, kb, history, mapping, mapping_review) as build_knowledge_retriever will load them."""
     resolved_tenant_id = str(tenant_id if tenant_id is not None else TENANT_ID).strip()
     resolved_kb_path = str(kb_path or (resolve_tenant_kb_path(resolved_tenant_id) if resolved_tenant_id else KB_PATH))
     resolved_history_path = str(
@@ -89,12 +91,44 @@ def build_knowledge_retriever(
     resolved_mapping_review_path = str(
         mapping_review_path or (tenant_mapping_review_path(resolved_tenant_id) if resolved_tenant_id else "")
     )
+    return (
+        resolved_tenant_id,
+        resolved_kb_path,
+        resolved_history_path,
+        resolved_mapping_path,
+        resolved_mapping_review_path,
+    )
+
+
+def build_knowledge_retriever(
+    *,
+    tenant_id: Optional[str] = None,
+    kb_path: Optional[str] = None,
+    history_path: Optional[str] = None,
+    mapping_path: Optional[str] = None,
+    mapping_review_path: Optional[str] = None,
+    snapshot_key: Optional[Tuple[str, ...]] = None,
+) -> "KnowledgeRetriever":
+    (
+        resolved_tenant_id,
+        resolved_kb_path,
+        resolved_history_path,
+        resolved_mapping_path,
+        resolved_mapping_review_path,
+    ) = resolve_knowledge_retriever_paths(
+        tenant_id=tenant_id,
+        kb_path=kb_path,
+        history_path=history_path,
+        mapping_path=mapping_path,
+        mapping_review_path=mapping_review_path,
+    )
     return KnowledgeRetriever(
         resolved_kb_path,
         resolved_history_path,
         resolved_mapping_path,
         tenant_id=resolved_tenant_id,
         mapping_review_path=resolved_mapping_review_path,
+        snapshot_key=snapshot_key,
     )
 
 
@@ -143,8 +177,13 @@ class KnowledgeRetriever:
         *,
         tenant_id: Optional[str] = None,
         mapping_review_path: Optional[str] = None,
+        snapshot_key: Optional[Tuple[str, ...]] = None,
     ):
-        print("Loading Knowledge Base...")
+        """
+        `snapshot_key` is the retriever cache key (tenant + path version tokens).
+        When given, a matching on-disk snapshot replaces the parse/refit below,
+        and a fresh build is written back as a snapshot for the next cold start.
+        """
         self.kb_path = str(kb_path)
         self.history_path = str(history_path)
         self.kb_data = []
@@ -168,6 +207,50 @@ class KnowledgeRetriever:
                     self.mapping_review = raw_review
             except Exception:
                 self.mapping_review = {}
+        self.selected_mapping_path = ""
+
+        use_snapshot = bool(snapshot_key) and snapshots_enabled()
+        if use_snapshot:
+            try:
+                snapshot = load_retriever_snapshot(snapshot_key)
+            except Exception as e:
+                print(f"Warning: retriever snapshot unreadable, rebuilding index ({e})")
+                snapshot = None
+            if snapshot is not None:
+                self._restore_snapshot(snapshot)
+                print(f"Loaded retriever snapshot ({len(self.kb_data)} slices, {len(self.history_df)} reference questions)")
+                return
+
+        self._build_indices()
+        if use_snapshot:
+            try:
+                save_retriever_snapshot(self, snapshot_key)
+            except Exception as e:
+                print(f"Warning: failed to write retriever snapshot ({e})")
+
+    def _restore_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        self.kb_data = snapshot["kb_data"]
+        self.mapping = snapshot["mapping"]
+        self.mapping_review = snapshot["mapping_review"]
+        self.kb_to_questions = snapshot["kb_to_questions"]
+        self.selected_mapping_path = snapshot["selected_mapping_path"]
+        self.history_df = snapshot["history_df"]
+        self.vectorizer = snapshot["vectorizer"]
+        self.tfidf_matrix = snapshot["tfidf_matrix"]
+        self.history_corpus = []
+        if self.tfidf_matrix is not None:
+            self.history_corpus = (
+                self.history_df['题干'].astype(str) + " " + self.history_df['考点'].astype(str)
+            ).tolist()
+        self.kb_vectorizer = snapshot["kb_vectorizer"]
+        self.kb_tfidf_matrix = snapshot["kb_tfidf_matrix"]
+        self.kb_corpus = [
+            f"{item.get('完整路径','')} {item.get('核心内容','')}"
+            for item in self.kb_data
+        ]
+
+    def _build_indices(self) -> None:
+        print("Loading Knowledge Base...")
         with open(self.kb_path, 'r', encoding='utf-8') as f:
             for line in f:
                 item = json.loads(line)
@@ -225,6 +308,7 @@ class KnowledgeRetriever:
 
         selected_mapping_path = next((p for p in mapping_candidates if os.path.exists(p)), None)
         if selected_mapping_path:
+            self.selected_mapping_path = selected_mapping_path
             with open(selected_mapping_path, "r", encoding="utf-8") as f:
                 self.mapping = json.load(f)
             total_candidates = 0
@@ -324,56 +408,72 @@ class KnowledgeRetriever:
         ranked = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)
         return [q_type for q_type, cnt in ranked if cnt > 0]
 
+    def _history_example(self, row) -> Dict[str, Any]:
+        return {
+            "题干": row['题干'],
+            "选项": {
+                "A": row['选项1'], "B": row['选项2'], "C": row['选项3'], "D": row['选项4']
+            },
+            "正确答案": row['正确答案'],
+            "解析": row['解析'],
+            "难度": row['难度值']
+        }
+
     def get_similar_examples(self, query_text, k=3, question_type=None):
+        return self.get_similar_examples_batch([query_text], k=k, question_type=question_type)[0]
+
+    def get_similar_examples_batch(self, query_texts: List[str], k: int = 3, question_type=None) -> List[List[Dict[str, Any]]]:
+        """Batched `get_similar_examples`: one sparse product scores every query."""
         if self.history_df.empty or self.vectorizer is None or self.tfidf_matrix is None:
-            return []
-        query_vec = self.vectorizer.transform([query_text])
-        similarities = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
-        # Get more candidates to account for filtering
-        top_candidates = similarities.argsort()[-(k*5):][::-1]  # Increased from k*3 to k*5 for type filtering
-        
-        examples = []
-        for idx in top_candidates:
-            if len(examples) >= k:
-                break
-            row = self.history_df.iloc[idx]
-            # Skip invalid examples
-            if not self._is_valid_example(row):
-                continue
-            # Skip if question type doesn't match
-            if not self._matches_question_type(row, question_type):
-                continue
-            examples.append({
-                "题干": row['题干'],
-                "选项": {
-                    "A": row['选项1'], "B": row['选项2'], "C": row['选项3'], "D": row['选项4']
-                },
-                "正确答案": row['正确答案'],
-                "解析": row['解析'],
-                "难度": row['难度值']
-            })
-        return examples
+            return [[] for _ in query_texts]
+        scores = _score_queries(self.vectorizer, self.tfidf_matrix, query_texts)
+        results = []
+        for row_scores in scores:
+            examples = []
+            # Get more candidates to account for filtering
+            for idx in _top_k_desc(row_scores, k * 5):  # Increased from k*3 to k*5 for type filtering
+                if len(examples) >= k:
+                    break
+                row = self.history_df.iloc[idx]
+                # Skip invalid examples
+                if not self._is_valid_example(row):
+                    continue
+                # Skip if question type doesn't match
+                if not self._matches_question_type(row, question_type):
+                    continue
+                examples.append(self._history_example(row))
+            results.append(examples)
+        return results
 
     def is_similar_to_history(self, text: str, threshold: float = 0.9, top_k: int = 3):
         """Check if text is highly similar to existing history questions."""
         if not text:
             return False, None, None
-        if self.history_df.empty or self.vectorizer is None or self.tfidf_matrix is None:
-            return False, None, None
+        return self.is_similar_to_history_batch([text], threshold=threshold)[0]
+
+    def is_similar_to_history_batch(self, texts: List[str], threshold: float = 0.9) -> List[Tuple[bool, Optional[float], Optional[str]]]:
+        """Batched `is_similar_to_history`; returns one (is_dup, best_score, matched_stem) per text."""
+        empty = (False, None, None)
+        if self.history_df.empty or self.vectorizer is None or self.tfidf_matrix is None or self.tfidf_matrix.shape[0] == 0:
+            return [empty for _ in texts]
+        live = [i for i, t in enumerate(texts) if t]
+        results = [empty for _ in texts]
+        if not live:
+            return results
         try:
-            query_vec = self.vectorizer.transform([text])
-            similarities = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
-            top_idx = similarities.argsort()[::-1]
-            if not len(top_idx):
-                return False, None, None
-            best_idx = top_idx[0]
-            best_score = similarities[best_idx]
-            if best_score >= threshold:
-                row = self.history_df.iloc[best_idx]
-                return True, best_score, str(row.get('题干', ''))
-            return False, best_score, None
+            scores = _score_queries(self.vectorizer, self.tfidf_matrix, [texts[i] for i in live])
         except Exception:
-            return False, None, None
+            return results
+        best_idx = scores.argmax(axis=1)
+        for pos, i in enumerate(live):
+            idx = int(best_idx[pos])
+            best_score = float(scores[pos, idx])
+            if best_score >= threshold:
+                row = self.history_df.iloc[idx]
+                results[i] = (True, best_score, str(row.get('题干', '')))
+            else:
+                results[i] = (False, best_score, None)
+        return results
     
     def get_examples_by_knowledge_point(self, kb_chunk, k=3, question_type=None):
         """Get examples that match this knowledge point."""
@@ -406,15 +506,7 @@ class KnowledgeRetriever:
                 # Skip if question type doesn't match
                 if not self._matches_question_type(row, question_type):
                     continue
-                examples.append({
-                    "题干": row['题干'],
-                    "选项": {
-                        "A": row['选项1'], "B": row['选项2'], "C": row['选项3'], "D": row['选项4']
-                    },
-                    "正确答案": row['正确答案'],
-                    "解析": row['解析'],
-                    "难度": row['难度值']
-                })
+                examples.append(self._history_example(row))
             return examples
         else:
             # No mapping -> no examples
@@ -436,26 +528,54 @@ class KnowledgeRetriever:
     def get_related_kb_chunks(self, query_text: str, k: int = 5, exclude_paths=None):
         if not query_text:
             return []
-        if exclude_paths is None:
-            exclude_paths = set()
-        else:
-            exclude_paths = set(exclude_paths)
+        return self.get_related_kb_chunks_batch([query_text], k=k, exclude_paths=exclude_paths)[0]
+
+    def get_related_kb_chunks_batch(self, query_texts: List[str], k: int = 5, exclude_paths=None) -> List[List[Dict]]:
+        """Batched `get_related_kb_chunks`; empty queries yield empty lists."""
+        exclude_paths = set(exclude_paths or [])
+        results: List[List[Dict]] = [[] for _ in query_texts]
+        live = [i for i, t in enumerate(query_texts) if t]
+        if not live or not self.kb_data:
+            return results
         try:
-            query_vec = self.kb_vectorizer.transform([query_text])
-            sims = cosine_similarity(query_vec, self.kb_tfidf_matrix).flatten()
-            top_idx = sims.argsort()[::-1]
-            results = []
-            for idx in top_idx:
-                if len(results) >= k:
+            scores = _score_queries(self.kb_vectorizer, self.kb_tfidf_matrix, [query_texts[i] for i in live])
+        except Exception:
+            return results
+        # Enough headroom that skipping excluded slices can never starve the top-k.
+        n_excluded = sum(1 for c in self.kb_data if c.get("完整路径", "") in exclude_paths) if exclude_paths else 0
+        for pos, i in enumerate(live):
+            chunks = []
+            for idx in _top_k_desc(scores[pos], k + n_excluded):
+                if len(chunks) >= k:
                     break
                 chunk = self.kb_data[idx]
-                path = chunk.get("完整路径", "")
-                if path in exclude_paths:
+                if chunk.get("完整路径", "") in exclude_paths:
                     continue
-                results.append(chunk)
-            return results
-        except Exception:
-            return []
+                chunks.append(chunk)
+            results[i] = chunks
+        return results
+
+
+def _score_queries(vectorizer: TfidfVectorizer, matrix, query_texts: List[str]) -> np.ndarray:
+    """
+    Cosine scores of every query against every row of `matrix`, shape (queries, rows).
+    TfidfVectorizer output is already L2-normalised, so one sparse product is the cosine.
+    """
+    query_vecs = vectorizer.transform(list(query_texts))
+    return np.asarray((matrix @ query_vecs.T).T.todense())
+
+
+def _top_k_desc(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via argpartition instead of a full sort."""
+    n = scores.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
 
 # --- Multi-Agent System ---
 
@@ -1,4 +1,6 @@
+import asyncio
 import contextvars
+import inspect
 import math
 import os
 import json
@@ -9,21 +11,36 @@ import threading
 import time
 import uuid
 from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Annotated, List, Dict, Optional, TypedDict, Union, Any, Tuple
+from typing import Annotated, Callable, List, Dict, Optional, TypedDict, Union, Any, Tuple
 from typing_extensions import TypedDict
 
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, Field
-from openai import OpenAI
-from volcenginesdkarkruntime import Ark
-
 from hard_rules import (
     replace_single_quotes_in_final_json,
     sanitize_media_payload,
-    validate_media_rules,
+    validate_media_issues,
+)
+
+from llm_clients import (
+    get_ark_client,
+    get_async_ark_client,
+    get_async_openai_client,
+    get_openai_client,
+    order_url_candidates,
+    remember_working_url,
 )
+from llm_rate_limiter import get_llm_limiter
+from llm_response_cache import get_llm_response_cache, llm_cache_key, llm_cache_mode
+from glossary_artifact import load_glossary
+from slice_context_cache import SHARED_SLICE_CONTEXT_CACHE, slice_content_hash, slice_context_cache_for
+from term_matcher import TermMatcher, normalize_term_text
+from text_rules import RuleSet, TextRule, keyword_rules
 
 # Reuse existing config loading
 from exam_factory import (
@@ -49,6 +66,7 @@ from exam_factory import (
     ARK_PROJECT_NAME,
     KnowledgeRetriever,
     build_knowledge_retriever,
+    resolve_knowledge_retriever_paths,
 )
 
 MAX_QUESTION_RETRY_ROUNDS = 3
@@ -79,6 +97,19 @@ def detach_question_wall_clock_budget(token: Optional[contextvars.Token]) -> Non
         _QUESTION_WALL_CLOCK.reset(token)
 
 
+# 由 admin_api 与单题墙钟预算一并设置：锁词检测使用该租户的专有名词库（未设置时用平台共享库）。
+_GLOSSARY_TENANT: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("glossary_tenant", default=None)
+
+
+def attach_glossary_tenant(tenant_id: Optional[str]) -> contextvars.Token:
+    return _GLOSSARY_TENANT.set(str(tenant_id or "").strip() or None)
+
+
+def detach_glossary_tenant(token: Optional[contextvars.Token]) -> None:
+    if token is not None:
+        _GLOSSARY_TENANT.reset(token)
+
+
 def _question_wall_clock_cap_http_timeout(base_timeout_seconds: int) -> tuple[int, Optional[str]]:
     """
     按单题墙钟预算收紧本次 HTTP 调用的 timeout（秒）。
@@ -255,23 +286,24 @@ BLANK_BRACKET = "（\u3000）"
 ENDING_PUNCTUATION_CHARS = "。．？！?!；;：:，,、"
 _STEM_REWRITE_CACHE: Dict[str, str] = {}
 _STEM_AFFIRMATIVE_JUDGE_CACHE: Dict[str, bool] = {}
+_EMPTY_BRACKET_RE = re.compile(r"\s*[(（]\s*[)）]\s*")
+_PLACEHOLDER_BRACKET_RE = re.compile(r"[(（][)）]|[(（][ \s\u3000]*[)）]")
+_SPACED_BLANK_BRACKET_RE = re.compile(r"\s" + re.escape(BLANK_BRACKET) + r"|" + re.escape(BLANK_BRACKET) + r"\s")
 
 def normalize_blank_brackets(text: str) -> str:
     if not isinstance(text, str) or not text:
         return text
     # Normalize any empty bracket (half/full-width space inside) to Chinese format with full-width space only
-    def _repl(m: "re.Match") -> str:
-        return BLANK_BRACKET
-    return re.sub(r"\s*[(（]\s*[)）]\s*", _repl, text)
+    return _EMPTY_BRACKET_RE.sub(BLANK_BRACKET, text)
 
 def has_invalid_blank_bracket(text: str) -> bool:
     """Check if any placeholder bracket (empty or whitespace-only) is not exactly BLANK_BRACKET. Used for options."""
     if not isinstance(text, str) or not text:
         return False
-    for match in re.finditer(r"[(（][)）]|[(（][ \s\u3000]*[)）]", text):
+    for match in _PLACEHOLDER_BRACKET_RE.finditer(text):
         if match.group(0) != BLANK_BRACKET:
             return True
-    if re.search(r"\s" + re.escape(BLANK_BRACKET) + r"|" + re.escape(BLANK_BRACKET) + r"\s", text):
+    if _SPACED_BLANK_BRACKET_RE.search(text):
         return True
     return False
 
@@ -280,7 +312,7 @@ def has_invalid_ending_blank_bracket(text: str) -> bool:
     """Only the bracket at the end of the stem must have exactly one full-width space (U+3000) inside—not zero, not multiple; other brackets are not constrained."""
     if not isinstance(text, str) or not text:
         return False
-    matches = list(re.finditer(r"[(（][)）]|[(（][ \s\u3000]*[)）]", text))
+    matches = list(_PLACEHOLDER_BRACKET_RE.finditer(text))
     if not matches:
         return False
     last = matches[-1]
@@ -305,6 +337,9 @@ def has_forbidden_symbol_before_ending_blank_bracket(text: str) -> bool:
     return prev in ENDING_PUNCTUATION_CHARS or prev.isspace()
 
 
+_HIERARCHY_OPTION_PREFIX_RE = re.compile(r"^[A-Ha-h][\.．、:：]\s*")
+
+
 def detect_option_hierarchy_conflict(
     final_json: Dict[str, Any],
     kb_context: str,
@@ -331,7 +366,7 @@ def detect_option_hierarchy_conflict(
         if not raw:
             continue
         # Remove leading letter + punctuation, similar to DeterministicFilter
-        clean = re.sub(r"^[A-Ha-h][\.．、:：]\s*", "", raw).strip()
+        clean = _HIERARCHY_OPTION_PREFIX_RE.sub("", raw).strip()
         option_texts.append(clean)
         option_labels.append(chr(64 + idx))  # 1->A, 2->B...
 
@@ -443,13 +478,14 @@ def _choice_tail_unit_label(unit_text: str) -> str:
     return mapping.get(raw, raw)
 
 
+_CHOICE_TAIL_UNIT_RE = re.compile(rf"{re.escape(BLANK_BRACKET)}\s*([A-Za-z%％㎡\u4e00-\u9fff]{{1,8}})\s*[。．？！?!；;：:，,、\s]*$")
+_OPTIONAL_ENDING_PUNCT_TAIL_RE = re.compile(rf"[{re.escape(ENDING_PUNCTUATION_CHARS)}\s]*$")
+
+
 def _normalize_choice_tail_unit(text: str) -> str:
     if not isinstance(text, str) or not text:
         return text
-    unit_match = re.search(
-        rf"{re.escape(BLANK_BRACKET)}\s*([A-Za-z%％㎡\u4e00-\u9fff]{{1,8}})\s*[。．？！?!；;：:，,、\s]*$",
-        text,
-    )
+    unit_match = _CHOICE_TAIL_UNIT_RE.search(text)
     if not unit_match:
         return text
     raw_unit = unit_match.group(1).strip()
@@ -457,7 +493,7 @@ def _normalize_choice_tail_unit(text: str) -> str:
         return text
     normalized_unit = _choice_tail_unit_label(raw_unit)
     prefix = text[: unit_match.start()]
-    prefix = re.sub(rf"[{re.escape(ENDING_PUNCTUATION_CHARS)}\s]*$", "", prefix)
+    prefix = _OPTIONAL_ENDING_PUNCT_TAIL_RE.sub("", prefix)
     return f"{prefix}{normalized_unit}{BLANK_BRACKET}。"
 
 
@@ -507,6 +543,9 @@ def _is_affirmative_stem_by_llm(stem: str, target_type: str) -> bool:
     return result
 
 
+_QUESTION_MARK_TAIL_RE = re.compile(r"[？?]\s*$")
+
+
 def _should_rewrite_stem_with_llm(stem: str, target_type: str) -> bool:
     """
     Decide whether stem rewrite should run.
@@ -522,11 +561,16 @@ def _should_rewrite_stem_with_llm(stem: str, target_type: str) -> bool:
     s = str(stem or "").strip()
     if not s:
         return False
-    if re.search(r"[？?]\s*$", s):
+    if _QUESTION_MARK_TAIL_RE.search(s):
         return True
     return not _is_affirmative_stem_by_llm(s, target_type)
 
 
+_FENCE_OPEN_RE = re.compile(r"^```[\w-]*\s*")
+_FENCE_CLOSE_RE = re.compile(r"\s*```$")
+_BLANK_BRACKET_RE = re.compile(rf"{re.escape(BLANK_BRACKET)}")
+
+
 def _rewrite_stem_with_llm(stem: str, target_type: str) -> str:
     """
     Rewrite interrogative stem into natural declarative wording via LLM.
@@ -572,10 +616,10 @@ def _rewrite_stem_with_llm(stem: str, target_type: str) -> str:
             timeout=20,
         )
         rewritten = str(content or "").strip()
-        rewritten = re.sub(r"^```[\w-]*\s*", "", rewritten)
-        rewritten = re.sub(r"\s*```$", "", rewritten)
-        rewritten = re.sub(rf"{re.escape(BLANK_BRACKET)}", "", rewritten)
-        rewritten = re.sub(r"[。．？！?!；;：:，,、\s]+$", "", rewritten).strip()
+        rewritten = _FENCE_OPEN_RE.sub("", rewritten)
+        rewritten = _FENCE_CLOSE_RE.sub("", rewritten)
+        rewritten = _BLANK_BRACKET_RE.sub("", rewritten)
+        rewritten = _JUDGEMENT_CORE_TAIL_RE.sub("", rewritten).strip()
         final_text = rewritten if rewritten else raw
     except Exception:
         final_text = raw
@@ -583,16 +627,15 @@ def _rewrite_stem_with_llm(stem: str, target_type: str) -> str:
     return final_text
 
 
+_JUDGMENT_INTERROGATIVE_TAIL_RE = re.compile(r"(是否(正确|错误)|是不是(正确|错误)|对不对|吗|么)\s*$")
+_QUOTED_PHRASE_RE = re.compile(r"[「\"'][^」\"']+[」\"']")
+_LONG_HAN_RUN_RE = re.compile(r"[\u4e00-\u9fff]{8,}")
+
+
 def _has_judgment_interrogative_tail(stem: str) -> bool:
     if not isinstance(stem, str):
         return False
-    s = stem.strip()
-    return bool(
-        re.search(
-            r"(是否(正确|错误)|是不是(正确|错误)|对不对|吗|么)\s*$",
-            s,
-        )
-    )
+    return bool(_JUDGMENT_INTERROGATIVE_TAIL_RE.search(stem.strip()))
 
 def _readability_reason_grounded_in_candidate(
     bad_item: Dict[str, Any], candidate_sentences: List[Dict[str, Any]]
@@ -615,15 +658,14 @@ def _readability_reason_grounded_in_candidate(
     if not reason_text:
         return True
     # Quoted phrases in reason must appear in this candidate (no 张冠李戴/hallucination)
-    import re
-    quoted = re.findall(r"[「\"'][^」\"']+[」\"']", reason_text)
+    quoted = _QUOTED_PHRASE_RE.findall(reason_text)
     for q in quoted:
         inner = q[1:-1].strip()
         if len(inner) >= 4 and inner not in candidate_text:
             return False
     # Long substantive runs (8+ chars) in reason must appear in candidate; skip meta terms
     meta_stop = ("不自然", "拗口", "过长", "结构松散", "语义", "逻辑", "通顺", "流畅", "读起来", "表达", "定语", "句式", "牵强", "困惑")
-    for m in re.finditer(r"[\u4e00-\u9fff]{8,}", reason_text):
+    for m in _LONG_HAN_RUN_RE.finditer(reason_text):
         phrase = m.group(0)
         if phrase in candidate_text:
             continue
@@ -632,44 +674,64 @@ def _readability_reason_grounded_in_candidate(
         return False
     return True
 
+_LEADING_BLANK_BRACKET_RE = re.compile(r"^" + re.escape(BLANK_BRACKET))
+_ENDING_PUNCT_TAIL_RE = re.compile(rf"[{re.escape(ENDING_PUNCTUATION_CHARS)}\s]+$")
+_SENTENCE_END_RE = re.compile(r"[。．？！?!]\s*$")
+_JUDGEMENT_CORE_TAIL_RE = re.compile(r"[。．？！?!；;：:，,、\s]+$")
+
+
 def enforce_question_bracket_and_punct(text: str, target_type: str) -> str:
     if not isinstance(text, str) or not text:
         return text
     t = normalize_blank_brackets(text.strip())
     # Remove leading bracket if present
-    t = re.sub(r"^" + re.escape(BLANK_BRACKET), "", t).lstrip()
+    t = _LEADING_BLANK_BRACKET_RE.sub("", t).lstrip()
     if target_type in ["单选题", "多选题"]:
         if BLANK_BRACKET not in t:
-            t = re.sub(rf"[{re.escape(ENDING_PUNCTUATION_CHARS)}\s]*$", "", t)
+            t = _ENDING_PUNCT_TAIL_RE.sub("", t)
             t = f"{t}{BLANK_BRACKET}"
         idx = t.rfind(BLANK_BRACKET)
         if idx >= 0:
             prefix = str(t[:idx] or "").strip()
             suffix = str(t[idx + len(BLANK_BRACKET):] or "")
-            suffix = re.sub(rf"[{re.escape(ENDING_PUNCTUATION_CHARS)}\s]+$", "", suffix).strip()
+            suffix = _ENDING_PUNCT_TAIL_RE.sub("", suffix).strip()
             stem_raw = f"{prefix}{suffix}".strip()
             stem_part = _rewrite_stem_with_llm(stem_raw, target_type)
-            stem_part = re.sub(rf"[{re.escape(ENDING_PUNCTUATION_CHARS)}\s]+$", "", str(stem_part or "")).strip()
+            stem_part = _ENDING_PUNCT_TAIL_RE.sub("", str(stem_part or "")).strip()
             if not stem_part:
                 stem_part = stem_raw
             t = f"{stem_part}{BLANK_BRACKET}。"
-        elif not re.search(r"[。．？！?!]\s*$", t):
+        elif not _SENTENCE_END_RE.search(t):
             t = f"{t}。"
     elif target_type == "判断题":
         if BLANK_BRACKET not in t:
-            t = re.sub(rf"[{re.escape(ENDING_PUNCTUATION_CHARS)}\s]*$", "", t)
+            t = _ENDING_PUNCT_TAIL_RE.sub("", t)
             t = f"{t}{BLANK_BRACKET}"
         idx = t.rfind(BLANK_BRACKET)
         core_raw = (t[:idx] if idx >= 0 else t).strip()
         core = _rewrite_stem_with_llm(core_raw, target_type)
-        core = re.sub(r"[。．？！?!；;：:，,、\s]+$", "", str(core or "")).strip()
+        core = _JUDGEMENT_CORE_TAIL_RE.sub("", str(core or "")).strip()
         t = f"{core}{BLANK_BRACKET}" if core else BLANK_BRACKET
     return t
 
-def validate_question_template_semantics(question: str, target_type: str) -> List[str]:
+def _validation_issue(issue_code: str, field: str, message: str, severity: str = "error") -> "ValidationIssue":
+    return {
+        "issue_code": issue_code,
+        "severity": severity,
+        "field": field,
+        "message": message,
+        "fix_hint": f"请修复问题：{message}",
+    }
+
+
+def _issue_messages(issues: List["ValidationIssue"]) -> List[str]:
+    return [str(issue.get("message", "")) for issue in issues]
+
+
+def validate_question_template_semantics_issues(question: str, target_type: str) -> List["ValidationIssue"]:
     """Check question stem meets basic semantics: declarative, proper punctuation, (　) placeholder.
     Does NOT require a single fixed ending phrase; recommend but do not enforce '以下表述正确/错误的是（　）。' etc."""
-    issues: List[str] = []
+    issues: List["ValidationIssue"] = []
     q = (question or "").strip()
     if not q or target_type not in ["单选题", "多选题", "判断题"]:
         return issues
@@ -681,67 +743,81 @@ def validate_question_template_semantics(question: str, target_type: str) -> Lis
     # True/False: stem must contain conclusion anchor 正确/错误 (Judge deterministic_filter)
     elif target_type == "判断题":
         stem_no_blank = q.replace(BLANK_BRACKET, "")
-        stem_no_blank = re.sub(r"[。．？！?!；;：:，,、\s]+$", "", stem_no_blank).strip()
+        stem_no_blank = _JUDGEMENT_CORE_TAIL_RE.sub("", stem_no_blank).strip()
         if "正确" not in q and "错误" not in q:
-            issues.append("判断题题干需包含结论锚点（正确或错误）")
+            issues.append(_validation_issue("FMT_ASK_TEMPLATE", "question", "判断题题干需包含结论锚点（正确或错误）"))
         if _has_judgment_interrogative_tail(stem_no_blank):
-            issues.append("判断题题干应使用肯定陈述句，避免“是否正确/对不对”等疑问句")
+            issues.append(_validation_issue("FMT_ASK_TEMPLATE", "question", "判断题题干应使用肯定陈述句，避免“是否正确/对不对”等疑问句"))
     return issues
 
 
-def validate_writer_format(question: str, options: List[str], answer, target_type: str) -> List[str]:
-    issues = []
+def validate_question_template_semantics(question: str, target_type: str) -> List[str]:
+    return _issue_messages(validate_question_template_semantics_issues(question, target_type))
+
+
+_OPTION_TRAILING_PUNCT_RE = re.compile(r"[。！？；;：:，,、]\s*$")
+_SINGLE_ANSWER_RE = re.compile(r"[A-Da-d]")
+_MULTI_ANSWER_RE = re.compile(r"[A-Da-d]{2,4}")
+_JUDGE_ANSWER_RE = re.compile(r"[ABab]")
+
+
+def validate_writer_format_issues(question: str, options: List[str], answer, target_type: str) -> List["ValidationIssue"]:
+    issues: List["ValidationIssue"] = []
     q = question or ""
     opt_count = len(options or []) if isinstance(options, list) else 0
     if target_type in ["单选题", "多选题", "判断题"]:
         if BLANK_BRACKET not in q:
-            issues.append("题干缺少标准占位括号（须为全角括号且括号内有且仅有一个全角空格）")
+            issues.append(_validation_issue("FMT_STEM_BLANK", "question", "题干缺少标准占位括号（须为全角括号且括号内有且仅有一个全角空格）"))
     if target_type in ["单选题", "多选题"] and opt_count != 4:
-        issues.append("选择题选项数量必须为4个")
+        issues.append(_validation_issue("FMT_OPTION_COUNT", "options", "选择题选项数量必须为4个"))
     if target_type == "判断题" and opt_count != 2:
-        issues.append("判断题选项数量必须为2个")
+        issues.append(_validation_issue("FMT_OPTION_COUNT", "options", "判断题选项数量必须为2个"))
     # Judge DeterministicFilter: 选择题题干作答占位括号（ ）只能出现一次
     if target_type in ["单选题", "多选题"] and q.count(BLANK_BRACKET) > 1:
-        issues.append("选择题题干作答占位括号（ ）只能出现一次")
+        issues.append(_validation_issue("FMT_STEM_BLANK", "question", "选择题题干作答占位括号（ ）只能出现一次"))
     if target_type in ["单选题", "多选题"]:
         if not q.endswith("。"):
-            issues.append("选择题题干未以句号结尾")
+            issues.append(_validation_issue("FMT_STEM_END_PUNCT", "question", "选择题题干未以句号结尾"))
     if target_type in ["单选题", "多选题", "判断题"]:
         if has_invalid_ending_blank_bracket(q):
-            issues.append("题干结尾括号中间必须有且仅有一个全角空格（不能多）")
+            issues.append(_validation_issue("FMT_BRACKET", "question", "题干结尾括号中间必须有且仅有一个全角空格（不能多）"))
         if has_forbidden_symbol_before_ending_blank_bracket(q):
-            issues.append("题干结尾作答括号前不能有任何符号或空格")
-    issues.extend(validate_question_template_semantics(q, target_type))
+            issues.append(_validation_issue("FMT_BRACKET", "question", "题干结尾作答括号前不能有任何符号或空格"))
+    issues.extend(validate_question_template_semantics_issues(q, target_type))
     # Validate options bracket formatting if present
     for opt in options or []:
         opt_str = str(opt)
         if has_invalid_blank_bracket(opt_str):
-            issues.append("选项括号格式不规范")
+            issues.append(_validation_issue("FMT_BRACKET", "options", "选项括号格式不规范"))
             break
     # Trailing punctuation check
     for opt in options or []:
-        if re.search(r"[。！？；;：:，,、]\s*$", str(opt)):
-            issues.append("选项末尾含标点")
+        if _OPTION_TRAILING_PUNCT_RE.search(str(opt)):
+            issues.append(_validation_issue("FMT_OPTION_END_PUNCT", "options", "选项末尾含标点"))
             break
     # Validate answer format
     if target_type == "判断题":
         if not (isinstance(answer, str) and answer.strip().upper() in ["A", "B"]):
-            issues.append("判断题答案格式应为A/B")
+            issues.append(_validation_issue("ANS_FORMAT", "answer", "判断题答案格式应为A/B"))
     elif target_type == "单选题":
-        if not (isinstance(answer, str) and re.fullmatch(r"[A-Da-d]", answer.strip())):
-            issues.append("单选题答案格式应为单个字母")
+        if not (isinstance(answer, str) and _SINGLE_ANSWER_RE.fullmatch(answer.strip())):
+            issues.append(_validation_issue("ANS_FORMAT", "answer", "单选题答案格式应为单个字母"))
     elif target_type == "多选题":
         if isinstance(answer, list):
-            if not answer or not all(re.fullmatch(r"[A-Da-d]", str(x).strip()) for x in answer):
-                issues.append("多选题答案列表格式不规范")
+            if not answer or not all(_SINGLE_ANSWER_RE.fullmatch(str(x).strip()) for x in answer):
+                issues.append(_validation_issue("ANS_FORMAT", "answer", "多选题答案列表格式不规范"))
         elif isinstance(answer, str):
-            if not re.fullmatch(r"[A-Da-d]{2,4}", answer.strip()):
-                issues.append("多选题答案格式应为多个字母")
+            if not _MULTI_ANSWER_RE.fullmatch(answer.strip()):
+                issues.append(_validation_issue("ANS_FORMAT", "answer", "多选题答案格式应为多个字母"))
         else:
-            issues.append("多选题答案格式不规范")
+            issues.append(_validation_issue("ANS_FORMAT", "answer", "多选题答案格式不规范"))
     return issues
 
 
+def validate_writer_format(question: str, options: List[str], answer, target_type: str) -> List[str]:
+    return _issue_messages(validate_writer_format_issues(question, options, answer, target_type))
+
+
 _SCENARIO_ROLE_TOKENS = (
     "经纪人", "客户", "业主", "买方", "卖方", "门店", "带看", "签约", "委托", "成交",
     "过户", "网签", "咨询", "接待", "培训", "入职", "看房", "交易",
@@ -752,6 +828,10 @@ _SCENARIO_ACTION_TOKENS = (
 )
 
 
+_SCENARIO_ROLE_NAME_RE = re.compile(r"(经纪人|客户|业主|买方|卖方)[\u4e00-\u9fff]{1,3}")
+_CLAUSE_SPLIT_RE = re.compile(r"[，。；;！？?!]")
+
+
 def _contains_scenario_anchor(text: str) -> bool:
     """
     判断题干是否包含可识别的业务场景锚点（角色/动作）。
@@ -764,7 +844,7 @@ def _contains_scenario_anchor(text: str) -> bool:
     if has_role and has_action:
         return True
     # 兼容“角色+姓名+动作”场景
-    if re.search(r"(经纪人|客户|业主|买方|卖方)[\u4e00-\u9fff]{1,3}", t) and has_action:
+    if _SCENARIO_ROLE_NAME_RE.search(t) and has_action:
         return True
     return False
 
@@ -776,7 +856,7 @@ def _has_redundant_stem_repetition(text: str) -> bool:
     t = str(text or "").strip()
     if not t:
         return False
-    parts = [re.sub(r"\s+", "", p) for p in re.split(r"[，。；;！？?!]", t) if str(p).strip()]
+    parts = [_WHITESPACE_RE.sub("", p) for p in _CLAUSE_SPLIT_RE.split(t) if str(p).strip()]
     long_parts = [p for p in parts if len(p) >= 8]
     if len(long_parts) < 2:
         return False
@@ -795,6 +875,9 @@ def _has_redundant_stem_repetition(text: str) -> bool:
     return False
 
 
+_DRAFT_OPTION_PREFIX_RE = re.compile(r"^\s*[A-Da-d][\.．、:：\s\)）]+")
+
+
 def _detect_option_prefix_in_draft(draft: Dict[str, Any]) -> List[str]:
     """Check raw draft options for A./B./C./D. prefix (Judge 4.6). Returns issue messages."""
     issues: List[str] = []
@@ -807,7 +890,7 @@ def _detect_option_prefix_in_draft(draft: Dict[str, Any]) -> List[str]:
         s = str(opt or "").strip()
         if not s:
             continue
-        if re.match(r"^\s*[A-Da-d][\.．、:：\s\)）]+", s):
+        if _DRAFT_OPTION_PREFIX_RE.match(s):
             issues.append("选项内容前禁止再写 A/B/C/D 标签，请仅填写选项正文")
             break
     return issues
@@ -825,6 +908,43 @@ NEGATIVE_EVENT_KEYWORDS = (
     "违法", "违规", "违纪", "事故", "骗贷", "挪用", "处罚", "追责", "黑线", "红线", "搅单", "私单", "伪造", "篡改",
 )
 
+_NON_PERSON_SUFFIX = r"(?!公司|银行|机构|单位|部门|分行|支行|小区|街道|路|号|市|区|县|省)"
+_SURNAME_HONORIFIC = rf"[{COMMON_SURNAMES}][\u4e00-\u9fff]{{0,1}}(女士|先生)"
+
+# 人名规范规则表：启动时编译一次；无违规文本只需一次合并扫描。
+_NAME_STYLE_RULES = RuleSet(
+    "name_style",
+    [
+        TextRule("honorific", _SURNAME_HONORIFIC, "使用了“姓+女士/先生”"),
+        # 小+常见姓氏（如小张/小李）——避免误伤“小区/小镇/小路”等非人名
+        TextRule("xiao_surname", rf"小(?![区镇路巷学型])[{COMMON_SURNAMES}]", "使用了“小+姓氏”称谓"),
+        *[TextRule(f"funny_name:{name}", re.escape(name), f"使用了不规范姓名：{name}") for name in sorted(FORBIDDEN_FUNNY_NAMES)],
+        TextRule("pet_name", r"(小宝|贝贝|宝宝)", "使用了小名/乳名"),
+    ],
+)
+_ANONYMOUS_PERSON_RULES = RuleSet(
+    "anonymous_person",
+    [
+        # 典型“张某/王某”类匿名指代
+        TextRule("surname_mou", rf"[{COMMON_SURNAMES}]某(?:某)?{_NON_PERSON_SUFFIX}"),
+        # “某某”匿名指代（排除明显组织/地点后缀）
+        TextRule("moumou", rf"某某{_NON_PERSON_SUFFIX}"),
+    ],
+)
+_JUDGEMENT_STEM_RULES = RuleSet(
+    "judgement_stem",
+    [
+        TextRule("which_statement", r"(以下|下列).{0,8}(表述|说法|选项).{0,12}(正确|错误)"),
+        TextRule("which_about", r"(以下|下列).{0,8}关于.{0,20}(正确|错误)"),
+        TextRule("judge", r"判断.{0,30}(正确|错误|是否合法|是否合规)"),
+        TextRule("conduct", r"(做法|行为|说法).{0,12}(正确|错误|是否合法|是否合规)"),
+        TextRule("whether", r"是否(正确|错误|合法|合规|违规|成立)"),
+    ],
+)
+_NEGATIVE_EVENT_RULES = RuleSet("negative_event", keyword_rules("negative_event", NEGATIVE_EVENT_KEYWORDS))
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
 def _broker_client_terminology_issues(text: str) -> List[str]:
     """
     检测业务叙述中不符合经纪一线习惯的买方指称。
@@ -842,54 +962,22 @@ def _broker_client_terminology_issues(text: str) -> List[str]:
 def _name_violations_in_text(text: str) -> List[str]:
     if not text:
         return []
-    issues = []
-    # 姓+女士/先生
-    if re.search(rf"[{COMMON_SURNAMES}][\u4e00-\u9fff]{{0,1}}(女士|先生)", text):
-        issues.append("使用了“姓+女士/先生”")
-    # 小+常见姓氏（如小张/小李）——避免误伤“小区/小镇/小路”等非人名
-    for m in re.finditer(rf"小[{COMMON_SURNAMES}](?:[\u4e00-\u9fff])?", text):
-        token = m.group(0)
-        if token.startswith(("小区", "小镇", "小路", "小巷", "小学", "小型")):
-            continue
-        issues.append("使用了“小+姓氏”称谓")
-        break
-    for name in FORBIDDEN_FUNNY_NAMES:
-        if name in text:
-            issues.append(f"使用了不规范姓名：{name}")
-    if re.search(r"(小宝|贝贝|宝宝)", text):
-        issues.append("使用了小名/乳名")
-    return issues
+    return _NAME_STYLE_RULES.messages(text)
 
 def _is_judgement_style_stem(text: str) -> bool:
     if not text:
         return False
-    stem = re.sub(r"\s+", "", str(text))
-    patterns = [
-        r"(以下|下列).{0,8}(表述|说法|选项).{0,12}(正确|错误)",
-        r"(以下|下列).{0,8}关于.{0,20}(正确|错误)",
-        r"判断.{0,30}(正确|错误|是否合法|是否合规)",
-        r"(做法|行为|说法).{0,12}(正确|错误|是否合法|是否合规)",
-        r"是否(正确|错误|合法|合规|违规|成立)",
-    ]
-    return any(re.search(p, stem) for p in patterns)
+    return _JUDGEMENT_STEM_RULES.any(_WHITESPACE_RE.sub("", str(text)))
 
 
 def _contains_anonymous_person_reference(text: str) -> bool:
     if not text:
         return False
-    t = str(text)
-    # 典型“张某/王某”类匿名指代
-    if re.search(rf"[{COMMON_SURNAMES}]某(?:某)?(?!公司|银行|机构|单位|部门|分行|支行|小区|街道|路|号|市|区|县|省)", t):
-        return True
-    # “某某”匿名指代（排除明显组织/地点后缀）
-    if re.search(r"某某(?!公司|银行|机构|单位|部门|分行|支行|小区|街道|路|号|市|区|县|省)", t):
-        return True
-    return False
+    return _ANONYMOUS_PERSON_RULES.any(str(text))
 
 
 def _has_negative_event_context(text: str) -> bool:
-    t = str(text or "")
-    return any(k in t for k in NEGATIVE_EVENT_KEYWORDS)
+    return _NEGATIVE_EVENT_RULES.any(str(text or ""))
 
 
 # 用于「题干/选项/解析人名一致性」抽取：不用整段 COMMON_SURNAMES 做字符类（会把复姓拆解字、公文高频字当成姓，导致「支付」「万元」等误判为人名）。
@@ -928,6 +1016,19 @@ _ROLE_THEN_PERSON_RE = re.compile(
 )
 
 
+_ANONYMOUS_PERSON_RE = re.compile(rf"[{COMMON_SURNAMES}]某(?:某)?{_NON_PERSON_SUFFIX}")
+_LEAD_PERSON_NAME_RE = re.compile(
+    rf"^[\s「」【『\[\(]*([{_PRIMARY_SURNAME_FOR_NAME_EXTRACT}][\u4e00-\u9fff]{{1,2}})(?={_AFTER_PERSON_NAME_BOUNDARY})"
+)
+_INNER_PERSON_NAME_RE = re.compile(
+    rf"(?<![\u4e00-\u9fff])([{_PRIMARY_SURNAME_FOR_NAME_EXTRACT}][\u4e00-\u9fff]{{1,2}})(?={_AFTER_PERSON_NAME_BOUNDARY})"
+)
+_CONNECTOR_PERSON_NAME_RE = re.compile(
+    rf"(?:(?<=^)|(?<=[与和及、，。；：\s]))([{_PRIMARY_SURNAME_FOR_NAME_EXTRACT}][\u4e00-\u9fff]{{1,2}})(?={_AFTER_PERSON_NAME_BOUNDARY})"
+)
+_DIGIT_RE = re.compile(r"\d")
+
+
 def _looks_like_non_person_name(tok: str) -> bool:
     t = str(tok or "").strip()
     if not t:
@@ -936,7 +1037,7 @@ def _looks_like_non_person_name(tok: str) -> bool:
         return True
     if any(h in t for h in _NON_PERSON_NAME_HINTS):
         return True
-    if re.search(r"\d", t):
+    if _DIGIT_RE.search(t):
         return True
     return False
 
@@ -953,10 +1054,7 @@ def _extract_person_like_names(text: str) -> set[str]:
         return set()
     names: set[str] = set()
     # 张某 / 王某某（匿名）
-    for m in re.finditer(
-        rf"[{COMMON_SURNAMES}]某(?:某)?(?!公司|银行|机构|单位|部门|分行|支行|小区|街道|路|号|市|区|县|省)",
-        t,
-    ):
+    for m in _ANONYMOUS_PERSON_RE.finditer(t):
         names.add(m.group(0))
     # 角色后的姓名：客户王明、经纪人王强
     for m in _ROLE_THEN_PERSON_RE.finditer(t):
@@ -964,19 +1062,13 @@ def _extract_person_like_names(text: str) -> set[str]:
         if 2 <= len(tok) <= 3 and not _looks_like_non_person_name(tok):
             names.add(tok)
     # 文首「姓+1～2 字名」：张伟购买…
-    lead = re.match(
-        rf"^[\s「」【『\[\(]*([{_PRIMARY_SURNAME_FOR_NAME_EXTRACT}][\u4e00-\u9fff]{{1,2}})(?={_AFTER_PERSON_NAME_BOUNDARY})",
-        t,
-    )
+    lead = _LEAD_PERSON_NAME_RE.match(t)
     if lead:
         tok = lead.group(1)
         if len(tok) >= 2 and not _looks_like_non_person_name(tok):
             names.add(tok)
     # 文中：非汉字左侧 + 精简姓表 + 1～2 字 + 边界（避免吞掉「王明与开发商」整段）
-    inner = re.compile(
-        rf"(?<![\u4e00-\u9fff])([{_PRIMARY_SURNAME_FOR_NAME_EXTRACT}][\u4e00-\u9fff]{{1,2}})(?={_AFTER_PERSON_NAME_BOUNDARY})"
-    )
-    for m in inner.finditer(t):
+    for m in _INNER_PERSON_NAME_RE.finditer(t):
         tok = m.group(1)
         if len(tok) < 2 or _looks_like_non_person_name(tok):
             continue
@@ -1014,10 +1106,7 @@ def _align_name_consistency(stem: str, options: List[str], explanation: str) ->
     def _rewrite_text(text: str) -> str:
         nonlocal changed
         names = set(_extract_role_person_names(text)) | set(_extract_person_like_names(text))
-        for m in re.finditer(
-            rf"(?:(?<=^)|(?<=[与和及、，。；：\s]))([{_PRIMARY_SURNAME_FOR_NAME_EXTRACT}][\u4e00-\u9fff]{{1,2}})(?={_AFTER_PERSON_NAME_BOUNDARY})",
-            str(text or ""),
-        ):
+        for m in _CONNECTOR_PERSON_NAME_RE.finditer(str(text or "")):
             tok = (m.group(1) or "").strip()
             if tok and not _looks_like_non_person_name(tok):
                 names.add(tok)
@@ -1047,20 +1136,29 @@ def _align_name_consistency(stem: str, options: List[str], explanation: str) ->
     return new_opts, new_exp, changed
 
 
+_REPAIR_HONORIFIC_RE = re.compile(rf"([{COMMON_SURNAMES}])[\u4e00-\u9fff]{{0,1}}(女士|先生)")
+_REPAIR_XIAO_SURNAME_RE = re.compile(rf"小([{COMMON_SURNAMES}])(?:[\u4e00-\u9fff])?")
+_REPAIR_PET_NAME_RE = re.compile(r"(小宝|贝贝|宝宝)(?=$|[，。；：、\s])")
+_REPAIR_SURNAME_MOU_RE = re.compile(rf"([{COMMON_SURNAMES}])某(?:某)?{_NON_PERSON_SUFFIX}")
+_REPAIR_MOUMOU_RE = re.compile(rf"某某{_NON_PERSON_SUFFIX}")
+_REPAIR_HONORIFIC_TO_MOU_RE = re.compile(_SURNAME_HONORIFIC)
+_REPAIR_XIAO_SURNAME_TO_MOU_RE = re.compile(rf"小[{COMMON_SURNAMES}](?:[\u4e00-\u9fff])?(?=$|[，。；：、\s])")
+
+
 def _repair_name_style(text: str, force_named: bool = False) -> str:
     if not text:
         return text
     repaired = str(text)
     # 统一替换称谓式/小+姓氏命名
-    repaired = re.sub(rf"([{COMMON_SURNAMES}])[\u4e00-\u9fff]{{0,1}}(女士|先生)", r"\1伟", repaired)
-    repaired = re.sub(rf"小([{COMMON_SURNAMES}])(?:[\u4e00-\u9fff])?", r"\1伟", repaired)
+    repaired = _REPAIR_HONORIFIC_RE.sub(r"\1伟", repaired)
+    repaired = _REPAIR_XIAO_SURNAME_RE.sub(r"\1伟", repaired)
     for funny in FORBIDDEN_FUNNY_NAMES:
         repaired = repaired.replace(funny, "张伟")
-    repaired = re.sub(r"(小宝|贝贝|宝宝)(?=$|[，。；：、\s])", "张伟", repaired)
+    repaired = _REPAIR_PET_NAME_RE.sub("张伟", repaired)
     if force_named:
         # 判断“正确与否”类题干禁止匿名代称，统一改为通俗姓名
-        repaired = re.sub(rf"([{COMMON_SURNAMES}])某(?:某)?(?!公司|银行|机构|单位|部门|分行|支行|小区|街道|路|号|市|区|县|省)", r"\1伟", repaired)
-        repaired = re.sub(r"某某(?!公司|银行|机构|单位|部门|分行|支行|小区|街道|路|号|市|区|县|省)", "张伟", repaired)
+        repaired = _REPAIR_SURNAME_MOU_RE.sub(r"\1伟", repaired)
+        repaired = _REPAIR_MOUMOU_RE.sub("张伟", repaired)
     return repaired
 
 
@@ -1068,34 +1166,39 @@ def _repair_name_usage(text: str) -> str:
     if not text:
         return text
     # 替换“姓+女士/先生” → “某某”
-    text = re.sub(rf"[{COMMON_SURNAMES}][\u4e00-\u9fff]{{0,1}}(女士|先生)", "某某", text)
+    text = _REPAIR_HONORIFIC_TO_MOU_RE.sub("某某", text)
     # 替换“小+姓氏” → “某某”（同上规则，避免替换“小区/小镇”等）
-    text = re.sub(rf"小[{COMMON_SURNAMES}](?:[\u4e00-\u9fff])?(?=$|[，。；：、\s])", "某某", text)
+    text = _REPAIR_XIAO_SURNAME_TO_MOU_RE.sub("某某", text)
     return text
 
-def validate_name_usage(question: str, options: List[str], explanation: str) -> List[str]:
-    issues = []
-    issues += _name_violations_in_text(question or "")
-    for opt in options or []:
-        issues += _name_violations_in_text(str(opt))
-    issues += _name_violations_in_text(explanation or "")
+def validate_name_usage_issues(question: str, options: List[str], explanation: str) -> List["ValidationIssue"]:
     stem = str(question or "")
-    all_text = " ".join([stem] + [str(o or "") for o in (options or [])] + [str(explanation or "")])
-    anonymous_present = any(_contains_anonymous_person_reference(t) for t in [stem] + [str(o or "") for o in (options or [])] + [str(explanation or "")])
+    texts = [("question", stem)] + [("options", str(o or "")) for o in (options or [])] + [("explanation", str(explanation or ""))]
+    issues: List["ValidationIssue"] = []
+    for field, text in texts:
+        if text:
+            issues.extend(_validation_issue(f"NAME_STYLE:{rule.code}", field, rule.message) for rule in _NAME_STYLE_RULES.scan(text))
+    all_text = " ".join(text for _, text in texts)
+    anonymous_present = any(_contains_anonymous_person_reference(text) for _, text in texts)
     is_judgement = _is_judgement_style_stem(stem)
     if anonymous_present and is_judgement:
-        issues.append("需要判断行为/说法正确与否时，不得使用“张某/某某”代称")
+        issues.append(_validation_issue("NAME_ANONYMOUS", "question", "需要判断行为/说法正确与否时，不得使用“张某/某某”代称"))
     if anonymous_present and (not _has_negative_event_context(all_text)):
-        issues.append("非事故/违法违规场景不应使用“张某/某某”代称")
+        issues.append(_validation_issue("NAME_ANONYMOUS", "global", "非事故/违法违规场景不应使用“张某/某某”代称"))
 
-    for t in [stem] + [str(o or "") for o in (options or [])] + [str(explanation or "")]:
-        issues.extend(_broker_client_terminology_issues(t))
-    return list(dict.fromkeys(issues))
+    for field, text in texts:
+        issues.extend(_validation_issue("NAME_CLIENT_TERM", field, msg) for msg in _broker_client_terminology_issues(text))
+    seen: set = set()
+    return [i for i in issues if not (i["message"] in seen or seen.add(i["message"]))]
 
-def validate_critic_format(final_json: Dict[str, Any], question_type: str) -> List[str]:
-    issues = []
+
+def validate_name_usage(question: str, options: List[str], explanation: str) -> List[str]:
+    return _issue_messages(validate_name_usage_issues(question, options, explanation))
+
+
+def validate_critic_format_issues(final_json: Dict[str, Any], question_type: str) -> List["ValidationIssue"]:
     if not isinstance(final_json, dict):
-        return ["题目结构非字典"]
+        return [_validation_issue("FMT_STRUCTURE", "global", "题目结构非字典")]
     q = str(final_json.get("题干", "") or "")
     options = []
     for i in range(1, 9):
@@ -1105,61 +1208,69 @@ def validate_critic_format(final_json: Dict[str, Any], question_type: str) -> Li
             options.append(str(val))
     answer = final_json.get("正确答案", "")
     opt_count = len(options)
+    issues: List["ValidationIssue"] = []
     if question_type in ["单选题", "多选题", "判断题"]:
         if BLANK_BRACKET not in q:
-            issues.append("题干缺少标准占位括号（须为全角括号且括号内有且仅有一个全角空格）")
+            issues.append(_validation_issue("FMT_STEM_BLANK", "question", "题干缺少标准占位括号（须为全角括号且括号内有且仅有一个全角空格）"))
     if question_type in ["单选题", "多选题"] and opt_count != 4:
-        issues.append("选择题选项数量必须为4个")
+        issues.append(_validation_issue("FMT_OPTION_COUNT", "options", "选择题选项数量必须为4个"))
     if question_type == "判断题" and opt_count != 2:
-        issues.append("判断题选项数量必须为2个")
+        issues.append(_validation_issue("FMT_OPTION_COUNT", "options", "判断题选项数量必须为2个"))
     if question_type in ["单选题", "多选题"]:
         if not q.endswith("。"):
-            issues.append("选择题题干未以句号结尾")
+            issues.append(_validation_issue("FMT_STEM_END_PUNCT", "question", "选择题题干未以句号结尾"))
     if question_type in ["单选题", "多选题", "判断题"]:
         if has_invalid_ending_blank_bracket(q):
-            issues.append("题干结尾括号中间必须有且仅有一个全角空格（不能多）")
+            issues.append(_validation_issue("FMT_BRACKET", "question", "题干结尾括号中间必须有且仅有一个全角空格（不能多）"))
         if has_forbidden_symbol_before_ending_blank_bracket(q):
-            issues.append("题干结尾作答括号前不能有任何符号或空格")
+            issues.append(_validation_issue("FMT_BRACKET", "question", "题干结尾作答括号前不能有任何符号或空格"))
     for opt in options:
         if has_invalid_blank_bracket(opt):
-            issues.append("选项括号格式不规范")
+            issues.append(_validation_issue("FMT_BRACKET", "options", "选项括号格式不规范"))
             break
     for opt in options:
-        if re.search(r"[。！？；;：:，,、]\s*$", opt):
-            issues.append("选项末尾含标点")
+        if _OPTION_TRAILING_PUNCT_RE.search(opt):
+            issues.append(_validation_issue("FMT_OPTION_END_PUNCT", "options", "选项末尾含标点"))
             break
     if question_type == "判断题":
-        if not (isinstance(answer, str) and re.fullmatch(r"[ABab]", str(answer).strip())):
-            issues.append("判断题答案格式应为A/B")
+        if not (isinstance(answer, str) and _JUDGE_ANSWER_RE.fullmatch(answer.strip())):
+            issues.append(_validation_issue("ANS_FORMAT", "answer", "判断题答案格式应为A/B"))
     elif question_type == "单选题":
-        if not (isinstance(answer, str) and re.fullmatch(r"[A-Da-d]", str(answer).strip())):
-            issues.append("单选题答案格式应为单个字母")
+        if not (isinstance(answer, str) and _SINGLE_ANSWER_RE.fullmatch(answer.strip())):
+            issues.append(_validation_issue("ANS_FORMAT", "answer", "单选题答案格式应为单个字母"))
     elif question_type == "多选题":
         if isinstance(answer, list):
             labels = [str(x).strip() for x in answer if str(x).strip()]
-            if not labels or not all(re.fullmatch(r"[A-Da-d]", x) for x in labels):
-                issues.append("多选题答案列表格式不规范")
+            if not labels or not all(_SINGLE_ANSWER_RE.fullmatch(x) for x in labels):
+                issues.append(_validation_issue("ANS_FORMAT", "answer", "多选题答案列表格式不规范"))
         elif isinstance(answer, str):
-            if not re.fullmatch(r"[A-Da-d]{2,4}", str(answer).strip()):
-                issues.append("多选题答案格式应为多个字母")
+            if not _MULTI_ANSWER_RE.fullmatch(answer.strip()):
+                issues.append(_validation_issue("ANS_FORMAT", "answer", "多选题答案格式应为多个字母"))
         else:
-            issues.append("多选题答案格式不规范")
+            issues.append(_validation_issue("ANS_FORMAT", "answer", "多选题答案格式不规范"))
     # Name usage checks (no 姓+女士/先生 or 小+姓氏)
     q_text = str(final_json.get("题干", "") or "")
     exp_text = str(final_json.get("解析", "") or "")
-    name_issues = validate_name_usage(q_text, options, exp_text)
+    name_issues = validate_name_usage_issues(q_text, options, exp_text)
     if name_issues:
-        issues.append("人名或一线称谓不规范")
+        issues.append(_validation_issue("NAME_STYLE", "global", "人名或一线称谓不规范"))
         issues.extend(name_issues)
-    issues += validate_media_rules(q_text, options, exp_text)
+    issues += validate_media_issues(q_text, options, exp_text)
     return issues
 
 
+def validate_critic_format(final_json: Dict[str, Any], question_type: str) -> List[str]:
+    return _issue_messages(validate_critic_format_issues(final_json, question_type))
+
+
+_CHOICE_LABEL_RE = re.compile(r"[A-D]")
+
+
 def _parse_answer_labels(answer: Any) -> List[str]:
     if isinstance(answer, list):
         labels = [str(x).strip().upper() for x in answer if str(x).strip()]
     else:
-        labels = re.findall(r"[A-D]", str(answer or "").upper())
+        labels = _CHOICE_LABEL_RE.findall(str(answer or "").upper())
     out: List[str] = []
     seen: set[str] = set()
     for label in labels:
@@ -1170,14 +1281,18 @@ def _parse_answer_labels(answer: Any) -> List[str]:
     return out
 
 
+_NUMBER_UNIT_SUFFIX_RE = re.compile(r"(万元|万|元|平方米|平米|㎡|套|户|分|年|个月|月|天|次|%)$")
+_PLAIN_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
 def _coerce_number(value: Any) -> Optional[float]:
     text = str(value or "").strip()
     if not text:
         return None
     text = text.replace(",", "").replace("，", "")
-    text = re.sub(r"(万元|万|元|平方米|平米|㎡|套|户|分|年|个月|月|天|次|%)$", "", text)
+    text = _NUMBER_UNIT_SUFFIX_RE.sub("", text)
     text = text.strip()
-    if not re.fullmatch(r"-?\d+(?:\.\d+)?", text):
+    if not _PLAIN_NUMBER_RE.fullmatch(text):
         return None
     try:
         return float(text)
@@ -1197,17 +1312,21 @@ def _get_answer_option_payload(final_json: Dict[str, Any]) -> List[Tuple[str, st
     return rows
 
 
+_LINE_OR_PERIOD_SPLIT_RE = re.compile(r"[\n。]")
+_EQUALS_NUMBER_RE = re.compile(r"=\s*(-?\d+(?:\.\d+)?)")
+
+
 def _extract_primary_calc_result_from_explanation(explanation: str) -> Optional[float]:
     text = str(explanation or "")
     if not text:
         return None
     keyword_lines = [
         line.strip()
-        for line in re.split(r"[\n。]", text)
+        for line in _LINE_OR_PERIOD_SPLIT_RE.split(text)
         if any(keyword in line for keyword in ["计算过程为", "代入计算", "严格按公式计算", "按公式计算"])
     ]
     for line in keyword_lines:
-        eq_matches = re.findall(r"=\s*(-?\d+(?:\.\d+)?)", line)
+        eq_matches = _EQUALS_NUMBER_RE.findall(line)
         if eq_matches:
             try:
                 return float(eq_matches[-1])
@@ -1234,14 +1353,21 @@ def _numbers_close(left: Optional[float], right: Optional[float], tolerance: flo
     return abs(left - right) <= tolerance
 
 
+_DECIMAL_PART_RE = re.compile(r"\.(\d+)")
+
+
 def _extract_decimal_places(text: str) -> int:
-    m = re.search(r"\.(\d+)", str(text or ""))
+    m = _DECIMAL_PART_RE.search(str(text or ""))
     return len(m.group(1)) if m else 0
 
 
+_APPROX_WORDING_RE = re.compile(r"(约为|约等于|大约|约合)")
+_PRECISION_WORDING_RE = re.compile(r"(?:保留到?|精确到?)\s*(\d+)\s*位小数")
+
+
 def _calc_numeric_tolerance(question_text: str, selected_option_texts: List[str]) -> float:
     q = str(question_text or "")
-    if re.search(r"(约为|约等于|大约|约合)", q):
+    if _APPROX_WORDING_RE.search(q):
         numeric_opts = sorted(
             {
                 float(v)
@@ -1260,7 +1386,7 @@ def _calc_numeric_tolerance(question_text: str, selected_option_texts: List[str]
         # “约为”题型允许小幅近似，但不应跨越到相邻干扰项
         return min(10.0, max(0.5, (min_gap / 2.0) - 1e-6)) + 1e-9
 
-    m = re.search(r"(?:保留到?|精确到?)\s*(\d+)\s*位小数", q)
+    m = _PRECISION_WORDING_RE.search(q)
     if m:
         places = max(int(m.group(1)), 0)
         return 0.5 * (10 ** (-places)) + 1e-9
@@ -1304,9 +1430,12 @@ def _align_numeric_scales(value: Optional[float], targets: List[float]) -> List[
     return uniq
 
 
+_NON_WORD_CHAR_RE = re.compile(r"[^\u4e00-\u9fa5A-Za-z0-9]")
+
+
 def _extract_calc_target_signature(question_text: str) -> str:
     q = str(question_text or "")
-    q = re.sub(r"\s+", "", q)
+    q = _WHITESPACE_RE.sub("", q)
     # Keep only a compact semantic signature for key calculated targets.
     rules = [
         ("组合贷款总额度", r"(组合贷款.*总额度|总额度)"),
@@ -1331,7 +1460,7 @@ def _extract_calc_target_signature(question_text: str) -> str:
         if re.search(pattern, q):
             return name
     # fallback: keep full sanitized signature to avoid semantic truncation
-    return re.sub(r"[^\u4e00-\u9fa5A-Za-z0-9]", "", q)
+    return _NON_WORD_CHAR_RE.sub("", q)
 
 
 def _is_calc_target_semantically_aligned(
@@ -1459,19 +1588,25 @@ def _enforce_calc_target_lock_on_final_json(
     return updated, notices
 
 
+_REPEATED_GUANYU_RE = re.compile(r"(关于){2,}")
+# 含反向引用，不能并入 RuleSet 的合并扫描，单独预编译
+_REPEATED_FRAGMENT_RE = re.compile(r"([一-龥]{1,3})\1{2,}")
+_SHORT_HAN_TOKEN_RE = re.compile(r"[\u4e00-\u9fa5]{2,3}")
+
+
 def _detect_text_pollution_issue(text: str, baseline_text: str = "") -> str:
     s = str(text or "")
     if not s:
         return ""
-    if re.search(r"(关于){2,}", s):
+    if _REPEATED_GUANYU_RE.search(s):
         return "重复词污染:关于连用"
-    if re.search(r"([一-龥]{1,3})\1{2,}", s):
+    if _REPEATED_FRAGMENT_RE.search(s):
         return "重复片段污染"
     # 检测短词异常高频注入（如“王强在”被插入多处）
-    cands = re.findall(r"[\u4e00-\u9fa5]{2,3}", s)
+    cands = _SHORT_HAN_TOKEN_RE.findall(s)
     if cands:
         s_counter = Counter(cands)
-        b_counter = Counter(re.findall(r"[\u4e00-\u9fa5]{2,3}", str(baseline_text or "")))
+        b_counter = Counter(_SHORT_HAN_TOKEN_RE.findall(str(baseline_text or "")))
         for token, cnt in s_counter.items():
             if token in {"根据", "关于", "规定", "本题", "客户"}:
                 continue
@@ -1480,23 +1615,20 @@ def _detect_text_pollution_issue(text: str, baseline_text: str = "") -> str:
     return ""
 
 
+_SOFT_QUALITY_ISSUE_RULES = RuleSet(
+    "soft_quality_issue",
+    keyword_rules(
+        "soft_quality",
+        ["三段", "分级", "可读性", "结构问题", "句式", "措辞", "教材原文段", "轻微格式", "第1段", "目标题内容"],
+    ),
+)
+
+
 def _is_soft_quality_issue_text(issue: str) -> bool:
     t = str(issue or "").strip()
     if not t:
         return False
-    soft_patterns = [
-        r"三段",
-        r"分级",
-        r"可读性",
-        r"结构问题",
-        r"句式",
-        r"措辞",
-        r"教材原文段",
-        r"轻微格式",
-        r"第1段",
-        r"目标题内容",
-    ]
-    return any(re.search(p, t) for p in soft_patterns)
+    return _SOFT_QUALITY_ISSUE_RULES.any(t)
 
 
 def _split_soft_hard_format_issues(issues: List[str]) -> Tuple[List[str], List[str]]:
@@ -1723,6 +1855,23 @@ def _sort_critic_issue_types(issue_types: List[str]) -> List[str]:
     return sorted(deduped, key=lambda x: (CRITIC_ISSUE_PRIORITY.get(x, 999), x))
 
 
+# 审计文本关键词 → 问题类型（规则码即 critic_issue_types 的取值），启动时编译一次
+_CRITIC_ISSUE_TYPE_RULES = RuleSet(
+    "critic_issue_type",
+    [
+        TextRule("focus", r"对工作无帮助|超纲|概念辨析|标签|题目没意义|脱离业务"),
+        TextRule("solvability", r"缺少关键前提|无法稳定|多解|主体/视角|人物身份冲突|题干与答案冲突|题干与选项冲突"),
+        TextRule("grounding", r"非当前切片|跨切片|材料外推断|虚假引用|地域口径冲突"),
+        TextRule("anti_spoonfeeding", r"直给答案|题干直接包含答案|文本直配|提示过强"),
+        TextRule("option", r"跨维度|兜底选项|单位位置错误|数值未排序|题型结构不一致|选项格式"),
+        TextRule("distractor", r"干扰项弱|随机数字|误算路径|错项不可解释|同样成立"),
+        TextRule("explanation", r"三段式|覆盖不足|结论格式|解析重写不足|解析与答案不一致|解析与计算过程不一致|可读性差"),
+        TextRule("style", r"人名不规范|一线称谓|某购房人|模糊词|生造词|冗余铺垫|场景啰嗦|非人话"),
+        TextRule("calc", r"缺地区口径|缺触发前提|缺级别锁定|无执行结果|设问目标漂移|计算闭环"),
+    ],
+)
+
+
 def _derive_critic_issue_types(
     *,
     required_fixes: Optional[List[str]] = None,
@@ -1759,13 +1908,9 @@ def _derive_critic_issue_types(
         add("focus")
     if any(item.startswith("writer:") for item in required_set):
         add("focus")
-    if re.search(r"对工作无帮助|超纲|概念辨析|标签|题目没意义|脱离业务", combined_text):
-        add("focus")
 
     if any(item in {"logic:cannot_deduce_unique_answer", "logic:missing_conditions", "logic:example_conflict", "logic:answer_mismatch", "logic:name_entity_conflict"} for item in required_set):
         add("solvability")
-    if re.search(r"缺少关键前提|无法稳定|多解|主体/视角|人物身份冲突|题干与答案冲突|题干与选项冲突", combined_text):
-        add("solvability")
 
     if "logic:grounding" in required_set:
         add("grounding")
@@ -1774,21 +1919,12 @@ def _derive_critic_issue_types(
         or critic_result.get("basis_source") in {"non_current", "mixed"}
     ):
         add("grounding")
-    if re.search(r"非当前切片|跨切片|材料外推断|虚假引用|地域口径冲突", combined_text):
-        add("grounding")
-
-    if re.search(r"直给答案|题干直接包含答案|文本直配|提示过强", combined_text):
-        add("anti_spoonfeeding")
 
     if "logic:option_dimension" in required_set:
         add("option")
-    if re.search(r"跨维度|兜底选项|单位位置错误|数值未排序|题型结构不一致|选项格式", combined_text):
-        add("option")
 
     if "calc:distractor_quality" in required_set:
         add("distractor")
-    if re.search(r"干扰项弱|随机数字|误算路径|错项不可解释|同样成立", combined_text):
-        add("distractor")
 
     if "explanation:invalid" in {str(x).strip() for x in (all_issues or []) if str(x).strip()}:
         add("explanation")
@@ -1801,21 +1937,19 @@ def _derive_critic_issue_types(
         or critic_result.get("analysis_rewrite_sufficient") is False
     ):
         add("explanation")
-    if re.search(r"三段式|覆盖不足|结论格式|解析重写不足|解析与答案不一致|解析与计算过程不一致|可读性差", combined_text):
-        add("explanation")
 
     if "quality:name_semantic" in required_set:
         add("style")
-    if re.search(r"人名不规范|一线称谓|某购房人|模糊词|生造词|冗余铺垫|场景啰嗦|非人话", combined_text):
-        add("style")
 
     if "term_lock:violation" in required_set:
         add("term_lock")
 
     if any(item.startswith("calc:") and item != "calc:distractor_quality" for item in required_set):
         add("calc")
-    if re.search(r"缺地区口径|缺触发前提|缺级别锁定|无执行结果|设问目标漂移|计算闭环", combined_text):
-        add("calc")
+
+    # 审计文本里的关键词信号：规则码即问题类型
+    for issue_type in _CRITIC_ISSUE_TYPE_RULES.codes(combined_text):
+        add(issue_type)
 
     if not issue_types and required_set:
         add("solvability")
@@ -1825,6 +1959,12 @@ def _derive_critic_issue_types(
 # 业务场景与前置条件判定统一走 LLM 语义审计，不再保留关键词/槽位穷举闸门。
 
 
+_CITY6_PRICING_RE = re.compile(r"(1560|4000)\s*元")
+_ASKS_AMOUNT_RE = re.compile(r"(超标款|补交|金额|总额|税额|税费|费用)")
+_FLOAT_RULE_RE = re.compile(r"(上浮一个职级|浮动范围|不能分割退回|上浮后的面积标准|标准面积变为)")
+_FLOAT_LEVEL_LOCK_RE = re.compile(r"(上浮后.*(标准|面积)|上浮一个职级.*(至|到).*(标准|面积|㎡)|上浮后的面积标准|标准面积变为)")
+
+
 def validate_calculation_closure(
     final_json: Dict[str, Any],
     *,
@@ -1862,8 +2002,8 @@ def validate_calculation_closure(
             str(final_json.get("解析", "") or ""),
         ]
     )
-    has_city6_pricing = bool(re.search(r"(1560|4000)\s*元", stem_text_join))
-    asks_amount = bool(re.search(r"(超标款|补交|金额|总额|税额|税费|费用)", stem_text))
+    has_city6_pricing = bool(_CITY6_PRICING_RE.search(stem_text_join))
+    asks_amount = bool(_ASKS_AMOUNT_RE.search(stem_text))
     if has_city6_pricing and asks_amount and ("城六区" not in stem_text):
         issue_messages.append("题干缺少区域口径（是否城六区），无法唯一确定分段单价")
         required_fixes.append("calc:missing_region_condition")
@@ -1871,15 +2011,14 @@ def validate_calculation_closure(
         issue_type = "major"
         fix_strategy = "regenerate"
     # 仅在明确命中“上浮规则”语义域时才触发该组计算闭环校验，避免跨题型误判。
-    uses_float_rule = bool(re.search(r"(上浮一个职级|浮动范围|不能分割退回|上浮后的面积标准|标准面积变为)", stem_text_join))
+    uses_float_rule = bool(_FLOAT_RULE_RE.search(stem_text_join))
     if uses_float_rule and ("不能分割退回" not in stem_text):
         issue_messages.append("题干缺少“不能分割退回”前置条件，无法锁定上浮规则")
         required_fixes.append("calc:missing_non_split_condition")
         fail_types.append("calculation_non_split_condition_missing")
         issue_type = "major"
         fix_strategy = "regenerate"
-    level_lock_pattern = r"(上浮后.*(标准|面积)|上浮一个职级.*(至|到).*(标准|面积|㎡)|上浮后的面积标准|标准面积变为)"
-    if uses_float_rule and not re.search(level_lock_pattern, stem_text):
+    if uses_float_rule and not _FLOAT_LEVEL_LOCK_RE.search(stem_text):
         issue_messages.append("题干未锁定上浮后的级别口径，可能导致上浮规则歧义")
         required_fixes.append("calc:missing_level_lock")
         fail_types.append("calculation_level_lock_missing")
@@ -1956,25 +2095,27 @@ def _extract_text_from_kb_context(kb_context: str) -> str:
     except Exception:
         return kb_context or ""
 
+_SUPPLEMENT_MATERIAL_STEM_RE = re.compile(r"(补充|还需|需要|应当|应需).*(材料|证|证明|证件)")
+_MATERIAL_PROVIDED_PREFIX = r"(已提供|已提交|已出示|已准备|已递交|已交).{0,6}"
+_MATERIAL_TERMS = (
+    "身份证", "户口本", "结婚证", "婚姻关系证明", "出生医学证明", "独生子女证",
+    "子女关系证明", "不动产权证书", "权属证明", "购房合同", "委托书", "完税证明",
+)
+_MATERIAL_PROVIDED_RES = {m: re.compile(_MATERIAL_PROVIDED_PREFIX + re.escape(m)) for m in _MATERIAL_TERMS}
+
+
 def material_missing_check(final_json: Dict[str, Any], kb_context: str) -> Tuple[bool, List[str]]:
     if not isinstance(final_json, dict):
         return False, []
     q = str(final_json.get("题干", "") or "")
     # Only apply to "supplement materials" questions
-    if not re.search(r"(补充|还需|需要|应当|应需).*(材料|证|证明|证件)", q):
+    if not _SUPPLEMENT_MATERIAL_STEM_RE.search(q):
         return False, []
     kb_text = _extract_text_from_kb_context(kb_context)
-    material_terms = [
-        "身份证", "户口本", "结婚证", "婚姻关系证明", "出生医学证明", "独生子女证",
-        "子女关系证明", "不动产权证书", "权属证明", "购房合同", "委托书", "完税证明"
-    ]
-    required = {m for m in material_terms if m in kb_text}
+    required = {m for m in _MATERIAL_TERMS if m in kb_text}
     if not required:
         return False, []
-    provided = set()
-    for m in required:
-        if re.search(rf"(已提供|已提交|已出示|已准备|已递交|已交).{{0,6}}{re.escape(m)}", q):
-            provided.add(m)
+    provided = {m for m in required if _MATERIAL_PROVIDED_RES[m].search(q)}
     missing = sorted(list(required - provided))
     # If more than one missing item, question is ambiguous for single-answer
     if len(missing) > 1:
@@ -1994,18 +2135,24 @@ def _extract_required_material_terms(kb_text: str) -> List[str]:
 
 
 def detect_router_high_risk_slice(content: str, path: str = "") -> Dict[str, Any]:
+    profile = SHARED_SLICE_CONTEXT_CACHE.get_or_compute(
+        "router_high_risk", (str(path or ""), str(content or "")), lambda: _detect_router_high_risk_slice(content, path)
+    )
+    return {**profile, "required_materials": list(profile["required_materials"])}
+
+
+_LIST_ITEM_MARK_RE = re.compile(r"（\d+）|\d+\.")
+_MATERIAL_CHECKLIST_RE = re.compile(r"(材料|证件|证明|资料).*(包括|准备|提交|提供|补充)|包括.*(材料|证件|证明|资料)")
+_PARALLEL_RULE_RE = re.compile(r"(渠道|条件|情形|规则|标准|方式|路径|材料|证件)")
+
+
+def _detect_router_high_risk_slice(content: str, path: str = "") -> Dict[str, Any]:
     text = str(content or "")
     full_text = f"{path}\n{text}"
-    list_hits = len(re.findall(r"（\d+）|\d+\.", text))
+    list_hits = len(_LIST_ITEM_MARK_RE.findall(text))
     required_materials = _extract_required_material_terms(full_text)
-    has_material_checklist = (
-        len(required_materials) >= 2
-        and bool(re.search(r"(材料|证件|证明|资料).*(包括|准备|提交|提供|补充)|包括.*(材料|证件|证明|资料)", full_text))
-    )
-    has_parallel_rules = (
-        list_hits >= 2
-        and bool(re.search(r"(渠道|条件|情形|规则|标准|方式|路径|材料|证件)", full_text))
-    )
+    has_material_checklist = len(required_materials) >= 2 and bool(_MATERIAL_CHECKLIST_RE.search(full_text))
+    has_parallel_rules = list_hits >= 2 and bool(_PARALLEL_RULE_RE.search(full_text))
     prohibit_single_choice = has_material_checklist or has_parallel_rules
     return {
         "required_materials": required_materials,
@@ -2016,25 +2163,32 @@ def detect_router_high_risk_slice(content: str, path: str = "") -> Dict[str, Any
 
 
 def detect_router_formula_ambiguity_risk(content: str, path: str = "") -> Dict[str, Any]:
-    text = str(content or "")
-    full_text = f"{path}\n{text}"
-    has_ranking_formula_ambiguity = bool(
-        re.search(r"最中国式排名|排名赋分\s*=\s*（?1-最中国式排名-1", full_text)
-    )
-    has_loan_formula = bool(
-        re.search(
-            r"较小值（评估值、网签价）\s*×\s*商业贷款成数\s*-\s*公积金贷款部分额度",
-            full_text,
+    return dict(
+        SHARED_SLICE_CONTEXT_CACHE.get_or_compute(
+            "router_formula_risk", (str(path or ""), str(content or "")), lambda: _detect_router_formula_ambiguity_risk(content, path)
         )
     )
-    has_coeff_lookup_dependency = bool(
-        re.search(r"市占考核系数S.*报盘激励系数Z.*绿金扣分系数Q", full_text)
-        and re.search(r"运营总经理收入构成|季度分润", full_text)
-    )
+
+
+_RANKING_FORMULA_RE = re.compile(r"最中国式排名|排名赋分\s*=\s*（?1-最中国式排名-1")
+_LOAN_FORMULA_RE = re.compile(r"较小值（评估值、网签价）\s*×\s*商业贷款成数\s*-\s*公积金贷款部分额度")
+_COEFF_CHAIN_RE = re.compile(r"市占考核系数S.*报盘激励系数Z.*绿金扣分系数Q")
+_COEFF_INCOME_RE = re.compile(r"运营总经理收入构成|季度分润")
+_COMBINED_USE_RE = re.compile(r"(可同时使用|同时使用|叠加使用)")
+_FORMULA_RHS_RE = re.compile(r"=\s*[（(]?[^\n。]{3,}")
+_MERGED_FORMULA_RE = re.compile(r"(合并公式|总公式|同时使用时.*公式|叠加后.*公式)")
+
+
+def _detect_router_formula_ambiguity_risk(content: str, path: str = "") -> Dict[str, Any]:
+    text = str(content or "")
+    full_text = f"{path}\n{text}"
+    has_ranking_formula_ambiguity = bool(_RANKING_FORMULA_RE.search(full_text))
+    has_loan_formula = bool(_LOAN_FORMULA_RE.search(full_text))
+    has_coeff_lookup_dependency = bool(_COEFF_CHAIN_RE.search(full_text) and _COEFF_INCOME_RE.search(full_text))
     has_parallel_formula_without_merge = bool(
-        re.search(r"(可同时使用|同时使用|叠加使用)", full_text)
-        and len(re.findall(r"=\s*[（(]?[^\n。]{3,}", full_text)) >= 2
-        and not re.search(r"(合并公式|总公式|同时使用时.*公式|叠加后.*公式)", full_text)
+        _COMBINED_USE_RE.search(full_text)
+        and len(_FORMULA_RHS_RE.findall(full_text)) >= 2
+        and not _MERGED_FORMULA_RE.search(full_text)
     )
     return {
         "has_ranking_formula_ambiguity": has_ranking_formula_ambiguity,
@@ -2054,6 +2208,53 @@ def _derive_focus_contract(
     llm_focus_rule: str = "",
     llm_focus_variables: Optional[List[str]] = None,
     llm_focus_task: str = "",
+) -> Dict[str, Any]:
+    contract = SHARED_SLICE_CONTEXT_CACHE.get_or_compute(
+        "focus_contract",
+        (str(path or ""), str(content or "")),
+        lambda: _derive_focus_contract_uncached(
+            path=path,
+            content=content,
+            core_focus=core_focus,
+            has_calc_signal=has_calc_signal,
+            has_list=has_list,
+            llm_focus_rule=llm_focus_rule,
+            llm_focus_variables=llm_focus_variables,
+            llm_focus_task=llm_focus_task,
+        ),
+        extra=(
+            str(core_focus or ""),
+            bool(has_calc_signal),
+            bool(has_list),
+            str(llm_focus_rule or ""),
+            tuple(str(x) for x in (llm_focus_variables or [])),
+            str(llm_focus_task or ""),
+        ),
+    )
+    return {**contract, "focus_variables": list(contract.get("focus_variables") or [])}
+
+
+_CLAUSE_LINE_SPLIT_RE = re.compile(r"[\n。；;]")
+_FOCUS_REGION_RE = re.compile(r"(上海|本市|在沪|外环|城六区|郊区)")
+_FOCUS_SUBJECT_RE = re.compile(r"(户籍|家庭|单身|居民|主贷人|买方|卖方|业主|纳税人)")
+_FOCUS_TIME_RE = re.compile(r"(满\\d+年|不满\\d+年|前后\\d+年|日期|网签|时点|期限)")
+_FOCUS_CONDITION_RE = re.compile(r"(首套|二套|套数|资格|限购|条件|可购买|可再购买)")
+_FOCUS_ELIGIBILITY_RE = re.compile(r"(限购|资格|条件|适用|是否|可否|可再购买|最多)")
+_FOCUS_PROCESS_RE = re.compile(r"(流程|步骤|顺序)")
+_FOCUS_RELEASE_DATE_RE = re.compile(r"(发布时间|首个|首次).{0,12}(发布|时间)|发布.{0,12}(首个|首次)|\\d{4}年\\d{1,2}月\\d{1,2}日")
+_FOCUS_PURCHASE_POLICY_RE = re.compile(r"(限购政策如下|户籍|外环|社保|套数|购房资格|可购|可再购买|最多可购买|适用条件)")
+
+
+def _derive_focus_contract_uncached(
+    *,
+    path: str,
+    content: str,
+    core_focus: str,
+    has_calc_signal: bool,
+    has_list: bool,
+    llm_focus_rule: str = "",
+    llm_focus_variables: Optional[List[str]] = None,
+    llm_focus_task: str = "",
 ) -> Dict[str, Any]:
     text = f"{path}\n{content}"
     focus_rule = str(llm_focus_rule or "").strip()
@@ -2061,7 +2262,7 @@ def _derive_focus_contract(
         if core_focus and len(core_focus) >= 4 and core_focus not in path:
             focus_rule = core_focus
         else:
-            first_line = re.split(r"[\n。；;]", str(content or "").strip())[0].strip()
+            first_line = _CLAUSE_LINE_SPLIT_RE.split(str(content or "").strip())[0].strip()
             focus_rule = first_line if first_line else (core_focus or path.split(" > ")[-1])
 
     focus_variables: List[str] = []
@@ -2071,13 +2272,13 @@ def _derive_focus_contract(
             focus_variables.append(val)
 
     auto_vars: List[str] = []
-    if re.search(r"(上海|本市|在沪|外环|城六区|郊区)", text):
+    if _FOCUS_REGION_RE.search(text):
         auto_vars.append("适用地域")
-    if re.search(r"(户籍|家庭|单身|居民|主贷人|买方|卖方|业主|纳税人)", text):
+    if _FOCUS_SUBJECT_RE.search(text):
         auto_vars.append("主体身份")
-    if re.search(r"(满\\d+年|不满\\d+年|前后\\d+年|日期|网签|时点|期限)", text):
+    if _FOCUS_TIME_RE.search(text):
         auto_vars.append("时间条件")
-    if re.search(r"(首套|二套|套数|资格|限购|条件|可购买|可再购买)", text):
+    if _FOCUS_CONDITION_RE.search(text):
         auto_vars.append("判定条件")
     if has_calc_signal:
         auto_vars.append("计算口径")
@@ -2090,22 +2291,19 @@ def _derive_focus_contract(
     if not focus_task:
         if has_calc_signal:
             focus_task = "数值计算"
-        elif re.search(r"(限购|资格|条件|适用|是否|可否|可再购买|最多)", text):
+        elif _FOCUS_ELIGIBILITY_RE.search(text):
             focus_task = "规则判定"
-        elif has_list or re.search(r"(流程|步骤|顺序)", text):
+        elif has_list or _FOCUS_PROCESS_RE.search(text):
             focus_task = "流程判定"
         else:
             focus_task = "规则理解"
 
     # Guardrail: avoid collapsing to pure "发布日期/年份" memory when slice contains actionable policy rules.
     is_date_memory_focus = bool(
-        re.search(
-            r"(发布时间|首个|首次).{0,12}(发布|时间)|发布.{0,12}(首个|首次)|\\d{4}年\\d{1,2}月\\d{1,2}日",
-            focus_rule,
-        )
+        _FOCUS_RELEASE_DATE_RE.search(focus_rule)
     )
     has_actionable_policy = bool(
-        re.search(r"(限购政策如下|户籍|外环|社保|套数|购房资格|可购|可再购买|最多可购买|适用条件)", text)
+        _FOCUS_PURCHASE_POLICY_RE.search(text)
     )
     if is_date_memory_focus and has_actionable_policy:
         focus_rule = "政策适用条件与结果判定规则"
@@ -2119,6 +2317,9 @@ def _derive_focus_contract(
     }
 
 
+_ASKS_MATERIALS_RE = re.compile(r"(材料|证件|证明|资料).*(包括|哪些|哪几项|准备|提交|提供|补充)")
+
+
 def validate_material_coverage_rule(
     final_json: Dict[str, Any],
     *,
@@ -2132,7 +2333,7 @@ def validate_material_coverage_rule(
     if len(required_materials) < 2:
         return None
     stem = str(final_json.get("题干", "") or "")
-    asks_materials = bool(re.search(r"(材料|证件|证明|资料).*(包括|哪些|哪几项|准备|提交|提供|补充)", stem))
+    asks_materials = bool(_ASKS_MATERIALS_RE.search(stem))
     if not asks_materials:
         return None
 
@@ -2487,8 +2688,11 @@ def validate_focus_alignment(
     except Exception:
         return []
 
+_YEAR_RE = re.compile(r'(19|20)\d{2}年')
+
+
 def _has_year(text: str) -> bool:
-    return bool(re.search(r'(19|20)\d{2}年', text or ""))
+    return bool(_YEAR_RE.search(text or ""))
 
 def _collect_text_fields(final_json: Dict[str, Any]) -> List[str]:
     fields = []
@@ -2502,6 +2706,11 @@ def _collect_text_fields(final_json: Dict[str, Any]) -> List[str]:
             fields.append(str(final_json.get(key, "")))
     return fields
 
+_OPTION_LABEL_PREFIX_RE = re.compile(r'^[A-HＡ-Ｈa-h][\.\、:：\s\)）]+', re.IGNORECASE)
+_OPTION_LABEL_GLUED_RE = re.compile(r'^[A-HＡ-Ｈa-h](?=[\u4e00-\u9fff])', re.IGNORECASE)
+_OPTION_END_PUNCT_RUN_RE = re.compile(r"[。！？；;：:，,、]+$")
+
+
 def repair_final_json_format(final_json: Dict[str, Any], question_type: str) -> Dict[str, Any]:
     if not isinstance(final_json, dict):
         return final_json
@@ -2521,11 +2730,11 @@ def repair_final_json_format(final_json: Dict[str, Any], question_type: str) ->
             key = f"选项{i}"
             val = str(repaired.get(key, "") or "")
             # Strip leading A-H with punctuation (A. A、 A: etc.)
-            val = re.sub(r'^[A-HＡ-Ｈa-h][\.\、:：\s\)）]+', '', val, flags=re.IGNORECASE)
+            val = _OPTION_LABEL_PREFIX_RE.sub('', val)
             # Strip leading single A-H when followed by CJK (avoids "A网签" -> display "A. A网签...")
-            val = re.sub(r'^[A-HＡ-Ｈa-h](?=[\u4e00-\u9fff])', '', val, flags=re.IGNORECASE)
+            val = _OPTION_LABEL_GLUED_RE.sub('', val)
             val = normalize_blank_brackets(val.strip())
-            val = re.sub(r"[。！？；;：:，,、]+$", "", val)
+            val = _OPTION_END_PUNCT_RUN_RE.sub("", val)
             repaired[key] = val
         # Fill missing options for choice questions
         for i in range(1, 5):
@@ -2558,6 +2767,9 @@ def _normalize_semantic_question_type(raw_type: Any, fallback_type: str) -> str:
     return mapping.get(fallback, fallback or "单选题")
 
 
+_NON_CHOICE_LABEL_RE = re.compile(r"[^A-D]")
+
+
 def _normalize_semantic_answer(raw_answer: Any, question_type: str, fallback_answer: Any) -> str:
     text = str(raw_answer or "").strip().upper()
     if question_type == "判断题":
@@ -2568,7 +2780,7 @@ def _normalize_semantic_answer(raw_answer: Any, question_type: str, fallback_ans
         if text in {"错误", "FALSE", "F"}:
             return "B"
     else:
-        letters = re.sub(r"[^A-D]", "", text)
+        letters = _NON_CHOICE_LABEL_RE.sub("", text)
         if question_type == "多选题" and len(letters) >= 2:
             return "".join(dict.fromkeys(letters))
         if question_type == "单选题" and len(letters) == 1:
@@ -2576,7 +2788,7 @@ def _normalize_semantic_answer(raw_answer: Any, question_type: str, fallback_ans
     fallback_text = str(fallback_answer or "").strip().upper()
     if question_type == "判断题" and fallback_text in {"A", "B"}:
         return fallback_text
-    fallback_letters = re.sub(r"[^A-D]", "", fallback_text)
+    fallback_letters = _NON_CHOICE_LABEL_RE.sub("", fallback_text)
     if question_type == "多选题" and len(fallback_letters) >= 2:
         return "".join(dict.fromkeys(fallback_letters))
     if question_type == "单选题" and len(fallback_letters) == 1:
@@ -2654,6 +2866,9 @@ def _semantic_resolve_answer_and_type(
         resolved_answer = _normalize_semantic_answer(fallback_answer, resolved_type, fallback_answer)
     return resolved_answer, resolved_type, llm_record
 
+_NON_CHOICE_LABEL_CI_RE = re.compile(r"[^A-Da-d]")
+
+
 def prepare_draft_for_writer(draft: Dict[str, Any], target_type: str) -> Dict[str, Any]:
     if not isinstance(draft, dict):
         return draft
@@ -2667,10 +2882,10 @@ def prepare_draft_for_writer(draft: Dict[str, Any], target_type: str) -> Dict[st
         fixed_opts = []
         for opt in options if isinstance(options, list) else []:
             val = str(opt)
-            val = re.sub(r'^[A-HＡ-Ｈa-h][\.\、:：\s\)）]+', '', val, flags=re.IGNORECASE)
+            val = _OPTION_LABEL_PREFIX_RE.sub('', val)
             val = normalize_blank_brackets(val.strip())
             # Strip trailing punctuation (full-width and ASCII)
-            val = re.sub(r"[。！？；;：:，,、]+$", "", val)
+            val = _OPTION_END_PUNCT_RUN_RE.sub("", val)
             fixed_opts.append(val)
         cleaned["options"] = fixed_opts
     # Normalize option count for choice questions
@@ -2699,12 +2914,15 @@ def prepare_draft_for_writer(draft: Dict[str, Any], target_type: str) -> Dict[st
             cleaned["answer"] = ans.strip().upper()[:1]
     elif target_type == "多选题":
         if isinstance(ans, list):
-            cleaned["answer"] = [str(x).strip().upper() for x in ans if re.fullmatch(r"[A-Da-d]", str(x).strip())]
+            cleaned["answer"] = [str(x).strip().upper() for x in ans if _SINGLE_ANSWER_RE.fullmatch(str(x).strip())]
         elif isinstance(ans, str):
-            cleaned["answer"] = re.sub(r"[^A-Da-d]", "", ans.strip()).upper()
+            cleaned["answer"] = _NON_CHOICE_LABEL_CI_RE.sub("", ans.strip()).upper()
     return cleaned
 
 
+_JUDGE_CONCLUSION_RE = re.compile(r"本题答案为\s*(正确|错误)")
+
+
 def _infer_draft_type_for_writer(draft: Dict[str, Any]) -> str:
     options = draft.get("options", []) if isinstance(draft, dict) else []
     answer = draft.get("answer", "") if isinstance(draft, dict) else ""
@@ -2713,7 +2931,7 @@ def _infer_draft_type_for_writer(draft: Dict[str, Any]) -> str:
         opt_set = {str(options[0]).strip(), str(options[1]).strip()}
         if opt_set == {"正确", "错误"}:
             return "判断题"
-    if re.search(r"本题答案为\s*(正确|错误)", explanation):
+    if _JUDGE_CONCLUSION_RE.search(explanation):
         return "判断题"
     expl_labels = _infer_multiselect_labels_from_explanation(explanation, option_count=len(options or []))
     if len(expl_labels) >= 2:
@@ -2737,29 +2955,33 @@ def _infer_final_json_question_type(final_json: Optional[Dict[str, Any]]) -> str
     explanation = str(data.get("解析", "") or "").strip()
     if {opt1, opt2} == {"正确", "错误"} and not opt3 and not opt4:
         return "判断题"
-    if re.search(r"本题答案为\s*(正确|错误)", explanation):
+    if _JUDGE_CONCLUSION_RE.search(explanation):
         return "判断题"
     expl_labels = _infer_multiselect_labels_from_explanation(explanation, option_count=len([x for x in [opt1, opt2, opt3, opt4] if x]))
     if len(expl_labels) > 1:
         return "多选题"
-    letters = re.sub(r"[^A-D]", "", ans)
+    letters = _NON_CHOICE_LABEL_RE.sub("", ans)
     if len(letters) > 1:
         return "多选题"
     return "单选题"
 
 
+_CORRECT_OPTION_MENTION_RE = re.compile(r"(?:选项)?([A-D])(?:项)?\s*正确", re.IGNORECASE)
+_MULTI_CONCLUSION_RE = re.compile(r"本题答案为\s*([A-D]{2,4})", re.IGNORECASE)
+
+
 def _infer_multiselect_labels_from_explanation(explanation: str, option_count: int = 4) -> List[str]:
     text = str(explanation or "")
     labels: List[str] = []
     # e.g. "选项A正确" / "A正确"
-    for m in re.findall(r"(?:选项)?([A-D])(?:项)?\s*正确", text, flags=re.IGNORECASE):
+    for m in _CORRECT_OPTION_MENTION_RE.findall(text):
         lab = str(m).upper()
         if lab not in labels:
             labels.append(lab)
     if len(labels) >= 2:
         return labels
     # e.g. "本题答案为ACD"
-    ans_match = re.search(r"本题答案为\s*([A-D]{2,4})", text, flags=re.IGNORECASE)
+    ans_match = _MULTI_CONCLUSION_RE.search(text)
     if ans_match:
         for ch in str(ans_match.group(1)).upper():
             if ch not in labels:
@@ -2851,45 +3073,6 @@ def _resolve_writer_target_type(
     return current_question_type if current_question_type in ["单选题", "多选题", "判断题"] else router_recommended_type
 
 
-def _build_validation_issue(message: str) -> "ValidationIssue":
-    msg = str(message or "")
-    issue_code = "WRITER_RULE"
-    field = "global"
-    if "题干" in msg:
-        field = "question"
-    elif "选项" in msg:
-        field = "options"
-    elif "答案" in msg:
-        field = "answer"
-    elif "解析" in msg:
-        field = "explanation"
-    if "括号" in msg:
-        issue_code = "FMT_BRACKET"
-    elif "答案格式" in msg or "答案" in msg:
-        issue_code = "ANS_FORMAT"
-    elif "选项末尾" in msg:
-        issue_code = "FMT_OPTION_END_PUNCT"
-    elif "称谓" in msg or "人名" in msg:
-        issue_code = "NAME_STYLE"
-    elif "锁词" in msg or "术语" in msg:
-        issue_code = "TERM_LOCK"
-    elif "图片" in msg:
-        issue_code = "HARD_IMAGE"
-    elif "表格" in msg:
-        issue_code = "HARD_TABLE"
-    elif "题干缺少标准占位括号" in msg:
-        issue_code = "FMT_STEM_BLANK"
-    elif "设问不规范" in msg or "结论锚点" in msg:
-        issue_code = "FMT_ASK_TEMPLATE"
-    return {
-        "issue_code": issue_code,
-        "severity": "error",
-        "field": field,
-        "message": msg,
-        "fix_hint": f"请修复问题：{msg}",
-    }
-
-
 def _writer_normalize_phase(draft: Dict[str, Any], target_type: str) -> "QuestionIR":
     normalized = prepare_draft_for_writer(draft, target_type)
     # Deterministic name cleanup before media/format normalization.
@@ -3185,6 +3368,12 @@ def _get_parent_path(path: str) -> str:
     return " > ".join(path.split(" > ")[:-1]).strip()
 
 
+_UNEXPANDED_LIST_INTRO_RE = re.compile(r"(如下|下列|以下).{0,12}(标准|规则|条件|口径|情形|材料|步骤|流程).{0,6}[：:]\s*$")
+_COLON_TAIL_RE = re.compile(r"[：:]\s*$")
+_EXPANDED_ITEM_RE = re.compile(r"(①|②|③|1[、.]|2[、.]|A[、.]|B[、.])")
+_ETC_TAIL_RE = re.compile(r"(等|等情形|等情况|等标准|等条件)\s*$")
+
+
 def _detect_current_slice_incomplete(kb_chunk: Dict[str, Any]) -> Tuple[bool, str]:
     """
     轻量启发式：识别当前切片是否疑似“关键规则被截断/未写全”。
@@ -3197,16 +3386,44 @@ def _detect_current_slice_incomplete(kb_chunk: Dict[str, Any]) -> Tuple[bool, st
         return True, "当前切片核心内容为空"
 
     tail = text[-48:]
-    if re.search(r"(如下|下列|以下).{0,12}(标准|规则|条件|口径|情形|材料|步骤|流程).{0,6}[：:]\s*$", text):
+    if _UNEXPANDED_LIST_INTRO_RE.search(text):
         return True, "出现“如下/下列…：”但后续规则未展开"
-    if re.search(r"[：:]\s*$", text) and not re.search(r"(①|②|③|1[、.]|2[、.]|A[、.]|B[、.])", tail):
+    if _COLON_TAIL_RE.search(text) and not _EXPANDED_ITEM_RE.search(tail):
         return True, "以冒号结尾且尾部未出现展开条目"
-    if re.search(r"(等|等情形|等情况|等标准|等条件)\s*$", text):
+    if _ETC_TAIL_RE.search(text):
         return True, "以“等…”收尾，规则可能未完整列出"
     return False, ""
 
 
+def _example_related_query(ex: Any) -> str:
+    if isinstance(ex, dict):
+        q = ex.get("题干", "") or ex.get("question", "")
+        exp = ex.get("解析", "") or ex.get("explanation", "")
+        return f"{q}\n{exp}".strip()
+    return str(ex)
+
+
+def _slice_cache_key(kb_chunk: Dict[str, Any]) -> Tuple[str, str]:
+    return str((kb_chunk or {}).get("完整路径", "") or ""), slice_content_hash(kb_chunk)
+
+
 def build_extended_kb_context(kb_chunk: Dict[str, Any], retriever: Optional[KnowledgeRetriever], examples: List[Dict]) -> Tuple[str, List[Dict], List[Dict]]:
+    """
+    Prompt context for a slice (current + parent + similar slices).
+    Memoised per retriever (material version), slice content and example queries: every attempt on
+    the same slice used to redo the same retrieval and JSON formatting.
+    """
+    example_queries = tuple(_example_related_query(ex) for ex in (examples or [])[:5])
+    kb_context, parent_slices, related_slices = slice_context_cache_for(retriever).get_or_compute(
+        "extended_kb_context",
+        _slice_cache_key(kb_chunk),
+        lambda: _build_extended_kb_context(kb_chunk, retriever, list(example_queries)),
+        extra=example_queries,
+    )
+    return kb_context, list(parent_slices), list(related_slices)
+
+
+def _build_extended_kb_context(kb_chunk: Dict[str, Any], retriever: Optional[KnowledgeRetriever], example_queries: List[str]) -> Tuple[str, List[Dict], List[Dict]]:
     current_path = kb_chunk.get("完整路径", "")
     parent_path = _get_parent_path(current_path)
     current_incomplete, incomplete_reason = _detect_current_slice_incomplete(kb_chunk)
@@ -3215,28 +3432,19 @@ def build_extended_kb_context(kb_chunk: Dict[str, Any], retriever: Optional[Know
     if retriever:
         parent_slices = retriever.get_parent_slices(kb_chunk)
         related_k = 10 if current_incomplete else 5
-        # Related slices by current slice content
+        # Related slices by current slice content, then by examples (题干+解析); scored in one batch.
         current_query = f"{kb_chunk.get('完整路径','')} {kb_chunk.get('核心内容','')}".strip()
-        related_slices.extend(
-            retriever.get_related_kb_chunks(current_query, k=related_k, exclude_paths=[current_path])
+        batched = retriever.get_related_kb_chunks_batch(
+            [current_query] + example_queries, k=related_k, exclude_paths=[current_path]
         )
+        related_slices.extend(batched[0])
         # 若当前切片疑似不完整，追加父层路径语义检索，主动补齐规则链条。
         if current_incomplete and parent_path:
             related_slices.extend(
                 retriever.get_related_kb_chunks(parent_path, k=max(related_k, 12), exclude_paths=[current_path])
             )
-        # Related slices by examples (题干+解析)
-        if examples:
-            for ex in examples[:5]:
-                if isinstance(ex, dict):
-                    q = ex.get("题干", "") or ex.get("question", "")
-                    exp = ex.get("解析", "") or ex.get("explanation", "")
-                    query_text = f"{q}\n{exp}".strip()
-                else:
-                    query_text = str(ex)
-                related_slices.extend(
-                    retriever.get_related_kb_chunks(query_text, k=related_k, exclude_paths=[current_path])
-                )
+        for chunks in batched[1:]:
+            related_slices.extend(chunks)
     # Deduplicate by path
     def _dedup(chunks):
         seen = set()
@@ -3338,18 +3546,25 @@ def _is_conceptual_knowledge_slice(state: Optional[Dict[str, Any]]) -> bool:
     content_text = str(kb_chunk.get("核心内容", "") or "")
     focus_task = str(focus_contract.get("focus_task", "") or "").strip()
     focus_rule = str(focus_contract.get("focus_rule", "") or router_details.get("core_focus", "") or "").strip()
+    return SHARED_SLICE_CONTEXT_CACHE.get_or_compute(
+        "conceptual_slice",
+        (path_text, content_text),
+        lambda: _is_conceptual_slice_text(path_text, content_text, focus_task, focus_rule),
+        extra=(focus_task, focus_rule),
+    )
+
+
+_CONCEPTUAL_SIGNAL_RE = re.compile(r"(文化|使命|愿景|价值观|理念|定义|概念|术语|认识|原则|内涵)")
+_ACTIONABLE_SIGNAL_RE = re.compile(r"(限购|税|贷款|签约|合同|违约|赔付|流程|步骤|时点|年限|金额|比例|公式|计算|资格|审核|办理|交割)")
+_NUMERIC_FORMULA_SIGNAL_RE = re.compile(r"(=|%|％|\d)")
+
+
+def _is_conceptual_slice_text(path_text: str, content_text: str, focus_task: str, focus_rule: str) -> bool:
     full_text = f"{path_text}\n{content_text}\n{focus_rule}"
 
-    conceptual_signal = bool(
-        re.search(r"(文化|使命|愿景|价值观|理念|定义|概念|术语|认识|原则|内涵)", full_text)
-    )
-    actionable_signal = bool(
-        re.search(
-            r"(限购|税|贷款|签约|合同|违约|赔付|流程|步骤|时点|年限|金额|比例|公式|计算|资格|审核|办理|交割)",
-            full_text,
-        )
-    )
-    numeric_formula_signal = bool(re.search(r"(=|%|％|\d)", full_text))
+    conceptual_signal = bool(_CONCEPTUAL_SIGNAL_RE.search(full_text))
+    actionable_signal = bool(_ACTIONABLE_SIGNAL_RE.search(full_text))
+    numeric_formula_signal = bool(_NUMERIC_FORMULA_SIGNAL_RE.search(full_text))
 
     # 规则理解 + 概念信号强，且缺乏可执行规则信号时，按概念型处理。
     if focus_task == "规则理解" and conceptual_signal and not actionable_signal:
@@ -4073,6 +4288,19 @@ _EXPL_SECTION_HEADER_RE = re.compile(
 )
 
 
+# normalize_explanation_three_stage 的改写规则（每次出题/修复都会调用，模块加载时编译一次）
+_EXPL_NUMBERED_1_RE = re.compile(r"^(1\.)\s*")
+_EXPL_NUMBERED_2_RE = re.compile(r"(\n)(2\.)\s*")
+_EXPL_NUMBERED_3_RE = re.compile(r"(\n)(3\.)\s*")
+_EXPL_TEXTBOOK_LEVEL_RE = re.compile(r"^(教材原文\s*[（(][^）)]+[）)]\s*)", re.MULTILINE)
+_EXPL_TEXTBOOK_COLON_RE = re.compile(r"^(教材原文[：:]\s*)", re.MULTILINE)
+_EXPL_TEXTBOOK_BARE_RE = re.compile(r"^(教材原文)\s*(\n)?")
+_EXPL_ANALYSIS_RE = re.compile(r"(\n)(试题分析[：:]\s*)")
+_EXPL_CONCLUSION_RE = re.compile(r"(\n)(结论[：:]\s*)")
+_EXPL_ANSWER_LINE_RE = re.compile(r"(\n)(本题答案为)")
+_TARGET_TITLE_LABEL_RE = re.compile(r"目标题\s*[：:]\s*")
+
+
 def _merge_duplicate_expl_sections(text: str) -> str:
     """Ensure each of 教材原文/试题分析/结论 appears exactly once; merge duplicates."""
     if not (text or text.strip()):
@@ -4117,7 +4345,7 @@ def _strip_target_title_label(explanation: str) -> str:
     """Remove literal '目标题：' from explanation so display shows only the content (routing first three titles)."""
     if not explanation:
         return explanation
-    return re.sub(r"目标题\s*[：:]\s*", "", explanation)
+    return _TARGET_TITLE_LABEL_RE.sub("", explanation)
 
 
 def normalize_explanation_three_stage(text: str) -> str:
@@ -4127,9 +4355,9 @@ def normalize_explanation_three_stage(text: str) -> str:
         return s
     # Already starts with 1、 or 1. → unify to 1、2、3、 and return
     if s.startswith("1.") or s.startswith("1、") or "1. 教材原文" in s[:25] or "1、教材原文" in s[:25]:
-        s = re.sub(r"^(1\.)\s*", "1、", s, count=1)
-        s = re.sub(r"(\n)(2\.)\s*", r"\n2、", s, count=1)
-        s = re.sub(r"(\n)(3\.)\s*", r"\n3、", s, count=1)
+        s = _EXPL_NUMBERED_1_RE.sub("1、", s, count=1)
+        s = _EXPL_NUMBERED_2_RE.sub(r"\n2、", s, count=1)
+        s = _EXPL_NUMBERED_3_RE.sub(r"\n3、", s, count=1)
         s = _merge_duplicate_expl_sections(s)
         return _strip_target_title_label(s)
     # 【】 style
@@ -4138,16 +4366,16 @@ def normalize_explanation_three_stage(text: str) -> str:
     if "【本题答案为" in s and "3、" not in s and "3." not in s:
         s = s.replace("【本题答案为", "\n3、结论：【本题答案为", 1)
     # 教材原文(了解) / 教材原文（了解）→ 1、教材原文：
-    s = re.sub(r"^(教材原文\s*[（(][^）)]+[）)]\s*)", "1、教材原文：", s, count=1, flags=re.MULTILINE)
+    s = _EXPL_TEXTBOOK_LEVEL_RE.sub("1、教材原文：", s, count=1)
     # Plain 教材原文 / 教材原文：
-    s = re.sub(r"^(教材原文[：:]\s*)", "1、教材原文：", s, count=1, flags=re.MULTILINE)
+    s = _EXPL_TEXTBOOK_COLON_RE.sub("1、教材原文：", s, count=1)
     if not s.startswith("1、") and not s.startswith("1."):
-        s = re.sub(r"^(教材原文)\s*(\n)?", r"1、教材原文：\2", s, count=1)
+        s = _EXPL_TEXTBOOK_BARE_RE.sub(r"1、教材原文：\2", s, count=1)
     # 试题分析 / 结论 at line start
-    s = re.sub(r"(\n)(试题分析[：:]\s*)", r"\n2、试题分析：", s, count=1)
-    s = re.sub(r"(\n)(结论[：:]\s*)", r"\n3、结论：", s, count=1)
+    s = _EXPL_ANALYSIS_RE.sub(r"\n2、试题分析：", s, count=1)
+    s = _EXPL_CONCLUSION_RE.sub(r"\n3、结论：", s, count=1)
     if "本题答案为" in s and "3、结论：" not in s and "3. 结论：" not in s:
-        s = re.sub(r"(\n)(本题答案为)", r"\n3、结论：\2", s, count=1)
+        s = _EXPL_ANSWER_LINE_RE.sub(r"\n3、结论：\2", s, count=1)
     if not s.startswith("1.") and not s.startswith("1、"):
         s = "1、教材原文：" + s
     s = _merge_duplicate_expl_sections(s)
@@ -4221,11 +4449,18 @@ def get_default_retriever(configurable: Optional[Dict[str, Any]] = None) -> Opti
     object via `configurable.retriever` (e.g., LangGraph Studio).
     """
     cfg = configurable if isinstance(configurable, dict) else {}
-    tenant_id = str(cfg.get("tenant_id", "") or "").strip()
-    kb_path = str(cfg.get("kb_path", "") or "").strip()
-    history_path = str(cfg.get("history_path", "") or "").strip()
-    mapping_path = str(cfg.get("mapping_path", "") or "").strip()
-    mapping_review_path = str(cfg.get("mapping_review_path", "") or "").strip()
+    try:
+        # Resolve tenant defaults first so every input file (incl. mapping / mapping review) is in the key.
+        resolved_paths = resolve_knowledge_retriever_paths(
+            tenant_id=str(cfg.get("tenant_id", "") or "").strip() or None,
+            kb_path=str(cfg.get("kb_path", "") or "").strip() or None,
+            history_path=str(cfg.get("history_path", "") or "").strip() or None,
+            mapping_path=str(cfg.get("mapping_path", "") or "").strip() or None,
+            mapping_review_path=str(cfg.get("mapping_review_path", "") or "").strip() or None,
+        )
+    except Exception:
+        return None
+    tenant_id, kb_path, history_path, mapping_path, mapping_review_path = resolved_paths
     cache_key = (
         tenant_id,
         _graph_path_version_token(kb_path),
@@ -4238,11 +4473,12 @@ def get_default_retriever(configurable: Optional[Dict[str, Any]] = None) -> Opti
             return _DEFAULT_RETRIEVER_CACHE[cache_key]
     try:
         retriever = build_knowledge_retriever(
-            tenant_id=tenant_id or None,
-            kb_path=kb_path or None,
-            history_path=history_path or None,
-            mapping_path=mapping_path or None,
-            mapping_review_path=mapping_review_path or None,
+            tenant_id=tenant_id,
+            kb_path=kb_path,
+            history_path=history_path,
+            mapping_path=mapping_path,
+            mapping_review_path=mapping_review_path,
+            snapshot_key=cache_key,
         )
     except Exception:
         retriever = None
@@ -4255,88 +4491,30 @@ def get_default_retriever(configurable: Optional[Dict[str, Any]] = None) -> Opti
     return retriever
 
 
-def _normalize_term_text(text: str) -> str:
-    if not isinstance(text, str):
-        return ""
-    cleaned = re.sub(r"\s+", "", text)
-    cleaned = re.sub(r"[“”\"'`·•,，。！？；;：:（）()【】\\[\\]<>《》/\\\\-]", "", cleaned)
-    return cleaned.strip()
+_normalize_term_text = normalize_term_text
 
 
-def _build_glossary_cache() -> Dict[str, Any]:
-    global _GLOSSARY_CACHE
+def _build_glossary_cache(tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    # _GLOSSARY_CACHE pins a fixed glossary (tests, scripts); otherwise use the compiled,
+    # hot-reloaded artifact for the tenant bound to this question.
     if _GLOSSARY_CACHE is not None:
         return _GLOSSARY_CACHE
+    return load_glossary(tenant_id or _GLOSSARY_TENANT.get(None))
 
-    glossary_path = Path("房地产行业专有名词新.xlsx")
-    terms_by_category: Dict[str, List[str]] = defaultdict(list)
-    all_terms: List[str] = []
-
-    if glossary_path.exists():
-        try:
-            import pandas as pd  # Lazy import to avoid hard dependency at module import time
-            xls = pd.ExcelFile(glossary_path)
-            generic_headers = {"核心名词", "专有名词"}
-            for sheet in xls.sheet_names:
-                df = pd.read_excel(glossary_path, sheet_name=sheet)
-                col_names = [str(c).strip() for c in df.columns if str(c).strip()]
-                # Some sheets use a concrete term as the only header (e.g. 商业贷款), keep it.
-                for col in col_names:
-                    norm_col = _normalize_term_text(col)
-                    if len(norm_col) >= 2 and col not in generic_headers:
-                        terms_by_category[sheet].append(norm_col)
-                        all_terms.append(norm_col)
-                for col in df.columns:
-                    series = df[col].dropna()
-                    for value in series:
-                        term = _normalize_term_text(str(value))
-                        if len(term) >= 2:
-                            terms_by_category[sheet].append(term)
-                            all_terms.append(term)
-        except Exception as e:
-            print(f"⚠️ 专有名词库加载失败（xlsx）: {e}")
-
-    # Fallback to txt cache if xlsx unavailable
-    txt_path = Path("教材提取专有名词.txt")
-    if (not all_terms) and txt_path.exists():
-        try:
-            for line in txt_path.read_text(encoding="utf-8").splitlines():
-                term = _normalize_term_text(line)
-                if len(term) >= 2:
-                    terms_by_category["fallback_txt"].append(term)
-                    all_terms.append(term)
-        except Exception as e:
-            print(f"⚠️ 专有名词库加载失败（txt）: {e}")
-
-    dedup_terms: List[str] = []
-    seen = set()
-    for t in all_terms:
-        if t in seen:
-            continue
-        seen.add(t)
-        dedup_terms.append(t)
-
-    dedup_terms.sort(key=len, reverse=True)
-    for cat, terms in list(terms_by_category.items()):
-        u = []
-        s = set()
-        for t in terms:
-            if t and t not in s:
-                s.add(t)
-                u.append(t)
-        terms_by_category[cat] = u
 
+def _glossary_matcher(glossary: Dict[str, Any]) -> TermMatcher:
+    """Compiled automaton for a glossary dict, built on first use and kept on the dict."""
+    matcher = glossary.get("matcher")
+    if isinstance(matcher, TermMatcher):
+        return matcher
     term_to_categories: Dict[str, List[str]] = defaultdict(list)
-    for cat, ts in terms_by_category.items():
+    for cat, ts in (glossary.get("terms_by_category") or {}).items():
         for t in ts:
-            term_to_categories[t].append(cat)
-
-    _GLOSSARY_CACHE = {
-        "terms": dedup_terms,
-        "terms_by_category": dict(terms_by_category),
-        "term_to_categories": dict(term_to_categories),
-    }
-    return _GLOSSARY_CACHE
+            if cat not in term_to_categories[t]:
+                term_to_categories[t].append(cat)
+    matcher = TermMatcher(glossary.get("terms") or [], term_to_categories)
+    glossary["matcher"] = matcher
+    return matcher
 
 
 def _build_kb_term_context(kb_chunk: Dict[str, Any]) -> str:
@@ -4350,13 +4528,16 @@ def _build_kb_term_context(kb_chunk: Dict[str, Any]) -> str:
     return "\n".join([p for p in parts if p])
 
 
+_TERM_CATEGORY_SPLIT_RE = re.compile(r"[、与和/]")
+
+
 def _semantic_term_match(term: str, context_text: str, category: str, category_terms: List[str], path_text: str) -> bool:
     if term in path_text:
         return True
     if len(term) >= 3:
         return True
     # For very short terms, require stronger contextual evidence.
-    for kw in re.split(r"[、与和/]", category or ""):
+    for kw in _TERM_CATEGORY_SPLIT_RE.split(category or ""):
         kw = _normalize_term_text(kw)
         if len(kw) >= 2 and kw in context_text:
             return True
@@ -4372,6 +4553,17 @@ def _semantic_term_match(term: str, context_text: str, category: str, category_t
 
 def detect_term_locks_from_kb(kb_chunk: Dict[str, Any]) -> List[str]:
     glossary = _build_glossary_cache()
+    # The cached value pins its glossary, so id(glossary) cannot be reused by a reloaded one while cached.
+    _pinned, locks = SHARED_SLICE_CONTEXT_CACHE.get_or_compute(
+        "term_locks",
+        _slice_cache_key(kb_chunk),
+        lambda: (glossary, _detect_term_locks_from_kb(kb_chunk, glossary)),
+        extra=(id(glossary),),
+    )
+    return list(locks)
+
+
+def _detect_term_locks_from_kb(kb_chunk: Dict[str, Any], glossary: Dict[str, Any]) -> List[str]:
     terms = glossary.get("terms", []) or []
     terms_by_category = glossary.get("terms_by_category", {}) or {}
     if not terms:
@@ -4381,16 +4573,15 @@ def detect_term_locks_from_kb(kb_chunk: Dict[str, Any]) -> List[str]:
     context_text = _normalize_term_text(context_raw)
     path_text = _normalize_term_text(str((kb_chunk or {}).get("完整路径", "") or ""))
     locks: List[str] = []
+    matcher = _glossary_matcher(glossary)
 
-    for term in terms:
-        if term not in context_text:
-            continue
+    for term in matcher.find_terms_ordered(context_text):
         matched = False
-        for category, cat_terms in terms_by_category.items():
-            if term in cat_terms:
-                if _semantic_term_match(term, context_text, category, cat_terms, path_text):
-                    matched = True
-                    break
+        for category in matcher.term_to_categories.get(term, []):
+            cat_terms = terms_by_category.get(category) or []
+            if _semantic_term_match(term, context_text, category, cat_terms, path_text):
+                matched = True
+                break
         if matched or term in path_text:
             locks.append(term)
 
@@ -4404,6 +4595,31 @@ def detect_term_locks_from_kb(kb_chunk: Dict[str, Any]) -> List[str]:
     return uniq
 
 
+def warm_slice_context(
+    kb_chunks: List[Dict[str, Any]],
+    retriever: Optional[KnowledgeRetriever] = None,
+    *,
+    tenant_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    任务开始前预计算切片派生上下文（首轮 router 的扩展上下文、术语锁定、风险画像），
+    并发分片随后直接命中缓存。返回该教材版本缓存的命中统计。
+    """
+    token = attach_glossary_tenant(tenant_id)
+    try:
+        for chunk in kb_chunks or []:
+            if not isinstance(chunk, dict):
+                continue
+            content = str(chunk.get("核心内容", "") or "")
+            path = str(chunk.get("完整路径", "") or "")
+            build_extended_kb_context(chunk, retriever, [])
+            detect_term_locks_from_kb(chunk)
+            detect_router_high_risk_slice(content, path)
+            detect_router_formula_ambiguity_risk(content, path)
+    finally:
+        detach_glossary_tenant(token)
+    return slice_context_cache_for(retriever).stats()
+
 def _question_text_for_term_check(payload: Dict[str, Any]) -> str:
     if not isinstance(payload, dict):
         return ""
@@ -4420,6 +4636,9 @@ def _question_text_for_term_check(payload: Dict[str, Any]) -> str:
     return _normalize_term_text(" ".join(fields))
 
 
+_SENTENCE_SPLIT_RE = re.compile(r"[。！？；;!\n]")
+
+
 def detect_term_lock_violations(term_locks: List[str], payload: Dict[str, Any]) -> List[str]:
     if not term_locks:
         return []
@@ -4439,34 +4658,15 @@ def detect_term_lock_violations(term_locks: List[str], payload: Dict[str, Any])
     text = _question_text_for_term_check(payload)
     if not text:
         return []
-    glossary = _build_glossary_cache()
-    all_terms = glossary.get("terms", []) or []
-    present_terms = [t for t in all_terms if t in text]
-
-    def _looks_like_substitution(lock: str, cand: str) -> bool:
-        if cand == lock:
-            return False
-        def _is_subseq(shorter: str, longer: str) -> bool:
-            it = iter(longer)
-            return all(ch in it for ch in shorter)
-        # Abbreviation-like pattern: same first/last char and candidate is shorter.
-        if len(cand) >= 2 and len(cand) < len(lock):
-            if lock[0] == cand[0] and lock[-1] == cand[-1]:
-                return True
-            # Abbreviation-like subsequence (e.g., 商业贷款 -> 商贷)
-            if lock[0] == cand[0] and _is_subseq(cand, lock):
-                return True
-        # Prefix/suffix containment relation (e.g., 全称/简称 variants).
-        if lock.startswith(cand) or cand.startswith(lock) or lock.endswith(cand) or cand.endswith(lock):
-            return True
-        return False
+    matcher = _glossary_matcher(_build_glossary_cache())
+    present_terms = matcher.find_terms_ordered(text)
 
     def _is_explanatory_usage(lock: str, cand: str, source_text: str) -> bool:
         if not source_text:
             return False
         explain_keywords = ["简称", "又称", "也称", "俗称", "即", "是指", "指的是", "全称"]
         # Sentence-level relaxation: same sentence contains both terms + explanation keyword.
-        for sentence in re.split(r"[。！？；;!\n]", source_text):
+        for sentence in _SENTENCE_SPLIT_RE.split(source_text):
             if lock in sentence and cand in sentence and any(k in sentence for k in explain_keywords):
                 return True
         # Allow explicit terminology explanation forms.
@@ -4481,6 +4681,7 @@ def detect_term_lock_violations(term_locks: List[str], payload: Dict[str, Any])
     violations: List[str] = []
     for lock in term_locks:
         similar_hits = []
+        substitutes = matcher.substitutes_of(lock)
         for t in present_terms:
             if t == lock:
                 continue
@@ -4488,7 +4689,7 @@ def detect_term_lock_violations(term_locks: List[str], payload: Dict[str, Any])
             # mandatory terminology instead of replacement.
             if t in lock_set:
                 continue
-            if not _looks_like_substitution(lock, t):
+            if t not in substitutes:
                 continue
             if _is_explanatory_usage(lock, t, raw_text):
                 continue
@@ -4553,6 +4754,9 @@ def enforce_term_locks(term_locks: List[str], payload: Dict[str, Any]) -> Dict[s
     return fixed
 
 
+_FENCED_JSON_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+
+
 def parse_json_from_response(text: str) -> Dict:
     """
     Robustly extracts and parses JSON from LLM response text.
@@ -4571,7 +4775,7 @@ def parse_json_from_response(text: str) -> Dict:
     
     # 1. Try to find JSON within markdown code blocks
     # Matches ```json { ... } ``` or ``` { ... } ```
-    match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
+    match = _FENCED_JSON_RE.search(text)
     if match:
         json_str = match.group(1)
     else:
@@ -4713,12 +4917,143 @@ def mark_unstable(summary: Dict[str, Any]) -> List[str]:
     return flags
 
 
-def call_llm(
+def _is_retryable_llm_error(err: Exception) -> bool:
+    err_str = str(err)
+    err_lower = err_str.lower()
+    return (
+        "429" in err_str
+        or "rate" in err_lower
+        or "too many" in err_lower
+        or "500" in err_str
+        or "502" in err_str
+        or "503" in err_str
+        or "504" in err_str
+        or "timeout" in err_lower
+        or "timed out" in err_lower
+        or "connection" in err_lower
+    )
+
+
+def _build_llm_call_record(
+    *,
     node_name: str,
-    prompt: str,
+    trace_id: Optional[str],
+    question_id: Optional[str],
+    prompt_version: Optional[str],
+    temperature: float,
+    max_tokens: int,
+    success: bool,
+    used_model: str,
+    provider_used: str,
+    started_at: float,
+    retries: int,
+    usage_obj: Any = None,
+    error: Optional[str] = None,
+    cache_hit: bool = False,
+) -> Dict[str, Any]:
+    ended_at = time.time()
+    usage = _extract_usage_dict(usage_obj)
+    return {
+        "call_id": uuid.uuid4().hex,
+        "trace_id": trace_id,
+        "question_id": question_id,
+        "node": node_name,
+        "provider": provider_used,
+        "model": used_model,
+        "prompt_version": prompt_version,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+        "latency_ms": round((ended_at - started_at) * 1000, 2),
+        "retries": retries,
+        "success": success,
+        "error": error,
+        "cache_hit": cache_hit,
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ended_at)),
+        "ts_ms": int(ended_at * 1000),
+    }
+
+
+def _lookup_llm_cache(
+    cache_mode: str,
+    cache_key: str,
+    build_record: Any,
     model_name: str,
-    api_key: str = None,
-    base_url: str = None,
+    provider_used: str,
+) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    """Serve a cached completion, or fail a replay-mode miss; None means go to the network."""
+    if cache_mode == "off":
+        return None
+    started = time.time()
+    try:
+        cached = get_llm_response_cache().get(cache_key)
+    except Exception as e:
+        print(f"⚠️ LLM 响应缓存读取失败: {e}")
+        cached = None
+    if cached is not None:
+        record = build_record(
+            success=True,
+            used_model=cached["model"] or model_name,
+            provider_used=cached["provider"] or provider_used,
+            started_at=started,
+            retries=0,
+            usage_obj=None,
+            cache_hit=True,
+        )
+        return cached["content"], record["model"], record
+    if cache_mode == "replay":
+        # Strict replay: never reach the network, a miss is a hard failure.
+        record = build_record(
+            success=False,
+            used_model=model_name,
+            provider_used=provider_used,
+            started_at=started,
+            retries=0,
+            usage_obj=None,
+            error="LLM cache replay miss",
+        )
+        return "", model_name, record
+    return None
+
+
+def _store_llm_cache(cache_mode: str, cache_key: str, content: str, record: Dict[str, Any]) -> None:
+    if cache_mode != "readwrite" or not str(content or "").strip():
+        return
+    try:
+        get_llm_response_cache().put(
+            cache_key,
+            model=record.get("model") or "",
+            provider=record.get("provider") or "",
+            content=content,
+            usage={k: record.get(k) for k in ("prompt_tokens", "completion_tokens", "total_tokens")},
+        )
+    except Exception as e:
+        print(f"⚠️ LLM 响应缓存写入失败: {e}")
+
+
+def _llm_url_candidates(url_provider: str, base_u: str, key: str) -> List[str]:
+    url_candidates: List[str] = []
+    if base_u:
+        url_candidates.append(base_u)
+        if not base_u.endswith("/v1"):
+            url_candidates.append(f"{base_u}/v1")
+    else:
+        url_candidates.append(base_u)
+    # de-duplicate while preserving order
+    seen_url = set()
+    url_candidates = [u for u in url_candidates if not (u in seen_url or seen_url.add(u))]
+    # Try the variant (with or without /v1) that worked last time first.
+    return order_url_candidates(url_provider, base_u, key, url_candidates)
+
+
+def call_llm(
+    node_name: str,
+    prompt: str,
+    model_name: str,
+    api_key: str = None,
+    base_url: str = None,
     provider: str = None,
     trace_id: Optional[str] = None,
     question_id: Optional[str] = None,
@@ -4727,6 +5062,27 @@ def call_llm(
     max_tokens: int = 4000,
     timeout: int = 300,
 ) -> Tuple[str, str, Dict[str, Any]]:
+    loop = _ASYNC_LLM_LOOP.get()
+    if loop is not None and loop.is_running() and not _on_event_loop(loop):
+        # 异步图节点内：请求交给事件循环上的 acall_llm，本线程只等结果
+        return _submit_to_loop(
+            loop,
+            acall_llm(
+                node_name,
+                prompt,
+                model_name,
+                api_key=api_key,
+                base_url=base_url,
+                provider=provider,
+                trace_id=trace_id,
+                question_id=question_id,
+                prompt_version=prompt_version,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout,
+                on_token=_graph_token_writer(node_name),
+            ),
+        ).result()
     # NOTE: In Studio UI, users might omit config; provide safe defaults.
     if not model_name:
         model_name = MODEL_NAME or "deepseek-chat"
@@ -4742,54 +5098,24 @@ def call_llm(
     else:
         is_ark = ("volces.com" in base_url_lower) or ("ark.cn" in base_url_lower)
 
-    def is_retryable_error(err: Exception) -> bool:
-        err_str = str(err)
-        err_lower = err_str.lower()
-        return (
-            "429" in err_str
-            or "rate" in err_lower
-            or "too many" in err_lower
-            or "500" in err_str
-            or "502" in err_str
-            or "503" in err_str
-            or "504" in err_str
-            or "timeout" in err_lower
-            or "timed out" in err_lower
-            or "connection" in err_lower
+    def build_record(**kwargs: Any) -> Dict[str, Any]:
+        return _build_llm_call_record(
+            node_name=node_name,
+            trace_id=trace_id,
+            question_id=question_id,
+            prompt_version=prompt_version,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
         )
 
-    def build_record(
-        *,
-        success: bool,
-        used_model: str,
-        provider_used: str,
-        started_at: float,
-        retries: int,
-        usage_obj: Any = None,
-        error: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        ended_at = time.time()
-        usage = _extract_usage_dict(usage_obj)
-        return {
-            "call_id": uuid.uuid4().hex,
-            "trace_id": trace_id,
-            "question_id": question_id,
-            "node": node_name,
-            "provider": provider_used,
-            "model": used_model,
-            "prompt_version": prompt_version,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "prompt_tokens": usage.get("prompt_tokens"),
-            "completion_tokens": usage.get("completion_tokens"),
-            "total_tokens": usage.get("total_tokens"),
-            "latency_ms": round((ended_at - started_at) * 1000, 2),
-            "retries": retries,
-            "success": success,
-            "error": error,
-            "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ended_at)),
-            "ts_ms": int(ended_at * 1000),
-        }
+    cache_mode = llm_cache_mode()
+    cache_key = llm_cache_key(model_name, prompt, temperature, max_tokens) if cache_mode != "off" else ""
+    cached_result = _lookup_llm_cache(
+        cache_mode, cache_key, build_record, model_name, "ark" if is_ark else (provider or "ait")
+    )
+    if cached_result is not None:
+        return cached_result
 
     if is_ark:
         started = time.time()
@@ -4821,26 +5147,24 @@ def call_llm(
             try:
                 ark_key = ARK_API_KEY or api_key
                 if ark_key:
-                    client = Ark(
-                        api_key=ark_key,
-                        base_url=(base_url or ARK_BASE_URL),
-                    )
+                    client = get_ark_client(base_url or ARK_BASE_URL, api_key=ark_key)
                 else:
                     if not (VOLC_ACCESS_KEY_ID and VOLC_SECRET_ACCESS_KEY):
                         raise ValueError("ARK_API_KEY is required for Ark chain, or provide VOLC_ACCESS_KEY_ID / VOLC_SECRET_ACCESS_KEY")
-                    client = Ark(
+                    client = get_ark_client(
+                        base_url or ARK_BASE_URL,
                         ak=VOLC_ACCESS_KEY_ID,
                         sk=VOLC_SECRET_ACCESS_KEY,
-                        base_url=(base_url or ARK_BASE_URL),
                     )
-                resp = client.chat.completions.create(
-                    model=model_name,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    timeout=http_timeout,
-                    extra_headers=({"X-Project-Name": ARK_PROJECT_NAME} if ARK_PROJECT_NAME else None),
-                )
+                with get_llm_limiter("ark", model_name).slot(timeout=http_timeout):
+                    resp = client.chat.completions.create(
+                        model=model_name,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=http_timeout,
+                        extra_headers=({"X-Project-Name": ARK_PROJECT_NAME} if ARK_PROJECT_NAME else None),
+                    )
                 content = resp.choices[0].message.content if resp.choices else ""
                 record = build_record(
                     success=True,
@@ -4850,9 +5174,10 @@ def call_llm(
                     retries=attempt,
                     usage_obj=getattr(resp, "usage", None),
                 )
+                _store_llm_cache(cache_mode, cache_key, content, record)
                 return content, model_name, record
             except Exception as e:
-                if is_retryable_error(e) and attempt < len(ark_backoff_seconds):
+                if _is_retryable_llm_error(e) and attempt < len(ark_backoff_seconds):
                     wait_time = ark_backoff_seconds[attempt]
                     print(f"⚠️ Ark 限流/服务错误，等待 {wait_time}s 后重试 (第 {attempt+1} 次)")
                     time.sleep(wait_time)
@@ -4874,17 +5199,9 @@ def call_llm(
     used_model = model_name
     backoff_seconds = [2, 5, 10]
     started = time.time()
-    url_candidates: List[str] = []
     base_u = str(url or "").rstrip("/")
-    if base_u:
-        url_candidates.append(base_u)
-        if not base_u.endswith("/v1"):
-            url_candidates.append(f"{base_u}/v1")
-    else:
-        url_candidates.append(base_u)
-    # de-duplicate while preserving order
-    seen_url = set()
-    url_candidates = [u for u in url_candidates if not (u in seen_url or seen_url.add(u))]
+    url_provider = provider or "ait"
+    url_candidates = _llm_url_candidates(url_provider, base_u, key)
 
     for attempt in range(len(backoff_seconds) + 1):
         http_timeout, wall_err = _question_wall_clock_cap_http_timeout(effective_timeout)
@@ -4926,14 +5243,15 @@ def call_llm(
                             error=wall_err,
                         )
                         return "", used_model, record
-                    client = OpenAI(api_key=key, base_url=candidate_url)
-                    resp = client.chat.completions.create(
-                        model=used_model,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                        timeout=http_timeout,
-                    )
+                    client = get_openai_client(key, candidate_url)
+                    with get_llm_limiter(url_provider, used_model).slot(timeout=http_timeout):
+                        resp = client.chat.completions.create(
+                            model=used_model,
+                            messages=[{"role": "user", "content": prompt}],
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            timeout=http_timeout,
+                        )
                     content = resp.choices[0].message.content if resp.choices else ""
                     if isinstance(content, list):
                         content = "\n".join(
@@ -4944,6 +5262,7 @@ def call_llm(
                         content = str(content or "")
                     if not content.strip():
                         raise ValueError(f"Empty response (attempt {attempt + 1})")
+                    remember_working_url(url_provider, base_u, key, candidate_url)
                     record = build_record(
                         success=True,
                         used_model=used_model,
@@ -4952,9 +5271,10 @@ def call_llm(
                         retries=attempt,
                         usage_obj=getattr(resp, "usage", None),
                     )
+                    _store_llm_cache(cache_mode, cache_key, content, record)
                     return content, used_model, record
                 except Exception as inner:
-                    if is_retryable_error(inner):
+                    if _is_retryable_llm_error(inner):
                         raise
                     last_non_retryable = inner
             if last_non_retryable is not None:
@@ -4962,7 +5282,7 @@ def call_llm(
             raise RuntimeError("No valid base_url candidate for OpenAI-compatible call")
         except Exception as e:
             err_str = str(e)
-            is_retryable = is_retryable_error(e)
+            is_retryable = _is_retryable_llm_error(e)
             if is_retryable and attempt < len(backoff_seconds):
                 wait_time = backoff_seconds[attempt]
                 print(f"⚠️ OpenAI-compatible 限流/服务错误，等待 {wait_time}s 后重试 (第 {attempt+1} 次)")
@@ -4980,6 +5300,258 @@ def call_llm(
             return "", used_model, record
 
 
+async def _astream_chat_completion(client: Any, emit: Callable[[str], Any], **create_kwargs: Any) -> Tuple[str, Any]:
+    stream = await client.chat.completions.create(
+        stream=True,
+        stream_options={"include_usage": True},
+        **create_kwargs,
+    )
+    parts: List[str] = []
+    usage_obj = None
+    async with stream:
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage_obj = chunk.usage
+            choices = getattr(chunk, "choices", None) or []
+            delta = getattr(getattr(choices[0], "delta", None), "content", None) if choices else None
+            if delta:
+                parts.append(delta)
+                await emit(delta)
+    return "".join(parts), usage_obj
+
+
+async def acall_llm(
+    node_name: str,
+    prompt: str,
+    model_name: str,
+    api_key: str = None,
+    base_url: str = None,
+    provider: str = None,
+    trace_id: Optional[str] = None,
+    question_id: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    temperature: float = 0.3,
+    max_tokens: int = 4000,
+    timeout: int = 300,
+    on_token: Optional[Callable[[str], Any]] = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    asyncio 版 call_llm：流式接收增量 token，重试/退避/单题墙钟预算/响应缓存语义与 call_llm 一致。
+    @param on_token 每个增量片段的回调（普通函数或协程函数）；已有片段下发后不再重试，避免调用方收到重复内容
+    """
+    if not model_name:
+        model_name = MODEL_NAME or "deepseek-chat"
+
+    provider = str(provider or "").lower()
+    request_timeout_cap = int(str(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "90")).strip() or 90)
+    total_timeout_cap = int(str(os.getenv("LLM_TOTAL_TIMEOUT_SECONDS", "240")).strip() or 240)
+    effective_timeout = max(10, min(int(timeout or 300), request_timeout_cap, total_timeout_cap))
+    base_url_lower = str(base_url or "").lower()
+    if provider:
+        is_ark = provider == "ark"
+    else:
+        is_ark = ("volces.com" in base_url_lower) or ("ark.cn" in base_url_lower)
+    provider_used = "ark" if is_ark else (provider or "ait")
+
+    def build_record(**kwargs: Any) -> Dict[str, Any]:
+        return _build_llm_call_record(
+            node_name=node_name,
+            trace_id=trace_id,
+            question_id=question_id,
+            prompt_version=prompt_version,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+
+    streamed = False
+
+    async def emit(delta: str) -> None:
+        nonlocal streamed
+        streamed = True
+        if on_token is None:
+            return
+        result = on_token(delta)
+        if inspect.isawaitable(result):
+            await result
+
+    cache_mode = llm_cache_mode()
+    cache_key = llm_cache_key(model_name, prompt, temperature, max_tokens) if cache_mode != "off" else ""
+    cached_result = _lookup_llm_cache(cache_mode, cache_key, build_record, model_name, provider_used)
+    if cached_result is not None:
+        if cached_result[0]:
+            await emit(cached_result[0])
+        return cached_result
+
+    if is_ark:
+        ark_key = ARK_API_KEY or api_key
+        base_u = str(base_url or ARK_BASE_URL)
+        url_candidates = [base_u]
+    else:
+        key = api_key or API_KEY
+        base_u = str(base_url or BASE_URL or "").rstrip("/")
+        url_candidates = _llm_url_candidates(provider_used, base_u, key)
+    backoff_seconds = [2, 5, 10]
+    started = time.time()
+
+    def failed(attempt: int, error: str) -> Tuple[str, str, Dict[str, Any]]:
+        record = build_record(
+            success=False,
+            used_model=model_name,
+            provider_used=provider_used,
+            started_at=started,
+            retries=attempt,
+            usage_obj=None,
+            error=error,
+        )
+        return "", model_name, record
+
+    for attempt in range(len(backoff_seconds) + 1):
+        _, wall_err = _question_wall_clock_cap_http_timeout(effective_timeout)
+        if wall_err:
+            return failed(attempt, wall_err)
+        if time.time() - started > total_timeout_cap:
+            return failed(attempt, f"LLM total timeout exceeded ({total_timeout_cap}s)")
+        try:
+            last_non_retryable: Optional[Exception] = None
+            for candidate_url in url_candidates:
+                try:
+                    http_timeout, wall_err = _question_wall_clock_cap_http_timeout(effective_timeout)
+                    if wall_err:
+                        return failed(attempt, wall_err)
+                    create_kwargs: Dict[str, Any] = {}
+                    if is_ark:
+                        if ark_key:
+                            client = get_async_ark_client(candidate_url, api_key=ark_key)
+                        else:
+                            if not (VOLC_ACCESS_KEY_ID and VOLC_SECRET_ACCESS_KEY):
+                                raise ValueError("ARK_API_KEY is required for Ark chain, or provide VOLC_ACCESS_KEY_ID / VOLC_SECRET_ACCESS_KEY")
+                            client = get_async_ark_client(candidate_url, ak=VOLC_ACCESS_KEY_ID, sk=VOLC_SECRET_ACCESS_KEY)
+                        if ARK_PROJECT_NAME:
+                            create_kwargs["extra_headers"] = {"X-Project-Name": ARK_PROJECT_NAME}
+                    else:
+                        client = get_async_openai_client(key, candidate_url)
+                    async with get_llm_limiter(provider_used, model_name).aslot(timeout=http_timeout):
+                        try:
+                            content, usage_obj = await asyncio.wait_for(
+                                _astream_chat_completion(
+                                    client,
+                                    emit,
+                                    model=model_name,
+                                    messages=[{"role": "user", "content": prompt}],
+                                    temperature=temperature,
+                                    max_tokens=max_tokens,
+                                    timeout=http_timeout,
+                                    **create_kwargs,
+                                ),
+                                timeout=http_timeout,
+                            )
+                        except asyncio.TimeoutError:
+                            raise TimeoutError(f"LLM stream timed out ({http_timeout}s)")
+                    if not is_ark:
+                        if not content.strip():
+                            raise ValueError(f"Empty response (attempt {attempt + 1})")
+                        remember_working_url(provider_used, base_u, key, candidate_url)
+                    record = build_record(
+                        success=True,
+                        used_model=model_name,
+                        provider_used=provider_used,
+                        started_at=started,
+                        retries=attempt,
+                        usage_obj=usage_obj,
+                    )
+                    _store_llm_cache(cache_mode, cache_key, content, record)
+                    return content, model_name, record
+                except Exception as inner:
+                    if is_ark or _is_retryable_llm_error(inner) or streamed:
+                        raise
+                    last_non_retryable = inner
+            if last_non_retryable is not None:
+                raise last_non_retryable
+            raise RuntimeError("No valid base_url candidate for OpenAI-compatible call")
+        except Exception as e:
+            if _is_retryable_llm_error(e) and attempt < len(backoff_seconds) and not streamed:
+                wait_time = backoff_seconds[attempt]
+                print(f"⚠️ {provider_used} 限流/服务错误，等待 {wait_time}s 后重试 (第 {attempt+1} 次)")
+                await asyncio.sleep(wait_time)
+                continue
+            if is_ark:
+                print(f"❌ Ark 调用失败: {e}")
+            return failed(attempt, str(e))
+
+
+# 异步图节点（app.astream / app.ainvoke）运行时所在的事件循环；同步驱动（app.stream）下为 None
+_ASYNC_LLM_LOOP: contextvars.ContextVar[Optional[asyncio.AbstractEventLoop]] = contextvars.ContextVar(
+    "_ASYNC_LLM_LOOP", default=None
+)
+_ASYNC_NODE_THREADS = max(1, int(os.getenv("ASYNC_GRAPH_NODE_THREADS", "256") or 256))
+_ASYNC_NODE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ASYNC_NODE_EXECUTOR_LOCK = threading.Lock()
+
+
+def _async_node_executor() -> ThreadPoolExecutor:
+    global _ASYNC_NODE_EXECUTOR
+    with _ASYNC_NODE_EXECUTOR_LOCK:
+        if _ASYNC_NODE_EXECUTOR is None:
+            _ASYNC_NODE_EXECUTOR = ThreadPoolExecutor(max_workers=_ASYNC_NODE_THREADS, thread_name_prefix="graph-anode")
+        return _ASYNC_NODE_EXECUTOR
+
+
+def _on_event_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def _submit_to_loop(loop: asyncio.AbstractEventLoop, coro: Any) -> Future:
+    """在 loop 上以调用线程的 contextvars 副本运行 coro（单题墙钟预算、LangGraph 配置都在 contextvars 里）。"""
+    ctx = contextvars.copy_context()
+    done: Future = Future()
+
+    def _finish(task: "asyncio.Task[Any]") -> None:
+        if task.cancelled():
+            done.cancel()
+        elif task.exception() is not None:
+            done.set_exception(task.exception())
+        else:
+            done.set_result(task.result())
+
+    def _start() -> None:
+        ctx.run(loop.create_task, coro).add_done_callback(_finish)
+
+    loop.call_soon_threadsafe(_start)
+    return done
+
+
+def _graph_token_writer(node_name: str) -> Optional[Callable[[str], None]]:
+    """app.astream(stream_mode="custom") 下把增量 token 推给调用方；不在图节点内时返回 None。"""
+    try:
+        writer = get_stream_writer()
+    except Exception:
+        return None
+
+    def _emit(delta: str) -> None:
+        writer({"node": node_name, "token": delta})
+
+    return _emit
+
+
+def _async_graph_node(node: Callable[[AgentState, Any], Dict[str, Any]]) -> RunnableLambda:
+    """
+    同步驱动时原样调用 node；异步驱动时 node 主体在节点线程池里跑，其中的 call_llm 全部回到事件循环走 acall_llm。
+    节点本身是上千行的同步代码，异步化的是 LLM I/O：连接池、重试退避、流式 token 都在事件循环上。
+    """
+
+    async def _anode(state: AgentState, config: Any) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        ctx.run(_ASYNC_LLM_LOOP.set, loop)
+        return await loop.run_in_executor(_async_node_executor(), ctx.run, node, state, config)
+
+    return RunnableLambda(node, afunc=_anode, name=node.__name__)
+
+
 def generate_content(model_name: str, prompt: str, api_key: str = None, base_url: str = None, provider: str = None, return_model: bool = False):
     # Backward-compatible wrapper for legacy scripts.
     content, used_model, _ = call_llm(
@@ -5034,6 +5606,10 @@ def _resolve_specialist_writer_model(state: AgentState, default_model: str) -> T
 
 # --- Nodes ---
 
+_CALC_TOPIC_RE = re.compile(r"(计算|金额|税额|税费|补交|超标款|贷款|利率|成数|比例|面积|年限|公式|分润|指数)")
+_CALC_TOKEN_RE = re.compile(r"(×|/|=|％|%|㎡|平方米|元|万元|\d+\.\d+|\d+)")
+
+
 def router_node(state: AgentState, config):
     kb_chunk = state['kb_chunk']
     configurable = config.get('configurable', {}) if isinstance(config, dict) else {}
@@ -5065,14 +5641,11 @@ def router_node(state: AgentState, config):
     has_formulas = len(struct.get('formulas', [])) > 0
     has_tables = len(struct.get('tables', [])) > 0
     # Simple heuristic for list: text contains multiple numbered items like (1) (2) or 1. 2.
-    has_list = bool(re.search(r'（\d+）|\d+\.', content)) and content.count('\n') > 3
+    has_list = bool(_LIST_ITEM_MARK_RE.search(content)) and content.count('\n') > 3
     has_calc_keywords = bool(
-        re.search(
-            r"(计算|金额|税额|税费|补交|超标款|贷款|利率|成数|比例|面积|年限|公式|分润|指数)",
-            f"{path}\n{content}",
-        )
+        _CALC_TOPIC_RE.search(f"{path}\n{content}")
     )
-    has_calc_operands = bool(re.search(r"(×|/|=|％|%|㎡|平方米|元|万元|\d+\.\d+|\d+)", content))
+    has_calc_operands = bool(_CALC_TOKEN_RE.search(content))
     has_calc_signal = has_formulas or (has_calc_keywords and has_calc_operands)
     term_locks = detect_term_locks_from_kb(kb_chunk)
     high_risk_profile = detect_router_high_risk_slice(content, path)
@@ -5425,7 +5998,7 @@ def specialist_node(state: AgentState, config):
         retriever=retriever,
     )
     # 公式歧义兜底：遇到明显歧义公式时，降级为判断题
-    if re.search(r"最中国式排名|排名赋分\s*=\s*（?1-最中国式排名-1", kb_context):
+    if _RANKING_FORMULA_RE.search(kb_context):
         target_type = "判断题"
     high_risk_profile = router_details.get("high_risk_profile") or {}
     if high_risk_profile.get("prohibit_single_choice") and target_type == "单选题":
@@ -6703,9 +7276,9 @@ def writer_node(state: AgentState, config):
                 val = str(options[i])
                 # Only strip alphabetic option labels like A./A、/A: .
                 # Never strip numeric prefixes here, otherwise decimals such as 2.7 / 3.3 get corrupted.
-                val = re.sub(r'^[A-HＡ-Ｈa-h][\.\、:：\s\)）]+', '', val, flags=re.IGNORECASE)
+                val = _OPTION_LABEL_PREFIX_RE.sub('', val)
                 # Strip leading single A-H when followed by CJK (avoids "A网签" -> display "A. A网签...")
-                val = re.sub(r'^[A-HＡ-Ｈa-h](?=[\u4e00-\u9fff])', '', val, flags=re.IGNORECASE)
+                val = _OPTION_LABEL_GLUED_RE.sub('', val)
                 val = val.strip()
                 if storage_type in ["判断题", "单选题", "多选题"]:
                     val = normalize_blank_brackets(val)
@@ -6808,6 +7381,41 @@ def writer_node(state: AgentState, config):
             "logs": [f"❌ 作家格式化失败: {str(e)}"]
         }
 
+CRITIC_SUBCHECK_CONCURRENCY = max(1, int(os.getenv("CRITIC_SUBCHECK_CONCURRENCY", "6") or 6))
+
+
+def _run_critic_subchecks(checks: List[Tuple[str, Callable[[], Any]]]) -> Dict[str, Tuple[Any, Optional[Exception]]]:
+    """
+    并发执行互不依赖的 Critic 子检查，返回 {name: (value, error)}。
+    每项在调用方 contextvars 副本中运行，单题墙钟预算照常生效；CRITIC_SUBCHECK_CONCURRENCY=1 时退化为顺序执行。
+    """
+
+    def _run(fn: Callable[[], Any]) -> Tuple[Any, Optional[Exception]]:
+        try:
+            return fn(), None
+        except Exception as e:
+            return None, e
+
+    if CRITIC_SUBCHECK_CONCURRENCY <= 1 or len(checks) <= 1:
+        return {name: _run(fn) for name, fn in checks}
+    with ThreadPoolExecutor(
+        max_workers=min(CRITIC_SUBCHECK_CONCURRENCY, len(checks)),
+        thread_name_prefix="critic-subcheck",
+    ) as ex:
+        futures = {name: ex.submit(contextvars.copy_context().run, _run, fn) for name, fn in checks}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def _subcheck_value(results: Dict[str, Tuple[Any, Optional[Exception]]], name: str) -> Any:
+    value, error = results[name]
+    if error is not None:
+        raise error
+    return value
+
+
+_ABCD_LABEL_RE = re.compile(r'[ABCD]')
+
+
 def critic_node(state: AgentState, config):
     llm_records: List[Dict[str, Any]] = []
     # Structured option hierarchy conflict detection defaults
@@ -7175,21 +7783,291 @@ def critic_node(state: AgentState, config):
         )
         return _attach_first_failure_snapshot(state, critic_payload)
 
+    # ✅ Smart model switching: Check GPT rate limit and switch to Deepseek if needed
+    critic_model = CRITIC_MODEL
+    critic_model_used = critic_model
+    critic_api_key = CRITIC_API_KEY
+    critic_base_url = CRITIC_BASE_URL
+    critic_provider = CRITIC_PROVIDER
+    
+    # Check if GPT model is rate-limited
+    if critic_model and critic_model.lower().startswith("gpt") and "api.deepseek.com" in (critic_base_url or ""):
+        throttle_path = Path(".gpt_rate_limit.txt")
+        if throttle_path.exists():
+            try:
+                last_ts = float(throttle_path.read_text(encoding="utf-8").strip() or "0")
+                now = time.time()
+                elapsed = now - last_ts
+                wait_needed = max(0, 12 - elapsed)
+                
+                # If need to wait > 5 seconds, switch to Deepseek
+                if wait_needed > 5:
+                    print(f"⚠️ GPT-5.2 限流中（需等待 {int(wait_needed)}s），切换到 Deepseek Reasoner")
+                    critic_model = "deepseek-reasoner"
+                    critic_api_key = API_KEY  # Use default OpenAI-compatible key
+                    critic_base_url = BASE_URL  # Use default base URL
+                    critic_provider = "ait"
+            except Exception as e:
+                print(f"⚠️ 限流检测失败: {e}，使用默认模型")
+    
+    if critic_model and "deepseek" in critic_model.lower():
+        log_prefix = f"🔍 批评家 (Deepseek):"
+    else:
+        log_prefix = f"🔍 批评家 ({critic_model}):"
+
+    # Create a blind copy of the question (remove answer and explanation)
+    blind_question = {k: v for k, v in final_json.items() if k not in ['正确答案', '解析', 'answer', 'explanation']}
+    
+    # --- Critic Code Generation Step ---
+    # 1. Decide if calculation is needed to verify this question, and generate Python code
+    prompt_plan = f"""
+# 角色
+你是批评家 (Critic)。
+你需要验证以下题目是否正确。请分析【题目】和【参考材料】，判断是否需要进行数值计算来验证答案。
+
+# 计算验证约束（必须遵守）
+1. **时间/日期题必须用 datetime 精确到天**：禁止用年份直接相减。
+2. **先锚定政策阈值**：在代码前用常量声明，例如 `REQUIRED_YEARS = 2`。
+3. **注释仅说明变量含义**：严禁在注释里辩论或解释“为什么”。
+4. **验证逻辑体现在 if/else 或比较表达式**。
+
+# 重要提示：参数提取和计算步骤分析
+**计算可能只是解决整个问题的一个步骤，而不是整个问题！**
+
+在验证题目时，请仔细分析：
+1. **题目问的是什么？**（最终答案是什么）
+2. **需要计算什么？**（能解决哪个步骤）
+3. **如何从题目中提取参数？**（题干和选项中可能包含计算所需的数据）
+
+**参数提取规则：**
+- 必须从题目中提取**具体的数值**（如：80平方米、1560元、2025年、1993年）
+- **不能使用描述性文字**（如："成本价"、"建筑面积"、"建成年代"）
+- 如果题目中没有明确数值，需要根据参考材料推断合理的数值
+- 注意单位的统一（平方米、元、年等）
+
+**计算步骤分析：**
+- 如果题目问的是最终结果，可能需要多步计算
+- 计算可能只解决其中一个步骤
+- 需要验证：计算结果 + 其他步骤 = 题目答案
+
+例如：
+- 题目问"土地出让金是多少"，如果题干给出"建筑面积80平方米，成本价1560元/平方米"
+  → 生成代码：`result = 80 * 1560 * 0.01`
+  
+- 题目问"最长贷款年限是多少"，题干给出"建成年代1993年，当前2025年"
+  → 先计算房龄：`house_age = 2025 - 1993`
+  → 再根据"房龄+贷款年限≤50年"计算：`max_loan_years = 50 - house_age`
+  → 可能还需要考虑借款人年龄等其他因素
+
+# 题目
+{json.dumps(blind_question, ensure_ascii=False)}
+
+{CALCULATION_GUIDE}
+{CALC_PARAMETER_GROUNDING_GUIDE}
+
+# 参考材料
+{kb_context}
+
+# 任务
+如果需要计算，返回 JSON: {{"need_calculation": true, "python_code": "result = ..."}}
+如果不需要计算，返回 {{"need_calculation": false, "python_code": null}}
+"""
+    # Use code generation model (qwen3-coder-plus) for code generation in critic
+    # When verifying calculation questions, use specialized code generation model
+    use_code_gen_model = agent_name in ['CalculatorAgent', 'FinanceAgent']
+    
+    if use_code_gen_model:
+        # Use code generation model for better code generation
+        plan_model = CODE_GEN_MODEL
+        plan_api_key = CODE_GEN_API_KEY or critic_api_key
+        plan_base_url = CODE_GEN_BASE_URL or critic_base_url
+        plan_provider = resolve_code_gen_provider(plan_model, CODE_GEN_PROVIDER, None)
+    else:
+        # Use regular critic model for non-calculation questions
+        plan_model = critic_model
+        plan_api_key = critic_api_key
+        plan_base_url = critic_base_url
+        plan_provider = critic_provider
+
+    def _readability_check() -> Tuple[str, str, Dict[str, Any]]:
+        readability_prompt = f"""
+# 角色
+你是中文试题的可读性审稿人，专门检查“题干+选项代入”后的句子在中文里是否自然顺畅。
+
+# 说明
+- 已给出题干模板中的括号占位符句子，以及把不同选项内容代入括号（　）后形成的完整句子列表。每项带有 index、option_label（选项A/B/C/D）、option 原文和代入后的 sentence。
+- 你只关心语法和表达是否自然，不需要考虑答案对错或业务规则。
+- 错误选项（干扰项）在业务上本来就是错的，可读性检查不得因为“选项里的公式/事实是错的”而判为不自然。例如：题干问“正确的计算公式是()”，某选项为“未结算值=实抄数字+结清数字”（错误公式），只要代入后句子通顺、无语病，应判 is_natural=true；不要因该公式在业务上错误而判为不自然。
+- “含义残缺”仅指句子本身表述不完整、歧义或语病导致读者看不懂在说什么，不包括“选项内容与教材/常识不符”这类逻辑正确性。
+- 重要：index 与 option_label 一一对应（1=选项A, 2=选项B, 3=选项C, 4=选项D）。你返回的每一条必须严格对应该 index 的那一句；reason 里描述的内容必须属于该条目的 option/sentence，不得把其他选项、解析或题目外内容张冠李戴。若引用具体表述，请用引号标出，且只能引用本条候选句中的原文。
+
+# 候选句列表（JSON 数组）
+{json.dumps(candidate_sentences, ensure_ascii=False)}
+
+# 输出要求（必须是单个 JSON 对象）
+{{
+  "per_sentence": [
+    {{"index": 1, "option_label": "A", "is_natural": true, "reason": "一句话说明是否自然、如果不自然说明哪里别扭（仅限语法/搭配/断句问题）；必须针对本 index 对应选项的内容"}}
+  ],
+  "overall_ok": true
+}}
+- 每条必须包含与输入一致的 index 和 option_label，且 is_natural/reason 只针对该条对应的那一句。
+- is_natural 为 false 仅在存在明显语法错误、搭配错误、断句异常或表述残缺（非逻辑错误）时使用。
+- overall_ok 为 false 当存在任意一句 is_natural = false 且该问题可能影响考生理解或造成误解时。
+"""
+        return call_llm(
+            node_name="critic.readability",
+            prompt=readability_prompt,
+            model_name=critic_model,
+            api_key=critic_api_key or CRITIC_API_KEY,
+            base_url=critic_base_url or CRITIC_BASE_URL,
+            provider=critic_provider or CRITIC_PROVIDER,
+            trace_id=state.get("trace_id"),
+            question_id=state.get("question_id"),
+            temperature=0.1,
+            max_tokens=800,
+        )
+
+    def _plan_check() -> Tuple[str, str, Dict[str, Any]]:
+        print(f"🔍 Critic Step 1: 开始调用 LLM 生成验证计划（模型: {plan_model}）")
+        return call_llm(
+            node_name="critic.plan",
+            prompt=prompt_plan,
+            model_name=plan_model,
+            api_key=plan_api_key,
+            base_url=plan_base_url,
+            provider=plan_provider,
+            trace_id=state.get("trace_id"),
+            question_id=state.get("question_id"),
+        )
+
+    def _precondition_check() -> Tuple[bool, List[str], str, Optional[Dict[str, Any]]]:
+        return assess_preconditions_current_only(
+            final_json=final_json if isinstance(final_json, dict) else {},
+            kb_context=kb_context,
+            question_type=question_type,
+            model_name=CRITIC_MODEL or MODEL_NAME,
+            api_key=CRITIC_API_KEY or API_KEY,
+            base_url=CRITIC_BASE_URL or BASE_URL,
+            provider=CRITIC_PROVIDER or "ait",
+            trace_id=state.get("trace_id"),
+            question_id=state.get("question_id"),
+            node_name="critic.precondition_current",
+        )
+
+    def _minimal_conditions_check() -> Tuple[bool, List[str], str, Optional[Dict[str, Any]]]:
+        return assess_minimal_sufficient_conditions_current_only(
+            final_json=final_json if isinstance(final_json, dict) else {},
+            kb_context=kb_context,
+            question_type=question_type,
+            model_name=CRITIC_MODEL or MODEL_NAME,
+            api_key=CRITIC_API_KEY or API_KEY,
+            base_url=CRITIC_BASE_URL or BASE_URL,
+            provider=CRITIC_PROVIDER or "ait",
+            trace_id=state.get("trace_id"),
+            question_id=state.get("question_id"),
+            node_name="critic.minimal_conditions_current",
+        )
+
+    def _name_semantic_check() -> Tuple[bool, str, List[str], str, Optional[Dict[str, Any]]]:
+        return assess_name_semantic_consistency_current_only(
+            final_json=final_json if isinstance(final_json, dict) else {},
+            kb_context=kb_context,
+            model_name=CRITIC_MODEL or MODEL_NAME,
+            api_key=CRITIC_API_KEY or API_KEY,
+            base_url=CRITIC_BASE_URL or BASE_URL,
+            provider=CRITIC_PROVIDER or "ait",
+            trace_id=state.get("trace_id"),
+            question_id=state.get("question_id"),
+            node_name="critic.name_semantic_current",
+        )
+
+    def _focus_overload_check() -> Optional[Dict[str, Any]]:
+        return detect_focus_overload_issue(
+            final_json,
+            focus_contract=state.get("locked_focus_contract") or (state.get("router_details") or {}).get("focus_contract") or {},
+            kb_context=kb_context,
+            model_name=CRITIC_MODEL or MODEL_NAME,
+            api_key=CRITIC_API_KEY or API_KEY,
+            base_url=CRITIC_BASE_URL or BASE_URL,
+            provider=CRITIC_PROVIDER or "ait",
+            trace_id=state.get("trace_id"),
+            question_id=state.get("question_id"),
+        )
+
+    # 计算题数值闭环是纯规则校验：放在 LLM 子检查 fan-out 之前，闭环不成立时不再发出任何语义审计调用。
+    calculation_closure_issue = None
+    if state.get("agent_name") == "CalculatorAgent":
+        calculation_closure_issue = validate_calculation_closure(
+            final_json,
+            question_type=question_type,
+            execution_result=state.get("execution_result"),
+            code_status=str(state.get("code_status", "") or ""),
+            expected_calc_target=str(state.get("calc_target_signature", "") or ""),
+            calc_llm_need_calculation=state.get("calc_llm_need_calculation"),
+            has_generated_code=bool(str(state.get("generated_code") or "").strip()),
+        )
+    if calculation_closure_issue:
+        reason = str(calculation_closure_issue.get("reason", "") or "计算题数值闭环不成立")
+        issue_type = str(calculation_closure_issue.get("issue_type", "") or "major")
+        fix_strategy = str(calculation_closure_issue.get("fix_strategy", "") or "regenerate")
+        fail_types = calculation_closure_issue.get("fail_types") or ["calculation_closure_fail"]
+        required_fixes = calculation_closure_issue.get("required_fixes") or ["calc:closure"]
+        level = "重新生成" if fix_strategy == "regenerate" else "进入修复"
+        critic_payload = {
+            "critic_feedback": "FAIL",
+            "critic_rules_context": full_rules_text,
+            "critic_related_rules": related_rules,
+            "critic_result": {
+                "passed": False,
+                "issue_type": issue_type,
+                "reason": reason,
+                "fix_strategy": fix_strategy,
+                "fail_types": fail_types,
+            },
+            "critic_required_fixes": required_fixes,
+            "critic_details": reason,
+            "option_hierarchy_conflict_flag": option_hierarchy_conflict_flag,
+            "option_hierarchy_conflict_pairs": option_hierarchy_conflict_pairs,
+            "option_hierarchy_conflict_message": option_hierarchy_conflict_message,
+            "critic_model_used": "rule-based",
+            "retry_count": state.get("retry_count", 0) + 1,
+            "llm_trace": llm_records,
+            "logs": [f"🔍 批评家: ❌ {reason} → {level}"],
+        }
+        critic_payload["critic_issue_items"] = _build_critic_issue_items(
+            required_fixes=required_fixes,
+            reason_text=reason,
+            extra_issue_map={tag: reason for tag in required_fixes},
+        )
+        return _attach_first_failure_snapshot(state, critic_payload)
+
+    # 以下子检查互不依赖：并发发起，再按原顺序消费，首个失败项的返回契约不变；
+    # Critic 墙钟取决于最慢的一项而非各项之和（代价是前序失败时后序调用已经发出）。
+    critic_checks: List[Tuple[str, Callable[[], Any]]] = [
+        ("precondition", _precondition_check),
+        ("minimal_conditions", _minimal_conditions_check),
+        ("focus_overload", _focus_overload_check),
+        ("plan", _plan_check),
+    ]
+    if _has_name_semantic_risk(final_json if isinstance(final_json, dict) else {}):
+        critic_checks.append(("name_semantic", _name_semantic_check))
+    if question_type in ["单选题", "多选题"] and candidate_sentences:
+        critic_checks.append(("readability", _readability_check))
+    critic_subchecks = _run_critic_subchecks(critic_checks)
+    for check_name, record_index in (
+        ("precondition", 3),
+        ("minimal_conditions", 3),
+        ("name_semantic", 4),
+        ("readability", 2),
+        ("plan", 2),
+    ):
+        check_value, check_error = critic_subchecks.get(check_name, (None, None))
+        if check_error is None and check_value and check_value[record_index]:
+            llm_records.append(check_value[record_index])
+
     # 当前题目前置条件验收（每轮即时重建，不继承历史槽位/历史 missing_conditions）
-    precond_passed, precond_missing, precond_reason, precond_record = assess_preconditions_current_only(
-        final_json=final_json if isinstance(final_json, dict) else {},
-        kb_context=kb_context,
-        question_type=question_type,
-        model_name=CRITIC_MODEL or MODEL_NAME,
-        api_key=CRITIC_API_KEY or API_KEY,
-        base_url=CRITIC_BASE_URL or BASE_URL,
-        provider=CRITIC_PROVIDER or "ait",
-        trace_id=state.get("trace_id"),
-        question_id=state.get("question_id"),
-        node_name="critic.precondition_current",
-    )
-    if precond_record:
-        llm_records.append(precond_record)
+    precond_passed, precond_missing, precond_reason, precond_record = _subcheck_value(critic_subchecks, "precondition")
     if not precond_passed:
         missing_desc = f"；缺失：{', '.join(precond_missing)}" if precond_missing else ""
         reason = f"{precond_reason}{missing_desc}".strip() or "题干/选项缺少关键前提，无法稳定判定唯一答案"
@@ -7221,20 +8099,7 @@ def critic_node(state: AgentState, config):
         return _attach_first_failure_snapshot(state, critic_payload)
 
     # 当前题目“最小充分条件”审计：若题干存在明显冗余条件过载，先走修复瘦身。
-    min_passed, redundant_conditions, min_reason, min_record = assess_minimal_sufficient_conditions_current_only(
-        final_json=final_json if isinstance(final_json, dict) else {},
-        kb_context=kb_context,
-        question_type=question_type,
-        model_name=CRITIC_MODEL or MODEL_NAME,
-        api_key=CRITIC_API_KEY or API_KEY,
-        base_url=CRITIC_BASE_URL or BASE_URL,
-        provider=CRITIC_PROVIDER or "ait",
-        trace_id=state.get("trace_id"),
-        question_id=state.get("question_id"),
-        node_name="critic.minimal_conditions_current",
-    )
-    if min_record:
-        llm_records.append(min_record)
+    min_passed, redundant_conditions, min_reason, min_record = _subcheck_value(critic_subchecks, "minimal_conditions")
     if not min_passed:
         red_desc = f"；冗余条件：{', '.join(redundant_conditions)}" if redundant_conditions else ""
         reason = f"{min_reason}{red_desc}".strip() or "题干包含与判题无关的冗余条件，设问聚焦度不足"
@@ -7265,20 +8130,8 @@ def critic_node(state: AgentState, config):
         return _attach_first_failure_snapshot(state, critic_payload)
 
     # 人名一致性语义审计（仅可疑场景触发）：避免代码关键词误判造成循环。
-    if _has_name_semantic_risk(final_json if isinstance(final_json, dict) else {}):
-        name_passed, name_severity, name_issues, name_reason, name_record = assess_name_semantic_consistency_current_only(
-            final_json=final_json if isinstance(final_json, dict) else {},
-            kb_context=kb_context,
-            model_name=CRITIC_MODEL or MODEL_NAME,
-            api_key=CRITIC_API_KEY or API_KEY,
-            base_url=CRITIC_BASE_URL or BASE_URL,
-            provider=CRITIC_PROVIDER or "ait",
-            trace_id=state.get("trace_id"),
-            question_id=state.get("question_id"),
-            node_name="critic.name_semantic_current",
-        )
-        if name_record:
-            llm_records.append(name_record)
+    if "name_semantic" in critic_subchecks:
+        name_passed, name_severity, name_issues, name_reason, name_record = _subcheck_value(critic_subchecks, "name_semantic")
         if not name_passed:
             severity = "major" if name_severity == "major" else "minor"
             required_fixes = ["logic:name_entity_conflict"] if severity == "major" else ["quality:name_semantic"]
@@ -7338,142 +8191,17 @@ def critic_node(state: AgentState, config):
             )
             return _attach_first_failure_snapshot(state, critic_payload)
 
-    focus_overload_issue = detect_focus_overload_issue(
-        final_json,
-        focus_contract=state.get("locked_focus_contract") or (state.get("router_details") or {}).get("focus_contract") or {},
-        kb_context=kb_context,
-        model_name=CRITIC_MODEL or MODEL_NAME,
-        api_key=CRITIC_API_KEY or API_KEY,
-        base_url=CRITIC_BASE_URL or BASE_URL,
-        provider=CRITIC_PROVIDER or "ait",
-        trace_id=state.get("trace_id"),
-        question_id=state.get("question_id"),
-    )
+    focus_overload_issue = _subcheck_value(critic_subchecks, "focus_overload")
     focus_overload_warning = ""
     if focus_overload_issue:
         # focus_overload 仅做非阻断提示，避免关键词规则误杀可解题目。
         focus_overload_warning = str(focus_overload_issue.get("reason", "") or "题干测点过载")
 
-    calculation_closure_issue = None
-    if state.get("agent_name") == "CalculatorAgent":
-        calculation_closure_issue = validate_calculation_closure(
-            final_json,
-            question_type=question_type,
-            execution_result=state.get("execution_result"),
-            code_status=str(state.get("code_status", "") or ""),
-            expected_calc_target=str(state.get("calc_target_signature", "") or ""),
-            calc_llm_need_calculation=state.get("calc_llm_need_calculation"),
-            has_generated_code=bool(str(state.get("generated_code") or "").strip()),
-        )
-    if calculation_closure_issue:
-        reason = str(calculation_closure_issue.get("reason", "") or "计算题数值闭环不成立")
-        issue_type = str(calculation_closure_issue.get("issue_type", "") or "major")
-        fix_strategy = str(calculation_closure_issue.get("fix_strategy", "") or "regenerate")
-        fail_types = calculation_closure_issue.get("fail_types") or ["calculation_closure_fail"]
-        required_fixes = calculation_closure_issue.get("required_fixes") or ["calc:closure"]
-        level = "重新生成" if fix_strategy == "regenerate" else "进入修复"
-        critic_payload = {
-            "critic_feedback": "FAIL",
-            "critic_rules_context": full_rules_text,
-            "critic_related_rules": related_rules,
-            "critic_result": {
-                "passed": False,
-                "issue_type": issue_type,
-                "reason": reason,
-                "fix_strategy": fix_strategy,
-                "fail_types": fail_types,
-            },
-            "critic_required_fixes": required_fixes,
-            "critic_details": reason,
-            "option_hierarchy_conflict_flag": option_hierarchy_conflict_flag,
-            "option_hierarchy_conflict_pairs": option_hierarchy_conflict_pairs,
-            "option_hierarchy_conflict_message": option_hierarchy_conflict_message,
-            "critic_model_used": "rule-based",
-            "retry_count": state.get("retry_count", 0) + 1,
-            "llm_trace": llm_records,
-            "logs": [f"🔍 批评家: ❌ {reason} → {level}"],
-        }
-        critic_payload["critic_issue_items"] = _build_critic_issue_items(
-            required_fixes=required_fixes,
-            reason_text=reason,
-            extra_issue_map={tag: reason for tag in required_fixes},
-        )
-        return _attach_first_failure_snapshot(state, critic_payload)
-
-    # ✅ Smart model switching: Check GPT rate limit and switch to Deepseek if needed
-    critic_model = CRITIC_MODEL
-    critic_model_used = critic_model
-    critic_api_key = CRITIC_API_KEY
-    critic_base_url = CRITIC_BASE_URL
-    critic_provider = CRITIC_PROVIDER
-    
-    # Check if GPT model is rate-limited
-    if critic_model and critic_model.lower().startswith("gpt") and "api.deepseek.com" in (critic_base_url or ""):
-        throttle_path = Path(".gpt_rate_limit.txt")
-        if throttle_path.exists():
-            try:
-                last_ts = float(throttle_path.read_text(encoding="utf-8").strip() or "0")
-                now = time.time()
-                elapsed = now - last_ts
-                wait_needed = max(0, 12 - elapsed)
-                
-                # If need to wait > 5 seconds, switch to Deepseek
-                if wait_needed > 5:
-                    print(f"⚠️ GPT-5.2 限流中（需等待 {int(wait_needed)}s），切换到 Deepseek Reasoner")
-                    critic_model = "deepseek-reasoner"
-                    critic_api_key = API_KEY  # Use default OpenAI-compatible key
-                    critic_base_url = BASE_URL  # Use default base URL
-                    critic_provider = "ait"
-            except Exception as e:
-                print(f"⚠️ 限流检测失败: {e}，使用默认模型")
-    
-    if critic_model and "deepseek" in critic_model.lower():
-        log_prefix = f"🔍 批评家 (Deepseek):"
-    else:
-        log_prefix = f"🔍 批评家 ({critic_model}):"
-
     # 题干与选项组合可读性复核（仅对单选/多选启用；判断题“正确/错误”代入易产生表面重复误判）
     readability_warning = ""
-    if question_type in ["单选题", "多选题"] and candidate_sentences:
+    if "readability" in critic_subchecks:
         try:
-            readability_prompt = f"""
-# 角色
-你是中文试题的可读性审稿人，专门检查“题干+选项代入”后的句子在中文里是否自然顺畅。
-
-# 说明
-- 已给出题干模板中的括号占位符句子，以及把不同选项内容代入括号（　）后形成的完整句子列表。每项带有 index、option_label（选项A/B/C/D）、option 原文和代入后的 sentence。
-- 你只关心语法和表达是否自然，不需要考虑答案对错或业务规则。
-- 错误选项（干扰项）在业务上本来就是错的，可读性检查不得因为“选项里的公式/事实是错的”而判为不自然。例如：题干问“正确的计算公式是()”，某选项为“未结算值=实抄数字+结清数字”（错误公式），只要代入后句子通顺、无语病，应判 is_natural=true；不要因该公式在业务上错误而判为不自然。
-- “含义残缺”仅指句子本身表述不完整、歧义或语病导致读者看不懂在说什么，不包括“选项内容与教材/常识不符”这类逻辑正确性。
-- 重要：index 与 option_label 一一对应（1=选项A, 2=选项B, 3=选项C, 4=选项D）。你返回的每一条必须严格对应该 index 的那一句；reason 里描述的内容必须属于该条目的 option/sentence，不得把其他选项、解析或题目外内容张冠李戴。若引用具体表述，请用引号标出，且只能引用本条候选句中的原文。
-
-# 候选句列表（JSON 数组）
-{json.dumps(candidate_sentences, ensure_ascii=False)}
-
-# 输出要求（必须是单个 JSON 对象）
-{{
-  "per_sentence": [
-    {{"index": 1, "option_label": "A", "is_natural": true, "reason": "一句话说明是否自然、如果不自然说明哪里别扭（仅限语法/搭配/断句问题）；必须针对本 index 对应选项的内容"}}
-  ],
-  "overall_ok": true
-}}
-- 每条必须包含与输入一致的 index 和 option_label，且 is_natural/reason 只针对该条对应的那一句。
-- is_natural 为 false 仅在存在明显语法错误、搭配错误、断句异常或表述残缺（非逻辑错误）时使用。
-- overall_ok 为 false 当存在任意一句 is_natural = false 且该问题可能影响考生理解或造成误解时。
-"""
-            readability_response, _, readability_record = call_llm(
-                node_name="critic.readability",
-                prompt=readability_prompt,
-                model_name=critic_model,
-                api_key=critic_api_key or CRITIC_API_KEY,
-                base_url=critic_base_url or CRITIC_BASE_URL,
-                provider=critic_provider or CRITIC_PROVIDER,
-                trace_id=state.get("trace_id"),
-                question_id=state.get("question_id"),
-                temperature=0.1,
-                max_tokens=800,
-            )
-            llm_records.append(readability_record)
+            readability_response, _, readability_record = _subcheck_value(critic_subchecks, "readability")
             parsed_readability = parse_json_from_response(readability_response)
             per_list = parsed_readability.get("per_sentence") or []
             overall_ok = bool(parsed_readability.get("overall_ok", True))
@@ -7503,92 +8231,7 @@ def critic_node(state: AgentState, config):
             # 可读性审计失败不应阻断整体 Critic 流程，仅记录日志
             print(f"⚠️ Critic 可读性检查失败: {e}")
     
-    # Create a blind copy of the question (remove answer and explanation)
-    blind_question = {k: v for k, v in final_json.items() if k not in ['正确答案', '解析', 'answer', 'explanation']}
-    
-    # --- Critic Code Generation Step ---
-    # 1. Decide if calculation is needed to verify this question, and generate Python code
-    prompt_plan = f"""
-# 角色
-你是批评家 (Critic)。
-你需要验证以下题目是否正确。请分析【题目】和【参考材料】，判断是否需要进行数值计算来验证答案。
-
-# 计算验证约束（必须遵守）
-1. **时间/日期题必须用 datetime 精确到天**：禁止用年份直接相减。
-2. **先锚定政策阈值**：在代码前用常量声明，例如 `REQUIRED_YEARS = 2`。
-3. **注释仅说明变量含义**：严禁在注释里辩论或解释“为什么”。
-4. **验证逻辑体现在 if/else 或比较表达式**。
-
-# 重要提示：参数提取和计算步骤分析
-**计算可能只是解决整个问题的一个步骤，而不是整个问题！**
-
-在验证题目时，请仔细分析：
-1. **题目问的是什么？**（最终答案是什么）
-2. **需要计算什么？**（能解决哪个步骤）
-3. **如何从题目中提取参数？**（题干和选项中可能包含计算所需的数据）
-
-**参数提取规则：**
-- 必须从题目中提取**具体的数值**（如：80平方米、1560元、2025年、1993年）
-- **不能使用描述性文字**（如："成本价"、"建筑面积"、"建成年代"）
-- 如果题目中没有明确数值，需要根据参考材料推断合理的数值
-- 注意单位的统一（平方米、元、年等）
-
-**计算步骤分析：**
-- 如果题目问的是最终结果，可能需要多步计算
-- 计算可能只解决其中一个步骤
-- 需要验证：计算结果 + 其他步骤 = 题目答案
-
-例如：
-- 题目问"土地出让金是多少"，如果题干给出"建筑面积80平方米，成本价1560元/平方米"
-  → 生成代码：`result = 80 * 1560 * 0.01`
-  
-- 题目问"最长贷款年限是多少"，题干给出"建成年代1993年，当前2025年"
-  → 先计算房龄：`house_age = 2025 - 1993`
-  → 再根据"房龄+贷款年限≤50年"计算：`max_loan_years = 50 - house_age`
-  → 可能还需要考虑借款人年龄等其他因素
-
-# 题目
-{json.dumps(blind_question, ensure_ascii=False)}
-
-{CALCULATION_GUIDE}
-{CALC_PARAMETER_GROUNDING_GUIDE}
-
-# 参考材料
-{kb_context}
-
-# 任务
-如果需要计算，返回 JSON: {{"need_calculation": true, "python_code": "result = ..."}}
-如果不需要计算，返回 {{"need_calculation": false, "python_code": null}}
-"""
-    # Use code generation model (qwen3-coder-plus) for code generation in critic
-    # When verifying calculation questions, use specialized code generation model
-    use_code_gen_model = agent_name in ['CalculatorAgent', 'FinanceAgent']
-    
-    if use_code_gen_model:
-        # Use code generation model for better code generation
-        plan_model = CODE_GEN_MODEL
-        plan_api_key = CODE_GEN_API_KEY or critic_api_key
-        plan_base_url = CODE_GEN_BASE_URL or critic_base_url
-        plan_provider = resolve_code_gen_provider(plan_model, CODE_GEN_PROVIDER, None)
-    else:
-        # Use regular critic model for non-calculation questions
-        plan_model = critic_model
-        plan_api_key = critic_api_key
-        plan_base_url = critic_base_url
-        plan_provider = critic_provider
-    
-    print(f"🔍 Critic Step 1: 开始调用 LLM 生成验证计划（模型: {plan_model}）")
-    plan_content, _, llm_record = call_llm(
-        node_name="critic.plan",
-        prompt=prompt_plan,
-        model_name=plan_model,
-        api_key=plan_api_key,
-        base_url=plan_base_url,
-        provider=plan_provider,
-        trace_id=state.get("trace_id"),
-        question_id=state.get("question_id"),
-    )
-    llm_records.append(llm_record)
+    plan_content, _, llm_record = _subcheck_value(critic_subchecks, "plan")
     print(f"🔍 Critic Step 1: 验证计划生成完成")
     # Normalize potential list responses to string
     if isinstance(plan_content, list):
@@ -8322,8 +8965,7 @@ Fail 条件（任一即 Fail）：
     except Exception as e:
         print(f"DEBUG CRITIC PARSE ERROR: {e}")
         # Fallback: try to find answer in text if JSON fails
-        import re
-        match = re.search(r'[ABCD]', response_text)
+        match = _ABCD_LABEL_RE.search(response_text)
         if match:
             critic_answer = match.group(0)
         
@@ -8421,43 +9063,57 @@ Fail 条件（任一即 Fail）：
         "result": calc_result
     }
 
-    # Near-duplicate guard: avoid generating questions that already exist in history
+    # Near-duplicate guard: avoid generating questions that already exist in history,
+    # in the tenant bank, or earlier in the same task (shared `dup_index` from the caller).
+    dup_hit: Optional[Tuple[float, str]] = None
     if retriever:
         is_dup, dup_score, dup_text = retriever.is_similar_to_history(question_text, threshold=0.9)
         if is_dup:
-            critic_payload = {
-                "critic_feedback": "FAIL",
-                "critic_details": f"疑似重复题干，相似度 {dup_score:.2f}，已存在题目: {dup_text}",
-                "critic_tool_usage": critic_tool_usage,
-                "critic_result": {
-                    "passed": False,
-                    "issue_type": "major",
-                    "reason": "高相似度重复题目",
-                    "fail_types": ["duplicate_stem"],
-                    "basis_source": basis_source,
-                    "basis_paths": basis_paths,
-                    "basis_reason": basis_reason,
-                    "non_current_slice_basis": non_current_slice_basis,
-                },
-                "critic_required_fixes": ["duplicate_stem"],
-                "critic_basis_source": basis_source,
-                "critic_basis_paths": basis_paths,
-                "critic_non_current_basis": non_current_slice_basis,
-                "option_hierarchy_conflict_flag": option_hierarchy_conflict_flag,
-                "option_hierarchy_conflict_pairs": option_hierarchy_conflict_pairs,
-                "option_hierarchy_conflict_message": option_hierarchy_conflict_message,
-                "critic_model_used": critic_model,
-                "final_json": None,
-                "retry_count": state.get("retry_count", 0) + 1,
-                "llm_trace": llm_records,
-                "logs": [f"🛑 {log_prefix} 发现高相似度题目（{dup_score:.2f}），已丢弃以避免重复出题。"]
-            }
-            critic_payload["critic_issue_items"] = _build_critic_issue_items(
-                required_fixes=["duplicate_stem"],
-                reason_text="高相似度重复题目",
-                extra_issue_map={"duplicate_stem": f"疑似重复题干，相似度 {dup_score:.2f}，已存在题目: {dup_text}"},
-            )
-            return _attach_first_failure_snapshot(state, critic_payload)
+            dup_hit = (float(dup_score), str(dup_text or ""))
+    dup_index = configurable.get("dup_index")
+    if dup_hit is None and dup_index is not None and question_text:
+        dup_match = dup_index.query(
+            question_text,
+            threshold=float(configurable.get("dup_threshold") or 0.85),
+            scope=str(configurable.get("dup_scope") or ""),
+        )
+        if dup_match is not None:
+            dup_hit = (dup_match.score, dup_match.text)
+    if dup_hit is not None:
+        dup_score, dup_text = dup_hit
+        critic_payload = {
+            "critic_feedback": "FAIL",
+            "critic_details": f"疑似重复题干，相似度 {dup_score:.2f}，已存在题目: {dup_text}",
+            "critic_tool_usage": critic_tool_usage,
+            "critic_result": {
+                "passed": False,
+                "issue_type": "major",
+                "reason": "高相似度重复题目",
+                "fail_types": ["duplicate_stem"],
+                "basis_source": basis_source,
+                "basis_paths": basis_paths,
+                "basis_reason": basis_reason,
+                "non_current_slice_basis": non_current_slice_basis,
+            },
+            "critic_required_fixes": ["duplicate_stem"],
+            "critic_basis_source": basis_source,
+            "critic_basis_paths": basis_paths,
+            "critic_non_current_basis": non_current_slice_basis,
+            "option_hierarchy_conflict_flag": option_hierarchy_conflict_flag,
+            "option_hierarchy_conflict_pairs": option_hierarchy_conflict_pairs,
+            "option_hierarchy_conflict_message": option_hierarchy_conflict_message,
+            "critic_model_used": critic_model,
+            "final_json": None,
+            "retry_count": state.get("retry_count", 0) + 1,
+            "llm_trace": llm_records,
+            "logs": [f"🛑 {log_prefix} 发现高相似度题目（{dup_score:.2f}），已丢弃以避免重复出题。"]
+        }
+        critic_payload["critic_issue_items"] = _build_critic_issue_items(
+            required_fixes=["duplicate_stem"],
+            reason_text="高相似度重复题目",
+            extra_issue_map={"duplicate_stem": f"疑似重复题干，相似度 {dup_score:.2f}，已存在题目: {dup_text}"},
+        )
+        return _attach_first_failure_snapshot(state, critic_payload)
 
     # Pass Condition: 核心是"反向解题成功"（能推导出唯一答案）
     # 1. 反向解题校验（核心）
@@ -10490,10 +11146,7 @@ def calculator_node(state: AgentState, config):
         target_type = "单选题"
     
     loan_formula_parentheses_sensitive = bool(
-        re.search(
-            r"较小值（评估值、网签价）\s*×\s*商业贷款成数\s*-\s*公积金贷款部分额度",
-            kb_context,
-        )
+        _LOAN_FORMULA_RE.search(kb_context)
     )
     calc_disambiguation_instruction = ""
     if loan_formula_parentheses_sensitive:
@@ -10857,12 +11510,13 @@ def calculator_node(state: AgentState, config):
 # --- Graph Construction ---
 workflow = StateGraph(AgentState)
 
-workflow.add_node("router", router_node)
-workflow.add_node("specialist", specialist_node)
-workflow.add_node("calculator", calculator_node)  # 计算专家节点
-workflow.add_node("writer", writer_node)
-workflow.add_node("critic", critic_node)
-workflow.add_node("fixer", fixer_node)
+# 节点同时支持 app.stream（同步）与 app.astream / app.ainvoke（LLM 调用走 acall_llm）
+workflow.add_node("router", _async_graph_node(router_node))
+workflow.add_node("specialist", _async_graph_node(specialist_node))
+workflow.add_node("calculator", _async_graph_node(calculator_node))  # 计算专家节点
+workflow.add_node("writer", _async_graph_node(writer_node))
+workflow.add_node("critic", _async_graph_node(critic_node))
+workflow.add_node("fixer", _async_graph_node(fixer_node))
 
 workflow.set_entry_point("router")
 
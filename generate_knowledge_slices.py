@@ -1189,17 +1189,29 @@ def _slice_blocks_for_embedding(s: Dict) -> List[Dict[str, str]]:
 
 
 def _encode_blocks(blocks: List[Dict[str, str]]) -> Optional["np.ndarray"]:
-    """Encode blocks with BGE. Returns (N, dim) normalized embeddings or None."""
+    """Encode blocks with BGE. Returns (N, dim) normalized embeddings or None.
+
+    Blocks already encoded by an earlier run (or by the mapping pipeline) come from the shared
+    embedding store; the model is only loaded when some block is new.
+    """
     if not blocks:
         return None
     if np is None:
         return None
-    model = _get_bge_model()
-    if model is None:
-        return None
+    from embedding_store import encode_with_store
+
+    def _encode(missing: List[str]) -> "np.ndarray":
+        model = _get_bge_model()
+        if model is None:
+            raise RuntimeError("BGE model unavailable")
+        embs = model.encode(missing, batch_size=64, normalize_embeddings=True)
+        return np.asarray(embs, dtype=np.float32)
+
     texts = [b.get("text", "") for b in blocks]
-    embs = model.encode(texts, batch_size=64, normalize_embeddings=True)
-    return np.asarray(embs, dtype=np.float32)
+    try:
+        return encode_with_store(_BGE_MODEL_NAME, texts, _encode)
+    except RuntimeError:
+        return None
 
 
 def _build_subslice_from_blocks(base: Dict, blocks: List[Dict[str, str]], sub_index: int, total: int) -> Dict:
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from runtime_paths import REPO_ROOT, cache_root
+from tenants_config import resolve_tenant_glossary_path
+from term_matcher import TermMatcher, normalize_term_text
+
+GLOSSARY_ARTIFACT_VERSION = 1
+FALLBACK_GLOSSARY_TXT = REPO_ROOT / "教材提取专有名词.txt"
+# How often a loaded glossary re-checks its source spreadsheet for changes.
+GLOSSARY_RELOAD_CHECK_SECONDS = max(0.0, float(os.getenv("GLOSSARY_RELOAD_CHECK_SECONDS", "2") or 2))
+
+_LOADED: Dict[str, Tuple[Tuple[Any, ...], float, Dict[str, Any]]] = {}
+_LOADED_LOCK = threading.Lock()
+
+
+def glossary_artifact_dir() -> Path:
+    raw = os.getenv("GLOSSARY_ARTIFACT_DIR")
+    return Path(raw).expanduser().resolve() if raw else cache_root() / "glossary"
+
+
+def _file_token(path: Path) -> Tuple[str, int, int]:
+    try:
+        stat = path.stat()
+        return str(path), int(stat.st_mtime_ns), int(stat.st_size)
+    except OSError:
+        return str(path), 0, 0
+
+
+def glossary_source_token(xlsx_path: Path, txt_path: Path = FALLBACK_GLOSSARY_TXT) -> Tuple[Any, ...]:
+    return (GLOSSARY_ARTIFACT_VERSION, _file_token(xlsx_path), _file_token(txt_path))
+
+
+def artifact_path_for(xlsx_path: Path) -> Path:
+    digest = hashlib.sha256(str(xlsx_path).encode("utf-8")).hexdigest()[:16]
+    return glossary_artifact_dir() / f"glossary_{digest}.pkl"
+
+
+def compile_glossary(xlsx_path: Path, txt_path: Path = FALLBACK_GLOSSARY_TXT) -> Dict[str, Any]:
+    """Read the glossary spreadsheet (txt fallback) into terms, category maps and a compiled matcher."""
+    terms_by_category: Dict[str, List[str]] = defaultdict(list)
+    all_terms: List[str] = []
+
+    if xlsx_path.exists():
+        try:
+            import pandas as pd  # Lazy import to avoid hard dependency at module import time
+            xls = pd.ExcelFile(xlsx_path)
+            generic_headers = {"核心名词", "专有名词"}
+            for sheet in xls.sheet_names:
+                df = pd.read_excel(xls, sheet_name=sheet)
+                col_names = [str(c).strip() for c in df.columns if str(c).strip()]
+                # Some sheets use a concrete term as the only header (e.g. 商业贷款), keep it.
+                for col in col_names:
+                    norm_col = normalize_term_text(col)
+                    if len(norm_col) >= 2 and col not in generic_headers:
+                        terms_by_category[sheet].append(norm_col)
+                        all_terms.append(norm_col)
+                for col in df.columns:
+                    series = df[col].dropna()
+                    for value in series:
+                        term = normalize_term_text(str(value))
+                        if len(term) >= 2:
+                            terms_by_category[sheet].append(term)
+                            all_terms.append(term)
+        except Exception as e:
+            print(f"⚠️ 专有名词库加载失败（xlsx）: {e}")
+
+    # Fallback to txt cache if xlsx unavailable
+    if (not all_terms) and txt_path.exists():
+        try:
+            for line in txt_path.read_text(encoding="utf-8").splitlines():
+                term = normalize_term_text(line)
+                if len(term) >= 2:
+                    terms_by_category["fallback_txt"].append(term)
+                    all_terms.append(term)
+        except Exception as e:
+            print(f"⚠️ 专有名词库加载失败（txt）: {e}")
+
+    dedup_terms = list(dict.fromkeys(all_terms))
+    dedup_terms.sort(key=len, reverse=True)
+    for cat, terms in list(terms_by_category.items()):
+        terms_by_category[cat] = list(dict.fromkeys(t for t in terms if t))
+
+    term_to_categories: Dict[str, List[str]] = defaultdict(list)
+    for cat, ts in terms_by_category.items():
+        for t in ts:
+            term_to_categories[t].append(cat)
+
+    return {
+        "terms": dedup_terms,
+        "terms_by_category": dict(terms_by_category),
+        "term_to_categories": dict(term_to_categories),
+        "matcher": TermMatcher(dedup_terms, term_to_categories),
+    }
+
+
+def _read_artifact(path: Path, token: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+    try:
+        with path.open("rb") as f:
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ 专有名词编译产物读取失败，将重新编译: {e}")
+        return None
+    if not isinstance(payload, dict) or payload.get("token") != token:
+        return None
+    glossary = payload.get("glossary")
+    return glossary if isinstance(glossary, dict) and isinstance(glossary.get("matcher"), TermMatcher) else None
+
+
+def build_glossary_artifact(xlsx_path: Path, txt_path: Path = FALLBACK_GLOSSARY_TXT) -> Tuple[Path, Dict[str, Any]]:
+    """Compile the glossary and atomically write the versioned artifact next to other caches."""
+    token = glossary_source_token(xlsx_path, txt_path)
+    glossary = compile_glossary(xlsx_path, txt_path)
+    target = artifact_path_for(xlsx_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=target.name + ".", suffix=".tmp", dir=str(target.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"token": token, "glossary": glossary}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, target)
+    except Exception:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return target, glossary
+
+
+def load_glossary(tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Glossary for a tenant (its materials/glossary.xlsx, else the shared one).
+    Served from memory, then from the compiled artifact, and only recompiled when the source changed.
+    """
+    xlsx_path = resolve_tenant_glossary_path(tenant_id)
+    key = str(xlsx_path)
+    now = time.monotonic()
+    with _LOADED_LOCK:
+        entry = _LOADED.get(key)
+        if entry is not None and now - entry[1] < GLOSSARY_RELOAD_CHECK_SECONDS:
+            return entry[2]
+    token = glossary_source_token(xlsx_path)
+    with _LOADED_LOCK:
+        entry = _LOADED.get(key)
+        if entry is not None and entry[0] == token:
+            _LOADED[key] = (token, now, entry[2])
+            return entry[2]
+        glossary = _read_artifact(artifact_path_for(xlsx_path), token)
+        if glossary is None:
+            try:
+                _, glossary = build_glossary_artifact(xlsx_path)
+            except OSError as e:
+                print(f"⚠️ 专有名词编译产物写入失败，仅使用内存结果: {e}")
+                glossary = compile_glossary(xlsx_path)
+        _LOADED[key] = (token, now, glossary)
+        return glossary
+
+
+def reset_loaded_glossaries() -> None:
+    with _LOADED_LOCK:
+        _LOADED.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile glossary spreadsheets into cached matcher artifacts.")
+    parser.add_argument("--tenant", action="append", default=[], help="Tenant id (repeatable); default builds the shared glossary")
+    args = parser.parse_args()
+    sources = {resolve_tenant_glossary_path(t) for t in (args.tenant or [None])}
+    for xlsx_path in sorted(sources, key=str):
+        target, glossary = build_glossary_artifact(xlsx_path)
+        print(f"{xlsx_path} -> {target} ({len(glossary['terms'])} terms, {len(glossary['terms_by_category'])} categories)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+from __future__ import annotations
+
+import importlib
+import json
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from runtime_paths import runtime_root
+
+GRAPH_EXEC_BACKEND = str(os.getenv("GRAPH_EXEC_BACKEND", "thread") or "thread").strip().lower()
+GRAPH_EXEC_WORKERS = max(1, int(os.getenv("GRAPH_EXEC_WORKERS", str(os.cpu_count() or 2)) or 2))
+_POLL_SECONDS = max(0.01, float(os.getenv("GRAPH_EXEC_POLL_SECONDS", "0.05") or 0.05))
+_HEARTBEAT_SECONDS = max(1.0, float(os.getenv("GRAPH_EXEC_HEARTBEAT_SECONDS", "10") or 10))
+# A running job whose worker has not heartbeated for this long is failed as worker_lost.
+_STALE_SECONDS = max(_HEARTBEAT_SECONDS * 3, float(os.getenv("GRAPH_EXEC_STALE_SECONDS", "60") or 60))
+
+DEFAULT_RUNNER = "graph_exec_backend:run_exam_graph"
+
+
+class GraphJobError(RuntimeError):
+    pass
+
+
+class GraphJobQueue:
+    """
+    Durable local job queue (SQLite) between the web process and graph workers.
+
+    A job is one graph invocation: the web process enqueues a pickled payload and tails the
+    job's event rows; a worker claims it, appends each graph event as it is produced and marks
+    it done/failed. Rows are deleted once the consumer has read the result.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.path = Path(db_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute(
+                """
+                create table if not exists graph_jobs (
+                  job_id text primary key,
+                  status text not null,
+                  payload blob not null,
+                  worker text not null default '',
+                  created_at real not null,
+                  heartbeat_at real not null default 0,
+                  error blob
+                )
+                """
+            )
+            conn.execute("create index if not exists idx_graph_jobs_status on graph_jobs (status, created_at)")
+            conn.execute(
+                """
+                create table if not exists graph_job_events (
+                  job_id text not null,
+                  seq integer not null,
+                  event blob not null,
+                  primary key (job_id, seq)
+                )
+                """
+            )
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        with self.connect() as conn:
+            conn.execute(
+                "insert into graph_jobs (job_id, status, payload, created_at) values (?, 'queued', ?, ?)",
+                (job_id, pickle.dumps(payload), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute("begin immediate")
+            try:
+                # Jobs of a dead worker are not re-run (graph runs are not idempotent); the consumer sees the failure.
+                self._fail_lost(conn, stale_before=now - _STALE_SECONDS)
+                row = conn.execute(
+                    "select job_id, payload from graph_jobs where status = 'queued' order by created_at limit 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "update graph_jobs set status = 'running', worker = ?, heartbeat_at = ? where job_id = ?",
+                        (worker, now, row[0]),
+                    )
+                conn.execute("commit")
+            except BaseException:
+                conn.execute("rollback")
+                raise
+        if row is None:
+            return None
+        return str(row[0]), pickle.loads(row[1])
+
+    @staticmethod
+    def _fail_lost(
+        conn: sqlite3.Connection,
+        *,
+        stale_before: float,
+        job_id: str | None = None,
+        dead_workers: Iterable[str] = (),
+    ) -> int:
+        dead = [str(w) for w in dead_workers]
+        where = "status = 'running' and (heartbeat_at < ?"
+        params: List[Any] = [pickle.dumps(GraphJobError("graph_worker_lost")), stale_before]
+        if dead:
+            where += f" or worker in ({', '.join('?' for _ in dead)})"
+            params.extend(dead)
+        where += ")"
+        if job_id is not None:
+            where += " and job_id = ?"
+            params.append(job_id)
+        return conn.execute(f"update graph_jobs set status = 'failed', error = ? where {where}", params).rowcount
+
+    def fail_lost(self, job_id: str, *, stale_before: float, dead_workers: Iterable[str] = ()) -> bool:
+        """Fail a running job whose worker stopped heartbeating or is known dead; True if it was failed."""
+        with self.connect() as conn:
+            return self._fail_lost(conn, stale_before=stale_before, job_id=job_id, dead_workers=dead_workers) > 0
+
+    def heartbeat(self, job_id: str) -> bool:
+        """Returns False when the consumer has gone away (job cancelled or purged)."""
+        with self.connect() as conn:
+            cur = conn.execute(
+                "update graph_jobs set heartbeat_at = ? where job_id = ? and status = 'running'",
+                (time.time(), job_id),
+            )
+            return cur.rowcount > 0
+
+    def append_event(self, job_id: str, seq: int, event: Any) -> None:
+        with self.connect() as conn:
+            conn.execute(
+                "insert or replace into graph_job_events (job_id, seq, event) values (?, ?, ?)",
+                (job_id, int(seq), pickle.dumps(event)),
+            )
+
+    def finish(self, job_id: str, error: BaseException | None = None) -> None:
+        blob = None
+        if error is not None:
+            try:
+                blob = pickle.dumps(error)
+                pickle.loads(blob)
+            except Exception:
+                blob = pickle.dumps(GraphJobError(f"{type(error).__name__}: {error}"))
+        with self.connect() as conn:
+            cur = conn.execute(
+                "update graph_jobs set status = ?, error = ? where job_id = ? and status = 'running'",
+                ("failed" if error is not None else "done", blob, job_id),
+            )
+            if cur.rowcount == 0:
+                # Consumer already released the job; drop events written after that.
+                conn.execute("delete from graph_job_events where job_id = ?", (job_id,))
+
+    def read_events(self, job_id: str, after_seq: int) -> List[Tuple[int, Any]]:
+        with self.connect() as conn:
+            rows = conn.execute(
+                "select seq, event from graph_job_events where job_id = ? and seq >= ? order by seq",
+                (job_id, int(after_seq)),
+            ).fetchall()
+        return [(int(seq), pickle.loads(blob)) for seq, blob in rows]
+
+    def status(self, job_id: str) -> Tuple[str, BaseException | None]:
+        with self.connect() as conn:
+            row = conn.execute("select status, error from graph_jobs where job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return "missing", GraphJobError("graph_job_missing")
+        return str(row[0]), (pickle.loads(row[1]) if row[1] else None)
+
+    def release(self, job_id: str) -> None:
+        with self.connect() as conn:
+            conn.execute("delete from graph_job_events where job_id = ?", (job_id,))
+            conn.execute("delete from graph_jobs where job_id = ?", (job_id,))
+
+    def counts(self) -> Dict[str, int]:
+        with self.connect() as conn:
+            return {str(s): int(n) for s, n in conn.execute("select status, count(*) from graph_jobs group by status")}
+
+
+# ---- worker side -------------------------------------------------------------
+
+_WORKER_RETRIEVERS: Dict[Tuple[str, ...], Any] = {}
+_WORKER_DUP_INDEXES: Dict[str, Dict[str, Any]] = {}
+
+
+def _file_token(path: str) -> str:
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return f"{path}|missing"
+    return f"{path}|{stat.st_mtime_ns}|{stat.st_size}"
+
+
+def _worker_retriever(spec: Dict[str, Any] | None) -> Any:
+    if not spec:
+        return None
+    from exam_factory import build_knowledge_retriever
+
+    key = (str(spec.get("tenant_id", "")),) + tuple(
+        _file_token(str(spec.get(k, "") or "")) for k in ("kb_path", "history_path", "mapping_path", "mapping_review_path")
+    )
+    retriever = _WORKER_RETRIEVERS.get(key)
+    if retriever is None:
+        retriever = build_knowledge_retriever(
+            tenant_id=spec.get("tenant_id"),
+            kb_path=spec.get("kb_path"),
+            history_path=spec.get("history_path"),
+            mapping_path=spec.get("mapping_path"),
+            mapping_review_path=spec.get("mapping_review_path"),
+        )
+        _WORKER_RETRIEVERS.clear()
+        _WORKER_RETRIEVERS[key] = retriever
+    return retriever
+
+
+_BANK_PROBE_BYTES = 64
+
+
+def _scan_bank_tail(path: Path, start: int, next_id: int, probe: bytes) -> Optional[Tuple[List[Tuple[str, str]], int, int, bytes]]:
+    """
+    Stems appended to the bank log since byte `start`: (stems, new offset, next question_id, probe).
+    None when the bytes before `start` no longer match `probe` (file rewritten) or the tail holds a
+    put/delete record (an indexed stem changed) — the caller then folds the whole file.
+    """
+    from bank_store import BANK_OP_KEY
+
+    try:
+        with path.open("rb") as f:
+            f.seek(max(0, start - len(probe)))
+            data = f.read()
+    except OSError:
+        return None
+    if not data.startswith(probe):
+        return None
+    head = len(probe)
+    stems: List[Tuple[str, str]] = []
+    consumed = head
+    pos = head
+    while pos < len(data):
+        end = data.find(b"\n", pos)
+        line = data[pos:] if end < 0 else data[pos:end]
+        pos = len(data) if end < 0 else end + 1
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if end < 0:
+                    break  # 末行尚未写完，下次再读
+                record = None
+            else:
+                op = str(record.get(BANK_OP_KEY, "") or "") if isinstance(record, dict) else ""
+                if op == "skip":
+                    next_id += max(0, int(record.get("count", 0) or 0))
+                elif op:
+                    return None
+                else:
+                    if isinstance(record, dict):
+                        stems.append((f"bank:{next_id}", str(record.get("题干", "") or "")))
+                    next_id += 1
+        consumed = pos
+    offset = max(0, start - len(probe)) + consumed
+    return stems, offset, next_id, data[max(0, consumed - _BANK_PROBE_BYTES):consumed]
+
+
+def _fold_bank_stems(path: Path) -> Tuple[List[Tuple[str, str]], int, int, bytes]:
+    from bank_store import fold_bank_lines
+
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return [], 0, 0, b""
+    rows, next_id, _ = fold_bank_lines(data.decode("utf-8", errors="replace").splitlines())
+    stems = [(f"bank:{qid}", str(item.get("题干", "") or "")) for qid, item in rows if isinstance(item, dict)]
+    return stems, len(data), next_id, data[-_BANK_PROBE_BYTES:]
+
+
+def _worker_dup_index(payload: Dict[str, Any], retriever: Any) -> Any:
+    """
+    Worker copy of the tenant near-dup index: bank stems + mother questions + the caller's scoped entries.
+    Bank rows appended since the last job are indexed from the byte offset already read; the index is
+    rebuilt only when the bank is rewritten (compaction, truncation, put/delete records) or the mother
+    questions change. Scoped entries are re-shipped with every job and dropped again when it ends.
+    """
+    from near_dup_index import NearDuplicateIndex
+
+    tenant_id = str(payload.get("tenant_id", "") or "")
+    bank_path = str(payload.get("bank_path", "") or "")
+    history_token = _file_token(str(getattr(retriever, "history_path", "") or ""))
+    try:
+        bank_ino = Path(bank_path).stat().st_ino if bank_path else None
+    except OSError:
+        bank_ino = None
+    entry = _WORKER_DUP_INDEXES.get(tenant_id)
+    tail = None
+    if entry is not None and (entry["history_token"], entry["bank_path"], entry["bank_ino"]) == (history_token, bank_path, bank_ino):
+        tail = _scan_bank_tail(Path(bank_path), entry["bank_offset"], entry["bank_next_id"], entry["bank_probe"]) if bank_ino is not None else ([], 0, 0, b"")
+    if tail is None:
+        index = NearDuplicateIndex()
+        history_df = getattr(retriever, "history_df", None)
+        if history_df is not None and not history_df.empty:
+            index.add_batch((f"mother:{i}", str(stem or "")) for i, stem in enumerate(history_df["题干"].tolist()))
+        entry = {"index": index, "history_token": history_token, "bank_path": bank_path, "bank_ino": bank_ino}
+        _WORKER_DUP_INDEXES[tenant_id] = entry
+        tail = _fold_bank_stems(Path(bank_path)) if bank_ino is not None else ([], 0, 0, b"")
+    stems, entry["bank_offset"], entry["bank_next_id"], entry["bank_probe"] = tail
+    if stems:
+        entry["index"].add_batch(stems)
+    scope = str((payload.get("configurable") or {}).get("dup_scope") or "")
+    if scope and payload.get("dup_entries"):
+        entry["index"].add_batch(payload["dup_entries"], scope=scope)
+    return entry["index"]
+
+
+def run_exam_graph(payload: Dict[str, Any]) -> Iterator[Any]:
+    """Default job runner: rebuild retriever/dup index in the worker and stream exam_graph."""
+    from exam_graph import (
+        app as graph_app,
+        attach_glossary_tenant,
+        attach_question_wall_clock_budget,
+        detach_glossary_tenant,
+        detach_question_wall_clock_budget,
+    )
+
+    retriever = _worker_retriever(payload.get("retriever"))
+    configurable = dict(payload.get("configurable") or {})
+    configurable["retriever"] = retriever
+    dup_index = _worker_dup_index(payload, retriever) if payload.get("with_dup_index") else None
+    configurable["dup_index"] = dup_index
+    wall_token = attach_question_wall_clock_budget(
+        started_at_utc=payload["started_at"],
+        max_elapsed_ms=int(payload.get("max_elapsed_ms", 0) or 0),
+    )
+    glossary_token = attach_glossary_tenant(payload.get("tenant_id"))
+    try:
+        yield from graph_app.stream(payload.get("inputs") or {}, config={"configurable": configurable})
+    finally:
+        detach_glossary_tenant(glossary_token)
+        detach_question_wall_clock_budget(wall_token)
+        if dup_index is not None:
+            dup_index.remove_scope(str(configurable.get("dup_scope") or ""))
+
+
+def _resolve_runner(name: str) -> Callable[[Dict[str, Any]], Iterator[Any]]:
+    module_name, _, attr = str(name or DEFAULT_RUNNER).partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def run_job(queue: GraphJobQueue, job_id: str, payload: Dict[str, Any]) -> None:
+    alive = threading.Event()
+    alive.set()
+    stop = threading.Event()
+
+    def _beat() -> None:
+        while not stop.wait(_HEARTBEAT_SECONDS):
+            if not queue.heartbeat(job_id):
+                alive.clear()
+
+    beater = threading.Thread(target=_beat, daemon=True)
+    beater.start()
+    error: BaseException | None = None
+    try:
+        for seq, event in enumerate(_resolve_runner(payload.get("runner") or DEFAULT_RUNNER)(payload)):
+            if not alive.is_set():
+                break
+            queue.append_event(job_id, seq, event)
+    except Exception as exc:
+        error = exc
+    finally:
+        stop.set()
+    queue.finish(job_id, error)
+
+
+def _share_llm_limiter_budget(workers: int) -> None:
+    """
+    llm_rate_limiter keeps one window per process, so N graph workers would each get the configured
+    concurrency. Split LLM_LIMITER_INITIAL / LLM_LIMITER_MAX across workers before the limiter is
+    imported; the web process keeps its own window for the calls it still makes (e.g. Judge).
+    """
+    if workers <= 1:
+        return
+    for key, default in (("LLM_LIMITER_INITIAL", 16), ("LLM_LIMITER_MAX", 128)):
+        total = max(1, int(os.getenv(key, str(default)) or default))
+        os.environ[key] = str(max(1, total // workers))
+
+
+def worker_main(db_path: str, worker: str, workers: int = 1) -> None:
+    _share_llm_limiter_budget(workers)
+    queue = GraphJobQueue(Path(db_path))
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            time.sleep(_POLL_SECONDS)
+            continue
+        run_job(queue, job[0], job[1])
+
+
+# ---- web-process side --------------------------------------------------------
+
+
+class ProcessPoolGraphBackend:
+    """Runs graph jobs in local worker processes fed through GraphJobQueue."""
+
+    def __init__(self, db_path: Path, workers: int) -> None:
+        self.queue = GraphJobQueue(db_path)
+        self.workers = max(1, int(workers))
+        self._lock = threading.Lock()
+        self._procs: List[Any] = []
+        # Names of workers found dead, so their running jobs fail without waiting for _STALE_SECONDS.
+        self._lost_workers: deque[str] = deque(maxlen=256)
+
+    def ensure_started(self) -> None:
+        """Start workers up to self.workers, replacing any that have died."""
+        with self._lock:
+            self._lost_workers.extend(p.name for p in self._procs if not p.is_alive())
+            self._procs = [p for p in self._procs if p.is_alive()]
+            ctx = multiprocessing.get_context("spawn")
+            while len(self._procs) < self.workers:
+                name = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+                proc = ctx.Process(
+                    target=worker_main,
+                    args=(str(self.queue.path), name, self.workers),
+                    name=name,
+                    daemon=True,
+                )
+                proc.start()
+                self._procs.append(proc)
+
+    def _check_liveness(self, job_id: str) -> None:
+        # Stale-claim detection otherwise only runs inside another worker's claim(); with every worker
+        # dead (GRAPH_EXEC_WORKERS=1, OOM kill) nobody would ever claim again and the consumer polls forever.
+        self.ensure_started()
+        with self._lock:
+            lost = list(self._lost_workers)
+        self.queue.fail_lost(job_id, stale_before=time.time() - _STALE_SECONDS, dead_workers=lost)
+
+    def stream(self, payload: Dict[str, Any]) -> Iterator[Any]:
+        self.ensure_started()
+        job_id = self.queue.enqueue(payload)
+        next_seq = 0
+        next_check = time.monotonic() + _HEARTBEAT_SECONDS
+        try:
+            while True:
+                rows = self.queue.read_events(job_id, next_seq)
+                for seq, event in rows:
+                    next_seq = seq + 1
+                    yield event
+                if rows:
+                    continue
+                status, error = self.queue.status(job_id)
+                if status in {"done", "failed", "missing"}:
+                    for seq, event in self.queue.read_events(job_id, next_seq):
+                        next_seq = seq + 1
+                        yield event
+                    if status != "done":
+                        raise error or GraphJobError(f"graph_job_{status}")
+                    return
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + _HEARTBEAT_SECONDS
+                    self._check_liveness(job_id)
+                    continue
+                time.sleep(_POLL_SECONDS)
+        finally:
+            # Also reached when the consumer stops early; the worker notices on its next heartbeat.
+            self.queue.release(job_id)
+
+
+_BACKEND: Optional[ProcessPoolGraphBackend] = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def get_graph_backend() -> Optional[ProcessPoolGraphBackend]:
+    """None means run graphs in-process (GRAPH_EXEC_BACKEND=thread, the default)."""
+    global _BACKEND
+    if GRAPH_EXEC_BACKEND != "process":
+        return None
+    with _BACKEND_LOCK:
+        if _BACKEND is None:
+            _BACKEND = ProcessPoolGraphBackend(runtime_root() / "db" / "graph_jobs.sqlite3", GRAPH_EXEC_WORKERS)
+        return _BACKEND
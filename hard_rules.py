@@ -18,24 +18,24 @@ def replace_single_quotes_in_final_json(final_json: Dict) -> Dict:
 
 _MD_TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)+\|?\s*$")
 _MD_TABLE_ROW_RE = re.compile(r"^\s*\|.*\|\s*$")
+_MD_IMAGE_RE = re.compile(r"!\[([^\]]*)\]\([^)]+\)")
+_HTML_IMG_RE = re.compile(r"<\s*img\b", re.IGNORECASE)
+_HTML_IMG_TAG_RE = re.compile(r"<\s*img\b[^>]*>", re.IGNORECASE)
+_IMAGE_EXT_RE = re.compile(r"\.(png|jpe?g|gif)\b", re.IGNORECASE)
+_IMAGE_FILE_RE = re.compile(r"\S+\.(png|jpe?g|gif)\b", re.IGNORECASE)
+_HTML_TABLE_RE = re.compile(r"<\s*table\b", re.IGNORECASE)
 
 
 def _has_image_markers(text: str) -> bool:
     if not text:
         return False
-    if re.search(r"!\[[^\]]*\]\([^)]+\)", text):
-        return True
-    if re.search(r"<\s*img\b", text, flags=re.IGNORECASE):
-        return True
-    if re.search(r"\.(png|jpe?g|gif)\b", text, flags=re.IGNORECASE):
-        return True
-    return False
+    return bool(_MD_IMAGE_RE.search(text) or _HTML_IMG_RE.search(text) or _IMAGE_EXT_RE.search(text))
 
 
 def _has_table_markers(text: str) -> bool:
     if not text:
         return False
-    if re.search(r"<\s*table\b", text, flags=re.IGNORECASE):
+    if _HTML_TABLE_RE.search(text):
         return True
     lines = [line for line in str(text).splitlines() if "|" in line]
     if not lines:
@@ -48,29 +48,34 @@ def _has_table_markers(text: str) -> bool:
     return False
 
 
-def validate_media_rules(question: str, options: Iterable[str], explanation: str) -> List[str]:
-    issues: List[str] = []
+def validate_media_issues(question: str, options: Iterable[str], explanation: str) -> List[Dict[str, str]]:
+    """Image/table markers as structured issues (HARD_IMAGE / HARD_TABLE)."""
+    issues: List[Dict[str, str]] = []
     q_text = str(question or "")
     exp_text = str(explanation or "")
     opts = [str(o) for o in options or []]
 
     if _has_image_markers(q_text):
-        issues.append("题干包含图片标记或图片文件扩展名")
+        issues.append(_mk_issue("HARD_IMAGE", "question", "题干包含图片标记或图片文件扩展名"))
     if _has_image_markers(exp_text):
-        issues.append("解析包含图片标记或图片文件扩展名")
+        issues.append(_mk_issue("HARD_IMAGE", "explanation", "解析包含图片标记或图片文件扩展名"))
     if any(_has_image_markers(opt) for opt in opts):
-        issues.append("选项包含图片标记或图片文件扩展名")
+        issues.append(_mk_issue("HARD_IMAGE", "options", "选项包含图片标记或图片文件扩展名"))
 
     if _has_table_markers(q_text):
-        issues.append("题干包含表格标记")
+        issues.append(_mk_issue("HARD_TABLE", "question", "题干包含表格标记"))
     if _has_table_markers(exp_text):
-        issues.append("解析包含表格标记")
+        issues.append(_mk_issue("HARD_TABLE", "explanation", "解析包含表格标记"))
     if any(_has_table_markers(opt) for opt in opts):
-        issues.append("选项包含表格标记")
+        issues.append(_mk_issue("HARD_TABLE", "options", "选项包含表格标记"))
 
     return issues
 
 
+def validate_media_rules(question: str, options: Iterable[str], explanation: str) -> List[str]:
+    return [issue["message"] for issue in validate_media_issues(question, options, explanation)]
+
+
 def _sanitize_image_markers(text: str) -> Tuple[str, bool]:
     if not text:
         return text, False
@@ -83,12 +88,12 @@ def _sanitize_image_markers(text: str) -> Tuple[str, bool]:
         changed = True
         return alt if alt else "图片"
 
-    updated = re.sub(r"!\[([^\]]*)\]\([^)]+\)", _img_repl, updated)
-    if re.search(r"<\s*img\b", updated, flags=re.IGNORECASE):
-        updated = re.sub(r"<\s*img\b[^>]*>", "图片", updated, flags=re.IGNORECASE)
+    updated = _MD_IMAGE_RE.sub(_img_repl, updated)
+    if _HTML_IMG_RE.search(updated):
+        updated = _HTML_IMG_TAG_RE.sub("图片", updated)
         changed = True
-    if re.search(r"\.(png|jpe?g|gif)\b", updated, flags=re.IGNORECASE):
-        updated = re.sub(r"\S+\.(png|jpe?g|gif)\b", "图片", updated, flags=re.IGNORECASE)
+    if _IMAGE_EXT_RE.search(updated):
+        updated = _IMAGE_FILE_RE.sub("图片", updated)
         changed = True
     return updated, changed
 
@@ -282,14 +287,7 @@ def validate_hard_rules(
     opts = [str(o) for o in options or []]
 
     # Media rules (images/tables)
-    media_issues = validate_media_rules(q_text, opts, exp_text)
-    for msg in media_issues:
-        if "图片" in msg:
-            issues.append(_mk_issue("HARD_IMAGE", "global", msg))
-        elif "表格" in msg:
-            issues.append(_mk_issue("HARD_TABLE", "global", msg))
-        else:
-            issues.append(_mk_issue("HARD_MEDIA", "global", msg))
+    issues.extend(validate_media_issues(q_text, opts, exp_text))
 
     # Single quote ban
     if "'" in q_text:
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from hashlib import sha256
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from volcenginesdkarkruntime import Ark, AsyncArk
+
+# Each generation task runs GENERATE_TASK_CONCURRENCY shards, and one question attempt can
+# have several LLM calls in flight (critic sub-checks, judge layers), so pools get headroom.
+_DEFAULT_POOL_SIZE = max(1, int(os.getenv("GENERATE_TASK_CONCURRENCY", "5") or 5)) * 4
+LLM_HTTP_POOL_SIZE = max(1, int(os.getenv("LLM_HTTP_POOL_SIZE", str(_DEFAULT_POOL_SIZE)) or _DEFAULT_POOL_SIZE))
+LLM_HTTP_KEEPALIVE_SECONDS = max(1.0, float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "60") or 60))
+
+_CLIENTS: Dict[Tuple[str, str, str], Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+# Async clients are pinned to the event loop that created them: key -> (loop, client).
+_ASYNC_CLIENTS: Dict[Tuple[str, str, str], Tuple[asyncio.AbstractEventLoop, Any]] = {}
+# (provider, configured base_url, key digest) -> candidate URL that last answered successfully.
+_PREFERRED_URLS: Dict[Tuple[str, str, str], str] = {}
+_PREFERRED_URLS_LOCK = threading.Lock()
+
+
+def _key_digest(secret: str) -> str:
+    return sha256(str(secret or "").encode("utf-8")).hexdigest()[:16] if secret else ""
+
+
+def _pooled_http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_POOL_SIZE,
+            max_keepalive_connections=LLM_HTTP_POOL_SIZE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(600.0, connect=60.0),
+        follow_redirects=True,
+    )
+
+
+def get_openai_client(api_key: str, base_url: str) -> OpenAI:
+    """Shared OpenAI-compatible client per (base_url, key); reuses its keep-alive pool across calls."""
+    cache_key = ("openai", str(base_url or ""), _key_digest(api_key))
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(cache_key)
+        if client is None:
+            client = OpenAI(api_key=api_key, base_url=base_url, http_client=_pooled_http_client())
+            _CLIENTS[cache_key] = client
+        return client
+
+
+def get_ark_client(
+    base_url: str,
+    *,
+    api_key: Optional[str] = None,
+    ak: Optional[str] = None,
+    sk: Optional[str] = None,
+) -> Ark:
+    """Shared Ark client per (base_url, credentials); API key wins over AK/SK like the direct constructor."""
+    secret = api_key or f"{ak or ''}:{sk or ''}"
+    cache_key = ("ark", str(base_url or ""), _key_digest(secret))
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(cache_key)
+        if client is None:
+            if api_key:
+                client = Ark(api_key=api_key, base_url=base_url, http_client=_pooled_http_client())
+            else:
+                client = Ark(ak=ak, sk=sk, base_url=base_url, http_client=_pooled_http_client())
+            _CLIENTS[cache_key] = client
+        return client
+
+
+def _pooled_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_POOL_SIZE,
+            max_keepalive_connections=LLM_HTTP_POOL_SIZE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(600.0, connect=60.0),
+        follow_redirects=True,
+    )
+
+
+def get_async_openai_client(api_key: str, base_url: str) -> AsyncOpenAI:
+    """Async counterpart of get_openai_client; pools are bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    cache_key = ("openai", str(base_url or ""), _key_digest(api_key))
+    with _CLIENTS_LOCK:
+        cached_loop, client = _ASYNC_CLIENTS.get(cache_key, (None, None))
+        if client is None or cached_loop is not loop:
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=_pooled_async_http_client())
+            _ASYNC_CLIENTS[cache_key] = (loop, client)
+        return client
+
+
+def get_async_ark_client(
+    base_url: str,
+    *,
+    api_key: Optional[str] = None,
+    ak: Optional[str] = None,
+    sk: Optional[str] = None,
+) -> AsyncArk:
+    loop = asyncio.get_running_loop()
+    secret = api_key or f"{ak or ''}:{sk or ''}"
+    cache_key = ("ark", str(base_url or ""), _key_digest(secret))
+    with _CLIENTS_LOCK:
+        cached_loop, client = _ASYNC_CLIENTS.get(cache_key, (None, None))
+        if client is None or cached_loop is not loop:
+            if api_key:
+                client = AsyncArk(api_key=api_key, base_url=base_url, http_client=_pooled_async_http_client())
+            else:
+                client = AsyncArk(ak=ak, sk=sk, base_url=base_url, http_client=_pooled_async_http_client())
+            _ASYNC_CLIENTS[cache_key] = (loop, client)
+        return client
+
+
+def order_url_candidates(provider: str, base_url: str, api_key: str, candidates: List[str]) -> List[str]:
+    """Move the candidate that last worked for this endpoint to the front."""
+    with _PREFERRED_URLS_LOCK:
+        preferred = _PREFERRED_URLS.get((provider, str(base_url or ""), _key_digest(api_key)))
+    if preferred and preferred in candidates:
+        return [preferred] + [u for u in candidates if u != preferred]
+    return list(candidates)
+
+
+def remember_working_url(provider: str, base_url: str, api_key: str, candidate: str) -> None:
+    with _PREFERRED_URLS_LOCK:
+        _PREFERRED_URLS[(provider, str(base_url or ""), _key_digest(api_key))] = candidate
+
+
+def reset_llm_clients() -> None:
+    """Drop pooled clients and URL preferences (tests, key rotation)."""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+        # Async pools belong to their event loop; they are dropped and collected with it.
+        _ASYNC_CLIENTS.clear()
+    with _PREFERRED_URLS_LOCK:
+        _PREFERRED_URLS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
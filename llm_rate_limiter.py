@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+LLM_LIMITER_ENABLED = str(os.getenv("LLM_LIMITER_ENABLED", "1")).strip().lower() not in {"0", "false", "no", "off"}
+LLM_LIMITER_INITIAL = max(1, int(os.getenv("LLM_LIMITER_INITIAL", "16") or 16))
+LLM_LIMITER_MIN = max(1, int(os.getenv("LLM_LIMITER_MIN", "1") or 1))
+LLM_LIMITER_MAX = max(LLM_LIMITER_MIN, int(os.getenv("LLM_LIMITER_MAX", "128") or 128))
+# Latency EWMA above baseline * tolerance counts as congestion even without a 429.
+LLM_LIMITER_LATENCY_TOLERANCE = max(1.1, float(os.getenv("LLM_LIMITER_LATENCY_TOLERANCE", "3") or 3))
+# At most one multiplicative decrease per window, so a burst of 429s from one overload halves once.
+LLM_LIMITER_DECREASE_COOLDOWN_SECONDS = max(0.0, float(os.getenv("LLM_LIMITER_DECREASE_COOLDOWN_SECONDS", "2") or 2))
+
+
+def is_rate_limited_error(err: Any) -> bool:
+    text = str(err or "")
+    lower = text.lower()
+    return "429" in text or "rate limit" in lower or "ratelimit" in lower or "too many" in lower
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency window for one (provider, model).
+
+    Successes grow the window by ~1 per window's worth of calls; a 429 halves it and sustained
+    latency far above the observed baseline shrinks it by 10%. Callers hold a slot per HTTP request.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        *,
+        initial: int = LLM_LIMITER_INITIAL,
+        minimum: int = LLM_LIMITER_MIN,
+        maximum: int = LLM_LIMITER_MAX,
+    ) -> None:
+        self.provider = provider
+        self.model = model
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(self.maximum, max(self.minimum, int(initial))))
+        self.in_flight = 0
+        self.waiting = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.latency_ewma_ms: Optional[float] = None
+        self.latency_baseline_ms: Optional[float] = None
+        self._last_decrease_at = 0.0
+        self._cond = threading.Condition()
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(self.minimum, int(self.limit))
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if not self._has_capacity():
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            self.waiting += 1
+            try:
+                while not self._has_capacity():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def _decrease(self, factor: float, now: float) -> None:
+        if now - self._last_decrease_at < LLM_LIMITER_DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease_at = now
+        self.limit = max(float(self.minimum), self.limit * factor)
+
+    def release(self, latency_ms: Optional[float] = None, error: Any = None) -> None:
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if error is not None and is_rate_limited_error(error):
+                self.rate_limited += 1
+                self._decrease(0.5, now)
+            elif error is not None:
+                self.errors += 1
+            else:
+                self.successes += 1
+                congested = False
+                if latency_ms is not None and latency_ms >= 0:
+                    ewma = latency_ms if self.latency_ewma_ms is None else 0.8 * self.latency_ewma_ms + 0.2 * latency_ms
+                    self.latency_ewma_ms = ewma
+                    if self.latency_baseline_ms is None or ewma < self.latency_baseline_ms:
+                        self.latency_baseline_ms = ewma
+                    else:
+                        # Let the baseline drift up slowly so a permanently slower model is not punished forever.
+                        self.latency_baseline_ms += 0.01 * (ewma - self.latency_baseline_ms)
+                    congested = ewma > self.latency_baseline_ms * LLM_LIMITER_LATENCY_TOLERANCE
+                if congested:
+                    self._decrease(0.9, now)
+                else:
+                    self.limit = min(float(self.maximum), self.limit + 1.0 / max(1.0, self.limit))
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        if not self.acquire(timeout):
+            raise TimeoutError(f"LLM limiter wait timed out ({self.provider}/{self.model})")
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.release((time.monotonic() - started) * 1000, error=e)
+            raise
+        self.release((time.monotonic() - started) * 1000)
+
+    @asynccontextmanager
+    async def aslot(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        # threading.Condition would block the event loop, so async callers poll.
+        deadline = None if timeout is None else time.monotonic() + max(0.0, timeout)
+        delay = 0.01
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"LLM limiter wait timed out ({self.provider}/{self.model})")
+            await asyncio.sleep(delay)
+            delay = min(0.2, delay * 2)
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.release((time.monotonic() - started) * 1000, error=e)
+            raise
+        self.release((time.monotonic() - started) * 1000)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "provider": self.provider,
+                "model": self.model,
+                "limit": round(self.limit, 2),
+                "effective_limit": max(self.minimum, int(self.limit)),
+                "min": self.minimum,
+                "max": self.maximum,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "successes": self.successes,
+                "rate_limited": self.rate_limited,
+                "errors": self.errors,
+                "latency_ewma_ms": None if self.latency_ewma_ms is None else round(self.latency_ewma_ms, 1),
+                "latency_baseline_ms": None if self.latency_baseline_ms is None else round(self.latency_baseline_ms, 1),
+            }
+
+
+class _NoopLimiter:
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        yield
+
+    @asynccontextmanager
+    async def aslot(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        yield
+
+
+_LIMITERS: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+_NOOP = _NoopLimiter()
+
+
+def get_llm_limiter(provider: str, model: str) -> Any:
+    """Process-wide limiter shared by every generation, judge and mapping call to (provider, model)."""
+    if not LLM_LIMITER_ENABLED:
+        return _NOOP
+    key = (str(provider or "").lower() or "ait", str(model or ""))
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter(key[0], key[1])
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+def llm_limiter_snapshot() -> List[Dict[str, Any]]:
+    with _LIMITERS_LOCK:
+        limiters = list(_LIMITERS.values())
+    return sorted((l.snapshot() for l in limiters), key=lambda x: (x["provider"], x["model"]))
+
+
+def reset_llm_limiters() -> None:
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from runtime_paths import cache_root
+
+# off: no caching (default) | readwrite: serve hits, store successes | replay: serve hits, never call the model
+LLM_CACHE_MODES = {"off", "readwrite", "replay"}
+
+
+def llm_cache_mode() -> str:
+    mode = str(os.getenv("LLM_CACHE_MODE", "off") or "off").strip().lower()
+    return mode if mode in LLM_CACHE_MODES else "off"
+
+
+def llm_cache_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    prompt_hash = sha256(str(prompt or "").encode("utf-8")).hexdigest()
+    raw = json.dumps([str(model or ""), prompt_hash, float(temperature), int(max_tokens)])
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed, content-addressed store of successful LLM completions.
+    Evicts least-recently-used rows once the stored content exceeds `max_bytes`.
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute(
+                """
+                create table if not exists llm_response_cache (
+                  cache_key text primary key,
+                  model text not null,
+                  provider text not null default '',
+                  content text not null,
+                  usage_json text not null default '{}',
+                  size_bytes integer not null,
+                  created_at float not null,
+                  last_access_at float not null,
+                  hit_count integer not null default 0
+                )
+                """
+            )
+            conn.execute(
+                "create index if not exists idx_llm_response_cache_last_access on llm_response_cache (last_access_at)"
+            )
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock, self.connect() as conn:
+            row = conn.execute(
+                "select model, provider, content, usage_json from llm_response_cache where cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "update llm_response_cache set last_access_at = ?, hit_count = hit_count + 1 where cache_key = ?",
+                (time.time(), cache_key),
+            )
+        try:
+            usage = json.loads(row["usage_json"] or "{}")
+        except json.JSONDecodeError:
+            usage = {}
+        return {"model": row["model"], "provider": row["provider"], "content": row["content"], "usage": usage}
+
+    def put(self, cache_key: str, *, model: str, provider: str, content: str, usage: Optional[Dict[str, Any]] = None) -> None:
+        now = time.time()
+        size = len(str(content or "").encode("utf-8"))
+        with self._lock, self.connect() as conn:
+            conn.execute(
+                """
+                insert into llm_response_cache
+                  (cache_key, model, provider, content, usage_json, size_bytes, created_at, last_access_at)
+                values (?, ?, ?, ?, ?, ?, ?, ?)
+                on conflict(cache_key) do update set
+                  content = excluded.content,
+                  usage_json = excluded.usage_json,
+                  size_bytes = excluded.size_bytes,
+                  last_access_at = excluded.last_access_at
+                """,
+                (cache_key, str(model or ""), str(provider or ""), str(content or ""), json.dumps(usage or {}), size, now, now),
+            )
+            total = int(conn.execute("select coalesce(sum(size_bytes), 0) from llm_response_cache").fetchone()[0])
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for row in conn.execute(
+                "select cache_key, size_bytes from llm_response_cache where cache_key != ? order by last_access_at asc",
+                (cache_key,),
+            ):
+                if total <= self.max_bytes:
+                    break
+                victims.append((row["cache_key"],))
+                total -= int(row["size_bytes"])
+            conn.executemany("delete from llm_response_cache where cache_key = ?", victims)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.connect() as conn:
+            row = conn.execute(
+                "select count(*) as entries, coalesce(sum(size_bytes), 0) as size_bytes, coalesce(sum(hit_count), 0) as hits from llm_response_cache"
+            ).fetchone()
+        return {"entries": int(row["entries"]), "size_bytes": int(row["size_bytes"]), "hits": int(row["hits"]), "max_bytes": self.max_bytes}
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    global _CACHE
+    raw_path = os.getenv("LLM_CACHE_PATH")
+    path = Path(raw_path).expanduser().resolve() if raw_path else cache_root() / "llm_response_cache.sqlite3"
+    max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)) or 512 * 1024 * 1024)
+    with _CACHE_LOCK:
+        if _CACHE is None or _CACHE.path != path or _CACHE.max_bytes != max(1, max_bytes):
+            _CACHE = LLMResponseCache(path, max_bytes)
+        return _CACHE
@@ -15,6 +15,8 @@ from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 from tenants_config import resolve_tenant_kb_path, resolve_tenant_history_path, tenant_mapping_path
 from runtime_paths import load_primary_key_config
+from llm_rate_limiter import get_llm_limiter
+from embedding_store import encode_with_store
 
 # BGE embedding model - required, no fallback
 try:
@@ -336,9 +338,8 @@ def get_bge_model():
 
 def compute_bge_similarity(text1, text2):
     """Compute BGE embedding similarity between two texts."""
-    model = get_bge_model()
     try:
-        embeddings = model.encode([text1, text2], normalize_embeddings=True)
+        embeddings = encode_batch([text1, text2])
         emb1, emb2 = embeddings[0], embeddings[1]
         return float(np.dot(emb1, emb2))
     except Exception as e:
@@ -346,10 +347,15 @@ def compute_bge_similarity(text1, text2):
 
 
 def encode_batch(texts, batch_size=64):
-    """Encode a list of texts with BGE; returns (N, dim) float array, normalized."""
-    model = get_bge_model()
-    embs = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
-    return np.asarray(embs, dtype=np.float32)
+    """Encode a list of texts with BGE; returns (N, dim) float array, normalized.
+
+    Goes through the shared embedding store, so only texts not encoded before hit the model.
+    """
+    def _encode(missing):
+        embs = get_bge_model().encode(missing, batch_size=batch_size, normalize_embeddings=True)
+        return np.asarray(embs, dtype=np.float32)
+
+    return encode_with_store(BGE_MODEL_NAME, list(texts), _encode)
 
 def llm_semantic_match(kb_entry, questions_df, api_key, base_url, model_name="deepseek-chat", top_k=20):
     """Use LLM to find semantically related questions from all questions."""
@@ -418,13 +424,14 @@ def llm_semantic_match(kb_entry, questions_df, api_key, base_url, model_name="de
 
     try:
         client = OpenAI(api_key=api_key, base_url=base_url)
-        resp = client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,  # Slightly higher for semantic understanding
-            max_tokens=500,
-            timeout=30  # Add timeout
-        )
+        with get_llm_limiter("ait", model_name).slot(timeout=120):
+            resp = client.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1,  # Slightly higher for semantic understanding
+                max_tokens=500,
+                timeout=30  # Add timeout
+            )
         content = resp.choices[0].message.content if resp.choices and resp.choices[0].message else ""
         if not content:
             print(f"    [LLM] Warning: Empty response (finish_reason: {resp.choices[0].finish_reason if resp.choices else 'N/A'})", flush=True)
@@ -585,13 +592,14 @@ def llm_semantic_analysis(kb_entry, questions_df, api_key, base_url, model_name=
     
     try:
         client = OpenAI(api_key=api_key, base_url=base_url)
-        resp = client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=800,
-            timeout=60
-        )
+        with get_llm_limiter("ait", model_name).slot(timeout=120):
+            resp = client.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=800,
+                timeout=60
+            )
         content = resp.choices[0].message.content if resp.choices and resp.choices[0].message else ""
         if not content:
             print(f"    [LLM深度分析] Warning: Empty response", flush=True)
@@ -694,13 +702,14 @@ def llm_rerank_questions(kb_entry, candidate_indices, questions_df, api_key, bas
     
     try:
         client = OpenAI(api_key=api_key, base_url=base_url)
-        resp = client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=300,
-            response_format={"type": "json_object"},
-        )
+        with get_llm_limiter("ait", model_name).slot(timeout=120):
+            resp = client.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=300,
+                response_format={"type": "json_object"},
+            )
         content = resp.choices[0].message.content if resp.choices else ""
         if not content:
             return None
@@ -720,6 +729,109 @@ def llm_rerank_questions(kb_entry, candidate_indices, questions_df, api_key, bas
     except Exception:
         return None
 
+def _path_segments(path):
+    return [s for s in path.split('/') if s]
+
+
+def _question_full_path(row):
+    """Normalised 篇/章/节/考点 path used by Strategy 2; "" unless all four levels are present."""
+    if not build_gps_path(row):
+        return ""
+    q_pian = str(row.get('篇', '')).strip()
+    q_zhang = str(row.get('章', '')).strip()
+    q_jie = str(row.get('节', '')).strip()
+    q_kaodian = str(row.get('考点', '')).strip()
+    q_kaodian_clean = re.sub(r'[（(].*?[）)]', '', q_kaodian).strip()
+    q_kaodian_clean = re.sub(r'-无需修改', '', q_kaodian_clean).strip()
+    if not (q_pian and q_zhang and q_jie and q_kaodian_clean):
+        return ""
+    return normalize_path_dehydration(f"{q_pian}/{q_zhang}/{q_jie}/{q_kaodian_clean}")
+
+
+class PathStatuteIndex:
+    """
+    Inverted indexes for Strategy 2 (GPS full-path containment) and Strategy 3 (statute collision).
+
+    Built once per side (question bank or slice list) so each lookup resolves its candidates
+    through dict/set lookups instead of a full scan. Lookups only narrow the candidates; each
+    candidate is still checked with the original containment/equality test, so results match
+    a full scan in insertion order.
+    """
+
+    def __init__(self):
+        self.positions = {}        # key -> insertion position (keeps scan order)
+        self.full_paths = {}       # key -> (full_path, depth) for depth >= 3
+        self.interior_index = {}   # first interior segment of full_path -> {key}
+        self.segment_index = {}    # any segment of full_path -> {key}
+        self.legal_refs = {}       # key -> {(law_name, article_number)}
+        self.statute_index = {}    # (law_name, article_number) -> {key}
+
+    def add_entry(self, pos, key, full_path, refs):
+        self.positions[key] = pos
+        segs = _path_segments(full_path)
+        if len(segs) >= 3:
+            self.full_paths[key] = (full_path, len(segs))
+            # a path inside another one => its interior segments are whole segments of the outer path
+            self.interior_index.setdefault(segs[1], set()).add(key)
+            for seg in set(segs):
+                self.segment_index.setdefault(seg, set()).add(key)
+        if refs:
+            self.legal_refs[key] = set(refs)
+            for ref in refs:
+                self.statute_index.setdefault(ref, set()).add(key)
+
+    def _ordered(self, candidates):
+        return sorted(candidates, key=lambda k: self.positions[k])
+
+    def gps_full_path_matches(self, gps):
+        """[(key, full_path)] whose full path contains or is contained by gps (depth >= 3), in insertion order."""
+        segs = _path_segments(gps)
+        if len(segs) < 3:
+            return []
+        candidates = set(self.segment_index.get(segs[1], ()))
+        for seg in set(segs):
+            candidates |= self.interior_index.get(seg, set())
+        out = []
+        for key in self._ordered(candidates):
+            full_path, _ = self.full_paths[key]
+            if full_path in gps or gps in full_path:
+                out.append((key, full_path))
+        return out
+
+    def statute_candidates(self, refs):
+        """Keys sharing at least one (law, article) with refs, in insertion order."""
+        candidates = set()
+        for ref in refs:
+            candidates |= self.statute_index.get(ref, set())
+        return self._ordered(candidates)
+
+    def statute_matches(self, refs):
+        """[(key, (law, article))] once per matching reference in refs, in insertion order."""
+        out = []
+        for key in self.statute_candidates(refs):
+            entry_refs = self.legal_refs[key]
+            for ref in refs:
+                if ref in entry_refs:
+                    out.append((key, ref))
+        return out
+
+
+class QuestionMatchIndex(PathStatuteIndex):
+    """Question-side index keyed by DataFrame index, for slice-centric matching (find_matching_questions)."""
+
+    def add(self, pos, idx, row):
+        refs = extract_legal_references(str(row.get('题干', '')).strip())
+        refs.extend(extract_legal_references(str(row.get('解析', '')).strip()))
+        self.add_entry(pos, idx, _question_full_path(row), refs)
+
+
+def build_question_match_index(questions_df):
+    match_index = QuestionMatchIndex()
+    for pos, (idx, row) in enumerate(questions_df.iterrows()):
+        match_index.add(pos, idx, row)
+    return match_index
+
+
 def build_question_indices(questions_df):
     """Build indices for fast lookup."""
     # Index by 篇/章/节
@@ -917,14 +1029,15 @@ def llm_rerank_candidates(kb_entry, candidate_questions, api_key, base_url, mode
     )
 
     client = OpenAI(api_key=api_key, base_url=base_url)
-    resp = client.chat.completions.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=500,
-        timeout=30,
-        response_format={"type": "json_object"},
-    )
+    with get_llm_limiter("ait", model_name).slot(timeout=120):
+        resp = client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            max_tokens=500,
+            timeout=30,
+            response_format={"type": "json_object"},
+        )
     raw_content = resp.choices[0].message.content if resp.choices and resp.choices[0].message else ""
     if not raw_content:
         return [], ""
@@ -953,7 +1066,8 @@ def llm_rerank_candidates(kb_entry, candidate_questions, api_key, base_url, mode
 
 def find_matching_questions(kb_entry, kb_idx, questions_df, 
                            reverse_index, path_index, kaodian_index, 
-                           api_key=None, base_url=None, model_name="deepseek-chat"):
+                           api_key=None, base_url=None, model_name="deepseek-chat",
+                           match_index=None):
     """
     Find matching questions for a knowledge slice using PRD FR2.1.1 five-tier strategy.
     
@@ -962,7 +1076,12 @@ def find_matching_questions(kb_entry, kb_idx, questions_df,
     Strategy 3: Statute Collision (P2) - confidence 0.88
     Strategy 4: BGE Vector Retrieval (P3) - confidence = score
     Strategy 5: LLM Reranking (P4) - confidence 0.80
+
+    match_index: QuestionMatchIndex from build_question_match_index; pass it when mapping many
+    slices against the same questions_df (built on the fly otherwise).
     """
+    if match_index is None:
+        match_index = build_question_match_index(questions_df)
     kb_path = kb_entry.get('完整路径', '')
     kb_content = get_kb_content(kb_entry)
     segs = [x.strip() for x in kb_path.split(">")] if kb_path else []
@@ -1004,42 +1123,23 @@ def find_matching_questions(kb_entry, kb_idx, questions_df,
     # Strategy 2: GPS Path-Based Match (P1)
     # Build GPS paths for all questions and match
     # Only keep the highest confidence matches (if multiple same confidence, keep all)
+    # Full path match: require sufficient depth (>= 3 segments) to avoid over-broad matches
     strategy2_matches = []
-    for idx, row in questions_df.iterrows():
+    for idx, full_path in match_index.gps_full_path_matches(kb_gps):
         if idx in matched_set:
             continue
-        
-        q_gps = build_gps_path(row)
-        if not q_gps:
-            continue
-        
-        q_pian = str(row.get('篇', '')).strip()
-        q_zhang = str(row.get('章', '')).strip()
-        q_jie = str(row.get('节', '')).strip()
-        q_kaodian = str(row.get('考点', '')).strip()
-        q_kaodian_clean = re.sub(r'[（(].*?[）)]', '', q_kaodian).strip()
-        q_kaodian_clean = re.sub(r'-无需修改', '', q_kaodian_clean).strip()
-        
-        # Full path match: require sufficient depth to avoid over-broad matches
-        if q_pian and q_zhang and q_jie and q_kaodian_clean:
-            full_path = normalize_path_dehydration(f"{q_pian}/{q_zhang}/{q_jie}/{q_kaodian_clean}")
-            kb_gps_depth = len([s for s in kb_gps.split('/') if s])
-            full_depth = len([s for s in full_path.split('/') if s])
-            if kb_gps_depth >= 3 and full_depth >= 3 and (full_path in kb_gps or kb_gps in full_path):
-                strategy2_matches.append({
-                    'question_index': int(idx),
-                    'confidence': 0.95,
-                    'method': 'GPS_FullPath',
-                    'evidence': {
-                        'reason': f'全路径包含匹配：{full_path}',
-                        'match_type': 'full_path',
-                        'kb_gps': kb_gps,
-                        'q_gps': full_path
-                    }
-                })
-                continue
-        
-        # No partial-path strategy: fall through to later strategies
+        strategy2_matches.append({
+            'question_index': int(idx),
+            'confidence': 0.95,
+            'method': 'GPS_FullPath',
+            'evidence': {
+                'reason': f'全路径包含匹配：{full_path}',
+                'match_type': 'full_path',
+                'kb_gps': kb_gps,
+                'q_gps': full_path
+            }
+        })
+    # No partial-path strategy: fall through to later strategies
     
     # Strategy 2 outcome: full_path return early
     if strategy2_matches:
@@ -1065,31 +1165,20 @@ def find_matching_questions(kb_entry, kb_idx, questions_df,
     # Only keep the highest confidence matches (if multiple same confidence, keep all)
     strategy3_matches = []
     if kb_legal_refs:
-        for idx, row in questions_df.iterrows():
+        for idx, (kb_law, kb_article) in match_index.statute_matches(kb_legal_refs):
             if idx in matched_set:
                 continue
-            
-            q_stem = str(row.get('题干', '')).strip()
-            q_explanation = str(row.get('解析', '')).strip()
-            q_legal_refs = extract_legal_references(q_stem)
-            q_legal_refs.extend(extract_legal_references(q_explanation))
-            
-            # Check if any legal reference matches
-            for kb_law, kb_article in kb_legal_refs:
-                for q_law, q_article in q_legal_refs:
-                    if kb_law == q_law and kb_article == q_article:
-                        strategy3_matches.append({
-                            'question_index': int(idx),
-                            'confidence': 0.88,
-                            'method': 'Statute_Collision',
-                            'evidence': {
-                                'reason': f'法条硬碰撞：《{kb_law}》第{kb_article}条',
-                                'law_name': kb_law,
-                                'article_number': kb_article
-                            },
-                            'row': row
-                        })
-                        break
+            strategy3_matches.append({
+                'question_index': int(idx),
+                'confidence': 0.88,
+                'method': 'Statute_Collision',
+                'evidence': {
+                    'reason': f'法条硬碰撞：《{kb_law}》第{kb_article}条',
+                    'law_name': kb_law,
+                    'article_number': kb_article
+                },
+                'row': questions_df.iloc[match_index.positions[idx]]
+            })
     
     # Strategy 3: BGE refinement then keep best
     if strategy3_matches:
@@ -1325,6 +1414,14 @@ def build_slice_meta(kb_data):
     return meta
 
 
+def build_slice_match_index(slice_meta):
+    """Slice-side Strategy 2/3 index keyed by kb_idx, for the question-centric mapping loop."""
+    index = PathStatuteIndex()
+    for pos, m in enumerate(slice_meta):
+        index.add_entry(pos, m["kb_idx"], m["kb_gps"], m["kb_legal_refs"])
+    return index
+
+
 def precompute_slice_embeddings(slice_meta, batch_size=64):
     """Precompute BGE embeddings for all slices. Returns (N, dim) array."""
     texts = [m["emb_text"] for m in slice_meta]
@@ -1377,14 +1474,15 @@ def llm_rerank_slices_for_question(q_row, candidate_slices, api_key, base_url, m
     )
 
     client = OpenAI(api_key=api_key, base_url=base_url)
-    resp = client.chat.completions.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=500,
-        timeout=30,
-        response_format={"type": "json_object"},
-    )
+    with get_llm_limiter("ait", model_name).slot(timeout=120):
+        resp = client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            max_tokens=500,
+            timeout=30,
+            response_format={"type": "json_object"},
+        )
     raw_content = resp.choices[0].message.content if resp.choices and resp.choices[0].message else ""
     if not raw_content:
         return [], ""
@@ -1413,11 +1511,15 @@ def llm_rerank_slices_for_question(q_row, candidate_slices, api_key, base_url, m
 
 
 def find_matching_slices_for_question(
-    q_row, q_idx, slice_meta, slice_embeddings, question_to_kb, kb_data, api_key, base_url, model_name
+    q_row, q_idx, slice_meta, slice_embeddings, question_to_kb, kb_data, api_key, base_url, model_name,
+    slice_index=None,
 ):
     """
     Question-centric: find which slices match this question. Returns list of
     (kb_idx, confidence, method, evidence).
+
+    slice_index: PathStatuteIndex from build_slice_match_index; pass it when mapping many
+    questions against the same slice_meta (built on the fly otherwise).
     """
     q_gps = build_gps_path(q_row)
     if not q_gps:
@@ -1441,22 +1543,17 @@ def find_matching_slices_for_question(
     if q_pian and q_zhang and q_jie and q_kaodian_clean:
         full_path = normalize_path_dehydration(f"{q_pian}/{q_zhang}/{q_jie}/{q_kaodian_clean}")
 
+    if slice_index is None:
+        slice_index = build_slice_match_index(slice_meta)
+    # Full path match: require sufficient depth (>= 3 segments) on both sides to avoid over-broad matches
     full_matches = []
-    for m in slice_meta:
-        kb_idx = m["kb_idx"]
-        kb_gps = m["kb_gps"]
-
-        if full_path:
-            kb_gps_depth = len([s for s in kb_gps.split('/') if s])
-            full_depth = len([s for s in full_path.split('/') if s])
-            if kb_gps_depth >= 3 and full_depth >= 3 and (full_path in kb_gps or kb_gps in full_path):
-                full_matches.append((kb_idx, 0.95, "GPS_FullPath", {
-                    "reason": f"全路径包含匹配：{full_path}",
-                    "match_type": "full_path",
-                    "kb_gps": kb_gps,
-                    "q_gps": full_path,
-                }))
-                continue
+    for kb_idx, kb_gps in (slice_index.gps_full_path_matches(full_path) if full_path else []):
+        full_matches.append((kb_idx, 0.95, "GPS_FullPath", {
+            "reason": f"全路径包含匹配：{full_path}",
+            "match_type": "full_path",
+            "kb_gps": kb_gps,
+            "q_gps": full_path,
+        }))
 
     if full_matches and not is_meta_conflict:
         return full_matches
@@ -1471,16 +1568,13 @@ def find_matching_slices_for_question(
     q_refs = extract_legal_references(q_stem)
     q_refs.extend(extract_legal_references(q_expl))
 
+    # First slice reference that collides with the question, per slice in slice order
+    q_ref_set = set(q_refs)
     stat_matches = []
-    for m in slice_meta:
-        for kb_law, kb_art in m["kb_legal_refs"]:
-            for q_law, q_art in q_refs:
-                if kb_law == q_law and kb_art == q_art:
-                    stat_matches.append((m["kb_idx"], m, kb_law, kb_art))
-                    break
-            else:
-                continue
-            break
+    for kb_idx in slice_index.statute_candidates(q_refs):
+        m = slice_meta[slice_index.positions[kb_idx]]
+        kb_law, kb_art = next(ref for ref in m["kb_legal_refs"] if ref in q_ref_set)
+        stat_matches.append((kb_idx, m, kb_law, kb_art))
 
     if stat_matches and not is_meta_conflict:
         refined = []
@@ -1597,6 +1691,7 @@ def create_mapping():
     # Question-centric flow (PRD FR2.1.1, TP12.12): one question × full slices; precompute slice embeddings
     print("Building slice metadata...")
     slice_meta = build_slice_meta(kb_data_work)
+    slice_index = build_slice_match_index(slice_meta)
     print("Precomputing BGE embeddings for all slices...")
     slice_embeddings = precompute_slice_embeddings(slice_meta)
     question_indices = set(questions_df_work.index.tolist())
@@ -1610,7 +1705,7 @@ def create_mapping():
     for q_ord, (q_idx, q_row) in enumerate(questions_df_work.iterrows()):
         matches = find_matching_slices_for_question(
             q_row, q_idx, slice_meta, slice_embeddings, question_to_kb, kb_data_work,
-            api_key=api_key, base_url=base_url, model_name=model_name
+            api_key=api_key, base_url=base_url, model_name=model_name, slice_index=slice_index
         )
         for kb_idx, conf, method, ev in matches:
             if kb_idx not in mapping:
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 小于 2^32 的最大素数：a、b、shingle 都先落在 [0, p) 内，a*x+b < p^2+p < 2^64，uint64 不会溢出
+_HASH_PRIME = (1 << 32) - 5
+_NORMALIZE_RE = re.compile(r"[\s“”\"'`·•,，。！？!?；;：:（）()【】\[\]<>《》/\\\-_]+")
+
+
+def normalize_dup_text(text: str) -> str:
+    return _NORMALIZE_RE.sub("", str(text or "")).lower()
+
+
+@dataclass
+class NearDuplicateMatch:
+    key: str
+    score: float
+    text: str
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH index over character shingles of question stems.
+
+    Entries carry a scope: "" entries (mother questions, saved bank items) match every
+    query, scoped entries (e.g. one generation task) only match queries of the same scope.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, shingle_size: int = 3, seed: int = 1) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = max(1, shingle_size)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _HASH_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _HASH_PRIME, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._texts: Dict[str, str] = {}
+        self._scopes: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    def _shingles(self, text: str) -> np.ndarray:
+        norm = normalize_dup_text(text)
+        if not norm:
+            return np.empty(0, dtype=np.uint64)
+        n = self.shingle_size
+        grams = {norm[i : i + n] for i in range(max(1, len(norm) - n + 1))}
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) % _HASH_PRIME for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        shingles = self._shingles(text)
+        if not shingles.size:
+            return None
+        hashed = (np.outer(self._a, shingles) + self._b[:, None]) % np.uint64(_HASH_PRIME)
+        return hashed.min(axis=1)
+
+    def _band_keys(self, sig: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(b, sig[b * self.rows : (b + 1) * self.rows].tobytes()) for b in range(self.bands)]
+
+    def add_batch(self, items: Iterable[Tuple[str, str]], *, scope: str = "") -> int:
+        """Insert (key, text) pairs; existing keys and empty texts are skipped. Returns inserted count."""
+        prepared = []
+        for key, text in items:
+            key = str(key)
+            if key in self._signatures:
+                continue
+            sig = self.signature(text)
+            if sig is not None:
+                prepared.append((key, str(text or ""), sig))
+        inserted = 0
+        with self._lock:
+            for key, text, sig in prepared:
+                if key in self._signatures:
+                    continue
+                self._signatures[key] = sig
+                self._texts[key] = text
+                self._scopes[key] = scope
+                for band_key in self._band_keys(sig):
+                    self._buckets.setdefault(band_key, []).append(key)
+                inserted += 1
+        return inserted
+
+    def add(self, key: str, text: str, *, scope: str = "") -> bool:
+        return self.add_batch([(key, text)], scope=scope) > 0
+
+    def scoped_entries(self, scope: str) -> List[Tuple[str, str]]:
+        """(key, text) pairs added under a non-empty scope, e.g. to ship a task's stems to another process."""
+        if not scope:
+            return []
+        with self._lock:
+            return [(key, self._texts[key]) for key, s in self._scopes.items() if s == scope]
+
+    def remove_scope(self, scope: str) -> int:
+        """Drop every entry added under a non-empty scope, e.g. once its generation task has ended."""
+        if not scope:
+            return 0
+        with self._lock:
+            keys = [key for key, s in self._scopes.items() if s == scope]
+            for key in keys:
+                sig = self._signatures.pop(key)
+                self._texts.pop(key, None)
+                self._scopes.pop(key, None)
+                for band_key in self._band_keys(sig):
+                    bucket = self._buckets.get(band_key)
+                    if bucket is None:
+                        continue
+                    bucket[:] = [k for k in bucket if k != key]
+                    if not bucket:
+                        del self._buckets[band_key]
+        return len(keys)
+
+    def query_batch(
+        self,
+        texts: Sequence[str],
+        *,
+        threshold: float = 0.8,
+        scope: str = "",
+        exclude_keys: Optional[Iterable[str]] = None,
+    ) -> List[Optional[NearDuplicateMatch]]:
+        """Best match per text with estimated Jaccard >= threshold, or None."""
+        excluded = set(exclude_keys or [])
+        sigs = [self.signature(t) for t in texts]
+        results: List[Optional[NearDuplicateMatch]] = []
+        with self._lock:
+            for sig in sigs:
+                if sig is None:
+                    results.append(None)
+                    continue
+                candidates = set()
+                for band_key in self._band_keys(sig):
+                    candidates.update(self._buckets.get(band_key, ()))
+                best: Optional[NearDuplicateMatch] = None
+                for key in candidates:
+                    if key in excluded:
+                        continue
+                    entry_scope = self._scopes.get(key, "")
+                    if entry_scope and entry_scope != scope:
+                        continue
+                    score = float(np.mean(self._signatures[key] == sig))
+                    if score >= threshold and (best is None or score > best.score):
+                        best = NearDuplicateMatch(key=key, score=score, text=self._texts.get(key, ""))
+                results.append(best)
+        return results
+
+    def query(self, text: str, *, threshold: float = 0.8, scope: str = "") -> Optional[NearDuplicateMatch]:
+        return self.query_batch([text], threshold=threshold, scope=scope)[0]
@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+QA_ANALYTICS_SCHEMA_VERSION = 2
+
+# batch_metrics fields averaged per question (weighted by question_count) on the overview.
+WEIGHTED_RUN_METRICS = (
+    "hard_pass_rate",
+    "quality_score_avg",
+    "risk_high_rate",
+    "logic_pass_rate",
+    "duplicate_rate",
+    "knowledge_match_rate",
+    "avg_tokens_per_question",
+    "avg_latency_ms_per_question",
+    "avg_critic_loops",
+)
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _as_optional_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ended_ts(ended_at: str) -> float:
+    try:
+        return datetime.fromisoformat(ended_at.replace("Z", "+00:00")).timestamp()
+    except Exception:
+        return 0.0
+
+
+def run_metric_rows(run: Dict[str, Any], *, legacy: bool = False) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Flatten one QA run into a run row and per-question rows of the analytics tables."""
+    run_id = str(run.get("run_id", "") or "")
+    ended_at = str(run.get("ended_at", "") or "")
+    bm = run.get("batch_metrics") if isinstance(run.get("batch_metrics"), dict) else None
+    metrics = bm or {}
+    run_row: Dict[str, Any] = {
+        "run_id": run_id,
+        "ended_at": ended_at,
+        "ended_ts": _ended_ts(ended_at),
+        "material_version_id": str(run.get("material_version_id", "") or ""),
+        "is_failed_placeholder": 1 if run_id.startswith("run_fail_") else 0,
+        "is_legacy": 1 if legacy else 0,
+        "has_batch_metrics": 1 if bm is not None else 0,
+        "question_count": _as_int(metrics.get("question_count")),
+        "total_llm_calls": _as_int(metrics.get("total_llm_calls")),
+        "error_calls": _as_int(metrics.get("error_calls")),
+        "saved_count": _as_int(metrics.get("saved_count")),
+        "total_cost": _as_float(metrics.get("total_cost")),
+        "currency": str(metrics.get("currency", "CNY")),
+        "batch_metrics_json": json.dumps(metrics, ensure_ascii=False),
+    }
+    for key in WEIGHTED_RUN_METRICS:
+        run_row[key] = _as_float(metrics.get(key))
+
+    question_rows: List[Dict[str, Any]] = []
+    for idx, q in enumerate(run.get("questions") if isinstance(run.get("questions"), list) else []):
+        if not isinstance(q, dict):
+            continue
+        try:
+            slice_id = int(q.get("slice_id", -1))
+        except (TypeError, ValueError):
+            slice_id = -1
+        oj = q.get("offline_judge") if isinstance(q.get("offline_judge"), dict) else {}
+        obs = oj.get("observability") if isinstance(oj.get("observability"), dict) else {}
+        tok = obs.get("tokens") if isinstance(obs.get("tokens"), dict) else {}
+        costs = oj.get("costs") if isinstance(oj.get("costs"), dict) else {}
+        baseline_score = oj.get("baseline_score")
+        if baseline_score is None:
+            baseline_score = oj.get("penalty_score")
+        question_rows.append(
+            {
+                "run_id": run_id,
+                "q_idx": idx,
+                "slice_id": slice_id,
+                "slice_path": str(q.get("slice_path", "") or "").strip(),
+                "saved": 1 if bool(q.get("saved", False)) else 0,
+                "has_judge": 1 if oj else 0,
+                "judge_decision": str(oj.get("decision", "") or "").strip().lower(),
+                "judge_overall_score": _as_optional_float(oj.get("overall_score")),
+                "judge_baseline_score": _as_optional_float(baseline_score),
+                "judge_quality_score": _as_optional_float(oj.get("quality_score")),
+                "judge_llm_calls": _as_int(obs.get("llm_calls")),
+                "judge_failed_calls": _as_int(obs.get("failed_calls")),
+                "judge_tokens": _as_int(tok.get("total_tokens")),
+                "judge_latency_ms": _as_int(obs.get("latency_ms")),
+                "judge_cost_usd": _as_float(costs.get("per_question_usd")),
+            }
+        )
+    return run_row, question_rows
+
+
+class QAAnalyticsStore:
+    """
+    SQLite tables of per-run and per-question QA metrics, derived from qa_runs.jsonl.
+
+    Rows are written when a run is persisted or updated; dashboards aggregate with SQL over
+    the time window / material version instead of re-reading and looping over the JSONL.
+    `source_token` records which version of the run files the tables reflect.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        metric_columns = ",\n".join(f"  {key} real not null default 0" for key in WEIGHTED_RUN_METRICS)
+        with self.connect() as conn:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute(
+                f"""
+                create table if not exists qa_run_metrics (
+                  run_id text primary key,
+                  ended_at text not null,
+                  ended_ts real not null,
+                  material_version_id text not null,
+                  is_failed_placeholder integer not null,
+                  is_legacy integer not null default 0,
+                  has_batch_metrics integer not null,
+                  question_count integer not null,
+                  total_llm_calls integer not null,
+                  error_calls integer not null,
+                  saved_count integer not null,
+                  total_cost real not null,
+                  currency text not null,
+                  batch_metrics_json text not null,
+                {metric_columns}
+                )
+                """
+            )
+            columns = {r["name"] for r in conn.execute("pragma table_info(qa_run_metrics)").fetchall()}
+            if "is_legacy" not in columns:
+                # Tables from schema v1; the version bump in source_token makes the next read rebuild them.
+                conn.execute("alter table qa_run_metrics add column is_legacy integer not null default 0")
+            conn.execute(
+                "create index if not exists idx_qa_run_metrics_window on qa_run_metrics (material_version_id, ended_ts)"
+            )
+            conn.execute("create index if not exists idx_qa_run_metrics_ended on qa_run_metrics (ended_ts)")
+            conn.execute(
+                """
+                create table if not exists qa_question_metrics (
+                  run_id text not null,
+                  q_idx integer not null,
+                  slice_id integer not null,
+                  slice_path text not null,
+                  saved integer not null,
+                  has_judge integer not null,
+                  judge_decision text not null,
+                  judge_overall_score real,
+                  judge_baseline_score real,
+                  judge_quality_score real,
+                  judge_llm_calls integer not null,
+                  judge_failed_calls integer not null,
+                  judge_tokens integer not null,
+                  judge_latency_ms integer not null,
+                  judge_cost_usd real not null,
+                  primary key (run_id, q_idx)
+                )
+                """
+            )
+            conn.execute("create table if not exists qa_analytics_meta (key text primary key, value text not null)")
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def source_token(self) -> str:
+        with self.connect() as conn:
+            row = conn.execute("select value from qa_analytics_meta where key = 'source_token'").fetchone()
+        return str(row["value"]) if row is not None else ""
+
+    @staticmethod
+    def _set_token(conn: sqlite3.Connection, token: str) -> None:
+        conn.execute(
+            "insert into qa_analytics_meta (key, value) values ('source_token', ?) "
+            "on conflict(key) do update set value = excluded.value",
+            (f"{QA_ANALYTICS_SCHEMA_VERSION}|{token}",),
+        )
+
+    def is_current(self, token: str) -> bool:
+        return self.source_token() == f"{QA_ANALYTICS_SCHEMA_VERSION}|{token}"
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, run: Dict[str, Any], *, force: bool, legacy: bool = False) -> None:
+        run_row, question_rows = run_metric_rows(run, legacy=legacy)
+        if not run_row["run_id"]:
+            return
+        existing = conn.execute(
+            "select ended_at, is_legacy from qa_run_metrics where run_id = ?", (run_row["run_id"],)
+        ).fetchone()
+        if existing is not None:
+            # A run id also present in the primary file stays visible to drift / release lookups.
+            run_row["is_legacy"] = min(int(existing["is_legacy"]), run_row["is_legacy"])
+        # A run id persisted twice keeps its latest-ended record, like the dashboards' de-dup did.
+        if existing is not None and not force and str(existing["ended_at"]) > run_row["ended_at"]:
+            conn.execute(
+                "update qa_run_metrics set is_legacy = ? where run_id = ?", (run_row["is_legacy"], run_row["run_id"])
+            )
+            return
+        conn.execute("delete from qa_question_metrics where run_id = ?", (run_row["run_id"],))
+        columns = list(run_row)
+        conn.execute(
+            f"insert or replace into qa_run_metrics ({', '.join(columns)}) values ({', '.join('?' for _ in columns)})",
+            [run_row[c] for c in columns],
+        )
+        if question_rows:
+            q_columns = list(question_rows[0])
+            conn.executemany(
+                f"insert into qa_question_metrics ({', '.join(q_columns)}) values ({', '.join('?' for _ in q_columns)})",
+                [[r[c] for c in q_columns] for r in question_rows],
+            )
+
+    def rebuild(self, runs: Iterable[Dict[str, Any]], token: str, *, legacy_runs: Iterable[Dict[str, Any]] = ()) -> int:
+        """Replace the tables with `runs` (the primary qa_runs.jsonl) plus `legacy_runs` from the old audit dir."""
+        count = 0
+        with self._lock, self.connect() as conn:
+            conn.execute("delete from qa_question_metrics")
+            conn.execute("delete from qa_run_metrics")
+            for legacy, rows in ((False, runs), (True, legacy_runs)):
+                for run in rows:
+                    if isinstance(run, dict):
+                        self._upsert(conn, run, force=False, legacy=legacy)
+                        count += 1
+            self._set_token(conn, token)
+        return count
+
+    def record_run(self, run: Dict[str, Any], *, before_token: str, after_token: str, replace: bool = False) -> bool:
+        """Apply one written run if the tables were current before the write; False means a rebuild is due."""
+        with self._lock, self.connect() as conn:
+            row = conn.execute("select value from qa_analytics_meta where key = 'source_token'").fetchone()
+            if row is None or str(row["value"]) != f"{QA_ANALYTICS_SCHEMA_VERSION}|{before_token}":
+                return False
+            self._upsert(conn, run, force=replace)
+            self._set_token(conn, after_token)
+            return True
+
+    @staticmethod
+    def _window_clause(
+        *,
+        material_version_id: str,
+        since_ts: Optional[float],
+        success_only: bool,
+        run_ids: Sequence[str] = (),
+        limit: int = 0,
+    ) -> Tuple[str, List[Any]]:
+        """WHERE clause over `qa_run_metrics r`; `limit` keeps the latest N runs of the window before the run_ids filter."""
+        clauses = ["1 = 1"]
+        params: List[Any] = []
+        if success_only:
+            clauses.append("r.is_failed_placeholder = 0")
+        if material_version_id:
+            clauses.append("r.material_version_id = ?")
+            params.append(material_version_id)
+        if since_ts is not None:
+            clauses.append("r.ended_ts >= ?")
+            params.append(since_ts)
+        if limit > 0:
+            latest = (
+                f"select r.run_id from qa_run_metrics r where {' and '.join(clauses)} "
+                f"order by r.ended_at desc limit ?"
+            )
+            clauses = [f"r.run_id in ({latest})"]
+            params.append(int(limit))
+        if run_ids:
+            clauses.append(f"r.run_id in ({', '.join('?' for _ in run_ids)})")
+            params.extend(run_ids)
+        return " and ".join(clauses), params
+
+    def window_runs(self, **window: Any) -> List[Dict[str, Any]]:
+        """Runs in the window, latest first, with their stored batch_metrics."""
+        where, params = self._window_clause(**window)
+        with self.connect() as conn:
+            rows = conn.execute(
+                f"select run_id, ended_at, batch_metrics_json, has_batch_metrics from qa_run_metrics r "
+                f"where {where} order by r.ended_at desc",
+                params,
+            ).fetchall()
+        return [
+            {
+                "run_id": r["run_id"],
+                "ended_at": r["ended_at"],
+                "batch_metrics": json.loads(r["batch_metrics_json"]) if r["has_batch_metrics"] else None,
+            }
+            for r in rows
+        ]
+
+    def overview_aggregates(self, **window: Any) -> Dict[str, Any]:
+        where, params = self._window_clause(**window)
+        weighted = ", ".join(f"sum({k} * question_count) as w_{k}" for k in WEIGHTED_RUN_METRICS)
+        with self.connect() as conn:
+            runs = conn.execute(
+                f"""
+                select count(*) as run_count, sum(question_count) as total_questions,
+                       sum(total_llm_calls) as total_llm_calls, sum(error_calls) as error_calls,
+                       sum(total_cost) as total_cost, sum(saved_count) as saved_count, {weighted}
+                from qa_run_metrics r where {where} and r.has_batch_metrics = 1
+                """,
+                params,
+            ).fetchone()
+            currency = conn.execute(
+                f"select currency from qa_run_metrics r where {where} and r.has_batch_metrics = 1 "
+                f"order by r.ended_at desc limit 1",
+                params,
+            ).fetchone()
+            judge = conn.execute(
+                f"""
+                select count(*) as question_count,
+                       sum(q.judge_decision = 'pass') as pass_count,
+                       sum(q.judge_decision = 'review') as review_count,
+                       sum(q.judge_decision = 'reject') as reject_count,
+                       avg(q.judge_overall_score) as overall_avg,
+                       avg(q.judge_baseline_score) as baseline_avg,
+                       avg(q.judge_quality_score) as quality_avg,
+                       sum(q.judge_llm_calls) as llm_calls, sum(q.judge_failed_calls) as failed_calls,
+                       sum(q.judge_tokens) as tokens, sum(q.judge_latency_ms) as latency_ms,
+                       sum(q.judge_cost_usd) as cost_usd
+                from qa_question_metrics q join qa_run_metrics r on r.run_id = q.run_id
+                where {where} and q.has_judge = 1
+                """,
+                params,
+            ).fetchone()
+            slices = conn.execute(
+                f"""
+                select q.slice_id, q.slice_path, count(*) as attempt_count, sum(q.saved) as success_count
+                from qa_question_metrics q join qa_run_metrics r on r.run_id = q.run_id
+                where {where} and q.slice_id >= 0
+                group by q.slice_id, q.slice_path
+                """,
+                params,
+            ).fetchall()
+        out = {k: (runs[k] or 0) for k in runs.keys()}
+        out["currency"] = str(currency["currency"]) if currency is not None else "CNY"
+        out["judge"] = {k: judge[k] for k in judge.keys()}
+        out["slices"] = [
+            {
+                "slice_id": int(r["slice_id"]),
+                "slice_path": r["slice_path"],
+                "attempt_count": int(r["attempt_count"] or 0),
+                "success_count": int(r["success_count"] or 0),
+            }
+            for r in slices
+        ]
+        return out
+
+    def batch_metrics_by_run_id(self, run_ids: Sequence[str], *, include_legacy: bool = False) -> Dict[str, Dict[str, Any]]:
+        ids = [str(x) for x in run_ids if str(x)]
+        if not ids:
+            return {}
+        legacy_clause = "" if include_legacy else " and is_legacy = 0"
+        with self.connect() as conn:
+            rows = conn.execute(
+                f"select run_id, batch_metrics_json from qa_run_metrics "
+                f"where run_id in ({', '.join('?' for _ in ids)}){legacy_clause}",
+                ids,
+            ).fetchall()
+        return {r["run_id"]: json.loads(r["batch_metrics_json"]) for r in rows}
+
+
+_STORES: Dict[str, QAAnalyticsStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_qa_analytics_store(path: Path) -> QAAnalyticsStore:
+    key = str(Path(path))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = QAAnalyticsStore(Path(path))
+            _STORES[key] = store
+        return store
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+import uuid
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from runtime_paths import cache_root, ensure_dir
+
+# Bump when the on-disk layout or the meaning of any stored field changes.
+SNAPSHOT_FORMAT_VERSION = 1
+
+_MANIFEST_NAME = "manifest.json"
+_SNAPSHOT_KEEP = max(1, int(os.getenv("RETRIEVER_SNAPSHOT_KEEP", "24") or 24))
+
+
+def snapshots_enabled() -> bool:
+    return str(os.getenv("RETRIEVER_SNAPSHOT_ENABLED", "1") or "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def snapshot_root() -> Path:
+    raw = os.getenv("RETRIEVER_SNAPSHOT_DIR")
+    return Path(raw).expanduser().resolve() if raw else cache_root() / "retriever_snapshots"
+
+
+def file_version_token(path_like: Any) -> str:
+    """Same `path|mtime_ns|size` token the retriever caches use for their keys."""
+    path_str = str(path_like or "").strip()
+    if not path_str:
+        return ""
+    try:
+        stat = Path(path_str).stat()
+        return f"{path_str}|{int(stat.st_mtime_ns)}|{int(stat.st_size)}"
+    except Exception:
+        return path_str
+
+
+def snapshot_dir_for_key(key: Sequence[str]) -> Path:
+    digest = sha256(json.dumps([str(x) for x in key], ensure_ascii=False).encode("utf-8")).hexdigest()
+    return snapshot_root() / digest[:32]
+
+
+def _save_csr(target_dir: Path, name: str, matrix: Any) -> Dict[str, Any]:
+    csr = sparse.csr_matrix(matrix)
+    csr.sort_indices()
+    np.save(target_dir / f"{name}.data.npy", csr.data)
+    np.save(target_dir / f"{name}.indices.npy", csr.indices)
+    np.save(target_dir / f"{name}.indptr.npy", csr.indptr)
+    return {"shape": [int(csr.shape[0]), int(csr.shape[1])]}
+
+
+def _load_csr(source_dir: Path, name: str, meta: Dict[str, Any]) -> sparse.csr_matrix:
+    data = np.load(source_dir / f"{name}.data.npy", mmap_mode="r")
+    indices = np.load(source_dir / f"{name}.indices.npy", mmap_mode="r")
+    indptr = np.load(source_dir / f"{name}.indptr.npy", mmap_mode="r")
+    shape = tuple(int(x) for x in meta.get("shape") or (len(indptr) - 1, 0))
+    return sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+
+def _save_vectorizer(target_dir: Path, name: str, vectorizer: TfidfVectorizer) -> None:
+    (target_dir / f"{name}.vocab.json").write_text(
+        json.dumps({str(k): int(v) for k, v in vectorizer.vocabulary_.items()}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    np.save(target_dir / f"{name}.idf.npy", np.asarray(vectorizer.idf_))
+
+
+def _load_vectorizer(source_dir: Path, name: str) -> TfidfVectorizer:
+    vocabulary = json.loads((source_dir / f"{name}.vocab.json").read_text(encoding="utf-8"))
+    vectorizer = TfidfVectorizer()
+    vectorizer.vocabulary_ = {str(k): int(v) for k, v in vocabulary.items()}
+    vectorizer.idf_ = np.load(source_dir / f"{name}.idf.npy")
+    return vectorizer
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+def _read_json(path: Path) -> Any:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _prune_snapshots(keep_dir: Path) -> None:
+    root = snapshot_root()
+    try:
+        dirs = [p for p in root.iterdir() if p.is_dir() and (p / _MANIFEST_NAME).exists()]
+    except Exception:
+        return
+    if len(dirs) <= _SNAPSHOT_KEEP:
+        return
+    dirs.sort(key=lambda p: (p / _MANIFEST_NAME).stat().st_mtime, reverse=True)
+    for stale in dirs[_SNAPSHOT_KEEP:]:
+        if stale == keep_dir:
+            continue
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def save_retriever_snapshot(retriever: Any, key: Sequence[str]) -> Optional[Path]:
+    """
+    Persist the fitted retriever state for `key`.
+    Written into a temp dir first and renamed, so readers never see a partial snapshot.
+    """
+    target = snapshot_dir_for_key(key)
+    if (target / _MANIFEST_NAME).exists():
+        return target
+    tmp_dir = ensure_dir(target.parent / f".{target.name}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+    try:
+        matrices: Dict[str, Any] = {}
+        _write_json(tmp_dir / "kb_data.json", retriever.kb_data)
+        _write_json(tmp_dir / "mapping.json", retriever.mapping)
+        _write_json(tmp_dir / "mapping_review.json", retriever.mapping_review)
+        _write_json(tmp_dir / "kb_to_questions.json", retriever.kb_to_questions)
+        retriever.history_df.to_pickle(tmp_dir / "history_df.pkl")
+        _save_vectorizer(tmp_dir, "kb", retriever.kb_vectorizer)
+        matrices["kb"] = _save_csr(tmp_dir, "kb", retriever.kb_tfidf_matrix)
+        has_history_index = retriever.vectorizer is not None and retriever.tfidf_matrix is not None
+        if has_history_index:
+            _save_vectorizer(tmp_dir, "history", retriever.vectorizer)
+            matrices["history"] = _save_csr(tmp_dir, "history", retriever.tfidf_matrix)
+        selected_mapping_path = str(getattr(retriever, "selected_mapping_path", "") or "")
+        _write_json(
+            tmp_dir / _MANIFEST_NAME,
+            {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "key": [str(x) for x in key],
+                "created_at": time.time(),
+                "pandas_version": pd.__version__,
+                "has_history_index": has_history_index,
+                "selected_mapping_path": selected_mapping_path,
+                "selected_mapping_token": file_version_token(selected_mapping_path),
+                "matrices": matrices,
+            },
+        )
+        try:
+            os.replace(tmp_dir, target)
+        except OSError:
+            # Another worker finished the same snapshot first.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    _prune_snapshots(target)
+    return target
+
+
+def load_retriever_snapshot(key: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """
+    Load the snapshot stored for `key`, or None when it is missing or stale.
+    Sparse matrices are memory-mapped from disk instead of being read into RAM.
+    """
+    source = snapshot_dir_for_key(key)
+    manifest_path = source / _MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        manifest = _read_json(manifest_path)
+    except Exception:
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    if int(manifest.get("format_version") or 0) != SNAPSHOT_FORMAT_VERSION:
+        return None
+    if list(manifest.get("key") or []) != [str(x) for x in key]:
+        return None
+    if str(manifest.get("pandas_version") or "") != pd.__version__:
+        return None
+    selected_mapping_path = str(manifest.get("selected_mapping_path") or "")
+    if file_version_token(selected_mapping_path) != str(manifest.get("selected_mapping_token") or ""):
+        return None
+    matrices = manifest.get("matrices") if isinstance(manifest.get("matrices"), dict) else {}
+    payload: Dict[str, Any] = {
+        "kb_data": _read_json(source / "kb_data.json"),
+        "mapping": _read_json(source / "mapping.json"),
+        "mapping_review": _read_json(source / "mapping_review.json"),
+        "kb_to_questions": _read_json(source / "kb_to_questions.json"),
+        "history_df": pd.read_pickle(source / "history_df.pkl"),
+        "kb_vectorizer": _load_vectorizer(source, "kb"),
+        "kb_tfidf_matrix": _load_csr(source, "kb", matrices.get("kb") or {}),
+        "vectorizer": None,
+        "tfidf_matrix": None,
+        "selected_mapping_path": selected_mapping_path,
+    }
+    if manifest.get("has_history_index"):
+        payload["vectorizer"] = _load_vectorizer(source, "history")
+        payload["tfidf_matrix"] = _load_csr(source, "history", matrices.get("history") or {})
+    return payload
+
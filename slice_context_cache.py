@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from hashlib import sha1
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+SLICE_CONTEXT_CACHE_MAX_ENTRIES = max(64, int(os.getenv("SLICE_CONTEXT_CACHE_MAX_ENTRIES", "4096") or 4096))
+SLICE_CONTEXT_CACHE_ENABLED = str(os.getenv("SLICE_CONTEXT_CACHE_ENABLED", "1") or "1").strip().lower() not in {"0", "false", "no"}
+
+
+def slice_content_hash(kb_chunk: Dict[str, Any]) -> str:
+    """Hash of the slice fields the derivations read; edits to a slice change its key."""
+    chunk = kb_chunk if isinstance(kb_chunk, dict) else {}
+    data = {
+        "完整路径": chunk.get("完整路径", ""),
+        "掌握程度": chunk.get("掌握程度", ""),
+        "核心内容": chunk.get("核心内容", ""),
+        "结构化内容": chunk.get("结构化内容", {}),
+        "metadata": chunk.get("metadata", {}),
+    }
+    return sha1(json.dumps(data, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SliceContextCache:
+    """
+    LRU memo of artifacts derived from a knowledge slice (prompt context, term locks, risk profiles...).
+
+    Entries are keyed by (kind, slice key, extra) where the slice key is the path plus content hash,
+    so one cache can serve a whole material version and stays correct if a slice is edited.
+    Callers must treat returned values as read-only.
+    """
+
+    def __init__(self, name: str, max_entries: int = SLICE_CONTEXT_CACHE_MAX_ENTRIES) -> None:
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Any]" = OrderedDict()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._inflight: Dict[Tuple[Hashable, ...], threading.Event] = {}
+
+    def get_or_compute(self, kind: str, slice_key: Hashable, compute: Callable[[], Any], extra: Tuple[Hashable, ...] = ()) -> Any:
+        if not SLICE_CONTEXT_CACHE_ENABLED:
+            return compute()
+        key = (kind, slice_key) + tuple(extra)
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self._hits[kind] = self._hits.get(kind, 0) + 1
+                    return self._entries[key]
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    waiter = threading.Event()
+                    self._inflight[key] = waiter
+                    self._misses[kind] = self._misses.get(kind, 0) + 1
+                    break
+            # Another shard is computing the same slice; reuse its result (or retry if it failed).
+            waiter.wait()
+        try:
+            value = compute()
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            waiter.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = sorted(set(self._hits) | set(self._misses))
+            by_kind = {}
+            for kind in kinds:
+                hits = self._hits.get(kind, 0)
+                misses = self._misses.get(kind, 0)
+                by_kind[kind] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0}
+            return {"name": self.name, "entries": len(self._entries), "kinds": by_kind}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+
+# Derivations that only read the slice (no retriever) share one process-wide cache.
+SHARED_SLICE_CONTEXT_CACHE = SliceContextCache("shared")
+_RETRIEVER_CACHES: "weakref.WeakKeyDictionary[Any, SliceContextCache]" = weakref.WeakKeyDictionary()
+_RETRIEVER_CACHES_LOCK = threading.Lock()
+
+
+def slice_context_cache_for(retriever: Optional[Any]) -> SliceContextCache:
+    """Per-retriever (i.e. per material version) cache; dropped together with the retriever."""
+    if retriever is None:
+        return SHARED_SLICE_CONTEXT_CACHE
+    with _RETRIEVER_CACHES_LOCK:
+        try:
+            cache = _RETRIEVER_CACHES.get(retriever)
+        except TypeError:
+            # Not weak-referenceable: serve an unshared cache rather than mixing retrievers.
+            return SliceContextCache("unshared", max_entries=1)
+        if cache is None:
+            cache = SliceContextCache(str(getattr(retriever, "kb_path", "") or "retriever"))
+            _RETRIEVER_CACHES[retriever] = cache
+        return cache
+
+
+def slice_context_cache_stats() -> List[Dict[str, Any]]:
+    with _RETRIEVER_CACHES_LOCK:
+        caches = list(_RETRIEVER_CACHES.values())
+    return [SHARED_SLICE_CONTEXT_CACHE.stats()] + [c.stats() for c in caches]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Dict, List, Optional
+
+
+class TaskSubscription:
+    """
+    One viewer of one task. Events are pre-serialised strings shared by all viewers.
+
+    The queue is bounded: a viewer that falls behind is marked lagged instead of
+    blocking the publisher, and is expected to resync from a fresh snapshot.
+    """
+
+    def __init__(self, task_id: str, max_pending: int) -> None:
+        self.task_id = task_id
+        self.lagged = False
+        self.closed = False
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max(1, max_pending))
+
+    def offer(self, event: str) -> None:
+        if self.lagged:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.lagged = True
+
+    def get(self, timeout: float) -> Optional[str]:
+        try:
+            return self._queue.get(timeout=max(0.0, timeout))
+        except queue.Empty:
+            return None
+
+    def drain(self) -> None:
+        """Drop pending events and clear the lagged flag (after the caller resynced)."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self.lagged = False
+
+
+class TaskProgressBroker:
+    """In-process fan-out of task progress events keyed by task id."""
+
+    def __init__(self, max_pending: int = 256) -> None:
+        self.max_pending = max(1, int(max_pending))
+        self._lock = threading.Lock()
+        self._subs: Dict[str, List[TaskSubscription]] = {}
+
+    def subscribe(self, task_id: str) -> TaskSubscription:
+        sub = TaskSubscription(str(task_id or ""), self.max_pending)
+        with self._lock:
+            self._subs.setdefault(sub.task_id, []).append(sub)
+        return sub
+
+    def unsubscribe(self, sub: TaskSubscription) -> None:
+        sub.closed = True
+        with self._lock:
+            subs = self._subs.get(sub.task_id)
+            if not subs:
+                return
+            self._subs[sub.task_id] = [x for x in subs if x is not sub]
+            if not self._subs[sub.task_id]:
+                self._subs.pop(sub.task_id, None)
+
+    def has_subscribers(self, task_id: str) -> bool:
+        # Lock-free read: publishers use it to skip serialising when nobody watches.
+        return bool(self._subs.get(str(task_id or "")))
+
+    def publish(self, task_id: str, event: str) -> int:
+        with self._lock:
+            subs = list(self._subs.get(str(task_id or "")) or ())
+        for sub in subs:
+            sub.offer(event)
+        return len(subs)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(x) for x in self._subs.values())
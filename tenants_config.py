@@ -7,9 +7,10 @@ from pathlib import Path
 from datetime import datetime, timezone
 from typing import Dict, List
 
-from runtime_paths import REPO_DATA_DIR, ensure_parent, repo_tenant_data_dir, runtime_data_root, runtime_root
+from runtime_paths import REPO_DATA_DIR, REPO_ROOT, ensure_parent, repo_tenant_data_dir, runtime_data_root, runtime_root
 
 BASE_DATA_DIR = runtime_data_root()
+SHARED_GLOSSARY_FILE = REPO_ROOT / "房地产行业专有名词新.xlsx"
 TENANTS_FILE = runtime_root() / "config" / "tenants.json"
 LEGACY_TENANTS_FILE = REPO_DATA_DIR / "tenants.json"
 DEFAULT_TENANTS: Dict[str, str] = {
@@ -145,6 +146,17 @@ def resolve_tenant_history_path(tenant_id: str, fallback: str = "存量房买卖
     return Path(fallback)
 
 
+def resolve_tenant_glossary_path(tenant_id: str | None) -> Path:
+    """Tenant-specific materials/glossary.xlsx when uploaded, otherwise the shared platform glossary."""
+    tid = str(tenant_id or "").strip()
+    if tid:
+        for root in _tenant_roots(tid):
+            candidate = root / "materials" / "glossary.xlsx"
+            if candidate.exists():
+                return candidate
+    return SHARED_GLOSSARY_FILE
+
+
 def resolve_tenant_from_env(default: str = "hz") -> str:
     value = os.getenv("TENANT_ID", default).strip()
     return value or default
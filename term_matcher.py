@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set
+
+
+def normalize_term_text(text: str) -> str:
+    if not isinstance(text, str):
+        return ""
+    cleaned = re.sub(r"\s+", "", text)
+    cleaned = re.sub(r"[“”\"'`·•,，。！？；;：:（）()【】\\[\\]<>《》/\\\\-]", "", cleaned)
+    return cleaned.strip()
+
+
+def _is_subsequence(shorter: str, longer: str) -> bool:
+    it = iter(longer)
+    return all(ch in it for ch in shorter)
+
+
+def looks_like_substitution(lock: str, cand: str) -> bool:
+    """Whether `cand` reads like an abbreviation / variant of `lock` (e.g. 商业贷款 -> 商贷)."""
+    if cand == lock:
+        return False
+    # Abbreviation-like pattern: same first/last char and candidate is shorter.
+    if len(cand) >= 2 and len(cand) < len(lock):
+        if lock[0] == cand[0] and lock[-1] == cand[-1]:
+            return True
+        # Abbreviation-like subsequence (e.g., 商业贷款 -> 商贷)
+        if lock[0] == cand[0] and _is_subsequence(cand, lock):
+            return True
+    # Prefix/suffix containment relation (e.g., 全称/简称 variants).
+    if lock.startswith(cand) or cand.startswith(lock) or lock.endswith(cand) or cand.endswith(lock):
+        return True
+    return False
+
+
+class TermMatcher:
+    """
+    Aho–Corasick automaton over glossary terms.
+
+    `find_terms` returns every glossary term occurring in a text (overlaps included) in one
+    linear scan; `substitutes_of` returns the glossary terms that look like variants of a lock,
+    computed once per lock from first/last-character buckets instead of a scan over all terms.
+    """
+
+    def __init__(self, terms: Sequence[str], term_to_categories: Optional[Mapping[str, Sequence[str]]] = None) -> None:
+        self.terms: List[str] = [t for t in dict.fromkeys(terms) if t]
+        self._rank = {t: i for i, t in enumerate(self.terms)}
+        self.term_to_categories: Dict[str, List[str]] = {
+            t: list(cats) for t, cats in (term_to_categories or {}).items()
+        }
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for term in self.terms:
+            node = 0
+            for ch in term:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(term)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        self._by_first: Dict[str, List[str]] = {}
+        self._by_last: Dict[str, List[str]] = {}
+        for term in self.terms:
+            self._by_first.setdefault(term[0], []).append(term)
+            self._by_last.setdefault(term[-1], []).append(term)
+        self._substitutes: Dict[str, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, object]:
+        state = dict(self.__dict__)
+        state.pop("_lock", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def find_terms(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text or "":
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def find_terms_ordered(self, text: str) -> List[str]:
+        """Matched terms in glossary order (longest-first for the production glossary)."""
+        return sorted(self.find_terms(text), key=self._rank.__getitem__)
+
+    def substitutes_of(self, lock: str) -> FrozenSet[str]:
+        cached = self._substitutes.get(lock)
+        if cached is not None:
+            return cached
+        if not lock:
+            return frozenset()
+        # Every substitution rule implies a shared first or last character with the lock.
+        candidates: Iterable[str] = set(self._by_first.get(lock[0], ())) | set(self._by_last.get(lock[-1], ()))
+        frozen = frozenset(c for c in candidates if looks_like_substitution(lock, c))
+        with self._lock:
+            self._substitutes[lock] = frozen
+        return frozen
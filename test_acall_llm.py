@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import exam_graph
+
+
+class _FakeStream:
+    def __init__(self, pieces, fail_after=None):
+        self._pieces = list(pieces)
+        self._fail_after = fail_after
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for i, piece in enumerate(self._pieces):
+            if self._fail_after is not None and i == self._fail_after:
+                raise ConnectionError("connection reset")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+        yield SimpleNamespace(choices=[], usage={"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6})
+
+
+def _install(monkeypatch, behaviours, calls):
+    def _fake_client(_key, base_url):
+        async def _create(**kwargs):
+            calls.append(base_url)
+            behaviour = behaviours.pop(0)
+            if isinstance(behaviour, Exception):
+                raise behaviour
+            return behaviour
+
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+    monkeypatch.setattr(exam_graph, "get_async_openai_client", _fake_client)
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(exam_graph.asyncio, "sleep", lambda _s: real_sleep(0))
+
+
+KWARGS = dict(node_name="ut", prompt="p", model_name="gpt-5.2", api_key="k", base_url="https://gw.example.com/v1", provider="ait")
+
+
+def test_acall_llm_streams_tokens_and_records_usage(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    calls, tokens = [], []
+    _install(monkeypatch, [_FakeStream(["你", "好"])], calls)
+
+    async def _on_token(piece):
+        tokens.append(piece)
+
+    content, _, record = asyncio.run(exam_graph.acall_llm(**KWARGS, on_token=_on_token))
+    assert content == "你好" and tokens == ["你", "好"]
+    assert record["success"] is True and record["total_tokens"] == 6
+
+
+def test_acall_llm_retries_only_before_first_token(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    calls = []
+    _install(monkeypatch, [ValueError("429 too many requests"), _FakeStream(["ok"])], calls)
+    content, _, record = asyncio.run(exam_graph.acall_llm(**KWARGS))
+    assert content == "ok" and record["retries"] == 1 and len(calls) == 2
+
+    calls.clear()
+    _install(monkeypatch, [_FakeStream(["a", "b"], fail_after=1), _FakeStream(["x"])], calls)
+    content, _, record = asyncio.run(exam_graph.acall_llm(**KWARGS, on_token=lambda _p: None))
+    assert content == "" and record["success"] is False and len(calls) == 1
+
+
+def test_acall_llm_respects_wall_clock_budget(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    calls = []
+    _install(monkeypatch, [_FakeStream(["ok"])], calls)
+
+    async def _run():
+        exam_graph._QUESTION_WALL_CLOCK.set((0.0, 1000))
+        return await exam_graph.acall_llm(**KWARGS)
+
+    content, _, record = asyncio.run(_run())
+    assert content == "" and "超出单题耗时上限" in record["error"] and calls == []
+
+
+def _llm_graph(seen):
+    from typing import TypedDict
+
+    from langgraph.graph import END, StateGraph
+
+    class _State(TypedDict, total=False):
+        content: str
+        error: str
+
+    def llm_node(state, config):
+        seen.append(exam_graph._ASYNC_LLM_LOOP.get() is not None)
+        content, _, record = exam_graph.call_llm(**KWARGS)
+        return {"content": content, "error": str(record.get("error") or "")}
+
+    graph = StateGraph(_State)
+    graph.add_node("llm", exam_graph._async_graph_node(llm_node))
+    graph.set_entry_point("llm")
+    graph.add_edge("llm", END)
+    return graph.compile()
+
+
+def test_async_graph_nodes_route_call_llm_through_acall_llm(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    calls, seen = [], []
+    _install(monkeypatch, [_FakeStream(["你", "好"])], calls)
+    app = _llm_graph(seen)
+
+    async def _run():
+        out = []
+        async for mode, chunk in app.astream({}, stream_mode=["custom", "values"]):
+            out.append((mode, chunk))
+        return out
+
+    chunks = asyncio.run(_run())
+    assert seen == [True] and len(calls) == 1
+    assert [c for m, c in chunks if m == "custom"] == [{"node": "ut", "token": "你"}, {"node": "ut", "token": "好"}]
+    assert [c for m, c in chunks if m == "values"][-1]["content"] == "你好"
+
+    # The caller's per-question wall-clock budget reaches the request made on the event loop.
+    async def _exhausted():
+        exam_graph._QUESTION_WALL_CLOCK.set((0.0, 1000))
+        return await app.ainvoke({})
+
+    assert "超出单题耗时上限" in asyncio.run(_exhausted())["error"] and len(calls) == 1
+
+
+def test_sync_graph_drive_keeps_the_blocking_transport(monkeypatch):
+    seen = []
+    monkeypatch.setattr(exam_graph, "call_llm", lambda **kw: ("sync", "m", {}))
+    assert _llm_graph(seen).invoke({})["content"] == "sync" and seen == [False]
@@ -0,0 +1,81 @@
+import admin_api
+
+
+def _run(run_id, stem, *, decision=""):
+    question = {"question_text": stem, "slice_path": "第一篇 > 第一章", "answer": "A"}
+    if decision:
+        question["offline_judge"] = {"decision": decision, "overall_score": 8.5}
+    return {"run_id": run_id, "material_version_id": "v1", "config": {"task_id": f"task_{run_id}"}, "questions": [question]}
+
+
+def test_origin_index_follows_persisted_and_updated_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(admin_api, "_qa_dir", lambda _tenant_id: tmp_path)
+    monkeypatch.setattr(admin_api, "_latest_gen_task_rows", lambda *_a, **_k: {"t": {"task_id": "task_r1", "task_name": "任务一"}})
+    monkeypatch.setattr(admin_api, "_load_qa_thresholds", lambda _tenant_id: {})
+    monkeypatch.setattr(admin_api, "_build_alerts_for_run", lambda _run, _thresholds: [])
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEXES", {})
+
+    admin_api._persist_qa_run("hz", _run("r1", "题干一"))
+    first = admin_api._build_bank_origin_lookup("hz")
+    assert first["v1|第一篇>第一章|A|题干一"]["source_task_name"] == "任务一"
+
+    rebuilds = []
+    monkeypatch.setattr(admin_api, "rebuild_bank_origin_index", lambda tenant_id: rebuilds.append(tenant_id))
+    snapshot = (tmp_path / "bank_origin_index.json").read_text(encoding="utf-8")
+    admin_api._persist_qa_run("hz", _run("r2", "题干二"))
+    assert admin_api._update_qa_run("hz", "r1", _run("r1", "题干一", decision="pass"))
+    lookup = admin_api._build_bank_origin_lookup("hz")
+    assert rebuilds == []
+    # Persists append deltas to the log instead of rewriting the snapshot.
+    assert (tmp_path / "bank_origin_index.json").read_text(encoding="utf-8") == snapshot
+    assert len(admin_api._read_jsonl(tmp_path / "bank_origin_index.log.jsonl")) == 2
+    assert lookup["v1|第一篇>第一章|A|题干二"]["source_run_id"] == "r2"
+    assert lookup["v1|第一篇>第一章|A|题干一"]["offline_judge_decision"] == "pass"
+
+    item = {"题干": "题干一", "来源路径": "第一篇 > 第一章", "正确答案": "A", "教材版本ID": "v1"}
+    admin_api._fill_bank_item_origin_fields(item, lookup)
+    assert item["offline_judge_score"] == 8.5
+
+    monkeypatch.undo()
+    monkeypatch.setattr(admin_api, "_qa_dir", lambda _tenant_id: tmp_path)
+    monkeypatch.setattr(admin_api, "_latest_gen_task_rows", lambda *_a, **_k: {"t": {"task_id": "task_r1", "task_name": "任务一"}})
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEXES", {})
+    rebuilt = admin_api.rebuild_bank_origin_index("hz")
+    assert rebuilt["lookup"] == lookup
+
+    # A cold process serves the persisted snapshot without rescanning runs.
+    runs_path = tmp_path / "qa_runs.jsonl"
+    read_jsonl = admin_api._read_jsonl
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEXES", {})
+    monkeypatch.setattr(admin_api, "_read_jsonl", lambda path: (_ for _ in ()).throw(AssertionError("rescanned")) if path == runs_path else read_jsonl(path))
+    assert admin_api._build_bank_origin_lookup("hz") == lookup
+
+
+def test_origin_index_replays_logged_deltas_and_compacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(admin_api, "_qa_dir", lambda _tenant_id: tmp_path)
+    monkeypatch.setattr(admin_api, "_latest_gen_task_rows", lambda *_a, **_k: {})
+    monkeypatch.setattr(admin_api, "_load_qa_thresholds", lambda _tenant_id: {})
+    monkeypatch.setattr(admin_api, "_build_alerts_for_run", lambda _run, _thresholds: [])
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEXES", {})
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEX_COMPACT_EVERY", 3)
+    log_path = tmp_path / "bank_origin_index.log.jsonl"
+
+    admin_api._persist_qa_run("hz", _run("r1", "题干一"))
+    admin_api._build_bank_origin_lookup("hz")
+    admin_api._persist_qa_run("hz", _run("r2", "题干二"))
+    admin_api._persist_qa_run("hz", _run("r3", "题干三"))
+    assert len(admin_api._read_jsonl(log_path)) == 2
+    lookup = admin_api._build_bank_origin_lookup("hz")
+
+    # A cold process rebuilds nothing: snapshot + replayed deltas.
+    runs_path = tmp_path / "qa_runs.jsonl"
+    read_jsonl = admin_api._read_jsonl
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEXES", {})
+    monkeypatch.setattr(admin_api, "_read_jsonl", lambda path: (_ for _ in ()).throw(AssertionError("rescanned")) if path == runs_path else read_jsonl(path))
+    assert admin_api._build_bank_origin_lookup("hz") == lookup
+
+    # The third delta folds the log back into the snapshot.
+    admin_api._persist_qa_run("hz", _run("r4", "题干四"))
+    assert not log_path.exists()
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEXES", {})
+    assert admin_api._build_bank_origin_lookup("hz")["v1|第一篇>第一章|A|题干四"]["source_run_id"] == "r4"
@@ -0,0 +1,118 @@
+import json
+
+import admin_api
+from admin_api import app
+import bank_store
+from bank_store import BankStore
+
+
+def _write_bank(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(json.dumps(x, ensure_ascii=False) for x in rows), encoding="utf-8")
+
+
+def _row(i, **extra):
+    row = {"题干": f"题干{i}", "教材版本ID": "v1" if i % 2 else "v2", "出题任务名称": "任务A" if i < 3 else "任务A#2", "题目类型": "单选题"}
+    row.update(extra)
+    return row
+
+
+def test_store_keeps_ids_stable_and_only_appends_on_writes(tmp_path, monkeypatch):
+    bank_path = tmp_path / "bank.jsonl"
+    bank_path.write_text(
+        "\n".join([json.dumps(_row(0), ensure_ascii=False), "", "{broken", json.dumps(_row(1), ensure_ascii=False)]),
+        encoding="utf-8",
+    )
+    store = BankStore(bank_path)
+    assert store.count() == 2
+
+    def _no_rebuild(*_args, **_kwargs):
+        raise AssertionError("unexpected full rebuild")
+
+    monkeypatch.setattr(store, "_rebuild", _no_rebuild)
+    monkeypatch.setattr(bank_store, "BANK_COMPACT_MIN_DEAD", 1000)
+    for i in range(2, 6):
+        assert store.append(_row(i)) == i
+    size = bank_path.stat().st_size
+    store.replace(1, _row(1, 题干="更长的新题干" * 5))
+    assert store.delete([0, 3]) == (2, 4)
+    assert store.append(_row(9)) == 6
+    # Replace / delete append log records; nothing before them is rewritten.
+    assert bank_path.read_bytes().startswith(bank_path.read_bytes()[:size]) and bank_path.stat().st_size > size
+
+    assert [qid for qid, _ in store.query(newest_first=False)[1]] == [1, 2, 4, 5, 6]
+    assert store.get(0) is None and store.get(4)["题干"] == "题干4"
+    assert [store.get(i) for i in (1, 2, 4, 5, 6)] == admin_api._load_bank(bank_path)
+    monkeypatch.undo()
+
+    # A fresh index over the same log (e.g. another process) sees the same ids.
+    bank_path.with_name(bank_path.name + bank_store.BANK_INDEX_SUFFIX).unlink()
+    other = BankStore(bank_path)
+    assert [qid for qid, _ in other.query(newest_first=False)[1]] == [1, 2, 4, 5, 6]
+
+    # An outside rewrite is picked up through a rebuild.
+    _write_bank(bank_path, [_row(7)])
+    assert store.count() == 1 and store.get(0)["题干"] == "题干7"
+
+
+def test_compaction_and_bulk_rewrites_keep_ids(tmp_path, monkeypatch):
+    bank_path = tmp_path / "bank.jsonl"
+    _write_bank(bank_path, [_row(i) for i in range(6)])
+    store = BankStore(bank_path)
+    monkeypatch.setattr(bank_store, "BANK_COMPACT_MIN_DEAD", 5)
+    store.delete([1, 5])
+    store.replace(2, _row(2, 题干="改"))
+    # 5 superseded records reach the threshold: the log was compacted to live rows plus skip records.
+    lines = bank_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 6 and sum(1 for x in lines if "__bank_op__" in x) == 2
+    assert store.append(_row(8)) == 6
+    assert [qid for qid, _ in store.query(newest_first=False)[1]] == [0, 2, 3, 4, 6]
+
+    rows = admin_api._load_bank(bank_path)
+    rows = [r for r in rows if r["题干"] != "题干3"]
+    rows[0] = dict(rows[0], 题干="题干0改")
+    rows.append(_row(10))
+    admin_api._save_bank(bank_path, rows)
+    assert [(qid, r["题干"]) for qid, r in store.query(newest_first=False)[1]] == [
+        (0, "题干0改"),
+        (2, "改"),
+        (4, "题干4"),
+        (6, "题干8"),
+        (7, "题干10"),
+    ]
+
+
+def test_store_query_filters_and_paginates(tmp_path):
+    bank_path = tmp_path / "bank.jsonl"
+    _write_bank(bank_path, [_row(i) for i in range(6)])
+    store = BankStore(bank_path)
+
+    total, rows = store.query(material_version_id="v1", offset=0, limit=2)
+    assert total == 3 and [qid for qid, _ in rows] == [5, 3]
+    total, rows = store.query(task_name="任务A", keyword="题干4")
+    assert total == 1 and rows[0][0] == 4
+    total, _ = store.query(task_name="任务")
+    assert total == 0
+    assert [qid for qid, _ in store.get_many([4, 1, 99])] == [1, 4]
+
+
+def test_bank_list_api_uses_index(tmp_path, monkeypatch):
+    bank_path = tmp_path / "bank.jsonl"
+    _write_bank(bank_path, [_row(i) for i in range(5)] + [_row(5, 题目类型="判断题")])
+    monkeypatch.setattr(admin_api, "tenant_bank_path", lambda _tenant_id: bank_path)
+
+    client = app.test_client()
+    resp = client.get(
+        "/api/hz/bank?material_version_id=__all__&page=1&page_size=2&question_type=单选题",
+        headers={"X-System-User": "admin"},
+    )
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["total"] == 5
+    assert [x["question_id"] for x in data["items"]] == [4, 3]
+
+    resp = client.post("/api/hz/bank/delete", json={"question_ids": [0]}, headers={"X-System-User": "admin"})
+    assert resp.get_json() == {"deleted": 1, "remaining": 5}
+    assert client.get("/api/hz/bank/0", headers={"X-System-User": "admin"}).status_code == 404
+    resp = client.get("/api/hz/bank/1", headers={"X-System-User": "admin"})
+    assert resp.get_json()["item"]["题干"] == "题干1"
@@ -0,0 +1,75 @@
+import time
+
+import exam_graph
+from test_locked_question_type_contract import _base_config, _base_state
+
+
+def _slow(result, delay=0.3):
+    def _fn(*_args, **_kwargs):
+        time.sleep(delay)
+        return result
+
+    return _fn
+
+
+def _patch_subchecks(monkeypatch, *, precondition_passed):
+    monkeypatch.setattr(
+        exam_graph,
+        "assess_preconditions_current_only",
+        _slow((precondition_passed, [] if precondition_passed else ["缺少面积"], "缺前提", {"node": "critic.precondition_current"})),
+    )
+    monkeypatch.setattr(
+        exam_graph,
+        "assess_minimal_sufficient_conditions_current_only",
+        _slow((True, [], "", {"node": "critic.minimal_conditions_current"})),
+    )
+    monkeypatch.setattr(exam_graph, "detect_focus_overload_issue", _slow(None))
+    monkeypatch.setattr(exam_graph, "call_llm", _slow(("{}", "m", {"node": "critic.llm"})))
+
+
+def test_critic_subchecks_fan_out_and_keep_first_failure_contract(monkeypatch):
+    monkeypatch.setattr(exam_graph, "CRITIC_SUBCHECK_CONCURRENCY", 6)
+    _patch_subchecks(monkeypatch, precondition_passed=False)
+
+    started = time.time()
+    out = exam_graph.critic_node(_base_state(), _base_config())
+    elapsed = time.time() - started
+
+    # precondition, minimal, focus, plan and readability each sleep 0.3s; sequential would take >= 1.5s.
+    assert elapsed < 1.0
+    assert out["critic_required_fixes"] == ["logic:missing_conditions"]
+    assert out["critic_result"]["missing_conditions"] == ["缺少面积"]
+    nodes = [r["node"] for r in out["llm_trace"]]
+    assert nodes[:2] == ["critic.precondition_current", "critic.minimal_conditions_current"]
+    assert any(i.get("tag") == "logic:missing_conditions" for i in out["critic_issue_items"])
+
+
+def test_run_critic_subchecks_captures_errors_per_check():
+    results = exam_graph._run_critic_subchecks(
+        [("ok", lambda: 1), ("boom", lambda: (_ for _ in ()).throw(ValueError("x")))]
+    )
+    assert exam_graph._subcheck_value(results, "ok") == 1
+    try:
+        exam_graph._subcheck_value(results, "boom")
+    except ValueError as e:
+        assert str(e) == "x"
+    else:
+        raise AssertionError("expected the stored error to be re-raised")
+
+
+def test_calculation_closure_failure_skips_llm_subchecks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(exam_graph, "_run_critic_subchecks", lambda checks: calls.append(checks) or {})
+    monkeypatch.setattr(
+        exam_graph,
+        "validate_calculation_closure",
+        lambda *_args, **_kwargs: {"reason": "数值闭环不成立", "required_fixes": ["calc:closure"]},
+    )
+    state = _base_state()
+    state["agent_name"] = "CalculatorAgent"
+
+    out = exam_graph.critic_node(state, _base_config())
+
+    assert calls == []
+    assert out["critic_required_fixes"] == ["calc:closure"]
+    assert out["critic_model_used"] == "rule-based"
@@ -0,0 +1,55 @@
+import numpy as np
+
+import embedding_store
+from embedding_store import EmbeddingStore, encode_with_store
+
+
+def _encoder(calls):
+    def _encode(texts):
+        calls.append(list(texts))
+        return np.asarray([[len(t), 1.0, 0.5] for t in texts], dtype=np.float32)
+
+    return _encode
+
+
+def test_store_encodes_only_new_texts_and_survives_reopen(tmp_path):
+    calls = []
+    store = EmbeddingStore(tmp_path, "BAAI/bge-small-zh-v1.5")
+    first = store.encode(["契税", "个人所得税", "契税"], _encoder(calls))
+    assert calls == [["契税", "个人所得税"]]
+    assert first.shape == (3, 3) and first[0][0] == 2 and first[2][0] == 2
+
+    reopened = EmbeddingStore(tmp_path, "BAAI/bge-small-zh-v1.5")
+    second = reopened.encode(["个人所得税", "增值税"], _encoder(calls))
+    assert calls[-1] == ["增值税"]
+    assert second[0].tolist() == [5.0, 1.0, 0.5]
+    assert reopened.stats()["entries"] == 3
+
+
+def test_store_ignores_rows_without_keys_after_interrupted_write(tmp_path):
+    store = EmbeddingStore(tmp_path, "m", dtype="float16")
+    store.put_many(["a"], np.ones((1, 4), dtype=np.float32))
+    with (store.dir / "float16.bin").open("ab") as fh:
+        fh.write(b"\x00" * 8)
+    with (store.dir / "float16.keys").open("ab") as fh:
+        fh.write(b"dangl")
+
+    reopened = EmbeddingStore(tmp_path, "m", dtype="float16")
+    reopened.put_many(["b"], np.full((1, 4), 2.0, dtype=np.float32))
+    vectors, found = EmbeddingStore(tmp_path, "m", dtype="float16").get_many(["a", "b", "dangl"])
+    assert found == [True, True, False]
+    assert vectors[1].tolist() == [2.0, 2.0, 2.0, 2.0]
+
+
+def test_encode_with_store_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_STORE_DIR", str(tmp_path))
+    monkeypatch.setenv("EMBEDDING_STORE_ENABLED", "0")
+    calls = []
+    encode_with_store("m", ["x"], _encoder(calls))
+    encode_with_store("m", ["x"], _encoder(calls))
+    assert len(calls) == 2 and not any(tmp_path.iterdir())
+    monkeypatch.setenv("EMBEDDING_STORE_ENABLED", "1")
+    encode_with_store("m", ["x"], _encoder(calls))
+    encode_with_store("m", ["x"], _encoder(calls))
+    assert len(calls) == 3
+    assert embedding_store.get_embedding_store("m").stats()["hits"] == 1
@@ -0,0 +1,85 @@
+import admin_api
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(admin_api, "_qa_dir", lambda _tenant_id: tmp_path)
+    monkeypatch.setattr(admin_api, "GEN_TASKS", {})
+    monkeypatch.setattr(admin_api, "GEN_TASK_EVENT_STATE", {})
+    (tmp_path / "gen_task_snapshots").mkdir(exist_ok=True)
+
+
+def _task(**extra):
+    task = {"task_id": "t1", "tenant_id": "hz", "status": "running", "updated_at": "1", "process_trace": []}
+    task.update(extra)
+    return task
+
+
+def test_live_persists_append_deltas_and_replay_to_latest_state(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    admin_api.GEN_TASKS["t1"] = _task(note="x")
+    admin_api._persist_live_task_snapshot("hz", "t1")
+
+    for i in range(1, 4):
+        task = admin_api.GEN_TASKS["t1"]
+        task["updated_at"] = str(i + 1)
+        task["process_trace"] = task["process_trace"] + [{"index": i, "steps": ["s"] * 100}]
+        if i == 3:
+            task["process_trace"][0] = {"index": 1, "steps": ["done"]}
+            task.pop("note")
+        admin_api._persist_live_task_snapshot("hz", "t1")
+
+    events = admin_api._read_jsonl(admin_api._qa_gen_task_events_path("hz", "t1"))
+    assert len(events) == 3
+    assert [len(e.get("trace") or []) for e in events] == [1, 1, 2]
+    assert events[-1]["unset"] == ["note"]
+    assert not admin_api._qa_gen_tasks_path("hz").exists()
+    assert len(admin_api._read_jsonl(admin_api._qa_gen_tasks_summary_path("hz"))) == 4
+
+    replayed = admin_api._read_gen_task_snapshot_file("hz", "t1")
+    assert replayed == admin_api._task_snapshot(admin_api.GEN_TASKS["t1"])
+
+    admin_api.GEN_TASKS["t1"]["status"] = "completed"
+    admin_api._persist_live_task_snapshot("hz", "t1")
+    assert not admin_api._qa_gen_task_events_path("hz", "t1").exists()
+    assert admin_api._read_gen_task_snapshot_file("hz", "t1")["status"] == "completed"
+    assert len(admin_api._read_jsonl(admin_api._qa_gen_tasks_path("hz"))) == 1
+
+
+def test_events_compact_periodically_and_ignore_stale_base(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(admin_api, "_GEN_TASK_EVENT_COMPACT_EVERY", 2)
+    admin_api.GEN_TASKS["t1"] = _task(process_trace=[{"index": 2}, {"index": 1}])
+    for i in range(5):
+        admin_api.GEN_TASKS["t1"]["updated_at"] = str(10 + i)
+        admin_api._persist_live_task_snapshot("hz", "t1")
+    # The fourth persist compacted; an unchanged (unordered) trace is not re-sent.
+    events = admin_api._read_jsonl(admin_api._qa_gen_task_events_path("hz", "t1"))
+    assert events == [{"base": "13", "patch": {"updated_at": "14"}, "unset": []}]
+
+    admin_api._persist_gen_task_snapshot_file("hz", _task(updated_at="99"))
+    admin_api._append_jsonl(admin_api._qa_gen_task_events_path("hz", "t1"), {"base": "13", "patch": {"status": "failed"}})
+    assert admin_api._read_gen_task_snapshot_file("hz", "t1")["status"] == "running"
+
+
+def test_trace_becoming_index_ordered_is_not_unset_on_replay(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    admin_api.GEN_TASKS["t1"] = _task(process_trace=[{"index": 2}, {"index": 1}])
+    admin_api._persist_live_task_snapshot("hz", "t1")
+
+    task = admin_api.GEN_TASKS["t1"]
+    task["updated_at"] = "2"
+    task["process_trace"] = [{"index": 1}, {"index": 2}, {"index": 3}]
+    admin_api._persist_live_task_snapshot("hz", "t1")
+
+    events = admin_api._read_jsonl(admin_api._qa_gen_task_events_path("hz", "t1"))
+    assert events[-1]["patch"]["process_trace"] == task["process_trace"]
+    assert "process_trace" not in events[-1]["unset"]
+    replayed = admin_api._read_gen_task_snapshot_file("hz", "t1")
+    assert replayed["process_trace"] == [{"index": 1}, {"index": 2}, {"index": 3}]
+
+    # Events written before this fix carried both; replay must still keep the patched trace.
+    admin_api._append_jsonl(
+        admin_api._qa_gen_task_events_path("hz", "t1"),
+        {"base": "1", "patch": {"process_trace": [{"index": 1}]}, "unset": ["process_trace"]},
+    )
+    assert admin_api._read_gen_task_snapshot_file("hz", "t1")["process_trace"] == [{"index": 1}]
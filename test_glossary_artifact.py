@@ -0,0 +1,63 @@
+import os
+
+import pandas as pd
+
+import exam_graph
+import glossary_artifact
+
+
+def _write_glossary(path, terms):
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"核心名词": terms}).to_excel(writer, sheet_name="贷款与金融", index=False)
+
+
+def test_artifact_is_reused_and_hot_reloaded(tmp_path, monkeypatch):
+    xlsx = tmp_path / "glossary.xlsx"
+    _write_glossary(xlsx, ["商业贷款", "商贷"])
+    monkeypatch.setenv("GLOSSARY_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(glossary_artifact, "resolve_tenant_glossary_path", lambda _tenant: xlsx)
+    monkeypatch.setattr(glossary_artifact, "GLOSSARY_RELOAD_CHECK_SECONDS", 0.0)
+    glossary_artifact.reset_loaded_glossaries()
+
+    first = glossary_artifact.load_glossary("hz")
+    assert first["terms"] == ["商业贷款", "商贷"]
+    assert first["term_to_categories"]["商贷"] == ["贷款与金融"]
+    assert glossary_artifact.artifact_path_for(xlsx).exists()
+
+    # A fresh process only unpickles the artifact; the spreadsheet is not parsed again.
+    glossary_artifact.reset_loaded_glossaries()
+    compile_glossary = glossary_artifact.compile_glossary
+    monkeypatch.setattr(glossary_artifact, "compile_glossary", lambda *_a, **_k: (_ for _ in ()).throw(AssertionError("recompiled")))
+    again = glossary_artifact.load_glossary("hz")
+    assert again["matcher"].find_terms("办理商贷") == {"商贷"}
+    monkeypatch.setattr(glossary_artifact, "compile_glossary", compile_glossary)
+
+    _write_glossary(xlsx, ["公积金贷款"])
+    stat = xlsx.stat()
+    os.utime(xlsx, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+    reloaded = glossary_artifact.load_glossary("hz")
+    assert reloaded["terms"] == ["公积金贷款"]
+    glossary_artifact.reset_loaded_glossaries()
+
+
+def test_tenant_glossary_overrides_shared(tmp_path, monkeypatch):
+    import tenants_config
+
+    monkeypatch.setattr(tenants_config, "_tenant_roots", lambda tid: [tmp_path / tid])
+    assert tenants_config.resolve_tenant_glossary_path("hz") == tenants_config.SHARED_GLOSSARY_FILE
+    (tmp_path / "hz" / "materials").mkdir(parents=True)
+    _write_glossary(tmp_path / "hz" / "materials" / "glossary.xlsx", ["定金"])
+    assert tenants_config.resolve_tenant_glossary_path("hz") == tmp_path / "hz" / "materials" / "glossary.xlsx"
+
+
+def test_graph_uses_glossary_of_bound_tenant(monkeypatch):
+    seen = []
+    monkeypatch.setattr(exam_graph, "_GLOSSARY_CACHE", None)
+    monkeypatch.setattr(exam_graph, "load_glossary", lambda tenant_id=None: seen.append(tenant_id) or {"terms": []})
+    token = exam_graph.attach_glossary_tenant("bj")
+    try:
+        exam_graph._build_glossary_cache()
+    finally:
+        exam_graph.detach_glossary_tenant(token)
+    exam_graph._build_glossary_cache()
+    assert seen == ["bj", None]
@@ -0,0 +1,167 @@
+import os
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+import graph_exec_backend
+from graph_exec_backend import GraphJobQueue, ProcessPoolGraphBackend
+from near_dup_index import NearDuplicateIndex
+
+
+def _fake_runner(payload):
+    for node in payload["inputs"]["nodes"]:
+        if node == "boom":
+            raise ValueError("critic exploded")
+        yield {node: {"logs": [f"{node}:{payload['configurable']['question_type']}"]}}
+
+
+def _dying_runner(payload):
+    yield {"router": {"logs": ["router"]}}
+    os._exit(1)
+
+
+def _payload(nodes):
+    return {"runner": "test_graph_exec_backend:_fake_runner", "inputs": {"nodes": nodes}, "configurable": {"question_type": "单选题"}}
+
+
+def _consume_with_inline_worker(backend, payload):
+    def _work():
+        job = None
+        while job is None:
+            job = backend.queue.claim("inline")
+        graph_exec_backend.run_job(backend.queue, job[0], job[1])
+
+    worker = threading.Thread(target=_work)
+    worker.start()
+    try:
+        return list(backend.stream(payload))
+    finally:
+        worker.join()
+
+
+def test_jobs_stream_events_and_reraise_worker_errors(tmp_path, monkeypatch):
+    backend = ProcessPoolGraphBackend(tmp_path / "jobs.sqlite3", workers=1)
+    monkeypatch.setattr(backend, "ensure_started", lambda: None)
+
+    events = _consume_with_inline_worker(backend, _payload(["router", "writer", "critic"]))
+    assert events == [{n: {"logs": [f"{n}:单选题"]}} for n in ("router", "writer", "critic")]
+
+    with pytest.raises(ValueError, match="critic exploded"):
+        _consume_with_inline_worker(backend, _payload(["router", "boom"]))
+    assert backend.queue.counts() == {}
+
+
+def test_stale_running_job_fails_instead_of_rerunning(tmp_path, monkeypatch):
+    queue = GraphJobQueue(tmp_path / "jobs.sqlite3")
+    job_id = queue.enqueue(_payload(["router"]))
+    assert queue.claim("w1")[0] == job_id
+    monkeypatch.setattr(graph_exec_backend, "_STALE_SECONDS", -1)
+    assert queue.claim("w2") is None
+    status, error = queue.status(job_id)
+    assert status == "failed" and "graph_worker_lost" in str(error)
+
+
+def test_worker_process_runs_jobs(tmp_path):
+    backend = ProcessPoolGraphBackend(tmp_path / "jobs.sqlite3", workers=1)
+    try:
+        assert list(backend.stream(_payload(["router", "critic"]))) == [
+            {"router": {"logs": ["router:单选题"]}},
+            {"critic": {"logs": ["critic:单选题"]}},
+        ]
+    finally:
+        for proc in backend._procs:
+            proc.terminate()
+
+
+def test_scoped_entries_ship_task_stems():
+    index = NearDuplicateIndex()
+    index.add("bank:1", "某题干一")
+    index.add("task:0", "本任务题干", scope="task")
+    assert index.scoped_entries("task") == [("task:0", "本任务题干")]
+    assert index.scoped_entries("") == []
+
+
+def test_consumer_fails_job_and_respawns_when_worker_dies(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_exec_backend, "_HEARTBEAT_SECONDS", 0.2)
+    backend = ProcessPoolGraphBackend(tmp_path / "jobs.sqlite3", workers=1)
+    payload = {"runner": "test_graph_exec_backend:_dying_runner", "inputs": {}, "configurable": {}}
+    events = []
+    try:
+        with pytest.raises(graph_exec_backend.GraphJobError, match="graph_worker_lost"):
+            for event in backend.stream(payload):
+                events.append(event)
+        assert events == [{"router": {"logs": ["router"]}}]
+        assert len(backend._procs) == 1 and backend._procs[0].is_alive()
+        assert list(backend.stream(_payload(["writer"]))) == [{"writer": {"logs": ["writer:单选题"]}}]
+    finally:
+        for proc in backend._procs:
+            proc.terminate()
+
+
+def test_worker_drops_task_scope_from_cached_dup_index_after_job(tmp_path, monkeypatch):
+    import exam_graph
+
+    class _Graph:
+        def stream(self, inputs, config):
+            index = config["configurable"]["dup_index"]
+            assert index.scoped_entries("task-1") == [("task-1:run:0", "本任务题干")]
+            yield {"writer": {}}
+
+    monkeypatch.setattr(exam_graph, "app", _Graph())
+    monkeypatch.setattr(graph_exec_backend, "_WORKER_DUP_INDEXES", {})
+    payload = {
+        "tenant_id": "t",
+        "inputs": {},
+        "configurable": {"dup_scope": "task-1"},
+        "retriever": None,
+        "with_dup_index": True,
+        "bank_path": str(tmp_path / "bank.jsonl"),
+        "dup_entries": [("task-1:run:0", "本任务题干")],
+        "started_at": datetime.now(timezone.utc),
+        "max_elapsed_ms": 0,
+    }
+    assert list(graph_exec_backend.run_exam_graph(payload)) == [{"writer": {}}]
+    assert len(graph_exec_backend._WORKER_DUP_INDEXES["t"]["index"]) == 0
+
+
+def test_worker_dup_index_indexes_appended_bank_rows_without_rebuilding(tmp_path, monkeypatch):
+    from bank_store import get_bank_store
+
+    monkeypatch.setattr(graph_exec_backend, "_WORKER_DUP_INDEXES", {})
+    bank_path = tmp_path / "bank.jsonl"
+    store = get_bank_store(bank_path)
+    store.append({"题干": "第一道题干内容"})
+    payload = {"tenant_id": "t", "bank_path": str(bank_path)}
+    index = graph_exec_backend._worker_dup_index(payload, None)
+    assert "bank:0" in index
+
+    store.append({"题干": "第二道题干内容"})
+    with bank_path.open("ab") as f:
+        f.write(b'\n{"\xe9\xa2\x98')  # 另一个进程写到一半的行
+    assert graph_exec_backend._worker_dup_index(payload, None) is index
+    assert "bank:1" in index and len(index) == 2
+
+    with bank_path.open("ab") as f:
+        f.write('干": "第三道题干内容"}'.encode("utf-8"))
+    assert graph_exec_backend._worker_dup_index(payload, None) is index
+    assert "bank:2" in index
+
+    # A put/delete record changes indexed stems: fold the whole log again.
+    store.delete([0])
+    rebuilt = graph_exec_backend._worker_dup_index(payload, None)
+    assert rebuilt is not index and sorted(rebuilt._signatures) == ["bank:1", "bank:2"]
+    store.compact()
+    after_compact = graph_exec_backend._worker_dup_index(payload, None)
+    assert after_compact is not rebuilt and sorted(after_compact._signatures) == ["bank:1", "bank:2"]
+    store.append({"题干": "第四道题干内容"})
+    assert graph_exec_backend._worker_dup_index(payload, None) is after_compact
+    assert "bank:3" in after_compact
+
+
+def test_worker_processes_share_llm_limiter_budget(monkeypatch):
+    monkeypatch.setenv("LLM_LIMITER_INITIAL", "16")
+    monkeypatch.delenv("LLM_LIMITER_MAX", raising=False)
+    graph_exec_backend._share_llm_limiter_budget(4)
+    assert os.environ["LLM_LIMITER_INITIAL"] == "4"
+    assert os.environ["LLM_LIMITER_MAX"] == "32"
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+import admin_api
+
+
+def _patch_run(monkeypatch, n_questions, judge_fn, *, cancel_after=None):
+    questions = [{"question_id": f"q{i}", "index": i, "saved": True} for i in range(n_questions)]
+    run = {"run_id": "r1", "config": {}, "questions": questions}
+    updates = []
+    applied = []
+    monkeypatch.setattr(
+        admin_api,
+        "_prepare_judge_run_targets",
+        lambda tenant_id, run_id, ids: (run, list(questions), {q["question_id"] for q in questions}, None),
+    )
+    monkeypatch.setattr(admin_api, "_get_offline_judge_llm", lambda: (object(), ""))
+    monkeypatch.setattr(admin_api, "_append_judge_log", lambda *a, **k: None)
+    monkeypatch.setattr(admin_api, "_append_qa_trace", lambda tenant_id, row: applied.append(row["question_id"]))
+    monkeypatch.setattr(
+        admin_api,
+        "_update_qa_run",
+        lambda tenant_id, run_id, r: updates.append(
+            (dict(r["judge_job"]), [q["question_id"] for q in r["questions"] if q.get("offline_judge")])
+        ) or True,
+    )
+    monkeypatch.setattr(admin_api, "_run_offline_judge_for_question", judge_fn)
+    monkeypatch.setattr(
+        admin_api,
+        "_is_judge_task_cancelled",
+        lambda task_id: cancel_after is not None and len(applied) >= cancel_after,
+    )
+    return updates, applied
+
+
+def test_judge_run_is_parallel_ordered_and_batches_run_updates(monkeypatch):
+    monkeypatch.setattr(admin_api, "_JUDGE_RUN_WORKERS", 4)
+    monkeypatch.setattr(admin_api, "_JUDGE_RUN_FLUSH_EVERY", 5)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def _judge(q, cfg, llm, tenant_id=None):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        # Later questions finish first to exercise the reorder buffer.
+        time.sleep(0.02 * (3 - int(q["index"]) % 4))
+        with lock:
+            state["active"] -= 1
+        return {"error": "boom"} if q["index"] == 3 else {"decision": "pass"}
+
+    updates, applied = _patch_run(monkeypatch, 12, _judge)
+    progress = []
+    result = admin_api._execute_judge_run("t1", "r1", task_id="task-1", on_progress=progress.append)
+
+    assert state["peak"] > 1
+    assert applied == [f"q{i}" for i in range(12)]
+    currents = [p["progress"]["current"] for p in progress]
+    assert currents == sorted(currents) and currents[-1] == 12
+    assert result["completed_count"] == 12 and result["success_count"] == 11 and result["error_count"] == 1
+    assert len(updates) < 12
+    # Every checkpoint holds a prefix of the run, so resume never skips an unjudged question.
+    for _, judged in updates:
+        assert judged == [f"q{i}" for i in range(len(judged))]
+    assert updates[-1][0]["status"] == "completed" and updates[-1][0]["in_flight_question_ids"] == []
+
+
+def test_judge_run_cancellation_stops_submitting_and_keeps_in_flight_results(monkeypatch):
+    monkeypatch.setattr(admin_api, "_JUDGE_RUN_WORKERS", 2)
+
+    def _judge(q, cfg, llm, tenant_id=None):
+        time.sleep(0.01)
+        return {"decision": "pass"}
+
+    updates, applied = _patch_run(monkeypatch, 10, _judge, cancel_after=3)
+    result = admin_api._execute_judge_run("t1", "r1", task_id="task-1")
+
+    assert result["cancelled"] is True
+    assert 3 <= result["completed_count"] <= 5
+    assert applied == [f"q{i}" for i in range(result["completed_count"])]
+    assert updates[-1][0]["status"] == "cancelled"
+
+
+def test_judge_run_exception_aborts_after_checkpointing_judged_prefix(monkeypatch):
+    monkeypatch.setattr(admin_api, "_JUDGE_RUN_WORKERS", 3)
+
+    def _judge(q, cfg, llm, tenant_id=None):
+        if q["index"] == 2:
+            raise RuntimeError("judge crashed")
+        time.sleep(0.01)
+        return {"decision": "pass"}
+
+    updates, applied = _patch_run(monkeypatch, 8, _judge)
+    with pytest.raises(RuntimeError, match="judge crashed"):
+        admin_api._execute_judge_run("t1", "r1", task_id="task-1")
+
+    assert applied == ["q0", "q1"]
+    assert updates[-1][1] == ["q0", "q1"]
+    assert updates[-1][0]["completed_count"] == 2 and updates[-1][0]["error_count"] == 0
+
+
+def test_judge_run_questions_see_caller_context(monkeypatch):
+    marker = admin_api.contextvars.ContextVar("judge_run_test_marker", default="")
+    seen = []
+
+    def _judge(q, cfg, llm, tenant_id=None):
+        seen.append(marker.get())
+        return {"decision": "pass"}
+
+    _patch_run(monkeypatch, 3, _judge)
+    token = marker.set("req-1")
+    try:
+        admin_api._execute_judge_run("t1", "r1", task_id="task-1")
+    finally:
+        marker.reset(token)
+    assert seen == ["req-1"] * 3
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import exam_graph
+import llm_clients
+
+
+def test_openai_client_is_shared_per_endpoint_and_key():
+    llm_clients.reset_llm_clients()
+    a = llm_clients.get_openai_client("key-1", "https://example.com/v1")
+    assert llm_clients.get_openai_client("key-1", "https://example.com/v1") is a
+    assert llm_clients.get_openai_client("key-2", "https://example.com/v1") is not a
+    assert llm_clients.get_ark_client("https://ark.example.com/api/v3", api_key="k") is llm_clients.get_ark_client(
+        "https://ark.example.com/api/v3", api_key="k"
+    )
+    llm_clients.reset_llm_clients()
+
+
+def test_call_llm_remembers_working_url_candidate(monkeypatch):
+    llm_clients.reset_llm_clients()
+    calls = []
+
+    def _fake_client(_key, base_url):
+        def _create(**_kwargs):
+            calls.append(base_url)
+            if not base_url.endswith("/v1"):
+                raise ValueError("404 page not found")
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+                usage={"prompt_tokens": 1, "completion_tokens": 1},
+            )
+
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+    monkeypatch.setattr(exam_graph, "get_openai_client", _fake_client)
+    kwargs = dict(node_name="ut", prompt="p", model_name="gpt-5.2", api_key="k", base_url="https://gw.example.com", provider="ait")
+
+    content, _, record = exam_graph.call_llm(**kwargs)
+    assert content == "ok" and record["success"] is True
+    assert calls == ["https://gw.example.com", "https://gw.example.com/v1"]
+
+    calls.clear()
+    exam_graph.call_llm(**kwargs)
+    assert calls == ["https://gw.example.com/v1"]
+    llm_clients.reset_llm_clients()
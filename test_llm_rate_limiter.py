@@ -0,0 +1,51 @@
+import threading
+
+import llm_rate_limiter
+from llm_rate_limiter import AdaptiveLimiter
+
+
+def test_rate_limit_halves_and_success_grows_window(monkeypatch):
+    monkeypatch.setattr(llm_rate_limiter, "LLM_LIMITER_DECREASE_COOLDOWN_SECONDS", 0.0)
+    limiter = AdaptiveLimiter("ait", "m", initial=8, minimum=1, maximum=16)
+    assert limiter.acquire(timeout=0)
+    limiter.release(error=ValueError("Error code: 429 - Too Many Requests"))
+    assert limiter.limit == 4.0
+    for _ in range(8):
+        assert limiter.acquire(timeout=0)
+        limiter.release(latency_ms=100)
+    assert 5.0 < limiter.limit < 7.0
+    snap = limiter.snapshot()
+    assert snap["rate_limited"] == 1 and snap["successes"] == 8 and snap["in_flight"] == 0
+
+
+def test_window_caps_in_flight_requests():
+    limiter = AdaptiveLimiter("ait", "m", initial=2, minimum=1, maximum=4)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.acquire(timeout=0.05) is False
+    threading.Timer(0.05, limiter.release, kwargs={"latency_ms": 10}).start()
+    assert limiter.acquire(timeout=2)
+
+
+def test_sustained_latency_shrinks_window(monkeypatch):
+    monkeypatch.setattr(llm_rate_limiter, "LLM_LIMITER_DECREASE_COOLDOWN_SECONDS", 0.0)
+    limiter = AdaptiveLimiter("ait", "m", initial=10, minimum=1, maximum=10)
+    for latency in [100] * 5 + [5000] * 10:
+        assert limiter.acquire(timeout=0)
+        limiter.release(latency_ms=latency)
+    assert limiter.limit < 10
+
+
+def test_admin_endpoint_lists_limiters(monkeypatch):
+    import admin_api
+
+    llm_rate_limiter.reset_llm_limiters()
+    with llm_rate_limiter.get_llm_limiter("ait", "gpt-5.2").slot():
+        pass
+    client = admin_api.app.test_client()
+    resp = client.get("/api/admin/llm-limits", headers={"X-System-User": "admin"})
+    assert resp.status_code == 200
+    items = resp.get_json()["items"]
+    assert [(i["provider"], i["model"]) for i in items] == [("ait", "gpt-5.2")]
+    assert items[0]["successes"] == 1
+    llm_rate_limiter.reset_llm_limiters()
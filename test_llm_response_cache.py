@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import exam_graph
+from llm_response_cache import LLMResponseCache, llm_cache_key
+
+
+def _fake_client_factory(calls):
+    def _fake_client(_key, base_url):
+        def _create(**kwargs):
+            calls.append(kwargs["messages"][0]["content"])
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))],
+                usage={"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+            )
+
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+    return _fake_client
+
+
+def test_cache_key_covers_sampling_params():
+    base = llm_cache_key("m", "p", 0.3, 100)
+    assert base == llm_cache_key("m", "p", 0.3, 100)
+    assert base != llm_cache_key("m", "p", 0.5, 100)
+    assert base != llm_cache_key("m", "p", 0.3, 200)
+    assert base != llm_cache_key("m2", "p", 0.3, 100)
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = LLMResponseCache(tmp_path / "c.sqlite3", max_bytes=10)
+    cache.put("a", model="m", provider="ait", content="12345")
+    cache.put("b", model="m", provider="ait", content="12345")
+    assert cache.get("a") is not None
+    cache.put("c", model="m", provider="ait", content="12345")
+    assert cache.get("b") is None
+    assert cache.get("a")["content"] == "12345"
+    assert cache.get("c") is not None
+
+
+def test_call_llm_readwrite_then_replay(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(exam_graph, "get_openai_client", _fake_client_factory(calls))
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm.sqlite3"))
+    kwargs = dict(node_name="ut", prompt="p1", model_name="gpt-5.2", api_key="k", base_url="https://gw.example.com/v1", provider="ait")
+
+    monkeypatch.setenv("LLM_CACHE_MODE", "readwrite")
+    content, _, record = exam_graph.call_llm(**kwargs)
+    assert content == "answer" and record["cache_hit"] is False
+    content, _, record = exam_graph.call_llm(**kwargs)
+    assert content == "answer" and record["cache_hit"] is True and record["success"] is True
+    assert calls == ["p1"]
+
+    monkeypatch.setenv("LLM_CACHE_MODE", "replay")
+    content, _, record = exam_graph.call_llm(**kwargs)
+    assert content == "answer" and record["cache_hit"] is True
+    content, _, record = exam_graph.call_llm(**{**kwargs, "prompt": "p2"})
+    assert content == "" and record["success"] is False and record["error"] == "LLM cache replay miss"
+    assert calls == ["p1"]
@@ -0,0 +1,108 @@
+import json
+
+import admin_api
+import near_dup_index
+from near_dup_index import NearDuplicateIndex
+
+
+STEM = "客户王强今年46周岁，计划申请商业贷款购买一套竣工于2015年的住宅，可申请的最长贷款年限是（　）。"
+
+
+def test_batch_insert_and_query_detects_near_duplicates():
+    index = NearDuplicateIndex()
+    inserted = index.add_batch(
+        [
+            ("q1", STEM),
+            ("q2", "下列关于契税计税依据的说法，正确的是（　）。"),
+            ("q3", ""),
+        ]
+    )
+    assert inserted == 2
+    assert index.add_batch([("q1", STEM)]) == 0
+
+    near, unrelated, empty = index.query_batch(
+        [
+            STEM.replace("46周岁", "45周岁"),
+            "增值税满两年免征的适用条件是（　）。",
+            "",
+        ],
+        threshold=0.8,
+    )
+    assert near is not None and near.key == "q1" and near.score >= 0.8
+    assert unrelated is None
+    assert empty is None
+
+
+def test_signature_matches_exact_integer_hashing():
+    index = NearDuplicateIndex(num_perm=16, bands=4)
+    shingles = [int(x) for x in index._shingles(STEM)]
+    expected = [
+        min((int(a) * x + int(b)) % near_dup_index._HASH_PRIME for x in shingles)
+        for a, b in zip(index._a, index._b)
+    ]
+    assert [int(v) for v in index.signature(STEM)] == expected
+
+
+def test_scoped_entries_only_match_same_scope():
+    index = NearDuplicateIndex()
+    index.add("task-a:1", STEM, scope="task-a")
+    assert index.query(STEM, scope="task-a") is not None
+    assert index.query(STEM, scope="task-b") is None
+    index.add("bank:1", STEM)
+    assert index.query(STEM, scope="task-b").key == "bank:1"
+
+
+def test_tenant_index_tracks_bank_appends(tmp_path, monkeypatch):
+    bank_path = tmp_path / "bank.jsonl"
+    bank_path.write_text(json.dumps({"题干": "下列关于契税计税依据的说法，正确的是（　）。"}, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(admin_api, "tenant_bank_path", lambda _tenant_id: bank_path)
+    monkeypatch.setattr(admin_api, "NEAR_DUP_INDEXES", {})
+
+    index = admin_api._get_tenant_near_dup_index("ut_dup")
+    assert len(index) == 1
+    assert index.query(STEM) is None
+
+    admin_api._append_bank_item(bank_path, {"题干": STEM})
+
+    assert admin_api._get_tenant_near_dup_index("ut_dup") is index
+    assert index.query(STEM) is not None
+
+    admin_api._save_bank(bank_path, [{"题干": STEM}])
+    rebuilt = admin_api._get_tenant_near_dup_index("ut_dup")
+    assert rebuilt is not index
+    assert len(rebuilt) == 1
+
+
+def test_tenant_index_rebuild_loads_bank_outside_the_registry_lock(tmp_path, monkeypatch):
+    bank_path = tmp_path / "bank.jsonl"
+    bank_path.write_text(json.dumps({"题干": STEM}, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(admin_api, "tenant_bank_path", lambda _tenant_id: bank_path)
+    monkeypatch.setattr(admin_api, "NEAR_DUP_INDEXES", {})
+    load_bank = admin_api._load_bank
+    held = []
+
+    def _load_bank(path):
+        held.append(admin_api.NEAR_DUP_INDEX_LOCK.locked())
+        return load_bank(path)
+
+    monkeypatch.setattr(admin_api, "_load_bank", _load_bank)
+    index = admin_api._get_tenant_near_dup_index("ut_dup")
+    assert held == [False]
+    assert admin_api.NEAR_DUP_INDEXES["ut_dup"]["index"] is index and len(index) == 1
+    assert admin_api._get_tenant_near_dup_index("ut_dup") is index
+    assert held == [False]
+
+
+def test_remove_scope_drops_only_that_scope():
+    index = NearDuplicateIndex()
+    index.add("task-a:run1:0", STEM, scope="task-a")
+    index.add("task-a:run2:0", STEM, scope="task-a")
+    index.add("bank:1", "下列关于契税计税依据的说法，正确的是（　）。")
+    assert len(index) == 3
+
+    assert index.remove_scope("task-a") == 2
+    assert index.remove_scope("") == 0
+    assert len(index) == 1
+    assert index.scoped_entries("task-a") == []
+    assert index.query(STEM, scope="task-a") is None
+    assert index._buckets and all(keys == ["bank:1"] for keys in index._buckets.values())
@@ -0,0 +1,108 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import admin_api
+from admin_api import app
+
+
+def _run(run_id, *, days_ago, material="v1", question_count=2, hard_pass_rate=0.5, decisions=()):
+    ended_at = (datetime.now(timezone.utc) - timedelta(days=days_ago)).isoformat()
+    questions = [{"slice_id": 3, "slice_path": "第一章", "saved": i == 0} for i in range(question_count)]
+    for q, decision in zip(questions, decisions):
+        q["offline_judge"] = {"decision": decision, "overall_score": 8 if decision == "pass" else 4, "costs": {"per_question_usd": 0.01}}
+    return {
+        "run_id": run_id,
+        "ended_at": ended_at,
+        "material_version_id": material,
+        "batch_metrics": {
+            "question_count": question_count,
+            "hard_pass_rate": hard_pass_rate,
+            "total_cost": 1.0,
+            "saved_count": 1,
+            "total_llm_calls": 10,
+            "error_calls": 1,
+            "currency": "CNY",
+        },
+        "questions": questions,
+    }
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(admin_api, "_qa_dir", lambda _tenant_id: tmp_path / "audit")
+    monkeypatch.setattr(admin_api, "repo_tenant_data_dir", lambda _tenant_id: tmp_path / "legacy")
+    monkeypatch.setattr(admin_api, "_load_qa_thresholds", lambda _tenant_id: {})
+    monkeypatch.setattr(admin_api, "_build_alerts_for_run", lambda _run, _thresholds: [])
+    monkeypatch.setattr(admin_api, "BANK_ORIGIN_INDEXES", {})
+    (tmp_path / "audit").mkdir()
+
+
+def test_qa_dashboards_read_metric_tables(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    admin_api._persist_qa_run("hz", _run("r_old", days_ago=60, hard_pass_rate=0.1))
+    admin_api._persist_qa_run("hz", _run("r1", days_ago=2, hard_pass_rate=0.5, decisions=("pass", "reject")))
+    admin_api._persist_qa_run("hz", _run("r2", days_ago=1, question_count=6, hard_pass_rate=1.0))
+    admin_api._persist_qa_run("hz", _run("run_fail_x", days_ago=1))
+    admin_api._persist_qa_run("hz", _run("r3", days_ago=1, material="v2"))
+
+    client = app.test_client()
+    headers = {"X-System-User": "admin"}
+    data = client.get("/api/hz/qa/overview?material_version_id=v1&days=30", headers=headers).get_json()
+    assert data["run_ids"] == ["r2", "r1"]
+    assert data["run_count"] == 2
+    assert data["hard_pass_rate"] == round((0.5 * 2 + 1.0 * 6) / 8, 4)
+    assert data["error_call_rate"] == 0.1
+    assert data["judge_pass_rate"] == 0.5 and data["judge_overall_score_avg"] == 6.0
+    assert data["slice_success_stats"] == [{"slice_id": 3, "slice_path": "第一章", "attempt_count": 8, "success_count": 2, "success_rate": 0.25}]
+
+    trends = client.get("/api/hz/qa/trends?material_version_id=v1&days=30", headers=headers).get_json()
+    assert [p["run_id"] for p in trends["points"]] == ["r1", "r2"]
+
+    drift = client.get("/api/hz/qa/drift?base_run_id=r1&target_run_id=r2", headers=headers).get_json()
+    assert drift["compare"]["hard_pass_rate"] == {"base": 0.5, "target": 1.0, "delta": 0.5}
+    report = client.get("/api/hz/qa/release-report?base_run_ids=r1,r_old&target_run_id=r2", headers=headers).get_json()
+    assert report["base_run_ids"] == ["r1", "r_old"]
+    missing = client.get("/api/hz/qa/drift?base_run_id=nope&target_run_id=r2", headers=headers)
+    assert missing.status_code == 404
+
+
+def test_judge_update_is_applied_and_outside_writes_trigger_rebuild(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    admin_api._persist_qa_run("hz", _run("r1", days_ago=1))
+    store = admin_api._qa_analytics_store("hz")
+    assert store.overview_aggregates(material_version_id="", since_ts=None, success_only=True)["judge"]["question_count"] == 0
+
+    assert admin_api._update_qa_run("hz", "r1", _run("r1", days_ago=1, decisions=("pass",)))
+    judge = store.overview_aggregates(material_version_id="", since_ts=None, success_only=True)["judge"]
+    assert judge["pass_count"] == 1
+
+    runs_path = admin_api._qa_runs_path("hz")
+    with runs_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(_run("r9", days_ago=1), ensure_ascii=False) + "\n")
+    runs = admin_api._qa_analytics_store("hz").window_runs(material_version_id="", since_ts=None, success_only=True)
+    assert {r["run_id"] for r in runs} == {"r1", "r9"}
+
+
+def test_dashboards_keep_run_limit_and_drift_reads_primary_runs_only(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(admin_api, "_QA_DASHBOARD_RUN_LIMIT", 2)
+    legacy_path = tmp_path / "legacy" / "audit" / "qa_runs.jsonl"
+    legacy_path.parent.mkdir(parents=True)
+    legacy_path.write_text(json.dumps(_run("r_legacy", days_ago=4), ensure_ascii=False) + "\n", encoding="utf-8")
+    for i, run_id in enumerate(("r1", "r2", "r3")):
+        admin_api._persist_qa_run("hz", _run(run_id, days_ago=3 - i))
+
+    client = app.test_client()
+    headers = {"X-System-User": "admin"}
+    data = client.get("/api/hz/qa/overview?days=30", headers=headers).get_json()
+    assert data["run_ids"] == ["r3", "r2"]
+    assert data["run_count"] == 2
+    older = client.get("/api/hz/qa/overview?days=30&run_id=r1", headers=headers).get_json()
+    assert older["run_count"] == 0
+    trends = client.get("/api/hz/qa/trends?days=30", headers=headers).get_json()
+    assert [p["run_id"] for p in trends["points"]] == ["r2", "r3"]
+
+    monkeypatch.setattr(admin_api, "_QA_DASHBOARD_RUN_LIMIT", 10)
+    data = client.get("/api/hz/qa/overview?days=30", headers=headers).get_json()
+    assert data["run_ids"] == ["r3", "r2", "r1", "r_legacy"]
+    assert client.get("/api/hz/qa/drift?base_run_id=r_legacy&target_run_id=r3", headers=headers).status_code == 404
+    assert client.get("/api/hz/qa/drift?base_run_id=r1&target_run_id=r3", headers=headers).status_code == 200
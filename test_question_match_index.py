@@ -0,0 +1,140 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import map_knowledge_to_questions as mkq
+
+
+def _questions():
+    rows = [
+        {"篇": "交易服务", "章": "不动产交易税费", "节": "个人所得税", "考点": "个税计算（掌握）", "题干": "出售住房应缴纳", "解析": ""},
+        {"篇": "交易服务", "章": "不动产交易税费", "节": "契税", "考点": "契税税率", "题干": "依据《民法典》第595条", "解析": "《契税法》第3条"},
+        {"篇": "交易服务", "章": "不动产交易税费", "节": "", "考点": "无节", "题干": "", "解析": "《民法典》第595条"},
+        {"篇": "经纪业务", "章": "房源", "节": "实勘", "考点": "实勘要求-无需修改", "题干": "《民法典》第596条", "解析": ""},
+        {"篇": "交易服务", "章": "不动产交易税费", "节": "个人所得税", "考点": "个税计算", "题干": "《契税法》第3条与《民法典》第595条", "解析": ""},
+    ]
+    return pd.DataFrame(rows, index=[10, 11, 12, 13, 14])
+
+
+def _naive_strategy2(kb_gps, questions_df):
+    out = []
+    for idx, row in questions_df.iterrows():
+        if not mkq.build_gps_path(row):
+            continue
+        q_pian, q_zhang, q_jie = (str(row.get(k, "")).strip() for k in ("篇", "章", "节"))
+        q_kaodian_clean = re.sub(r"[（(].*?[）)]", "", str(row.get("考点", "")).strip()).strip()
+        q_kaodian_clean = re.sub(r"-无需修改", "", q_kaodian_clean).strip()
+        if q_pian and q_zhang and q_jie and q_kaodian_clean:
+            full_path = mkq.normalize_path_dehydration(f"{q_pian}/{q_zhang}/{q_jie}/{q_kaodian_clean}")
+            kb_depth = len([s for s in kb_gps.split("/") if s])
+            full_depth = len([s for s in full_path.split("/") if s])
+            if kb_depth >= 3 and full_depth >= 3 and (full_path in kb_gps or kb_gps in full_path):
+                out.append((idx, full_path))
+    return out
+
+
+def _naive_strategy3(kb_refs, questions_df):
+    out = []
+    for idx, row in questions_df.iterrows():
+        q_refs = mkq.extract_legal_references(str(row.get("题干", "")).strip())
+        q_refs.extend(mkq.extract_legal_references(str(row.get("解析", "")).strip()))
+        for kb_ref in kb_refs:
+            if kb_ref in q_refs:
+                out.append((idx, kb_ref))
+    return out
+
+
+def test_match_index_agrees_with_dataframe_scan():
+    df = _questions()
+    match_index = mkq.build_question_match_index(df)
+    kb_paths = [
+        "交易服务/不动产交易税费/个人所得税/个税计算",
+        "交易服务/不动产交易税费/个人所得税/个税计算/核定征收",
+        "不动产交易税费/契税",
+        "经纪业务/房源/实勘",
+        "前言/交易服务/不动产交易税费/契税/契税税率/附表",
+    ]
+    for kb_gps in kb_paths:
+        kb_gps = mkq.normalize_path_dehydration(kb_gps)
+        assert match_index.gps_full_path_matches(kb_gps) == _naive_strategy2(kb_gps, df)
+    for refs in ([("民法典", "595")], [("契税法", "3"), ("民法典", "595"), ("民法典", "595")], [("物权法", "1")]):
+        assert match_index.statute_matches(refs) == _naive_strategy3(refs, df)
+
+
+def test_find_matching_questions_uses_index_for_statute_collision(monkeypatch):
+    df = _questions()
+    path_index, kaodian_index = mkq.build_question_indices(df)
+    match_index = mkq.build_question_match_index(df)
+    monkeypatch.setattr(mkq, "compute_bge_similarity", lambda a, b: 0.5)
+    kb_entry = {"完整路径": "第一篇 > 合同 > 买卖合同", "核心内容": "《民法典》第595条规定了买卖合同。"}
+    matches, methods, _, _ = mkq.find_matching_questions(
+        kb_entry, 0, df, {}, path_index, kaodian_index, match_index=match_index
+    )
+    assert methods == ["Statute_Collision"]
+    assert [m["question_index"] for m in matches] == [11, 12, 14]
+    assert all("row" not in m for m in matches)
+
+
+def _slices():
+    return [
+        {"完整路径": "交易服务 > 不动产交易税费 > 个人所得税 > 个税计算 > 核定征收", "核心内容": "核定征收。"},
+        {"完整路径": "交易服务 > 不动产交易税费 > 契税", "核心内容": "《契税法》第3条规定税率；《民法典》第595条。"},
+        {"完整路径": "经纪业务 > 房源", "核心内容": "《民法典》第596条。"},
+        {"完整路径": "交易服务 > 不动产交易税费 > 个人所得税", "核心内容": "《民法典》第595条与《契税法》第3条。"},
+    ]
+
+
+def _naive_slice_scan(q_row, slice_meta):
+    full_path = mkq._question_full_path(q_row)
+    gps = []
+    for m in slice_meta:
+        kb_depth = len([s for s in m["kb_gps"].split("/") if s])
+        full_depth = len([s for s in full_path.split("/") if s])
+        if full_path and kb_depth >= 3 and full_depth >= 3 and (full_path in m["kb_gps"] or m["kb_gps"] in full_path):
+            gps.append((m["kb_idx"], m["kb_gps"]))
+    q_refs = mkq.extract_legal_references(str(q_row.get("题干", "")).strip())
+    q_refs.extend(mkq.extract_legal_references(str(q_row.get("解析", "")).strip()))
+    stat = []
+    for m in slice_meta:
+        hit = next(((law, art) for law, art in m["kb_legal_refs"] if (law, art) in q_refs), None)
+        if hit:
+            stat.append((m["kb_idx"], hit))
+    return gps, q_refs, stat
+
+
+def test_slice_index_agrees_with_slice_scan():
+    slice_meta = mkq.build_slice_meta(_slices())
+    slice_index = mkq.build_slice_match_index(slice_meta)
+    for _, q_row in _questions().iterrows():
+        gps, q_refs, stat = _naive_slice_scan(q_row, slice_meta)
+        full_path = mkq._question_full_path(q_row)
+        assert (slice_index.gps_full_path_matches(full_path) if full_path else []) == gps
+        first_refs = [
+            (kb_idx, next(r for r in slice_meta[kb_idx]["kb_legal_refs"] if r in q_refs))
+            for kb_idx in slice_index.statute_candidates(q_refs)
+        ]
+        assert first_refs == stat
+
+
+def test_find_matching_slices_for_question_uses_slice_index(monkeypatch):
+    slice_meta = mkq.build_slice_meta(_slices())
+    slice_index = mkq.build_slice_match_index(slice_meta)
+    monkeypatch.setattr(mkq, "detect_question_meta_conflict", lambda row: {"meta_conflict": False})
+    monkeypatch.setattr(mkq, "encode_batch", lambda texts, batch_size=64: np.ones((len(texts), 2)) / np.sqrt(2))
+    embeddings = np.ones((len(slice_meta), 2)) / np.sqrt(2)
+    df = _questions()
+
+    gps = mkq.find_matching_slices_for_question(
+        df.loc[10], 10, slice_meta, embeddings, {}, _slices(), None, None, None, slice_index=slice_index
+    )
+    assert [(kb_idx, method) for kb_idx, _, method, _ in gps] == [(0, "GPS_FullPath"), (3, "GPS_FullPath")]
+
+    q_row = df.loc[13].copy()
+    q_row["篇"], q_row["章"], q_row["节"] = "其他", "其他", "其他"
+    q_row["题干"] = "依据《民法典》第595条"
+    stat = mkq.find_matching_slices_for_question(
+        q_row, 99, slice_meta, embeddings, {}, _slices(), None, None, None, slice_index=slice_index
+    )
+    assert sorted(kb_idx for kb_idx, _, _, _ in stat) == [1, 3]
+    assert {method for _, _, method, _ in stat} == {"Statute_Collision"}
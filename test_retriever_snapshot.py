@@ -0,0 +1,89 @@
+import json
+
+import pandas as pd
+
+import exam_factory
+import retriever_snapshot
+from exam_factory import KnowledgeRetriever
+
+
+def _write_fixture(tmp_path):
+    kb_path = tmp_path / "kb.jsonl"
+    history_path = tmp_path / "history.xlsx"
+    mapping_path = tmp_path / "mapping.json"
+    review_path = tmp_path / "review.json"
+    kb_rows = [
+        {"完整路径": "第一章 > 契税", "核心内容": "契税 计税依据 成交价格"},
+        {"完整路径": "第一章 > 增值税", "核心内容": "增值税 满两年 免征"},
+    ]
+    kb_path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in kb_rows) + "\n", encoding="utf-8")
+    pd.DataFrame(
+        [
+            {"题干": "契税 计税依据 是什么", "选项1": "成交价", "选项2": "评估价", "选项3": "", "选项4": "", "正确答案": "A", "解析": "解析", "难度值": 0.5, "考点": "契税"},
+            {"题干": "增值税 免征 条件", "选项1": "满两年", "选项2": "满五年", "选项3": "", "选项4": "", "正确答案": "A", "解析": "解析", "难度值": 0.5, "考点": "增值税"},
+        ]
+    ).to_excel(history_path, index=False)
+    mapping_path.write_text(
+        json.dumps({"0": {"完整路径": "第一章 > 契税", "matched_questions": [{"question_index": 0, "confidence": 0.9, "method": "exact_path_match"}]}}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    review_path.write_text(json.dumps({"0:0": {"confirm_status": "confirmed"}}), encoding="utf-8")
+    return kb_path, history_path, mapping_path, review_path
+
+
+def test_warm_start_restores_index_from_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("RETRIEVER_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    kb_path, history_path, mapping_path, review_path = _write_fixture(tmp_path)
+    key = ("ut", str(kb_path), str(history_path), str(mapping_path), str(review_path))
+    kwargs = {"tenant_id": "ut", "mapping_review_path": str(review_path), "snapshot_key": key}
+
+    cold = KnowledgeRetriever(str(kb_path), str(history_path), str(mapping_path), **kwargs)
+    assert (retriever_snapshot.snapshot_dir_for_key(key) / "manifest.json").exists()
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("warm start must not re-read the reference questions")
+
+    monkeypatch.setattr(exam_factory, "load_reference_questions", _fail)
+    warm = KnowledgeRetriever(str(kb_path), str(history_path), str(mapping_path), **kwargs)
+
+    assert warm.kb_data == cold.kb_data
+    assert warm.kb_to_questions == cold.kb_to_questions
+    assert (warm.tfidf_matrix != cold.tfidf_matrix).nnz == 0
+    assert warm.get_similar_examples("契税 计税依据", k=1)[0]["题干"] == cold.get_similar_examples("契税 计税依据", k=1)[0]["题干"]
+    assert warm.get_related_kb_chunks("增值税 免征", k=1)[0]["完整路径"] == "第一章 > 增值税"
+    assert len(warm.get_examples_by_knowledge_point(warm.kb_data[0], k=3)) == 1
+
+
+def test_snapshot_ignored_when_key_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("RETRIEVER_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    kb_path, history_path, mapping_path, review_path = _write_fixture(tmp_path)
+    key = ("ut", "kb|1|1", "hist|1|1", "map|1|1", "review|1|1")
+    KnowledgeRetriever(str(kb_path), str(history_path), str(mapping_path), tenant_id="ut", mapping_review_path=str(review_path), snapshot_key=key)
+
+    assert retriever_snapshot.load_retriever_snapshot(key) is not None
+    assert retriever_snapshot.load_retriever_snapshot(("ut", "kb|2|1", "hist|1|1", "map|1|1", "review|1|1")) is None
+
+
+def test_default_retriever_snapshot_key_tracks_every_input_file(tmp_path, monkeypatch):
+    import exam_graph
+
+    kb_path, history_path, mapping_path, review_path = _write_fixture(tmp_path)
+    seen = []
+    monkeypatch.setattr(exam_graph, "_DEFAULT_RETRIEVER_CACHE", {})
+    monkeypatch.setattr(exam_graph, "build_knowledge_retriever", lambda **kwargs: seen.append(kwargs) or object())
+    cfg = {
+        "tenant_id": "ut",
+        "kb_path": str(kb_path),
+        "history_path": str(history_path),
+        "mapping_path": str(mapping_path),
+        "mapping_review_path": str(review_path),
+    }
+
+    exam_graph.get_default_retriever(cfg)
+    review_path.write_text(json.dumps({"0:0": {"confirm_status": "rejected"}}), encoding="utf-8")
+    exam_graph.get_default_retriever(cfg)
+
+    assert len(seen) == 2
+    first, second = seen[0]["snapshot_key"], seen[1]["snapshot_key"]
+    assert first is not None and second is not None and first != second
+    assert first[3] == second[3] and first[3].startswith(str(mapping_path) + "|")
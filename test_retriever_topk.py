@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+from exam_factory import KnowledgeRetriever, _top_k_desc
+
+
+def _build_retriever(tmp_path):
+    kb_path = tmp_path / "kb.jsonl"
+    history_path = tmp_path / "history.xlsx"
+    kb_rows = [
+        {"完整路径": "税费 > 契税", "核心内容": "契税 计税依据 成交价格 税率"},
+        {"完整路径": "税费 > 增值税", "核心内容": "增值税 满两年 免征 住房"},
+        {"完整路径": "贷款 > 商业贷款", "核心内容": "商业贷款 首付 比例 年限"},
+        {"完整路径": "贷款 > 公积金", "核心内容": "公积金 贷款 额度 年限"},
+    ]
+    kb_path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in kb_rows) + "\n", encoding="utf-8")
+    pd.DataFrame(
+        [
+            {"题干": "契税 计税依据 是", "选项1": "成交价", "选项2": "评估价", "选项3": "", "选项4": "", "正确答案": "A", "解析": "解析", "难度值": 0.5, "考点": "契税"},
+            {"题干": "增值税 免征 条件", "选项1": "满两年", "选项2": "满五年", "选项3": "", "选项4": "", "正确答案": "A", "解析": "解析", "难度值": 0.5, "考点": "增值税"},
+            {"题干": "商业贷款 最长 年限", "选项1": "正确", "选项2": "错误", "选项3": "", "选项4": "", "正确答案": "A", "解析": "解析", "难度值": 0.5, "考点": "贷款"},
+        ]
+    ).to_excel(history_path, index=False)
+    return KnowledgeRetriever(str(kb_path), str(history_path), str(tmp_path / "missing.json"), tenant_id="")
+
+
+def test_top_k_desc_matches_full_sort():
+    scores = np.array([0.1, 0.9, 0.3, 0.7, 0.5])
+    assert _top_k_desc(scores, 3).tolist() == [1, 3, 4]
+    assert _top_k_desc(scores, 10).tolist() == [1, 3, 4, 2, 0]
+    assert _top_k_desc(scores, 0).tolist() == []
+
+
+def test_batch_scores_match_cosine_similarity(tmp_path):
+    retriever = _build_retriever(tmp_path)
+    queries = ["契税 成交价格", "公积金 额度", "增值税 住房"]
+    expected = cosine_similarity(retriever.kb_vectorizer.transform(queries), retriever.kb_tfidf_matrix)
+
+    batched = retriever.get_related_kb_chunks_batch(queries, k=2)
+
+    for row, chunks in zip(expected, batched):
+        ranked = [i for i in row.argsort()[::-1][:2] if row[i] > 0]
+        assert [c["完整路径"] for c in chunks[: len(ranked)]] == [retriever.kb_data[i]["完整路径"] for i in ranked]
+    assert batched[0] == retriever.get_related_kb_chunks(queries[0], k=2)
+
+
+def test_batch_exclusion_and_empty_queries(tmp_path):
+    retriever = _build_retriever(tmp_path)
+    batched = retriever.get_related_kb_chunks_batch(["契税 成交价格", ""], k=3, exclude_paths=["税费 > 契税"])
+    assert len(batched[0]) == 3
+    assert all(c["完整路径"] != "税费 > 契税" for c in batched[0])
+    assert batched[1] == []
+
+
+def test_history_batch_checks(tmp_path):
+    retriever = _build_retriever(tmp_path)
+    dup, miss, empty = retriever.is_similar_to_history_batch(["契税 计税依据 是 契税", "毫不相关 内容", ""], threshold=0.9)
+    assert dup[0] is True and dup[2] == "契税 计税依据 是"
+    assert miss[0] is False and miss[2] is None
+    assert empty == (False, None, None)
+    assert retriever.get_similar_examples_batch(["商业贷款 年限"], k=1, question_type="判断题")[0][0]["题干"] == "商业贷款 最长 年限"
@@ -0,0 +1,69 @@
+import exam_graph
+from slice_context_cache import SliceContextCache, slice_context_cache_for
+
+
+class _Retriever:
+    def __init__(self):
+        self.calls = 0
+        self.kb_path = "kb.jsonl"
+
+    def get_parent_slices(self, kb_chunk):
+        self.calls += 1
+        return [{"完整路径": "第一篇", "核心内容": "父切片"}]
+
+    def get_related_kb_chunks_batch(self, query_texts, k=5, exclude_paths=None):
+        return [[{"完整路径": "第一篇 > 相邻", "核心内容": "相似"}] for _ in query_texts]
+
+    def get_related_kb_chunks(self, query_text, k=5, exclude_paths=None):
+        return []
+
+
+def _chunk(content="契税按计税价格的1%缴纳。"):
+    return {"完整路径": "第一篇 > 契税", "核心内容": content, "结构化内容": {}, "metadata": {}}
+
+
+def test_extended_context_is_memoised_per_retriever_slice_and_examples():
+    retriever = _Retriever()
+    first = exam_graph.build_extended_kb_context(_chunk(), retriever, [])
+    first[1].append({"完整路径": "mutated"})
+    again = exam_graph.build_extended_kb_context(_chunk(), retriever, [])
+    assert retriever.calls == 1 and len(again[1]) == 1 and again[0] == first[0]
+
+    exam_graph.build_extended_kb_context(_chunk(), retriever, [{"题干": "母题", "解析": "解析"}])
+    exam_graph.build_extended_kb_context(_chunk("契税税率调整为3%。"), retriever, [])
+    assert retriever.calls == 3
+    stats = slice_context_cache_for(retriever).stats()["kinds"]["extended_kb_context"]
+    assert stats == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+
+
+def test_warm_then_term_locks_follow_glossary_changes(monkeypatch):
+    glossary = {"terms": ["契税"], "terms_by_category": {"税种": ["契税"]}}
+    monkeypatch.setattr(exam_graph, "_GLOSSARY_CACHE", glossary)
+    retriever = _Retriever()
+    exam_graph.warm_slice_context([_chunk()], retriever)
+    assert retriever.calls == 1
+    exam_graph.build_extended_kb_context(_chunk(), retriever, [])
+    assert retriever.calls == 1
+    assert exam_graph.detect_term_locks_from_kb(_chunk()) == ["契税"]
+
+    monkeypatch.setattr(exam_graph, "_GLOSSARY_CACHE", {"terms": [], "terms_by_category": {}})
+    assert exam_graph.detect_term_locks_from_kb(_chunk()) == []
+
+
+def test_cache_evicts_lru_and_does_not_cache_failures():
+    cache = SliceContextCache("t", max_entries=2)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_compute("k", key, lambda key=key: key.upper())
+    assert cache.stats()["entries"] == 2
+    calls = []
+    assert cache.get_or_compute("k", "b", lambda: calls.append(1) or "B") == "B" and calls == [1]
+
+    def _boom():
+        raise ValueError("x")
+
+    for _ in range(2):
+        try:
+            cache.get_or_compute("k", "d", _boom)
+        except ValueError:
+            pass
+    assert cache.stats()["kinds"]["k"]["misses"] == 6
@@ -0,0 +1,83 @@
+import json
+
+import admin_api
+from admin_api import app
+from task_progress_broker import TaskProgressBroker
+
+
+def _events(body):
+    out = []
+    for chunk in body.split("\n\n"):
+        lines = chunk.strip().splitlines()
+        if lines and lines[0].startswith("event: "):
+            out.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return out
+
+
+def test_stream_sends_snapshot_then_deltas_until_end(monkeypatch):
+    monkeypatch.setattr(admin_api, "GEN_TASKS", {})
+    monkeypatch.setattr(admin_api, "TASK_PROGRESS_BROKER", TaskProgressBroker())
+    admin_api.GEN_TASKS["t1"] = {"task_id": "t1", "tenant_id": "hz", "status": "running", "process_trace": [{"index": 1, "steps": []}]}
+    admin_api._update_task_live("hz", "t1", {"generated_count": 0})  # nobody watching yet
+
+    client = app.test_client()
+    resp = client.get("/api/hz/generate/tasks/t1/events", headers={"X-System-User": "admin"}, buffered=False)
+    assert resp.status_code == 200 and resp.mimetype == "text/event-stream"
+    admin_api._update_task_live("hz", "t1", {"generated_count": 1}, [{"index": 2, "steps": [{"seq": 1, "message": "m"}]}])
+    admin_api._update_task_live("hz", "t1", {"status": "completed"})
+    events = _events(resp.get_data(as_text=True))
+
+    assert [name for name, _ in events] == ["snapshot", "progress", "progress", "end"]
+    assert events[0][1]["task"]["generated_count"] == 0
+    assert events[1][1]["patch"]["generated_count"] == 1
+    assert [row["index"] for row in events[1][1]["trace"]] == [2]
+    assert events[3][1]["status"] == "completed"
+    assert admin_api.TASK_PROGRESS_BROKER.subscriber_count() == 0
+
+
+def test_lagged_subscriber_is_resynced_and_finished_tasks_close_immediately(tmp_path, monkeypatch):
+    monkeypatch.setattr(admin_api, "GEN_TASKS", {})
+    monkeypatch.setattr(admin_api, "TASK_PROGRESS_BROKER", TaskProgressBroker(max_pending=1))
+    admin_api.GEN_TASKS["t1"] = {"task_id": "t1", "tenant_id": "hz", "status": "running"}
+    client = app.test_client()
+    resp = client.get("/api/hz/generate/tasks/t1/events", headers={"X-System-User": "admin"}, buffered=False)
+    for i in range(3):
+        admin_api._update_task_live("hz", "t1", {"generated_count": i})
+    admin_api.GEN_TASKS["t1"]["status"] = "cancelled"
+    monkeypatch.setattr(admin_api, "_TASK_PROGRESS_HEARTBEAT_SECONDS", 0.01)
+    events = _events(resp.get_data(as_text=True))
+    assert [name for name, _ in events] == ["snapshot", "snapshot", "end"]
+    assert events[1][1]["task"]["generated_count"] == 2
+
+    monkeypatch.setattr(admin_api, "_qa_dir", lambda _tenant_id: tmp_path)
+    (tmp_path / "gen_task_snapshots").mkdir()
+    admin_api._persist_gen_task_snapshot_file("hz", {"task_id": "t2", "tenant_id": "hz", "status": "completed"})
+    done = client.get("/api/hz/generate/tasks/t2/events", headers={"X-System-User": "admin"})
+    assert [name for name, _ in _events(done.get_data(as_text=True))] == ["snapshot", "end"]
+    assert client.get("/api/hz/generate/tasks/nope/events", headers={"X-System-User": "admin"}).status_code == 404
+
+
+def test_list_stream_pushes_top_level_rows_and_ends_when_nothing_runs(monkeypatch):
+    monkeypatch.setattr(admin_api, "GEN_TASKS", {})
+    monkeypatch.setattr(admin_api, "TASK_LIST_BROKER", TaskProgressBroker())
+    client = app.test_client()
+    idle = client.get("/api/hz/generate/tasks/events", headers={"X-System-User": "admin"})
+    assert [name for name, _ in _events(idle.get_data(as_text=True))] == ["snapshot", "end"]
+
+    admin_api.GEN_TASKS["p1"] = {"task_id": "p1", "tenant_id": "hz", "status": "running", "subtasks": []}
+    admin_api.GEN_TASKS["c1"] = {"task_id": "c1", "tenant_id": "hz", "status": "running", "parent_task_id": "p1"}
+    admin_api.GEN_TASKS["x1"] = {"task_id": "x1", "tenant_id": "other", "status": "running"}
+    resp = client.get("/api/hz/generate/tasks/events", headers={"X-System-User": "admin"}, buffered=False)
+    assert resp.status_code == 200 and resp.mimetype == "text/event-stream"
+    admin_api._update_task_live("other", "x1", {"generated_count": 5})
+    admin_api._update_task_live("hz", "c1", {"generated_count": 1})
+    admin_api._update_task_live("hz", "p1", {"generated_count": 2, "status": "completed"})
+    admin_api.GEN_TASKS["c1"]["status"] = "completed"
+    monkeypatch.setattr(admin_api, "_TASK_PROGRESS_HEARTBEAT_SECONDS", 0.01)
+    events = _events(resp.get_data(as_text=True))
+
+    assert [name for name, _ in events] == ["snapshot", "task", "task", "end"]
+    assert [row["task_id"] for row in events[0][1]["items"]] == ["p1"]
+    assert [data["task"]["task_id"] for _, data in events[1:3]] == ["p1", "p1"]
+    assert events[2][1]["task"]["status"] == "completed" and events[2][1]["task"]["generated_count"] == 2
+    assert admin_api.TASK_LIST_BROKER.subscriber_count() == 0
@@ -0,0 +1,24 @@
+import random
+
+import exam_graph
+from term_matcher import TermMatcher, looks_like_substitution
+
+
+def test_automaton_reports_overlapping_terms():
+    matcher = TermMatcher(["套内建筑面积", "建筑面积", "面积", "商业贷款", "商贷"])
+    assert matcher.find_terms("客户咨询套内建筑面积与商贷") == {"套内建筑面积", "建筑面积", "面积", "商贷"}
+    assert matcher.find_terms_ordered("商业贷款和建筑面积") == ["建筑面积", "面积", "商业贷款"]
+    assert matcher.find_terms("") == set()
+
+
+def test_automaton_and_substitution_table_match_naive_scan():
+    glossary = exam_graph._build_glossary_cache()
+    terms = glossary["terms"]
+    matcher = exam_graph._glossary_matcher(glossary)
+    rng = random.Random(7)
+    for _ in range(50):
+        text = "".join(rng.choice(terms) + rng.choice(["", "的", "和", "于"]) for _ in range(6))
+        text = text[rng.randint(0, 3):]
+        assert matcher.find_terms_ordered(text) == [t for t in terms if t in text]
+    for lock in terms:
+        assert matcher.substitutes_of(lock) == {t for t in terms if looks_like_substitution(lock, t)}
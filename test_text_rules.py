@@ -0,0 +1,85 @@
+import re
+
+import pytest
+
+import exam_graph
+from text_rules import RuleSet, TextRule, keyword_rules, naive_scan
+
+
+_TEXTS = [
+    "",
+    "客户王明委托经纪人张伟购买一套商品房，以下表述正确的是（　）。",
+    "李女士委托小张出售房屋，张某私自收取定金，下列说法错误的是（　）。",
+    "小区业主委员会在小学旁设立小型驿站。",
+    "王先生向经纪人小李咨询，客户小宝后续将签约，张三和贝贝陪同。",
+    "某某公司与业主签订独家委托协议，某某未按约定支付佣金。",
+    "请判断该经纪人的做法是否合规（　）",
+]
+
+
+def test_rule_set_matches_per_rule_search_in_table_order():
+    rules = [
+        TextRule("digits", r"\d+"),
+        TextRule("ci", r"abc", flags=re.IGNORECASE),
+        *keyword_rules("kw", ["违规", "事故"]),
+    ]
+    rule_set = RuleSet("t", rules)
+    for text in ["", "ABC 12", "发生事故并违规", "nothing"]:
+        assert rule_set.codes(text) == naive_scan(rules)(text)
+        assert rule_set.any(text) == bool(naive_scan(rules)(text))
+
+
+def test_rule_set_rejects_duplicate_codes_and_backreferences():
+    with pytest.raises(ValueError):
+        RuleSet("dup", [TextRule("a", "x"), TextRule("a", "y")])
+    with pytest.raises(ValueError):
+        RuleSet("backref", [TextRule("a", r"(x)\1")])
+
+
+@pytest.mark.parametrize(
+    "rule_set",
+    [exam_graph._NAME_STYLE_RULES, exam_graph._ANONYMOUS_PERSON_RULES, exam_graph._JUDGEMENT_STEM_RULES],
+)
+def test_exam_graph_rule_tables_agree_with_naive_scan(rule_set):
+    naive = naive_scan(rule_set.rules)
+    for text in _TEXTS:
+        assert rule_set.codes(text) == naive(text)
+
+
+def test_name_style_rules_keep_validator_messages():
+    issues = exam_graph._name_violations_in_text(_TEXTS[4])
+    assert "使用了“姓+女士/先生”" in issues
+    assert "使用了“小+姓氏”称谓" in issues
+    assert "使用了小名/乳名" in issues
+    assert {"使用了不规范姓名：张三", "使用了不规范姓名：贝贝", "使用了不规范姓名：小宝"} <= set(issues)
+    assert exam_graph._name_violations_in_text(_TEXTS[3]) == []
+    assert exam_graph._contains_anonymous_person_reference(_TEXTS[5])
+    assert not exam_graph._contains_anonymous_person_reference(_TEXTS[3])
+    assert exam_graph._is_judgement_style_stem(_TEXTS[6])
+    assert exam_graph._has_negative_event_context("发生交易事故")
+
+
+def test_critic_issue_type_rules_agree_with_naive_scan():
+    rule_set = exam_graph._CRITIC_ISSUE_TYPE_RULES
+    naive = naive_scan(rule_set.rules)
+    for text in _TEXTS + ["干扰项过弱且解析缺少依据", "计算结果与材料不一致"]:
+        assert rule_set.codes(text) == naive(text)
+
+
+def test_format_validators_return_issue_codes_with_legacy_messages():
+    final_json = {
+        "题干": "王先生购买住房时应缴纳的契税为（　）",
+        "选项1": "1万元。",
+        "选项2": "2万元",
+        "选项3": "3万元",
+        "正确答案": "AB",
+    }
+    issues = exam_graph.validate_critic_format_issues(final_json, "单选题")
+    codes = [issue["issue_code"] for issue in issues]
+    assert {"FMT_OPTION_COUNT", "FMT_STEM_END_PUNCT", "FMT_OPTION_END_PUNCT", "ANS_FORMAT"} <= set(codes)
+    assert any(code.startswith("NAME_STYLE") for code in codes)
+    assert all(issue["message"] and issue["field"] for issue in issues)
+    assert exam_graph.validate_critic_format(final_json, "单选题") == [issue["message"] for issue in issues]
+
+    media = exam_graph.validate_media_issues("见下图 ![图](a.png)", [], "<table><tr><td>1</td></tr></table>")
+    assert [(issue["issue_code"], issue["field"]) for issue in media] == [("HARD_IMAGE", "question"), ("HARD_TABLE", "explanation")]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+_SCOPED_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+@dataclass(frozen=True)
+class TextRule:
+    """One declarative check: `code` is the stable issue id, `message` the user-facing text."""
+
+    code: str
+    pattern: str
+    message: str = ""
+    flags: int = 0
+
+
+def _scoped(rule: TextRule) -> str:
+    letters = "".join(letter for flag, letter in _SCOPED_FLAGS if rule.flags & flag)
+    return f"(?{letters}:{rule.pattern})" if letters else f"(?:{rule.pattern})"
+
+
+class RuleSet:
+    """
+    A table of TextRules compiled once at import.
+
+    All rules are also joined into one alternation, so a clean text (the common case) costs a
+    single regex pass no matter how many rules the table has; only when that pass hits are the
+    rules evaluated one by one, which keeps results identical to running each rule's re.search.
+    """
+
+    def __init__(self, name: str, rules: Sequence[TextRule]) -> None:
+        self.name = name
+        self.rules = tuple(rules)
+        codes = [r.code for r in self.rules]
+        if len(codes) != len(set(codes)):
+            raise ValueError(f"duplicate rule code in {name}")
+        for rule in self.rules:
+            if _BACKREF_RE.search(rule.pattern):
+                raise ValueError(f"rule {rule.code} uses a backreference and cannot be combined")
+        self._compiled = [re.compile(r.pattern, r.flags) for r in self.rules]
+        self._combined = re.compile("|".join(_scoped(r) for r in self.rules)) if self.rules else None
+
+    def any(self, text: str) -> bool:
+        return bool(self._combined is not None and text and self._combined.search(text))
+
+    def scan(self, text: str) -> List[TextRule]:
+        """Rules that match `text`, in table order."""
+        if not self.any(text):
+            return []
+        return [rule for rule, compiled in zip(self.rules, self._compiled) if compiled.search(text)]
+
+    def codes(self, text: str) -> List[str]:
+        return [r.code for r in self.scan(text)]
+
+    def messages(self, text: str) -> List[str]:
+        return [r.message for r in self.scan(text)]
+
+
+def keyword_rules(prefix: str, keywords: Iterable[str], message: str = "") -> List[TextRule]:
+    """Literal keyword rules (escaped), e.g. for `any(k in text for k in KEYWORDS)` checks."""
+    return [TextRule(f"{prefix}:{k}", re.escape(k), message.format(keyword=k) if message else "") for k in keywords]
+
+
+def benchmark(
+    funcs: Dict[str, Callable[[str], Any]],
+    texts: Sequence[str],
+    *,
+    repeat: int = 200,
+) -> List[Dict[str, Any]]:
+    """Micro-benchmark: mean microseconds per text for each callable over the same corpus."""
+    out = []
+    for name, func in funcs.items():
+        for text in texts:
+            func(text)
+        started = time.perf_counter()
+        for _ in range(max(1, repeat)):
+            for text in texts:
+                func(text)
+        elapsed = time.perf_counter() - started
+        out.append({"name": name, "us_per_text": round(elapsed / (max(1, repeat) * max(1, len(texts))) * 1e6, 3)})
+    return out
+
+
+def naive_scan(rules: Sequence[TextRule]) -> Callable[[str], List[str]]:
+    """Baseline for `benchmark`: one uncompiled re.search per rule, as the inline checks used to do."""
+
+    def _scan(text: str) -> List[str]:
+        return [r.code for r in rules if re.search(r.pattern, text, r.flags)]
+
+    return _scan
+
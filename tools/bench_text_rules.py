@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from exam_graph import (
+    _ANONYMOUS_PERSON_RULES,
+    _JUDGEMENT_STEM_RULES,
+    _NAME_STYLE_RULES,
+    validate_name_usage,
+    validate_writer_format,
+)
+from text_rules import benchmark, naive_scan
+
+SAMPLE_TEXTS = [
+    "客户王明委托经纪人张伟购买一套商品房，以下表述正确的是（　）。",
+    "经纪人在带看前应当核验房源信息，并向客户说明交易流程与税费构成。",
+    "根据相关规定，出卖人应当在签订认购书后7日内办理网签手续。",
+    "李女士委托小张出售房屋，张某私自收取定金，下列说法错误的是（　）。",
+    "某某公司与业主签订独家委托协议，约定委托期限为90天。",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare precompiled rule tables with per-call re.search on sample stems.")
+    parser.add_argument("--repeat", type=int, default=500, help="Passes over the sample corpus per callable")
+    parser.add_argument("--file", default="", help="Optional UTF-8 file, one text per line, instead of the built-in samples")
+    args = parser.parse_args()
+    texts = SAMPLE_TEXTS
+    if args.file:
+        texts = [line.strip() for line in Path(args.file).read_text(encoding="utf-8").splitlines() if line.strip()]
+    funcs = {}
+    for rule_set in (_NAME_STYLE_RULES, _ANONYMOUS_PERSON_RULES, _JUDGEMENT_STEM_RULES):
+        funcs[f"{rule_set.name}.scan"] = rule_set.codes
+        funcs[f"{rule_set.name}.naive"] = naive_scan(rule_set.rules)
+    options = ["办理网签", "缴纳契税", "支付定金", "核验房源"]
+    funcs["validate_name_usage"] = lambda text: validate_name_usage(text, options, text)
+    funcs["validate_writer_format"] = lambda text: validate_writer_format(text, options, "A", "单选题")
+    print(json.dumps({"texts": len(texts), "results": benchmark(funcs, texts, repeat=args.repeat)}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from admin_api import (
+    _maintenance_tenant_ids,
+    rebuild_bank_origin_index,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill the materialised bank origin index from qa_runs.jsonl.")
+    parser.add_argument("--tenant", action="append", default=[], help="Tenant id (repeatable); default all active tenants")
+    args = parser.parse_args()
+    for tenant_id in args.tenant or _maintenance_tenant_ids():
+        index = rebuild_bank_origin_index(tenant_id)
+        print(
+            json.dumps(
+                {
+                    "tenant_id": tenant_id,
+                    "runs": index["run_count"],
+                    "keys": len(index["lookup"]) - 1,
+                },
+                ensure_ascii=False,
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
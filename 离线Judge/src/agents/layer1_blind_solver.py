@@ -12,7 +12,7 @@ from typing import Any
 from langchain_core.prompts import ChatPromptTemplate
 
 from src.agents.safe_python_runner import execute_code
-from src.llm import ReliableLLMClient, build_llm, resolve_ait_base_url, get_observability
+from src.llm import ReliableLLMClient, build_llm, resolve_ait_base_url, get_observability, note_parse_failure
 from src.prompt_loader import load_prompt_pair
 from src.schemas.evaluation import QuestionInput, SemanticDrift, SolverValidation
 
@@ -762,6 +762,7 @@ def layer1_blind_solver_agent(
             parse_ok = True
 
     if not parse_ok:
+        note_parse_failure()
         obs = get_observability()
         score = 0
         predicted_answer = "NONE"
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 import ast
+import atexit
 import json
+import os
 import subprocess
 import tempfile
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
+try:
+    import select
+except ImportError:  # pragma: no cover
+    select = None
+
 FORBIDDEN_IMPORTS = {
     "os",
     "sys",
@@ -53,6 +62,261 @@ def static_check(code: str) -> list[str]:
     return issues
 
 
+_PYTHON = "python"
+
+# 池化 worker 会预先注入 __judge_emit；逐次起进程时才在片段里定义
+_EMIT_PRELUDE = (
+    "if '__judge_emit' not in globals():\n"
+    "    def __judge_emit(payload):\n"
+    "        print(json.dumps(payload, ensure_ascii=False))\n"
+)
+
+# 常驻 worker：每个请求是一行 JSON {"script": ...}，在全新的 globals（含 builtins 副本）里执行，
+# 捕获 stdout/stderr 后回一行 JSON。协议走 dup 出来的 fd，原 fd 0/1 指向 devnull，用户代码写不到协议通道；
+# __judge_emit 由 worker 注入，只用启动时绑定的 json.dumps，不受代码片段改写 json 模块影响。
+# 执行期间新导入的模块在结束后移出 sys.modules；启动时已加载的模块（含 __main__ 与其中定义的类）
+# 做浅快照，任何一次执行改动了它们（如 `json.dumps = ...`）即回报 tainted，由父进程回收该 worker，
+# 保证与逐次起进程一样，一段代码的副作用不会影响下一题。
+_WORKER_SOURCE = r"""
+import builtins, contextlib, io, json, os, sys, traceback
+import datetime, decimal, fractions, math, re, statistics
+_dumps, _loads, _StringIO = json.dumps, json.loads, io.StringIO
+_redirect_stdout, _redirect_stderr, _format_exc = contextlib.redirect_stdout, contextlib.redirect_stderr, traceback.format_exc
+_exec, _compile, _set, _dict, _vars, _isinstance, _type = exec, compile, set, dict, vars, isinstance, type
+_proto_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+_proto_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+_null = os.open(os.devnull, os.O_RDWR)
+os.dup2(_null, 0)
+os.dup2(_null, 1)
+_builtins = dict(builtins.__dict__)
+
+
+def _snapshot():
+    snap = []
+    for name, mod in list(sys.modules.items()):
+        d = getattr(mod, "__dict__", None)
+        if not _isinstance(d, _dict):
+            continue
+        snap.append((sys.modules, name, mod))
+        snap.append((d, None, _dict(d)))
+        for value in list(d.values()):
+            if _isinstance(value, _type) and getattr(value, "__module__", None) == name:
+                snap.append((value, None, _dict(_vars(value))))
+    return snap
+
+
+def _changed(snap):
+    for owner, key, expected in snap:
+        if key is not None:
+            if owner.get(key) is not expected:
+                return True
+            continue
+        current = _vars(owner) if _isinstance(owner, _type) else owner
+        if len(current) != len(expected):
+            return True
+        for k, v in expected.items():
+            if current.get(k, _snapshot) is not v:
+                return True
+    return False
+
+
+def _serve():
+    # 循环变量都是函数局部量，__main__ 的模块字典在快照后保持不变
+    baseline = _snapshot()
+    baseline_modules = _set(sys.modules)
+    for line in _proto_in:
+        script = _loads(line)["script"]
+        out, err, code = _StringIO(), _StringIO(), 0
+        write = out.write
+
+        def __judge_emit(payload):
+            write(_dumps(payload, ensure_ascii=False) + "\n")
+
+        try:
+            with _redirect_stdout(out), _redirect_stderr(err):
+                _exec(
+                    _compile(script, "snippet.py", "exec"),
+                    {"__name__": "__main__", "__builtins__": _dict(_builtins), "__judge_emit": __judge_emit},
+                )
+        except SystemExit as e:
+            code = e.code if _isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            err.write(_format_exc())
+            code = 1
+        for name in _set(sys.modules) - baseline_modules:
+            sys.modules.pop(name, None)
+        tainted = _changed(baseline)
+        _proto_out.write(
+            _dumps({"returncode": code, "stdout": out.getvalue(), "stderr": err.getvalue(), "tainted": tainted}) + "\n"
+        )
+        _proto_out.flush()
+
+
+_serve()
+"""
+
+
+def _run_script_subprocess(script: str, timeout_seconds: float) -> tuple[int, str, str] | None:
+    with tempfile.TemporaryDirectory(prefix="judge_code_") as td:
+        p = Path(td) / "snippet.py"
+        p.write_text(script, encoding="utf-8")
+        try:
+            proc = subprocess.run(
+                [_PYTHON, "-I", str(p)],
+                capture_output=True,
+                text=True,
+                timeout=timeout_seconds,
+            )
+        except subprocess.TimeoutExpired:
+            return None
+    return proc.returncode, proc.stdout, proc.stderr
+
+
+class _CodeWorker:
+    def __init__(self) -> None:
+        self.proc = subprocess.Popen(
+            [_PYTHON, "-I", "-c", _WORKER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        self.tasks = 0
+        self.tainted = False
+        self._buf = b""
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+        for fh in (self.proc.stdin, self.proc.stdout):
+            try:
+                fh.close()
+            except OSError:
+                pass
+
+    def run(self, script: str, timeout_seconds: float) -> tuple[int, str, str]:
+        """Raises TimeoutError on timeout and EOFError if the worker died."""
+        deadline = time.monotonic() + timeout_seconds
+        self.tasks += 1
+        self.proc.stdin.write((json.dumps({"script": script}, ensure_ascii=False) + "\n").encode("utf-8"))
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self._buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError
+            self._buf += chunk
+        line, _, self._buf = self._buf.partition(b"\n")
+        data = json.loads(line.decode("utf-8"))
+        self.tainted = bool(data.get("tainted"))
+        return int(data["returncode"]), str(data["stdout"]), str(data["stderr"])
+
+
+class CodeWorkerPool:
+    """预启动的沙箱解释器池：超时/崩溃/改动了已加载模块的 worker 直接杀掉，执行满 max_tasks 次也换新，避免状态累积。"""
+
+    def __init__(self, size: int, *, max_tasks: int = 200) -> None:
+        self.size = max(1, int(size))
+        self.max_tasks = max(1, int(max_tasks))
+        self._cond = threading.Condition()
+        self._idle: list[_CodeWorker] = []
+        self._count = 0
+        self._closed = False
+        self.recycled = 0
+        for _ in range(self.size):
+            self._idle.append(_CodeWorker())
+            self._count += 1
+
+    def _acquire(self) -> _CodeWorker:
+        with self._cond:
+            while not self._idle and self._count >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._count += 1
+        try:
+            return _CodeWorker()
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker: _CodeWorker, *, healthy: bool) -> None:
+        if healthy and not worker.tainted and worker.alive() and worker.tasks < self.max_tasks and not self._closed:
+            with self._cond:
+                self._idle.append(worker)
+                self._cond.notify()
+            return
+        worker.kill()
+        replacement = None
+        if not self._closed:
+            try:
+                replacement = _CodeWorker()  # 保持池子是热的，下一次调用不用等解释器启动
+            except Exception:
+                replacement = None
+        with self._cond:
+            self.recycled += 1
+            if replacement is not None:
+                self._idle.append(replacement)
+            else:
+                self._count -= 1
+            self._cond.notify()
+
+    def run(self, script: str, timeout_seconds: float) -> tuple[int, str, str] | None:
+        """Same contract as a one-shot `python -I snippet.py`: (returncode, stdout, stderr); None on timeout."""
+        worker = self._acquire()
+        healthy = False
+        try:
+            out = worker.run(script, timeout_seconds)
+            healthy = True
+            return out
+        except TimeoutError:
+            return None
+        except (EOFError, OSError, ValueError):
+            return worker.proc.poll() or -1, "", "代码执行进程异常退出"
+        finally:
+            self._release(worker, healthy=healthy)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for worker in idle:
+            worker.kill()
+
+
+_POOL: CodeWorkerPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_code_worker_pool() -> CodeWorkerPool | None:
+    """JUDGE_CODE_POOL_SIZE=0 或平台不支持 select 时返回 None，退回逐次起子进程。"""
+    global _POOL
+    size = int(os.getenv("JUDGE_CODE_POOL_SIZE", "2") or 0)
+    if size <= 0 or select is None or os.name != "posix":
+        return None
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = CodeWorkerPool(size, max_tasks=int(os.getenv("JUDGE_CODE_WORKER_MAX_TASKS", "200") or 200))
+            atexit.register(_POOL.close)
+        return _POOL
+
+
+def _run_script(script: str, timeout_seconds: float) -> tuple[int, str, str] | None:
+    pool = get_code_worker_pool()
+    if pool is None:
+        return _run_script_subprocess(script, timeout_seconds)
+    return pool.run(script, timeout_seconds)
+
+
 def execute_code(code: str, *, timeout_seconds: float = 2.5) -> dict[str, Any]:
     """Execute code in isolated subprocess.
 
@@ -66,31 +330,22 @@ def execute_code(code: str, *, timeout_seconds: float = 2.5) -> dict[str, Any]:
 
     wrapper = (
         "import json\n"
-        "def __judge_emit(payload):\n"
-        "    print(json.dumps(payload, ensure_ascii=False))\n"
-        "try:\n"
+        + _EMIT_PRELUDE
+        + "try:\n"
         + "\n".join(f"    {line}" for line in code.splitlines())
         + "\nexcept Exception as e:\n"
         "    __judge_emit({'ok': False, 'error': str(e)})\n"
     )
 
-    with tempfile.TemporaryDirectory(prefix="judge_code_") as td:
-        p = Path(td) / "snippet.py"
-        p.write_text(wrapper, encoding="utf-8")
-        try:
-            proc = subprocess.run(
-                ["python", "-I", str(p)],
-                capture_output=True,
-                text=True,
-                timeout=timeout_seconds,
-            )
-        except subprocess.TimeoutExpired:
-            return {"ok": False, "issues": [f"代码执行超时({timeout_seconds}s)"]}
+    outcome = _run_script(wrapper, timeout_seconds)
+    if outcome is None:
+        return {"ok": False, "issues": [f"代码执行超时({timeout_seconds}s)"]}
+    returncode, stdout, stderr = outcome
 
-    if proc.returncode != 0 and not proc.stdout.strip():
-        return {"ok": False, "issues": [f"代码执行失败: {proc.stderr.strip() or proc.returncode}"]}
+    if returncode != 0 and not stdout.strip():
+        return {"ok": False, "issues": [f"代码执行失败: {stderr.strip() or returncode}"]}
 
-    lines = [x.strip() for x in proc.stdout.splitlines() if x.strip()]
+    lines = [x.strip() for x in stdout.splitlines() if x.strip()]
     if not lines:
         return {"ok": False, "issues": ["代码未输出可解析结果(JSON)"]}
 
@@ -117,9 +372,8 @@ def execute_generate_possible_answers(
     wrapper = (
         "import json\n"
         f"CONTEXT = {json.dumps(context, ensure_ascii=False)}\n"
-        "def __judge_emit(payload):\n"
-        "    print(json.dumps(payload, ensure_ascii=False))\n"
-        "try:\n"
+        + _EMIT_PRELUDE
+        + "try:\n"
         + "\n".join(f"    {line}" for line in code.splitlines())
         + "\n    fn = locals().get('generate_possible_answers')\n"
         "    if not callable(fn):\n"
@@ -131,23 +385,15 @@ def execute_generate_possible_answers(
         "    __judge_emit({'ok': False, 'error': str(e)})\n"
     )
 
-    with tempfile.TemporaryDirectory(prefix="judge_code_") as td:
-        p = Path(td) / "snippet.py"
-        p.write_text(wrapper, encoding="utf-8")
-        try:
-            proc = subprocess.run(
-                ["python", "-I", str(p)],
-                capture_output=True,
-                text=True,
-                timeout=timeout_seconds,
-            )
-        except subprocess.TimeoutExpired:
-            return {"ok": False, "issues": [f"代码执行超时({timeout_seconds}s)"]}
+    outcome = _run_script(wrapper, timeout_seconds)
+    if outcome is None:
+        return {"ok": False, "issues": [f"代码执行超时({timeout_seconds}s)"]}
+    returncode, stdout, stderr = outcome
 
-    if proc.returncode != 0 and not proc.stdout.strip():
-        return {"ok": False, "issues": [f"代码执行失败: {proc.stderr.strip() or proc.returncode}"]}
+    if returncode != 0 and not stdout.strip():
+        return {"ok": False, "issues": [f"代码执行失败: {stderr.strip() or returncode}"]}
 
-    lines = [x.strip() for x in proc.stdout.splitlines() if x.strip()]
+    lines = [x.strip() for x in stdout.splitlines() if x.strip()]
     if not lines:
         return {"ok": False, "issues": ["代码未输出可解析结果(JSON)"]}
 
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -12,7 +14,7 @@ from typing import Any
 from dotenv import load_dotenv
 from langchain_core.runnables import RunnableLambda
 
-from src.llm import build_llm
+from src.llm import build_llm, configure_provider_rate_limit
 from src.pipeline.graph import run_judge
 from src.schemas.evaluation import Decision, QuestionInput
 
@@ -130,39 +132,44 @@ def _progress(message: str) -> None:
     print(f"[batch_runner] {message}", file=sys.stderr, flush=True)
 
 
-def evaluate_golden(records: list[GoldenRecord], llm) -> dict:
-    reports = []
+def load_partial_reports(path: Path) -> dict[tuple[int, str], dict]:
+    """Reports already streamed to `path`, keyed by (record index, question_id); torn lines are skipped."""
+    done: dict[tuple[int, str], dict] = {}
+    if not path.exists():
+        return done
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(row, dict) and isinstance(row.get("report"), dict):
+            done[(int(row.get("index", 0)), str(row.get("question_id", "")))] = row["report"]
+    return done
+
+
+def _compute_metrics(records: list[GoldenRecord], decisions: list[Decision]) -> dict:
     correct = 0
     with_expected = 0
-
     tp = tn = fp = fn = 0
-    total = len(records)
-    for idx, rec in enumerate(records, start=1):
-        started = time.perf_counter()
-        _progress(f"start {idx}/{total} question_id={rec.item.question_id}")
-        report = run_judge(rec.item, llm)
-        pred = report.decision
-        reports.append(report.model_dump())
-        elapsed = time.perf_counter() - started
-        _progress(f"done {idx}/{total} question_id={rec.item.question_id} decision={pred} elapsed={elapsed:.1f}s")
-
-        if rec.expected_decision is not None:
-            with_expected += 1
-            if pred == rec.expected_decision:
-                correct += 1
-
-            pred_pass = pred == Decision.PASS
-            exp_pass = rec.expected_decision == Decision.PASS
-            if pred_pass and exp_pass:
-                tp += 1
-            elif (not pred_pass) and (not exp_pass):
-                tn += 1
-            elif pred_pass and (not exp_pass):
-                fp += 1
-            else:
-                fn += 1
+    for rec, pred in zip(records, decisions):
+        if rec.expected_decision is None:
+            continue
+        with_expected += 1
+        if pred == rec.expected_decision:
+            correct += 1
 
-    metrics = {
+        pred_pass = pred == Decision.PASS
+        exp_pass = rec.expected_decision == Decision.PASS
+        if pred_pass and exp_pass:
+            tp += 1
+        elif (not pred_pass) and (not exp_pass):
+            tn += 1
+        elif pred_pass and (not exp_pass):
+            fp += 1
+        else:
+            fn += 1
+
+    return {
         "total": len(records),
         "labeled": with_expected,
         "accuracy": round(correct / with_expected, 4) if with_expected else None,
@@ -171,7 +178,74 @@ def evaluate_golden(records: list[GoldenRecord], llm) -> dict:
         "false_reject_rate": round(fn / (fn + tp), 4) if (fn + tp) else None,
     }
 
-    return {"metrics": metrics, "reports": reports}
+
+def evaluate_golden(
+    records: list[GoldenRecord],
+    llm,
+    *,
+    workers: int = 1,
+    stream_path: Path | None = None,
+    resume: bool = False,
+) -> dict:
+    """
+    Judge every record and compute metrics.
+
+    Up to `workers` records are judged concurrently. With `stream_path`, each report is appended
+    there as one JSONL line as soon as it finishes; with `resume`, records already in that file are
+    not judged again. Reports are returned in record order either way.
+    """
+    total = len(records)
+    reports: list[dict | None] = [None] * total
+    if stream_path is not None and resume:
+        done = load_partial_reports(stream_path)
+        for idx, rec in enumerate(records, start=1):
+            reports[idx - 1] = done.get((idx, rec.item.question_id))
+        _progress(f"resume: {sum(1 for r in reports if r is not None)}/{total} record(s) already judged")
+    elif stream_path is not None:
+        stream_path.parent.mkdir(parents=True, exist_ok=True)
+        stream_path.write_text("", encoding="utf-8")
+    todo = [idx for idx in range(1, total + 1) if reports[idx - 1] is None]
+
+    def _judge(idx: int) -> tuple[int, dict, float]:
+        rec = records[idx - 1]
+        started = time.perf_counter()
+        _progress(f"start {idx}/{total} question_id={rec.item.question_id}")
+        report = run_judge(rec.item, llm).model_dump(mode="json")
+        return idx, report, time.perf_counter() - started
+
+    def _record(idx: int, report: dict, elapsed: float) -> None:
+        rec = records[idx - 1]
+        reports[idx - 1] = report
+        if stream is not None:
+            stream.write(json.dumps({"index": idx, "question_id": rec.item.question_id, "report": report}, ensure_ascii=False) + "\n")
+            stream.flush()
+        _progress(
+            f"done {idx}/{total} question_id={rec.item.question_id} decision={report.get('decision')} elapsed={elapsed:.1f}s"
+        )
+
+    stream = stream_path.open("a", encoding="utf-8") if stream_path is not None else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as ex:
+            futures = {ex.submit(_judge, idx): idx for idx in todo}
+            try:
+                for fut in as_completed(futures):
+                    _record(*fut.result())
+            except BaseException:
+                # Fail fast like the serial run: drop queued records instead of spending LLM budget on them,
+                # but keep the reports of records already in flight so --resume does not judge them again.
+                ex.shutdown(wait=False, cancel_futures=True)
+                for fut in futures:
+                    if fut.cancelled() or fut.exception() is not None:
+                        continue
+                    if reports[futures[fut] - 1] is None:
+                        _record(*fut.result())
+                raise
+    finally:
+        if stream is not None:
+            stream.close()
+
+    decisions = [Decision(str(r.get("decision"))) for r in reports]
+    return {"metrics": _compute_metrics(records, decisions), "reports": reports}
 
 
 def main():
@@ -182,20 +256,39 @@ def main():
     parser.add_argument("--provider", choices=["openai", "anthropic", "ait"], default="openai")
     parser.add_argument("--model", default=None)
     parser.add_argument("--temperature", type=float, default=0)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("JUDGE_BATCH_WORKERS", "1") or 1), help="records judged concurrently")
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=float(os.getenv("JUDGE_BATCH_RPM", "0") or 0),
+        help="max LLM requests per minute per provider (0 = unlimited)",
+    )
+    parser.add_argument("--resume", action="store_true", help="skip records already in <output-dir>/reports.jsonl")
     args = parser.parse_args()
 
     load_dotenv()
     records = load_golden(args.input)
+    if args.rpm > 0:
+        # Also covers the auxiliary models the pipeline builds itself (quality / solver extract).
+        for provider in ("openai", "anthropic", "ait"):
+            configure_provider_rate_limit(provider, args.rpm)
     if args.mock_llm:
         llm = RunnableLambda(_mock_llm_response)
     else:
         llm = build_llm(provider=args.provider, model=args.model, temperature=args.temperature)
     _progress(
-        f"loaded {len(records)} record(s), provider={'mock' if args.mock_llm else args.provider}, input={args.input}"
+        f"loaded {len(records)} record(s), provider={'mock' if args.mock_llm else args.provider}, "
+        f"workers={args.workers}, rpm={args.rpm or 'unlimited'}, input={args.input}"
     )
 
-    result = evaluate_golden(records, llm)
     args.output_dir.mkdir(parents=True, exist_ok=True)
+    result = evaluate_golden(
+        records,
+        llm,
+        workers=args.workers,
+        stream_path=args.output_dir / "reports.jsonl",
+        resume=args.resume,
+    )
 
     (args.output_dir / "reports.json").write_text(
         json.dumps(result["reports"], ensure_ascii=False, indent=2), encoding="utf-8"
@@ -1,13 +1,20 @@
 """LLM helpers for robust structured generation."""
 
-from .client import ReliableLLMClient, get_observability, reset_observability
+from .client import ReliableLLMClient, get_observability, note_parse_failure, note_skipped_node, observe_node, reset_observability
 from .factory import build_llm
+from .rate_limit import RateLimitedLLM, RateLimiter, configure_provider_rate_limit
 from .ait_client import resolve_ait_api_key, resolve_ait_base_url, resolve_ait_model
 
 __all__ = [
+    "RateLimitedLLM",
+    "RateLimiter",
     "ReliableLLMClient",
     "build_llm",
+    "configure_provider_rate_limit",
     "get_observability",
+    "note_parse_failure",
+    "note_skipped_node",
+    "observe_node",
     "reset_observability",
     "resolve_ait_api_key",
     "resolve_ait_base_url",
@@ -4,34 +4,86 @@ import json
 import os
 import re
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
-from typing import Any
-
-_OBS = {
-    "prompt_tokens": 0,
-    "completion_tokens": 0,
-    "latency_ms": 0,
-    "calls": 0,
-    "failed_calls": 0,
-    "last_error": "",
-    "last_raw_response": "",
-    "last_raw_truncated": False,
-}
+from typing import Any, Iterator
+
+def _new_observability() -> dict[str, Any]:
+    return {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "latency_ms": 0,
+        "calls": 0,
+        "failed_calls": 0,
+        # 调用成功但输出无法解析、退回 fallback 的次数（invoke_json / 盲答解析）
+        "parse_failures": 0,
+        "last_error": "",
+        "last_raw_response": "",
+        "last_raw_truncated": False,
+        # 按图节点拆分的调用/耗时（observe_node 标记），以及成本调度跳过的节点和估算节省量
+        "nodes": {},
+        "skipped_nodes": [],
+        "saved_tokens_est": 0,
+        "saved_latency_ms_est": 0,
+    }
+
+
+# Counters are per context so questions judged concurrently (one per worker thread) do not
+# mix; graph nodes run in copies of the caller's context and therefore share its dict.
+_GLOBAL_OBS = _new_observability()
+_OBS_VAR: ContextVar[dict[str, Any] | None] = ContextVar("judge_llm_observability", default=None)
+_NODE_VAR: ContextVar[str] = ContextVar("judge_llm_node", default="")
+
+
+def _obs() -> dict[str, Any]:
+    current = _OBS_VAR.get()
+    return current if current is not None else _GLOBAL_OBS
 
 
 def reset_observability() -> None:
-    _OBS["prompt_tokens"] = 0
-    _OBS["completion_tokens"] = 0
-    _OBS["latency_ms"] = 0
-    _OBS["calls"] = 0
-    _OBS["failed_calls"] = 0
-    _OBS["last_error"] = ""
-    _OBS["last_raw_response"] = ""
-    _OBS["last_raw_truncated"] = False
+    _OBS_VAR.set(_new_observability())
 
 
 def get_observability() -> dict[str, Any]:
-    return dict(_OBS)
+    obs = _obs()
+    out = dict(obs)
+    # Graph nodes may still be writing from other threads; list(...) snapshots are atomic.
+    out["nodes"] = {k: dict(v) for k, v in list(obs["nodes"].items())}
+    out["skipped_nodes"] = list(obs["skipped_nodes"])
+    return out
+
+
+@contextmanager
+def observe_node(name: str) -> Iterator[None]:
+    """Attribute LLM calls made inside the block to graph node `name` (obs["nodes"][name])."""
+    token = _NODE_VAR.set(name)
+    try:
+        yield
+    finally:
+        _NODE_VAR.reset(token)
+
+
+def note_parse_failure() -> None:
+    """Record that a model reply could not be parsed and a fallback result was used instead."""
+    _obs()["parse_failures"] += 1
+
+
+def note_skipped_node(name: str, *, tokens_est: int = 0, latency_ms_est: int = 0) -> None:
+    """Record a graph node skipped by cost-aware scheduling and its estimated savings."""
+    obs = _obs()
+    obs["skipped_nodes"].append(name)
+    obs["saved_tokens_est"] += int(tokens_est)
+    obs["saved_latency_ms_est"] += int(latency_ms_est)
+
+
+def _node_obs(obs: dict[str, Any]) -> dict[str, Any] | None:
+    name = _NODE_VAR.get()
+    if not name:
+        return None
+    return obs["nodes"].setdefault(
+        name, {"calls": 0, "failed_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0}
+    )
 
 
 def _relax_json(s: str) -> str:
@@ -102,10 +154,17 @@ class ReliableLLMClient:
                 out = fut.result(timeout=self.timeout_seconds)
                 elapsed_ms = int((time.perf_counter() - start) * 1000)
                 prompt_tokens, completion_tokens = self._extract_usage(out)
-                _OBS["latency_ms"] += elapsed_ms
-                _OBS["prompt_tokens"] += prompt_tokens
-                _OBS["completion_tokens"] += completion_tokens
-                _OBS["calls"] += 1
+                obs = _obs()
+                obs["latency_ms"] += elapsed_ms
+                obs["prompt_tokens"] += prompt_tokens
+                obs["completion_tokens"] += completion_tokens
+                obs["calls"] += 1
+                node_obs = _node_obs(obs)
+                if node_obs is not None:
+                    node_obs["latency_ms"] += elapsed_ms
+                    node_obs["prompt_tokens"] += prompt_tokens
+                    node_obs["completion_tokens"] += completion_tokens
+                    node_obs["calls"] += 1
                 ex.shutdown(wait=False, cancel_futures=True)
                 return self._normalize_text(out)
             except FuturesTimeoutError as err:
@@ -120,8 +179,12 @@ class ReliableLLMClient:
                 # Exponential backoff to smooth transient provider/network jitter.
                 sleep_s = self.retry_backoff_seconds * (2**attempt)
                 time.sleep(sleep_s)
-        _OBS["failed_calls"] += 1
-        _OBS["last_error"] = str(last_err or "unknown_llm_error")
+        obs = _obs()
+        obs["failed_calls"] += 1
+        obs["last_error"] = str(last_err or "unknown_llm_error")
+        node_obs = _node_obs(obs)
+        if node_obs is not None:
+            node_obs["failed_calls"] += 1
         raise RuntimeError(f"LLM invocation failed after retries: {last_err}")
 
     def invoke_json(self, prompt_input: Any, *, fallback: dict[str, Any]) -> dict[str, Any]:
@@ -133,8 +196,10 @@ class ReliableLLMClient:
         parsed = _extract_json_block(raw)
         if not isinstance(parsed, dict):
             raw_text = str(raw or "")
-            _OBS["last_raw_response"] = raw_text
-            _OBS["last_raw_truncated"] = False
+            obs = _obs()
+            obs["last_raw_response"] = raw_text
+            obs["last_raw_truncated"] = False
+            obs["parse_failures"] += 1
             return fallback
 
         merged = dict(fallback)
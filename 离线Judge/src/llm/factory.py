@@ -4,6 +4,7 @@ import os
 from typing import Any
 
 from .ait_client import resolve_ait_api_key, resolve_ait_base_url, resolve_ait_model
+from .rate_limit import with_provider_rate_limit
 
 
 def build_llm(
@@ -14,7 +15,10 @@ def build_llm(
     api_key: str | None = None,
 ) -> Any:
     provider = provider.lower().strip()
+    return with_provider_rate_limit(provider, _build_chat_model(provider, model, temperature, api_key))
 
+
+def _build_chat_model(provider: str, model: str | None, temperature: float, api_key: str | None) -> Any:
     if provider == "openai":
         from langchain_openai import ChatOpenAI
 
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+
+class RateLimiter:
+    """Token bucket: at most `rpm` requests per minute, with bursts of up to `burst` requests."""
+
+    def __init__(self, rpm: float, *, burst: int | None = None) -> None:
+        self.rpm = float(rpm)
+        self.capacity = float(max(1, burst if burst is not None else min(10, int(self.rpm) or 1)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rpm / 60.0)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) * 60.0 / self.rpm
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimitedLLM:
+    """Wraps a chat model so every `invoke` first takes a token from the provider's limiter."""
+
+    def __init__(self, llm: Any, limiter: RateLimiter) -> None:
+        self.llm = llm
+        self.limiter = limiter
+
+    def invoke(self, input_value: Any, *args: Any, **kwargs: Any) -> Any:
+        self.limiter.acquire()
+        return self.llm.invoke(input_value, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+
+_LIMITERS: dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def configure_provider_rate_limit(provider: str, rpm: float | None) -> None:
+    """Set (rpm > 0) or clear the shared limit for one provider; applies to models built afterwards."""
+    key = str(provider or "").lower().strip()
+    with _LIMITERS_LOCK:
+        if rpm and float(rpm) > 0:
+            _LIMITERS[key] = RateLimiter(float(rpm))
+        else:
+            _LIMITERS.pop(key, None)
+
+
+def with_provider_rate_limit(provider: str, llm: Any) -> Any:
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(str(provider or "").lower().strip())
+    return RateLimitedLLM(llm, limiter) if limiter is not None else llm
@@ -8,6 +8,10 @@ LangGraph 并行与聚合行为说明（参考 LangGraph 文档）：
 - State 合并方式：各节点返回的 state 更新按 key 应用。未指定 reducer 的 key 采用覆盖策略
   （后写覆盖）。本图各并行节点写入不同 key（basic_rules→hard_rule_*，surface_a→realism/rigor/distractor，
   teaching_b→explanation/teaching，calc_branch→calculation），无并发写冲突。
+- 除 aggregate 外的各层节点都经 layer_cache.cached_layer 包装：配置 JUDGE_LAYER_CACHE_DIR 后，
+  同一题内容、同一提示词版本、同一模型的层结果直接复用，不再调用大模型。
+- schedule=cost_aware（或 JUDGE_SCHEDULE_MODE=cost_aware）时，知识门通过后先走确定性预检
+  node_deterministic_precheck，命中硬错时只 fan-out 到仍可能判 REJECT 的分支（见 scheduling.py）。
 """
 
 from __future__ import annotations
@@ -15,18 +19,31 @@ from __future__ import annotations
 from langgraph.graph import END, StateGraph
 
 from src.pipeline import graph as graph_nodes
-from src.pipeline.routes import route_after_layer1_blind_solver, route_after_layer2_knowledge_gate
+from src.pipeline.layer_cache import cached_layer
+from src.pipeline.routes import (
+    route_after_deterministic_precheck,
+    route_after_layer1_blind_solver,
+    route_after_layer2_cost_aware,
+    route_after_layer2_knowledge_gate,
+)
+from src.pipeline.scheduling import SCHEDULE_COST_AWARE, judge_schedule_mode, node_deterministic_precheck, tracked_node
 from src.pipeline.state import JudgeState
 
 
-def create_judge_graph():
+def _layer_node(name: str):
+    # 按名取节点（而非绑定函数对象），测试里替换 graph 模块上的节点函数同样生效
+    return tracked_node(cached_layer(getattr(graph_nodes, name), name), name)
+
+
+def create_judge_graph(schedule: str | None = None):
+    schedule = schedule or judge_schedule_mode()
     workflow = StateGraph(JudgeState)
-    workflow.add_node("node_layer3_basic_rules_gate", graph_nodes.node_layer3_basic_rules_gate)
-    workflow.add_node("node_layer1_blind_solver", graph_nodes.node_layer1_blind_solver)
-    workflow.add_node("node_layer2_knowledge_gate", graph_nodes.node_layer2_knowledge_gate)
-    workflow.add_node("node_layer3_surface_a", graph_nodes.node_layer3_surface_a)
-    workflow.add_node("node_layer3_teaching_b", graph_nodes.node_layer3_teaching_b)
-    workflow.add_node("node_layer3_calc_branch", graph_nodes.node_layer3_calc_branch)
+    workflow.add_node("node_layer3_basic_rules_gate", _layer_node("node_layer3_basic_rules_gate"))
+    workflow.add_node("node_layer1_blind_solver", _layer_node("node_layer1_blind_solver"))
+    workflow.add_node("node_layer2_knowledge_gate", _layer_node("node_layer2_knowledge_gate"))
+    workflow.add_node("node_layer3_surface_a", _layer_node("node_layer3_surface_a"))
+    workflow.add_node("node_layer3_teaching_b", _layer_node("node_layer3_teaching_b"))
+    workflow.add_node("node_layer3_calc_branch", _layer_node("node_layer3_calc_branch"))
     workflow.add_node("node_aggregate", graph_nodes.node_aggregate)
 
     workflow.set_entry_point("node_layer1_blind_solver")
@@ -38,18 +55,25 @@ def create_judge_graph():
             "node_layer2_knowledge_gate": "node_layer2_knowledge_gate",
         },
     )
-    # 知识门通过时 fan-out 到多个并行节点；短路时直连 aggregate
-    workflow.add_conditional_edges(
-        "node_layer2_knowledge_gate",
-        route_after_layer2_knowledge_gate,
-        {
-            "node_aggregate": "node_aggregate",
-            "node_layer3_basic_rules_gate": "node_layer3_basic_rules_gate",
-            "node_layer3_surface_a": "node_layer3_surface_a",
-            "node_layer3_teaching_b": "node_layer3_teaching_b",
-            "node_layer3_calc_branch": "node_layer3_calc_branch",
-        },
-    )
+    fan_out = {
+        "node_aggregate": "node_aggregate",
+        "node_layer3_basic_rules_gate": "node_layer3_basic_rules_gate",
+        "node_layer3_surface_a": "node_layer3_surface_a",
+        "node_layer3_teaching_b": "node_layer3_teaching_b",
+        "node_layer3_calc_branch": "node_layer3_calc_branch",
+    }
+    if schedule == SCHEDULE_COST_AWARE:
+        # 知识门通过 → 确定性预检；预检命中硬错只走可能判 REJECT 的分支，否则完整 fan-out
+        workflow.add_node("node_deterministic_precheck", node_deterministic_precheck)
+        workflow.add_conditional_edges(
+            "node_layer2_knowledge_gate",
+            route_after_layer2_cost_aware,
+            {"node_aggregate": "node_aggregate", "node_deterministic_precheck": "node_deterministic_precheck"},
+        )
+        workflow.add_conditional_edges("node_deterministic_precheck", route_after_deterministic_precheck, fan_out)
+    else:
+        # 知识门通过时 fan-out 到多个并行节点；短路时直连 aggregate
+        workflow.add_conditional_edges("node_layer2_knowledge_gate", route_after_layer2_knowledge_gate, fan_out)
     # 各并行节点均指向 aggregate；aggregate 在所有上游完成后触发，接收合并后的 state
     workflow.add_edge("node_layer3_basic_rules_gate", "node_aggregate")
     workflow.add_edge("node_layer3_surface_a", "node_aggregate")
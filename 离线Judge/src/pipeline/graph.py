@@ -1586,6 +1586,7 @@ def node_aggregate(state: JudgeState) -> JudgeState:
 
     all_reasons = (
         errors
+        + state.get("early_exit_reasons", [])
         + state.get("solver_issues", [])
         + state.get("drift_issues", [])
         + state.get("knowledge_gate_reasons", [])
@@ -2206,6 +2207,9 @@ def node_aggregate(state: JudgeState) -> JudgeState:
         last_raw_truncated=bool(obs_raw.get("last_raw_truncated", False)),
         tokens=usage,
         latency_ms=int(obs_raw.get("latency_ms", 0) or 0),
+        skipped_nodes=list(obs_raw.get("skipped_nodes") or []),
+        saved_tokens_est=int(obs_raw.get("saved_tokens_est", 0) or 0),
+        saved_latency_ms_est=int(obs_raw.get("saved_latency_ms_est", 0) or 0),
         unstable_flag=bool(obs_raw.get("failed_calls", 0))
         or int(obs_raw.get("latency_ms", 0) or 0) > 60000,
     )
@@ -2285,10 +2289,10 @@ def node_aggregate(state: JudgeState) -> JudgeState:
     return {"final_report": report}  # type: ignore[typeddict-item]
 
 
-def create_judge_graph():
+def create_judge_graph(schedule: str | None = None):
     from src.pipeline.builder import create_judge_graph as _create_judge_graph
 
-    return _create_judge_graph()
+    return _create_judge_graph(schedule)
 
 
 def run_judge(
@@ -0,0 +1,227 @@
+"""Judge 分层结果缓存。
+
+同一道题重复评审（运行记录重载、重新触发 Judge、任务续跑）时，各层节点的输入完全相同，
+没必要再调一遍大模型。缓存键 = 层名 + 规范化后的 QuestionInput 哈希 + 该层提示词文件与代码的版本哈希
++ 模型标识，因此：
+- 题目内容不变 → 所有 LLM 层直接命中；
+- 只改了某一层的提示词 → 只有这一层重算，其余层照常命中；
+- 换模型或改 Judge 代码 → 全部重算。
+
+缓存落盘在 `JUDGE_LAYER_CACHE_DIR`（未设置则关闭），每条一个 JSON 文件，可随时整目录删除。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+from src.llm import get_observability
+from src.pipeline.state import JudgeState
+from src.schemas import evaluation as evaluation_schemas
+
+_SRC_ROOT = Path(__file__).resolve().parents[1]
+_GRAPH_SOURCES = ("pipeline/graph.py",)
+
+# 层名 → (提示词文件, 额外代码文件, 除 question 外还读取的 state 键)
+# 提示词路径与 load_prompt_pair 一致（相对工作目录）；文件缺失时按代码内默认提示词处理，由代码哈希兜底。
+LAYER_SPECS: dict[str, tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]]] = {
+    "node_layer1_blind_solver": (
+        ("prompts/layer1_blind_solver.md",),
+        ("agents/layer1_blind_solver.py", "agents/safe_python_runner.py"),
+        (),
+    ),
+    "node_layer2_knowledge_gate": (
+        ("prompts/layer2_knowledge_gate.md",),
+        ("agents/layer2_knowledge_gate.py",),
+        (),
+    ),
+    "node_layer3_basic_rules_gate": (
+        ("prompts/layer3_basic_rules_gate.md",),
+        (),
+        ("hard_rule_errors", "hard_rule_warnings"),
+    ),
+    "node_layer3_surface_a": (
+        ("prompts/layer3_surface_quality_practical.md", "prompts/layer3_surface_quality_concept.md"),
+        (),
+        (),
+    ),
+    "node_layer3_teaching_b": (("prompts/layer3_teaching_review.md",), (), ()),
+    "node_layer3_calc_branch": (("prompts/layer3_calc_branch.md",), (), ()),
+}
+
+# 盲答层会按这些环境变量另建计算/抽取模型，模型标识里一并带上
+_MODEL_ENV_KEYS = ("CALC_PROVIDER", "CALC_MODEL", "SOLVER_EXTRACT_PROVIDER", "SOLVER_EXTRACT_MODEL")
+
+_STATS_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "stored": 0, "skipped": 0}
+_FILE_HASHES: dict[str, tuple[tuple[int, int], str]] = {}
+
+
+def layer_cache_dir() -> Path | None:
+    raw = str(os.getenv("JUDGE_LAYER_CACHE_DIR", "") or "").strip()
+    if not raw or str(os.getenv("JUDGE_LAYER_CACHE_ENABLED", "1") or "").strip().lower() in {"0", "false", "no", "off"}:
+        return None
+    return Path(raw).expanduser()
+
+
+def _file_hash(path: Path) -> str:
+    try:
+        st = path.stat()
+    except OSError:
+        return "missing"
+    stamp = (st.st_mtime_ns, st.st_size)
+    key = str(path.resolve())
+    cached = _FILE_HASHES.get(key)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, sha256(path.read_bytes()).hexdigest())
+        _FILE_HASHES[key] = cached
+    return cached[1]
+
+
+def layer_version(layer: str) -> str:
+    """提示词文件与相关代码的联合哈希；任一变化即视为新版本。"""
+    prompts, sources, _ = LAYER_SPECS[layer]
+    parts = [f"prompt:{p}:{_file_hash(Path(p))}" for p in prompts]
+    parts += [f"src:{s}:{_file_hash(_SRC_ROOT / s)}" for s in (*_GRAPH_SOURCES, *sources)]
+    return sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def question_fingerprint(question: Any) -> str:
+    """题目内容哈希；question_id 不参与，同内容换 ID 也能复用。"""
+    data = question.model_dump(mode="json") if isinstance(question, BaseModel) else dict(question or {})
+    data.pop("question_id", None)
+    return sha256(json.dumps(_normalize(data), ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def model_identity(llm: Any) -> str | None:
+    """可识别的模型标识；拿不到模型名（如测试里的 RunnableLambda）时返回 None，不走缓存。"""
+    if llm is None:
+        return None
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    if not isinstance(model, str) or not model.strip():
+        return None
+    ident = {
+        "model": model.strip(),
+        "temperature": getattr(llm, "temperature", None),
+        "base_url": str(getattr(llm, "openai_api_base", "") or ""),
+        "env": {k: str(os.getenv(k, "") or "") for k in _MODEL_ENV_KEYS},
+    }
+    return json.dumps(ident, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return {"__model__": type(value).__name__, "data": value.model_dump(mode="json")}
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"不可缓存的节点输出类型: {type(value).__name__}")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        if "__model__" in value:
+            cls = getattr(evaluation_schemas, str(value["__model__"]), None)
+            if not (isinstance(cls, type) and issubclass(cls, BaseModel)):
+                raise TypeError(f"未知的缓存模型类型: {value['__model__']}")
+            return cls.model_validate(value["data"])
+        return {k: _decode(v) for k, v in value.items()}
+    return value
+
+
+def _entry_path(root: Path, layer: str, key: str) -> Path:
+    return root / layer / key[:2] / f"{key}.json"
+
+
+def layer_cache_key(layer: str, state: JudgeState) -> str | None:
+    ident = model_identity(state.get("llm"))
+    if ident is None:
+        return None
+    _, _, extra_keys = LAYER_SPECS[layer]
+    payload = {
+        "layer": layer,
+        "question": question_fingerprint(state["question"]),
+        "version": layer_version(layer),
+        "model": ident,
+        "inputs": {k: _normalize(state.get(k)) for k in extra_keys},
+    }
+    return sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _failure_count() -> int:
+    """LLM 调用失败次数 + 输出解析失败退回 fallback 的次数。"""
+    obs = get_observability()
+    return int(obs.get("failed_calls", 0) or 0) + int(obs.get("parse_failures", 0) or 0)
+
+
+def _bump(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def layer_cache_stats() -> dict[str, int]:
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+def cached_layer(node: Callable[[JudgeState], JudgeState], layer: str | None = None) -> Callable[[JudgeState], JudgeState]:
+    """包装图节点（层名默认取函数名）：命中直接返回缓存的 state 更新；未命中执行节点，且本层无 LLM 失败调用、无解析失败时才落盘。"""
+    layer = layer or node.__name__
+    if layer not in LAYER_SPECS:
+        raise ValueError(f"未登记的缓存层: {layer}")
+
+    def _node(state: JudgeState) -> JudgeState:
+        root = layer_cache_dir()
+        key = layer_cache_key(layer, state) if root is not None else None
+        if key is None:
+            return node(state)
+        path = _entry_path(root, layer, key)
+        if path.exists():
+            try:
+                out = _decode(json.loads(path.read_text(encoding="utf-8"))["output"])
+                _bump("hits")
+                return out
+            except Exception:
+                pass
+        _bump("misses")
+        failures_before = _failure_count()
+        out = node(state)
+        # 超时/解析失败后的兜底结果不能缓存，否则一次抖动会被永久复用
+        if _failure_count() > failures_before:
+            _bump("skipped")
+            return out
+        try:
+            body = json.dumps({"layer": layer, "output": _encode(out)}, ensure_ascii=False)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(body, encoding="utf-8")
+            os.replace(tmp, path)
+            _bump("stored")
+        except (OSError, TypeError):
+            _bump("skipped")
+        return out
+
+    _node.__name__ = layer
+    _node.__doc__ = node.__doc__
+    return _node
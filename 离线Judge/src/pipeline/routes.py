@@ -23,3 +23,21 @@ def route_after_layer2_knowledge_gate(state: JudgeState) -> list[str]:
     if bool(state["question"].is_calculation):
         routes.append("node_layer3_calc_branch")
     return routes
+
+
+# 确定性硬错已把结论定为至少 REVIEW；仅这两个分支还能把结论升为 REJECT
+# （surface_a 的法理/数学闭环不成立、calc_branch 的代码证据硬冲突），成本调度提前退出时仍要执行
+REJECT_CAPABLE_BRANCHES = ("node_layer3_surface_a", "node_layer3_calc_branch")
+
+
+def route_after_layer2_cost_aware(state: JudgeState) -> list[str]:
+    if bool(state.get("knowledge_gate_reject", False)):
+        return ["node_aggregate"]
+    return ["node_deterministic_precheck"]
+
+
+def route_after_deterministic_precheck(state: JudgeState) -> list[str]:
+    routes = route_after_layer2_knowledge_gate(state)
+    if bool(state.get("early_exit", False)):
+        return [r for r in routes if r in REJECT_CAPABLE_BRANCHES] or ["node_aggregate"]
+    return routes
@@ -0,0 +1,95 @@
+"""Judge 图的成本调度。
+
+默认（full）模式下，知识门通过后 basic_rules / surface_a / teaching_b / calc_branch 一起 fan-out。
+cost_aware 模式在 fan-out 前先跑确定性预检（DeterministicFilter 结果 + 基础规则代码校验）。
+命中足够多的确定性硬错时结论已至少是 REVIEW，只跳过不可能再改变结论的 LLM 分支（basic_rules_gate、
+teaching_b）；仍可能判 REJECT 的 surface_a / calc_branch 照常执行，结论与 full 模式一致。
+跳过的节点和按历史均值估算的 token / 耗时节省量写入 get_observability()。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from functools import wraps
+from typing import Any, Callable
+
+from src.llm import get_observability, note_skipped_node, observe_node
+from src.pipeline.graph import _basic_rules_code_checks
+from src.pipeline.routes import REJECT_CAPABLE_BRANCHES, route_after_layer2_knowledge_gate
+from src.pipeline.state import JudgeState
+
+SCHEDULE_FULL = "full"
+SCHEDULE_COST_AWARE = "cost_aware"
+
+_COST_LOCK = threading.Lock()
+# 节点 → [有 LLM 调用的执行次数, 累计 token, 累计耗时 ms]，进程内统计，用于估算跳过节点的节省量
+_NODE_COSTS: dict[str, list[int]] = {}
+
+
+def judge_schedule_mode() -> str:
+    mode = str(os.getenv("JUDGE_SCHEDULE_MODE", SCHEDULE_FULL) or "").strip().lower()
+    return mode if mode in {SCHEDULE_FULL, SCHEDULE_COST_AWARE} else SCHEDULE_FULL
+
+
+def early_exit_min_errors() -> int:
+    return max(1, int(os.getenv("JUDGE_EARLY_EXIT_MIN_ERRORS", "1") or 1))
+
+
+def record_node_cost(name: str, node_obs: dict[str, Any] | None) -> None:
+    if not node_obs or not int(node_obs.get("calls", 0) or 0):
+        return
+    tokens = int(node_obs.get("prompt_tokens", 0) or 0) + int(node_obs.get("completion_tokens", 0) or 0)
+    with _COST_LOCK:
+        row = _NODE_COSTS.setdefault(name, [0, 0, 0])
+        row[0] += 1
+        row[1] += tokens
+        row[2] += int(node_obs.get("latency_ms", 0) or 0)
+
+
+def estimated_node_cost(name: str) -> tuple[int, int]:
+    """(tokens, latency_ms) 的历史均值；该节点还没跑过时为 (0, 0)。"""
+    with _COST_LOCK:
+        runs, tokens, latency = _NODE_COSTS.get(name, (0, 0, 0))
+    if not runs:
+        return 0, 0
+    return round(tokens / runs), round(latency / runs)
+
+
+def tracked_node(node: Callable[[JudgeState], JudgeState], name: str | None = None) -> Callable[[JudgeState], JudgeState]:
+    """把节点内的 LLM 调用记到 obs["nodes"][节点名]，并更新该节点的成本均值。"""
+    name = name or node.__name__
+
+    @wraps(node)
+    def _node(state: JudgeState) -> JudgeState:
+        with observe_node(name):
+            out = node(state)
+        record_node_cost(name, get_observability()["nodes"].get(name))
+        return out
+
+    return _node
+
+
+def node_deterministic_precheck(state: JudgeState) -> JudgeState:
+    """成本调度预检：只跑确定性规则，硬错达到阈值则标记 early_exit，由路由跳过不影响结论的 LLM 分支。"""
+    errors = list(state.get("hard_rule_errors", []))
+    warnings = list(state.get("hard_rule_warnings", []))
+    code_errors, code_warnings = _basic_rules_code_checks(state["question"])
+    errors += [x for x in code_errors if x not in errors]
+    warnings += [x for x in code_warnings if x not in warnings]
+    if len(errors) < early_exit_min_errors():
+        return {"hard_rule_errors": errors, "hard_rule_warnings": warnings, "early_exit": False}
+
+    skipped = [r for r in route_after_layer2_knowledge_gate(state) if r not in REJECT_CAPABLE_BRANCHES]
+    for name in skipped:
+        tokens, latency = estimated_node_cost(name)
+        note_skipped_node(name, tokens_est=tokens, latency_ms_est=latency)
+    return {
+        "hard_rule_errors": errors,
+        "hard_rule_warnings": warnings,
+        "hard_rule_has_errors": True,
+        "early_exit": True,
+        "early_exit_reasons": [
+            f"【成本调度】确定性校验命中{len(errors)}条硬错，已跳过不影响结论的 LLM 分支：{'、'.join(skipped)}"
+        ],
+    }
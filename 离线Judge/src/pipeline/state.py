@@ -59,6 +59,8 @@ class JudgeState(TypedDict):
     ran_surface_a: bool
     ran_teaching_b: bool
     ran_calc_branch: bool
+    early_exit: bool
+    early_exit_reasons: list[str]
 
 
 def build_initial_state(question: QuestionInput, llm: Any) -> JudgeState:
@@ -103,4 +105,6 @@ def build_initial_state(question: QuestionInput, llm: Any) -> JudgeState:
         "ran_surface_a": False,
         "ran_teaching_b": False,
         "ran_calc_branch": False,
+        "early_exit": False,
+        "early_exit_reasons": [],
     }
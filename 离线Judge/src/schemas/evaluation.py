@@ -98,6 +98,10 @@ class Observability(BaseModel):
     last_raw_truncated: bool = False
     tokens: TokenUsage = Field(default_factory=TokenUsage)
     latency_ms: int = 0
+    # 成本调度（cost_aware）提前退出时跳过的节点，及按历史均值估算的节省量
+    skipped_nodes: list[str] = Field(default_factory=list)
+    saved_tokens_est: int = 0
+    saved_latency_ms_est: int = 0
     unstable_flag: bool = False
 
 
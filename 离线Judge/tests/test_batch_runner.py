@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+
+from src.evaluation import batch_runner
+from src.evaluation.batch_runner import GoldenRecord, evaluate_golden
+from src.llm.rate_limit import RateLimitedLLM, RateLimiter
+from src.schemas.evaluation import Decision, QuestionInput
+
+
+class _Report:
+    def __init__(self, question_id, decision):
+        self.question_id = question_id
+        self.decision = decision
+
+    def model_dump(self, mode="json"):
+        return {"question_id": self.question_id, "decision": self.decision}
+
+
+def _records(n):
+    out = []
+    for i in range(n):
+        item = QuestionInput(
+            question_id=f"Q-{i}",
+            question_type="single_choice",
+            stem="以下表述正确的是（ ）。",
+            options=["A. 甲", "B. 乙", "C. 丙", "D. 丁"],
+            correct_answer="A",
+            explanation="本题答案为A",
+            textbook_slice="教材切片",
+        )
+        out.append(GoldenRecord(item=item, expected_decision=Decision.PASS if i % 2 == 0 else Decision.REJECT))
+    return out
+
+
+def _patch_judge(monkeypatch, calls):
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def _run_judge(item, llm):
+        idx = int(item.question_id.split("-")[1])
+        with lock:
+            calls.append(item.question_id)
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.01 * (4 - idx % 4))
+        with lock:
+            state["active"] -= 1
+        return _Report(item.question_id, "pass" if idx % 3 else "reject")
+
+    monkeypatch.setattr(batch_runner, "run_judge", _run_judge)
+    return state
+
+
+def test_parallel_run_streams_reports_and_matches_serial_metrics(monkeypatch, tmp_path):
+    records = _records(8)
+    serial_calls, parallel_calls = [], []
+    _patch_judge(monkeypatch, serial_calls)
+    serial = evaluate_golden(records, llm=None)
+    state = _patch_judge(monkeypatch, parallel_calls)
+    stream = tmp_path / "reports.jsonl"
+    parallel = evaluate_golden(records, llm=None, workers=4, stream_path=stream)
+
+    assert state["peak"] > 1
+    assert parallel["metrics"] == serial["metrics"]
+    assert [r["question_id"] for r in parallel["reports"]] == [f"Q-{i}" for i in range(8)]
+    lines = [json.loads(line) for line in stream.read_text(encoding="utf-8").splitlines()]
+    assert sorted(row["index"] for row in lines) == list(range(1, 9))
+
+
+def test_resume_skips_streamed_records_and_ignores_torn_line(monkeypatch, tmp_path):
+    records = _records(6)
+    stream = tmp_path / "reports.jsonl"
+    first_calls = []
+    _patch_judge(monkeypatch, first_calls)
+    full = evaluate_golden(records, llm=None, workers=2, stream_path=stream)
+
+    kept = [line for line in stream.read_text(encoding="utf-8").splitlines() if json.loads(line)["index"] <= 3]
+    stream.write_text("\n".join(kept) + '\n{"index": 4, "question_id"', encoding="utf-8")
+    resumed_calls = []
+    _patch_judge(monkeypatch, resumed_calls)
+    resumed = evaluate_golden(records, llm=None, workers=2, stream_path=stream, resume=True)
+
+    assert sorted(resumed_calls) == ["Q-3", "Q-4", "Q-5"]
+    assert resumed["metrics"] == full["metrics"]
+    assert resumed["reports"] == full["reports"]
+
+
+def test_rate_limited_llm_spaces_requests():
+    limiter = RateLimiter(rpm=600, burst=1)
+    llm = RateLimitedLLM(type("_Echo", (), {"invoke": lambda self, x: x, "model_name": "echo"})(), limiter)
+    started = time.monotonic()
+    assert [llm.invoke(i) for i in range(3)] == [0, 1, 2]
+    assert time.monotonic() - started >= 0.18
+    assert llm.model_name == "echo"
+
+
+def test_failing_record_cancels_queued_work_and_keeps_finished_reports(monkeypatch, tmp_path):
+    records = _records(8)
+    calls = []
+
+    def _run_judge(item, llm):
+        calls.append(item.question_id)
+        if item.question_id == "Q-0":
+            time.sleep(0.02)
+            raise RuntimeError("llm down")
+        time.sleep(0.05)
+        return _Report(item.question_id, "pass")
+
+    monkeypatch.setattr(batch_runner, "run_judge", _run_judge)
+    stream = tmp_path / "reports.jsonl"
+    try:
+        evaluate_golden(records, llm=None, workers=2, stream_path=stream)
+    except RuntimeError as exc:
+        assert str(exc) == "llm down"
+    else:
+        raise AssertionError("expected the judge error to propagate")
+
+    assert len(calls) < len(records)
+    lines = [json.loads(line) for line in stream.read_text(encoding="utf-8").splitlines()]
+    streamed = [row["question_id"] for row in lines]
+    assert "Q-1" in streamed and "Q-0" not in streamed
+    assert sorted(streamed) == sorted(q for q in calls if q != "Q-0")
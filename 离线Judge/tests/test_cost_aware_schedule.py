@@ -0,0 +1,126 @@
+import pytest
+
+from src.llm import ReliableLLMClient
+from src.pipeline import graph as graph_nodes
+from src.pipeline.graph import create_judge_graph, run_judge
+from src.schemas.evaluation import Decision, QuestionInput, SemanticDrift, SolverValidation
+
+
+class _Reply:
+    def __init__(self, text):
+        self.content = text
+        self.usage_metadata = {"input_tokens": 100, "output_tokens": 20}
+
+
+class _FakeLLM:
+    def invoke(self, prompt):
+        return _Reply("ok")
+
+
+def _question(stem, **extra):
+    return QuestionInput(
+        question_id="Q-1",
+        stem=stem,
+        options=["甲", "乙", "丙", "丁"],
+        correct_answer="A",
+        explanation="1.教材原文\n2.试题分析\n3.结论\n本题答案为A",
+        textbook_slice="教材切片",
+        **extra,
+    )
+
+
+def _patch_nodes(monkeypatch, branch_calls, outputs=None):
+    monkeypatch.setattr(
+        graph_nodes,
+        "node_layer1_blind_solver",
+        lambda state: {
+            "solver_validation": SolverValidation(predicted_answer="A", reasoning_path="ok"),
+            "solver_semantic_drift": SemanticDrift(),
+            "ran_blind_solver": True,
+        },
+    )
+    monkeypatch.setattr(
+        graph_nodes,
+        "node_layer2_knowledge_gate",
+        lambda state: {"knowledge_gate_reject": False, "knowledge_semantic_drift": SemanticDrift(), "ran_knowledge_gate": True},
+    )
+    for name, flag in (
+        ("node_layer3_basic_rules_gate", None),
+        ("node_layer3_surface_a", "ran_surface_a"),
+        ("node_layer3_teaching_b", "ran_teaching_b"),
+        ("node_layer3_calc_branch", "ran_calc_branch"),
+    ):
+        def _branch(state, name=name, flag=flag):
+            branch_calls.append(name)
+            ReliableLLMClient(state["llm"], retries=0).invoke_text("prompt")
+            out = {flag: True} if flag else {}
+            out.update((outputs or {}).get(name, {}))
+            return out
+
+        monkeypatch.setattr(graph_nodes, name, _branch)
+    monkeypatch.setattr(graph_nodes, "_llm_quality_score_eval", lambda llm, question: (8.0, [], "", {}))
+
+
+def test_cost_aware_topology_inserts_deterministic_precheck():
+    graph = create_judge_graph("cost_aware").get_graph()
+    edges = {(e.source, e.target, e.conditional) for e in graph.edges}
+    assert ("node_layer2_knowledge_gate", "node_deterministic_precheck", True) in edges
+    assert ("node_deterministic_precheck", "node_aggregate", True) in edges
+    assert ("node_deterministic_precheck", "node_layer3_surface_a", True) in edges
+    assert ("node_layer2_knowledge_gate", "node_layer3_surface_a", True) not in edges
+
+
+def test_hard_deterministic_failure_skips_llm_branches_and_reports_savings(monkeypatch):
+    monkeypatch.setenv("JUDGE_SCHEDULE_MODE", "cost_aware")
+    monkeypatch.delenv("JUDGE_LAYER_CACHE_DIR", raising=False)
+    calls = []
+    _patch_nodes(monkeypatch, calls)
+
+    clean = run_judge(_question("以下表述正确的是（　）。"), _FakeLLM())
+    assert sorted(calls) == ["node_layer3_basic_rules_gate", "node_layer3_surface_a", "node_layer3_teaching_b"]
+    assert clean.observability.skipped_nodes == []
+
+    calls.clear()
+    broken = run_judge(_question("以下表述正确的是()?"), _FakeLLM())
+    # surface_a 仍可能判 REJECT，照常执行；其余分支只会加 REVIEW 信号，跳过
+    assert calls == ["node_layer3_surface_a"]
+    assert broken.hard_pass is False
+    assert set(broken.observability.skipped_nodes) == {"node_layer3_basic_rules_gate", "node_layer3_teaching_b"}
+    assert broken.observability.saved_tokens_est >= 2 * 120
+    assert any("【成本调度】" in r for r in broken.reasons)
+    assert broken.dimension_results["教学价值"].status == "SKIP"
+
+
+def test_full_schedule_still_runs_branches_on_deterministic_failure(monkeypatch):
+    monkeypatch.setenv("JUDGE_SCHEDULE_MODE", "full")
+    monkeypatch.delenv("JUDGE_LAYER_CACHE_DIR", raising=False)
+    calls = []
+    _patch_nodes(monkeypatch, calls)
+    report = run_judge(_question("以下表述正确的是()?"), _FakeLLM())
+    assert len(calls) == 3 and report.observability.skipped_nodes == []
+
+
+@pytest.mark.parametrize(
+    "extra, outputs, expected",
+    [
+        ({}, {}, Decision.REVIEW),
+        ({}, {"node_layer3_surface_a": {"rigor_data": {"legal_math_closure_invalid": True}}}, Decision.REJECT),
+        (
+            {"is_calculation": True},
+            {"node_layer3_calc_branch": {"calculation_data": {"enabled": True, "code_evidence_status": "HARD"}}},
+            Decision.REJECT,
+        ),
+    ],
+)
+def test_early_exit_reaches_the_full_pipeline_decision(monkeypatch, extra, outputs, expected):
+    monkeypatch.delenv("JUDGE_LAYER_CACHE_DIR", raising=False)
+    decisions = {}
+    for mode in ("full", "cost_aware"):
+        monkeypatch.setenv("JUDGE_SCHEDULE_MODE", mode)
+        calls = []
+        _patch_nodes(monkeypatch, calls, outputs)
+        report = run_judge(_question("以下表述正确的是()?", **extra), _FakeLLM())
+        decisions[mode] = report.decision
+        if mode == "cost_aware":
+            assert "node_layer3_teaching_b" in report.observability.skipped_nodes
+    assert decisions == {"full": expected, "cost_aware": expected}
@@ -0,0 +1,106 @@
+from src.llm import client as llm_client
+from src.llm import ReliableLLMClient, reset_observability
+from src.pipeline.layer_cache import cached_layer
+from src.pipeline.state import build_initial_state
+from src.schemas.evaluation import QuestionInput, SemanticDrift
+
+
+class _Model:
+    model_name = "judge-model"
+    temperature = 0
+
+
+def _question(question_id="Q-1", stem="以下表述正确的是（ ）。"):
+    return QuestionInput(
+        question_id=question_id,
+        stem=stem,
+        options=["A. 甲", "B. 乙", "C. 丙", "D. 丁"],
+        correct_answer="A",
+        explanation="本题答案为A",
+        textbook_slice="教材切片",
+    )
+
+
+def _counting_node(name, calls, *, fail=False):
+    def node(state):
+        calls.append(state["question"].question_id)
+        if fail:
+            llm_client._obs()["failed_calls"] += 1
+        return {"knowledge_issues": ["x"], "knowledge_semantic_drift": SemanticDrift(rule_constraints_kept=False)}
+
+    node.__name__ = name
+    return cached_layer(node)
+
+
+def _setup(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "prompts").mkdir()
+    (tmp_path / "prompts" / "layer2_knowledge_gate.md").write_text("v1", encoding="utf-8")
+    monkeypatch.setenv("JUDGE_LAYER_CACHE_DIR", str(tmp_path / "cache"))
+    reset_observability()
+
+
+def test_unchanged_question_hits_and_content_change_misses(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path)
+    calls = []
+    node = _counting_node("node_layer2_knowledge_gate", calls)
+
+    first = node(build_initial_state(_question(), _Model()))
+    again = node(build_initial_state(_question(question_id="Q-renamed", stem=" 以下表述正确的是（ ）。 "), _Model()))
+    assert calls == ["Q-1"]
+    assert again == first and isinstance(again["knowledge_semantic_drift"], SemanticDrift)
+
+    node(build_initial_state(_question(stem="以下表述错误的是（ ）。"), _Model()))
+    assert len(calls) == 2
+
+
+def test_prompt_change_recomputes_only_that_layer(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path)
+    l2_calls, l3_calls = [], []
+    l2 = _counting_node("node_layer2_knowledge_gate", l2_calls)
+    l3 = _counting_node("node_layer3_teaching_b", l3_calls)
+    state = build_initial_state(_question(), _Model())
+    l2(state), l3(state)
+
+    (tmp_path / "prompts" / "layer2_knowledge_gate.md").write_text("v2 - stricter", encoding="utf-8")
+    l2(state), l3(state)
+    assert len(l2_calls) == 2 and len(l3_calls) == 1
+
+
+def test_failed_llm_calls_and_unidentified_models_are_not_cached(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path)
+    calls = []
+    failing = _counting_node("node_layer3_calc_branch", calls, fail=True)
+    state = build_initial_state(_question(), _Model())
+    failing(state), failing(state)
+    assert len(calls) == 2
+
+    anonymous = _counting_node("node_layer3_surface_a", calls)
+    state = build_initial_state(_question(), object())
+    anonymous(state), anonymous(state)
+    assert len(calls) == 4
+    assert not (tmp_path / "cache" / "node_layer3_surface_a").exists()
+
+
+def test_parse_failure_fallback_is_not_cached(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path)
+    calls = []
+
+    class _Garbled:
+        model_name = "judge-model"
+        temperature = 0
+
+        def invoke(self, prompt):
+            return "not json at all"
+
+    def node(state):
+        calls.append(state["question"].question_id)
+        data = ReliableLLMClient(state["llm"], retries=0).invoke_json("prompt", fallback={"passed": True})
+        return {"knowledge_data": data}
+
+    node.__name__ = "node_layer2_knowledge_gate"
+    wrapped = cached_layer(node)
+    state = build_initial_state(_question(), _Garbled())
+    wrapped(state), wrapped(state)
+    assert len(calls) == 2
+    assert not (tmp_path / "cache" / "node_layer2_knowledge_gate").exists()
@@ -0,0 +1,28 @@
+import threading
+
+from src.llm import ReliableLLMClient, get_observability, reset_observability
+
+
+class _FakeLLM:
+    def invoke(self, prompt):
+        return "ok"
+
+
+def test_observability_is_isolated_per_judging_thread():
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def _judge(name, calls):
+        reset_observability()
+        barrier.wait()
+        client = ReliableLLMClient(_FakeLLM(), retries=0)
+        for _ in range(calls):
+            client.invoke_text("prompt")
+        results[name] = get_observability()["calls"]
+
+    threads = [threading.Thread(target=_judge, args=("a", 2)), threading.Thread(target=_judge, args=("b", 5))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {"a": 2, "b": 5}
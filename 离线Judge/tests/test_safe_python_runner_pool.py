@@ -0,0 +1,76 @@
+import pytest
+
+from src.agents import safe_python_runner
+from src.agents.safe_python_runner import CodeWorkerPool, execute_code, execute_generate_possible_answers
+
+
+def _emit(body):
+    return execute_code(body + '\n__judge_emit({"ok": True, "value": value})')
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = CodeWorkerPool(1, max_tasks=3)
+    monkeypatch.setattr(safe_python_runner, "get_code_worker_pool", lambda: pool)
+    yield pool
+    pool.close()
+
+
+def test_pool_matches_one_shot_subprocess(monkeypatch, pool):
+    snippets = [
+        "value = round(1200 * 0.03, 2)",
+        "value = 1 / 0",
+        "value = [i * i for i in range(5)]",
+    ]
+    pooled = [_emit(code) for code in snippets]
+    pooled.append(execute_generate_possible_answers("def generate_possible_answers(context):\n    return [context['x']]", {"x": 7}))
+    monkeypatch.setattr(safe_python_runner, "get_code_worker_pool", lambda: None)
+    one_shot = [_emit(code) for code in snippets]
+    one_shot.append(execute_generate_possible_answers("def generate_possible_answers(context):\n    return [context['x']]", {"x": 7}))
+    assert pooled == one_shot
+    assert pooled[0]["result"]["value"] == 36.0
+    assert pooled[1]["result"] == {"ok": False, "error": "division by zero"}
+
+
+def test_pool_isolates_globals_and_recycles_after_max_tasks(pool):
+    first_pid = pool._idle[0].proc.pid
+    assert _emit("leaked = 1\nvalue = 1")["ok"]
+    assert _emit("value = leaked")["result"] == {"ok": False, "error": "name 'leaked' is not defined"}
+    _emit("value = 3")
+    assert pool.recycled == 1 and pool._idle[0].proc.pid != first_pid
+    assert _emit("value = 4")["result"]["value"] == 4
+
+
+def test_pool_kills_worker_on_timeout_and_crash(pool):
+    slow = execute_code("while True:\n    pass", timeout_seconds=0.3)
+    assert slow == {"ok": False, "issues": ["代码执行超时(0.3s)"]}
+    assert _emit("value = 5")["result"]["value"] == 5
+
+    pool._idle[0].proc.kill()
+    crashed = _emit("value = 6")
+    assert crashed["ok"] is False and "代码执行失败" in crashed["issues"][0]
+    assert _emit("value = 7")["result"]["value"] == 7
+    assert pool.recycled >= 2
+
+
+def test_pool_keeps_static_check_restrictions(pool):
+    result = execute_code('import subprocess\n__judge_emit({"ok": True})')
+    assert result["ok"] is False and any("禁止导入模块" in x for x in result["issues"])
+
+
+def test_pool_recycles_worker_after_snippet_patches_preloaded_module(pool):
+    patched = _emit("import json\njson.dumps = lambda *a, **k: '{\"ok\": true, \"value\": 999}'\nvalue = 1")
+    assert patched["result"]["value"] == 1
+    assert pool.recycled == 1
+    assert _emit("value = round(1200 * 0.03, 2)")["result"]["value"] == 36.0
+
+    _emit("import math\nmath.pi = 3\nvalue = 2")
+    assert pool.recycled == 2
+    assert _emit("import math\nvalue = math.pi")["result"]["value"] != 3
+
+
+def test_pool_does_not_recycle_after_ordinary_snippets(pool):
+    pool.max_tasks = 100
+    for code in ("import decimal\nvalue = str(decimal.Decimal('1.1') * 3)", "import statistics\nvalue = statistics.mean([1, 2, 3])", "value = 1"):
+        assert _emit(code)["ok"]
+    assert pool.recycled == 0